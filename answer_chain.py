@@ -0,0 +1,127 @@
+# ==================================
+# SwiftVisa Answer Chains
+# ==================================
+#
+# How retrieved chunks are turned into an LLM answer. "stuff" sends every
+# chunk in one prompt, so its latency grows with the context. "map_reduce"
+# asks for the relevant facts of each chunk in concurrent, short calls
+# (at most max_concurrency at a time) and combines the extracts in one
+# small reduce call, so wall-clock time stays close to two round trips
+# however many or however long the chunks are. "auto" picks map_reduce once
+# the assembled context exceeds a token threshold.
+#
+# map_reduce_events() yields each extract as soon as its call returns, so
+# callers can stream partial results before the final answer.
+
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Iterator, Optional
+
+CHAIN_MODES = ("auto", "stuff", "map_reduce")
+NOTHING_RELEVANT = "NONE"
+
+MAP_PROMPT = """Extract the facts from this visa policy excerpt that help answer the question.
+Reply with at most 3 short sentences quoting requirements, limits or conditions as written.
+If nothing in the excerpt is relevant, reply with exactly {nothing}.
+
+Question: {question}
+
+Excerpt (source: {source}):
+{context}"""
+
+REDUCE_PROMPT = """Answer the question using only the numbered extracts from visa policy documents below.
+Cite extracts by number. If they do not answer the question, say so.
+
+Question: {question}
+
+Extracts:
+{summaries}"""
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count (about 4 characters per token for English text)"""
+    return (len(text or "") + 3) // 4
+
+
+def context_tokens(question: str, docs: list) -> int:
+    """Approximate size of a "stuff" prompt for question over docs"""
+    return estimate_tokens(question) + sum(estimate_tokens(doc.page_content) for doc in docs)
+
+
+def select_chain_mode(mode: str, question: str, docs: list, map_reduce_min_tokens: int) -> str:
+    """
+    Resolve a chain mode to "stuff" or "map_reduce"
+
+    "auto" is map_reduce when there are several chunks and their assembled
+    context is at least map_reduce_min_tokens.
+
+    Raises:
+        ValueError: For an unknown mode
+    """
+    if mode not in CHAIN_MODES:
+        raise ValueError(f"chain mode must be one of: {', '.join(CHAIN_MODES)}")
+    if mode != "auto":
+        return mode
+    if len(docs) > 1 and context_tokens(question, docs) >= map_reduce_min_tokens:
+        return "map_reduce"
+    return "stuff"
+
+
+def _content(message) -> str:
+    return (getattr(message, "content", message) or "").strip()
+
+
+def map_reduce_events(llm, question: str, docs: list, max_concurrency: int = 4,
+                      map_max_tokens: Optional[int] = 256, callbacks: Optional[list] = None) -> Iterator[dict]:
+    """
+    Run a map-reduce answer, yielding progress events
+
+    Args:
+        llm: Chat model
+        question: Question to answer
+        docs: Retrieved chunks, best first
+        max_concurrency: Maximum map calls in flight
+        map_max_tokens: Completion limit of each map call (None = model default)
+        callbacks: LangChain callbacks passed to every call
+
+    Yields:
+        {"event": "partial", "index", "source", "text"} per relevant chunk, in
+        completion order, then {"event": "answer", "text", "extracts"}
+    """
+    config = {"callbacks": callbacks or []}
+    mapper = llm.bind(max_tokens=map_max_tokens) if map_max_tokens else llm
+
+    def extract(doc) -> str:
+        source = (doc.metadata or {}).get("source") or "policy document"
+        prompt = MAP_PROMPT.format(nothing=NOTHING_RELEVANT, question=question, source=source,
+                                   context=doc.page_content)
+        return _content(mapper.invoke(prompt, config=config))
+
+    extracts = {}
+    if docs:
+        # Each call runs in a copy of the caller's context, so trace annotations still apply
+        with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(docs))),
+                                thread_name_prefix="map-chunk") as pool:
+            futures = {pool.submit(contextvars.copy_context().run, extract, doc): i for i, doc in enumerate(docs)}
+            for future in as_completed(futures):
+                i = futures[future]
+                text = future.result()
+                if text and text.strip(" .").upper() != NOTHING_RELEVANT:
+                    extracts[i] = text
+                    yield {"event": "partial", "index": i,
+                           "source": (docs[i].metadata or {}).get("source"), "text": text}
+
+    ordered = [extracts[i] for i in sorted(extracts)]
+    summaries = "\n".join(f"[{n}] {text}" for n, text in enumerate(ordered, 1)) or "(no relevant extracts)"
+    answer = _content(llm.invoke(REDUCE_PROMPT.format(question=question, summaries=summaries), config=config))
+    yield {"event": "answer", "text": answer, "extracts": len(ordered)}
+
+
+def map_reduce_answer(llm, question: str, docs: list, max_concurrency: int = 4,
+                      map_max_tokens: Optional[int] = 256, callbacks: Optional[list] = None) -> str:
+    """Final answer of map_reduce_events()"""
+    answer = ""
+    for event in map_reduce_events(llm, question, docs, max_concurrency, map_max_tokens, callbacks):
+        if event["event"] == "answer":
+            answer = event["text"]
+    return answer
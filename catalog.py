@@ -0,0 +1,60 @@
+# ==================================
+# SwiftVisa Visa Catalog
+# ==================================
+
+import os
+from typing import List, NamedTuple, Optional, Tuple
+
+
+class CatalogEntry(NamedTuple):
+    """One policy document in the clean corpus"""
+    country: str
+    visa_type: str
+    filename: str
+
+
+def parse_catalog_filename(filename: str) -> Optional[Tuple[str, str]]:
+    """
+    Extract (country, visa_type) from a clean data filename
+
+    Filenames follow ``Country_Country_VisaType_EligibilityOnly.txt``.
+
+    Args:
+        filename: Name of a file in the clean data directory
+
+    Returns:
+        (country, visa_type) tuple, or None if the name does not match
+    """
+    if not filename.endswith(".txt"):
+        return None
+    parts = filename.replace(".txt", "").split("_")
+    if len(parts) < 3:
+        return None
+    return parts[0], parts[2]
+
+
+def load_catalog(clean_dir: str = "data/clean") -> List[CatalogEntry]:
+    """
+    List every (country, visa_type) document available in the clean corpus
+
+    Args:
+        clean_dir: Directory holding the cleaned policy text files
+
+    Returns:
+        Catalog entries sorted by country, visa type and filename
+    """
+    entries = []
+    if not os.path.exists(clean_dir):
+        return entries
+
+    for filename in os.listdir(clean_dir):
+        parsed = parse_catalog_filename(filename)
+        if parsed:
+            entries.append(CatalogEntry(parsed[0], parsed[1], filename))
+
+    return sorted(entries)
+
+
+def catalog_pairs(clean_dir: str = "data/clean") -> List[Tuple[str, str]]:
+    """Get the sorted, de-duplicated (country, visa_type) pairs of the corpus"""
+    return sorted({(e.country, e.visa_type) for e in load_catalog(clean_dir)})
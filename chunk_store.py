@@ -0,0 +1,178 @@
+# ==================================
+# SwiftVisa Chunk Store
+# ==================================
+#
+# Full chunk text, addressable by chunk id, for the two-phase search API:
+# /vectorstore/search returns ids and scores, /chunks fetches content.
+#
+# Files (written next to the Chroma index of each build):
+#   chunks.dat        UTF-8 content of every chunk, concatenated (memory-mapped)
+#   chunks.idx.json   {"count": n, "chunks": {id: [offset, length]}}
+
+import base64
+import hashlib
+import json
+import mmap
+import os
+from typing import Dict, List, Optional, Tuple
+
+CHUNKS_FILE = "chunks.dat"
+CHUNK_INDEX_FILE = "chunks.idx.json"
+
+
+# ----------------------------------------
+# BUILD
+# ----------------------------------------
+def write_chunk_store(store_dir: str, ids: List[str], documents: List[str]) -> int:
+    """
+    Write the chunk store for one build
+
+    Returns:
+        Number of chunks written
+    """
+    os.makedirs(store_dir, exist_ok=True)
+    data_path = os.path.join(store_dir, CHUNKS_FILE)
+    index_path = os.path.join(store_dir, CHUNK_INDEX_FILE)
+
+    chunks = {}
+    with open(f"{data_path}.tmp", "wb") as f:
+        for chunk_id, text in zip(ids, documents):
+            data = (text or "").encode("utf-8")
+            chunks[chunk_id] = [f.tell(), len(data)]
+            f.write(data)
+    with open(f"{index_path}.tmp", "w", encoding="utf-8") as f:
+        json.dump({"count": len(chunks), "chunks": chunks}, f)
+
+    # Data first: the index is what marks the store as present
+    os.replace(f"{data_path}.tmp", data_path)
+    os.replace(f"{index_path}.tmp", index_path)
+    return len(chunks)
+
+
+def export_chunk_store(db, store_dir: str) -> int:
+    """Write the chunk store for a langchain Chroma store's collection"""
+    data = db.get(include=["documents"])
+    return write_chunk_store(store_dir, data["ids"], data["documents"])
+
+
+# ----------------------------------------
+# READ
+# ----------------------------------------
+class ChunkStore:
+    """Read-only, memory-mapped chunk contents"""
+
+    def __init__(self, store_dir: str):
+        with open(os.path.join(store_dir, CHUNK_INDEX_FILE), "r", encoding="utf-8") as f:
+            self._index: Dict[str, list] = json.load(f)["chunks"]
+        self._file = open(os.path.join(store_dir, CHUNKS_FILE), "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    def __contains__(self, chunk_id: str) -> bool:
+        return chunk_id in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def length(self, chunk_id: str) -> Optional[int]:
+        """Size of a chunk in bytes, or None if unknown"""
+        entry = self._index.get(chunk_id)
+        return entry[1] if entry else None
+
+    def read(self, chunk_id: str, start: int = 0, end: Optional[int] = None) -> Optional[bytes]:
+        """
+        Read a chunk or a byte range of it
+
+        Args:
+            start: First byte (inclusive)
+            end: Last byte (exclusive); defaults to the end of the chunk
+
+        Returns:
+            The bytes, or None if the chunk id is unknown
+        """
+        entry = self._index.get(chunk_id)
+        if entry is None:
+            return None
+        offset, length = entry
+        end = length if end is None else min(end, length)
+        start = max(0, min(start, end))
+        return bytes(self._data[offset + start:offset + end])
+
+    def close(self):
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._file.close()
+
+
+def open_chunk_store(store_dir: str) -> Optional[ChunkStore]:
+    """Open the chunk store of a build, or None if it has none"""
+    if not os.path.exists(os.path.join(store_dir, CHUNK_INDEX_FILE)):
+        return None
+    try:
+        return ChunkStore(store_dir)
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def parse_byte_range(header: str, size: int) -> Tuple[int, int]:
+    """
+    Parse a single-range HTTP Range header
+
+    Returns:
+        (start, end) with end exclusive
+
+    Raises:
+        ValueError: If the header is malformed or not satisfiable
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip() != "bytes" or "," in spec:
+        raise ValueError(f"Unsupported range: {header}")
+    first, _, last = spec.strip().partition("-")
+    if first:
+        start = int(first)
+        end = int(last) + 1 if last else size
+    elif last:
+        start, end = max(0, size - int(last)), size
+    else:
+        raise ValueError(f"Malformed range: {header}")
+    end = min(end, size)
+    if start >= end:
+        raise ValueError(f"Range not satisfiable: {header}")
+    return start, end
+
+
+# ----------------------------------------
+# SEARCH CURSORS
+# ----------------------------------------
+def _query_digest(query: str) -> str:
+    return hashlib.blake2b(query.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def encode_cursor(query: str, offset: int, index_version: str) -> str:
+    """Opaque cursor for the next page of a search"""
+    payload = json.dumps({"q": _query_digest(query), "o": offset, "v": index_version}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, query: str, index_version: str) -> int:
+    """
+    Validate a cursor against the query and live index
+
+    Returns:
+        Offset of the next page
+
+    Raises:
+        ValueError: If the cursor is malformed, for another query, or the
+            index has been swapped since it was issued
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        offset = int(payload["o"])
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid cursor")
+    if payload.get("q") != _query_digest(query):
+        raise ValueError("Cursor belongs to a different query")
+    if payload.get("v") != index_version:
+        raise ValueError("Cursor expired: the index has changed, restart the search")
+    return offset
@@ -2,6 +2,7 @@
 # SwiftVisa Configuration Module
 # ==================================
 
+import json
 import os
 from typing import Optional
 from dotenv import load_dotenv
@@ -10,6 +11,15 @@ from dotenv import load_dotenv
 load_dotenv()
 
 
+def _load_json_file(path: str) -> dict:
+    """Read an optional JSON settings file (e.g. tuned HNSW parameters)"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
 class Settings:
     """Application settings and configuration"""
     
@@ -25,7 +35,41 @@ class Settings:
     # Vector Store
     CHROMA_DB_DIR: str = os.getenv("CHROMA_DB_DIR", "vectorstore")
     TOP_K: int = int(os.getenv("TOP_K", "5"))
+    # Retrieval defaults at startup; admins change them at runtime (and add
+    # traffic-split variants) via /admin/retrieval, clients per request
+    # within RETRIEVAL_MAX_K / RETRIEVAL_MAX_FETCH_K.
+    # Search type: "similarity", "similarity_score_threshold" (drop chunks
+    # below RETRIEVAL_SCORE_THRESHOLD relevance, 0-1) or "mmr" (TOP_K of
+    # RETRIEVAL_FETCH_K candidates, diversified by RETRIEVAL_MMR_LAMBDA)
+    RETRIEVAL_SEARCH_TYPE: str = os.getenv("RETRIEVAL_SEARCH_TYPE", "similarity")
+    RETRIEVAL_FETCH_K: int = int(os.getenv("RETRIEVAL_FETCH_K", "20"))
+    RETRIEVAL_SCORE_THRESHOLD: float = float(os.getenv("RETRIEVAL_SCORE_THRESHOLD", "0"))
+    RETRIEVAL_MMR_LAMBDA: float = float(os.getenv("RETRIEVAL_MMR_LAMBDA", "0.5"))
+    REQUIREMENTS_TOP_K: int = int(os.getenv("REQUIREMENTS_TOP_K", "3"))
+    RETRIEVAL_MAX_K: int = int(os.getenv("RETRIEVAL_MAX_K", "20"))
+    RETRIEVAL_MAX_FETCH_K: int = int(os.getenv("RETRIEVAL_MAX_FETCH_K", "100"))
+    RETRIEVAL_ALLOW_OVERRIDES: bool = os.getenv("RETRIEVAL_ALLOW_OVERRIDES", "True").lower() == "true"
     EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"
+    # Directory written by scripts/package_model.py; when set the model is loaded
+    # from local disk only (no hub access), otherwise it is downloaded by name
+    EMBEDDING_MODEL_PATH: Optional[str] = os.getenv("EMBEDDING_MODEL_PATH")
+    EMBEDDING_MODEL_VERIFY: bool = os.getenv("EMBEDDING_MODEL_VERIFY", "False").lower() == "true"
+    # "chroma", "quantized" (int8/binary first pass + float32 rescoring),
+    # "sharded" (per-country collections, opened lazily), "readonly"
+    # (Chroma store opened immutably and held in memory; no SQLite locks) or
+    # "pack" (memory-mapped index.svpack; used automatically for installed packs)
+    VECTOR_INDEX_BACKEND: str = os.getenv("VECTOR_INDEX_BACKEND", "chroma")
+    QUANTIZED_MODE: str = os.getenv("QUANTIZED_MODE", "int8")
+    QUANTIZED_OVERSAMPLE: int = int(os.getenv("QUANTIZED_OVERSAMPLE", "10"))
+    SHARD_SEARCH_WORKERS: int = int(os.getenv("SHARD_SEARCH_WORKERS", "8"))
+
+    # Chroma HNSW parameters (env overrides the file written by scripts/tune_hnsw.py)
+    HNSW_CONFIG_FILE: str = os.getenv("HNSW_CONFIG_FILE", "hnsw_config.json")
+    tuned_hnsw = _load_json_file(HNSW_CONFIG_FILE)
+    HNSW_SPACE: str = os.getenv("HNSW_SPACE", tuned_hnsw.get("space", "l2"))
+    HNSW_M: int = int(os.getenv("HNSW_M", tuned_hnsw.get("M", 16)))
+    HNSW_CONSTRUCTION_EF: int = int(os.getenv("HNSW_CONSTRUCTION_EF", tuned_hnsw.get("construction_ef", 100)))
+    HNSW_SEARCH_EF: int = int(os.getenv("HNSW_SEARCH_EF", tuned_hnsw.get("search_ef", 10)))
     
     # Server
     HOST: str = os.getenv("HOST", "0.0.0.0")
@@ -65,7 +109,108 @@ class Settings:
     LLM_MAX_TOKENS: int = 1000
     LLM_MODEL_OPENAI: str = "gpt-3.5-turbo"
     LLM_MODEL_GEMINI: str = "gemini-1.5-pro"
+    # USD per 1K tokens, for cost reporting (defaults: gpt-3.5-turbo list price)
+    LLM_PROMPT_PRICE_PER_1K: float = float(os.getenv("LLM_PROMPT_PRICE_PER_1K", "0.0005"))
+    LLM_COMPLETION_PRICE_PER_1K: float = float(os.getenv("LLM_COMPLETION_PRICE_PER_1K", "0.0015"))
+    # Estimated USD spend per UTC day, in total and per client (X-Client-Id or
+    # address), after which requests get retrieval-only answers (0 = no limit)
+    LLM_DAILY_BUDGET_USD: float = float(os.getenv("LLM_DAILY_BUDGET_USD", "0"))
+    LLM_CLIENT_DAILY_BUDGET_USD: float = float(os.getenv("LLM_CLIENT_DAILY_BUDGET_USD", "0"))
+    # Answer chain: "stuff" (one prompt), "map_reduce" (concurrent per-chunk
+    # extraction, then a short reduce) or "auto" (map_reduce from
+    # MAP_REDUCE_MIN_TOKENS of assembled context); startup default, see /admin/retrieval
+    LLM_CHAIN_MODE: str = os.getenv("LLM_CHAIN_MODE", "auto")
+    MAP_REDUCE_MIN_TOKENS: int = int(os.getenv("MAP_REDUCE_MIN_TOKENS", "2500"))
+    MAP_REDUCE_CONCURRENCY: int = int(os.getenv("MAP_REDUCE_CONCURRENCY", "4"))
+    MAP_REDUCE_MAP_MAX_TOKENS: int = int(os.getenv("MAP_REDUCE_MAP_MAX_TOKENS", "256"))
     
+    # Materialized Answers (precomputed /visa-requirements and common profiles)
+    ENABLE_ANSWER_STORE: bool = os.getenv("ENABLE_ANSWER_STORE", "True").lower() == "true"
+    ANSWER_STORE_PATH: str = os.getenv("ANSWER_STORE_PATH", "data/materialized/answers.kv")
+    MATERIALIZE_ON_INDEX_CHANGE: bool = os.getenv("MATERIALIZE_ON_INDEX_CHANGE", "True").lower() == "true"
+    MATERIALIZE_WITH_LLM: bool = os.getenv("MATERIALIZE_WITH_LLM", "False").lower() == "true"
+    PROFILE_TEMPLATES_FILE: str = os.getenv("PROFILE_TEMPLATES_FILE", "data/profile_templates.jsonl")
+    MATERIALIZE_TOP_PROFILES: int = int(os.getenv("MATERIALIZE_TOP_PROFILES", "50"))
+
+    # Ingestion (near-duplicate documents collapsed before embedding; 0 disables)
+    DEDUP_THRESHOLD: float = float(os.getenv("DEDUP_THRESHOLD", "0.8"))
+
+    # Extractive Answers (retrieval-only mode answers with the best-matching sentences)
+    EXTRACTIVE_ANSWERS: bool = os.getenv("EXTRACTIVE_ANSWERS", "True").lower() == "true"
+    EXTRACTIVE_MAX_SENTENCES: int = int(os.getenv("EXTRACTIVE_MAX_SENTENCES", "5"))
+    EXTRACTIVE_MIN_SCORE: float = float(os.getenv("EXTRACTIVE_MIN_SCORE", "0.25"))
+
+    # Follow-Up Sessions (pinned retrieval context per profile)
+    SESSION_TTL_SECONDS: float = float(os.getenv("SESSION_TTL_SECONDS", "1800"))
+    SESSION_MAX: int = int(os.getenv("SESSION_MAX", "1000"))
+    SESSION_CONTEXT_K: int = int(os.getenv("SESSION_CONTEXT_K", "10"))
+    SESSION_HISTORY_TURNS: int = int(os.getenv("SESSION_HISTORY_TURNS", "4"))
+
+    # Prefetch (POST /prefetch retrieves while the form is filled in; pools
+    # PREFETCH_K chunks per destination/purpose, re-ranked to TOP_K on submit)
+    ENABLE_PREFETCH: bool = os.getenv("ENABLE_PREFETCH", "True").lower() == "true"
+    PREFETCH_K: int = int(os.getenv("PREFETCH_K", "15"))
+    PREFETCH_TTL_SECONDS: float = float(os.getenv("PREFETCH_TTL_SECONDS", "300"))
+    PREFETCH_MAX_ENTRIES: int = int(os.getenv("PREFETCH_MAX_ENTRIES", "500"))
+    PREFETCH_MAX_INFLIGHT: int = int(os.getenv("PREFETCH_MAX_INFLIGHT", "2"))
+    PREFETCH_RATE_LIMIT: int = int(os.getenv("PREFETCH_RATE_LIMIT", "5"))
+    PREFETCH_RATE_WINDOW_SECONDS: float = float(os.getenv("PREFETCH_RATE_WINDOW_SECONDS", "60"))
+
+    # Analysis Jobs (async /analyze-profile)
+    JOB_WORKERS: int = int(os.getenv("JOB_WORKERS", "4"))
+    JOB_MAX_PENDING: int = int(os.getenv("JOB_MAX_PENDING", "100"))
+    JOB_RESULT_TTL_SECONDS: float = float(os.getenv("JOB_RESULT_TTL_SECONDS", "3600"))
+    JOB_WEBHOOK_ALLOWED_HOSTS: str = os.getenv("JOB_WEBHOOK_ALLOWED_HOSTS", "localhost,127.0.0.1")
+
+    # Fast-Path Rules (age / length-of-stay limits extracted at index build time)
+    ENABLE_RULES_ENGINE: bool = os.getenv("ENABLE_RULES_ENGINE", "True").lower() == "true"
+
+    # Two-Phase Search (/vectorstore/search ids + scores, /chunks content)
+    SEARCH_MAX_PAGE_SIZE: int = int(os.getenv("SEARCH_MAX_PAGE_SIZE", "50"))
+    SEARCH_MAX_DEPTH: int = int(os.getenv("SEARCH_MAX_DEPTH", "200"))
+    CHUNKS_MAX_IDS: int = int(os.getenv("CHUNKS_MAX_IDS", "100"))
+
+    # Index Snapshots (versioned builds, hot-swapped without restart)
+    SNAPSHOT_KEEP: int = int(os.getenv("SNAPSHOT_KEEP", "2"))
+    SNAPSHOT_WATCH_INTERVAL: float = float(os.getenv("SNAPSHOT_WATCH_INTERVAL", "5"))
+
+    # Admin API (disabled unless a token is configured)
+    ADMIN_TOKEN: Optional[str] = os.getenv("ADMIN_TOKEN")
+
+    # Sampling Profiler (per-request via X-Profile header for admins, continuous at a sample rate)
+    PROFILE_SAMPLE_RATE: float = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+    PROFILE_INTERVAL_MS: float = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+    PROFILE_ENDPOINTS: str = os.getenv("PROFILE_ENDPOINTS", "/check-eligibility,/analyze-profile")
+    PROFILE_MAX_STORED: int = int(os.getenv("PROFILE_MAX_STORED", "20"))
+
+    # Slow-Request Capture (full diagnostics for requests over the threshold)
+    SLOW_REQUEST_THRESHOLD_MS: float = float(os.getenv("SLOW_REQUEST_THRESHOLD_MS", "2000"))
+    SLOW_REQUEST_BUFFER_SIZE: int = int(os.getenv("SLOW_REQUEST_BUFFER_SIZE", "200"))
+    SLOW_REQUEST_LOG_FILE: Optional[str] = os.getenv("SLOW_REQUEST_LOG_FILE")
+
+    # Memory Profile (startup-phase RSS/tracemalloc and per-endpoint allocation
+    # growth at /admin/memory; slows the app - for benchmarks and staging)
+    MEMORY_PROFILE: bool = os.getenv("MEMORY_PROFILE", "False").lower() == "true"
+    MEMORY_PROFILE_EVERY: int = int(os.getenv("MEMORY_PROFILE_EVERY", "100"))
+    MEMORY_PROFILE_FRAMES: int = int(os.getenv("MEMORY_PROFILE_FRAMES", "1"))
+
+    # Traffic Capture (sanitized request bodies as JSONL for scripts/replay_traffic.py; off unless a file is set)
+    TRAFFIC_CAPTURE_FILE: Optional[str] = os.getenv("TRAFFIC_CAPTURE_FILE")
+    TRAFFIC_CAPTURE_ENDPOINTS: str = os.getenv(
+        "TRAFFIC_CAPTURE_ENDPOINTS",
+        "/check-eligibility*,/analyze-profile*,/sessions*,/visa-requirements/*,/suggest,/vectorstore/*,/chunks*"
+    )
+    TRAFFIC_CAPTURE_SAMPLE_RATE: float = float(os.getenv("TRAFFIC_CAPTURE_SAMPLE_RATE", "1.0"))
+    TRAFFIC_CAPTURE_SALT: str = os.getenv("TRAFFIC_CAPTURE_SALT", "")
+
+    # Stub LLM (fixed-latency fake model, for replaying captured traffic without provider calls)
+    STUB_LLM: bool = os.getenv("STUB_LLM", "False").lower() == "true"
+    STUB_LLM_LATENCY_MS: float = float(os.getenv("STUB_LLM_LATENCY_MS", "300"))
+
+    # Production Frontend (built by scripts/build_frontend.py, served at /app and /home)
+    SERVE_FRONTEND: bool = os.getenv("SERVE_FRONTEND", "False").lower() == "true"
+    FRONTEND_DIST_DIR: str = os.getenv("FRONTEND_DIST_DIR", "frontend_dist")
+
     # Feature Flags
     ENABLE_MONITORING: bool = os.getenv("ENABLE_MONITORING", "False").lower() == "true"
     ENABLE_ANALYTICS: bool = os.getenv("ENABLE_ANALYTICS", "False").lower() == "true"
@@ -105,6 +250,7 @@ class Settings:
             "app_name": cls.APP_NAME,
             "app_version": cls.APP_VERSION,
             "embedding_model": cls.EMBEDDING_MODEL,
+            "embedding_model_offline": bool(cls.EMBEDDING_MODEL_PATH),
             "top_k": cls.TOP_K,
             "llm_available": bool(cls.OPENAI_API_KEY or cls.GEMINI_API_KEY),
             "openai_configured": bool(cls.OPENAI_API_KEY and cls.OPENAI_API_KEY.startswith("sk-")),
@@ -0,0 +1,186 @@
+# ==================================
+# SwiftVisa Near-Duplicate Detection
+# ==================================
+#
+# MinHash signatures over word shingles, bucketed with LSH banding so only
+# likely pairs are compared, then confirmed with the exact Jaccard similarity
+# of their shingle sets. Used at ingestion time:
+#   - whole documents: near-identical copies are collapsed into the longest
+#     one before embedding (the others are listed in its "duplicates" metadata)
+#   - passages: scripts/chunk_data.py marks near-identical chunks with
+#     "duplicate_of" and leaves them out of visa_chunks.jsonl
+#
+# Signatures are deterministic (fixed seed, stable hashing), so the same
+# corpus always yields the same clusters.
+
+import hashlib
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, Sequence, Set, Tuple
+
+import numpy as np
+
+DEDUP_REPORT_FILE = "dedup_report.json"
+DEFAULT_DEDUP_THRESHOLD = 0.8
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+
+
+def shingles(text: str, size: int = 5) -> Set[int]:
+    """
+    Hashed word n-grams of a text (lower-cased, punctuation stripped)
+
+    Texts shorter than ``size`` words yield a single shingle of all their words.
+    """
+    words = re.findall(r"[a-z0-9]+", text.lower())
+    if not words:
+        return set()
+    grams = (" ".join(words[i:i + size]) for i in range(max(1, len(words) - size + 1)))
+    return {int.from_bytes(hashlib.blake2b(g.encode("utf-8"), digest_size=4).digest(), "little") for g in grams}
+
+
+def jaccard(a: Set[int], b: Set[int]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class MinHasher:
+    """Fixed family of ``num_perm`` universal hash functions"""
+
+    def __init__(self, num_perm: int = 128, seed: int = 1):
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        self._a = rng.randint(1, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+
+    def signature(self, shingle_set: Set[int]) -> np.ndarray:
+        """MinHash signature (num_perm uint32 values); all-max for an empty set"""
+        if not shingle_set:
+            return np.full(self.num_perm, MAX_HASH, dtype=np.uint32)
+        values = np.fromiter(shingle_set, dtype=np.uint64, count=len(shingle_set))
+        # (a * x + b) mod p, truncated to 32 bits; uint64 wraparound keeps it cheap
+        hashed = ((values[:, None] * self._a + self._b) % np.uint64(MERSENNE_PRIME)) & np.uint64(MAX_HASH)
+        return hashed.min(axis=0).astype(np.uint32)
+
+
+def lsh_candidates(signatures: Sequence[np.ndarray], bands: int) -> Set[Tuple[int, int]]:
+    """Index pairs that share at least one LSH band bucket"""
+    if not signatures:
+        return set()
+    rows = len(signatures[0]) // bands
+    pairs = set()
+    for band in range(bands):
+        buckets: Dict[bytes, List[int]] = defaultdict(list)
+        for index, signature in enumerate(signatures):
+            buckets[signature[band * rows:(band + 1) * rows].tobytes()].append(index)
+        for members in buckets.values():
+            for i, first in enumerate(members):
+                for second in members[i + 1:]:
+                    pairs.add((first, second))
+    return pairs
+
+
+def find_near_duplicates(texts: Sequence[str], threshold: float = DEFAULT_DEDUP_THRESHOLD, num_perm: int = 128,
+                         bands: int = 32, shingle_size: int = 5) -> List[List[int]]:
+    """
+    Group texts whose shingle sets have Jaccard similarity >= threshold
+
+    Args:
+        texts: Texts to compare
+        threshold: Minimum Jaccard similarity of two members of a group
+        num_perm: MinHash signature length
+        bands: LSH bands (num_perm / bands rows each); more bands find
+            lower-similarity candidates at the cost of more exact comparisons
+        shingle_size: Words per shingle
+
+    Returns:
+        Groups of two or more text indices, each sorted, in order of first member
+    """
+    shingle_sets = [shingles(text, shingle_size) for text in texts]
+    hasher = MinHasher(num_perm)
+    signatures = [hasher.signature(s) for s in shingle_sets]
+
+    parent = list(range(len(texts)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for first, second in sorted(lsh_candidates(signatures, bands)):
+        if not shingle_sets[first] or not shingle_sets[second]:
+            continue
+        if jaccard(shingle_sets[first], shingle_sets[second]) >= threshold:
+            parent[find(second)] = find(first)
+
+    groups: Dict[int, List[int]] = defaultdict(list)
+    for index in range(len(texts)):
+        groups[find(index)].append(index)
+    return sorted((members for members in groups.values() if len(members) > 1), key=lambda m: m[0])
+
+
+def collapse_documents(documents: Iterable[Tuple[str, str]],
+                       threshold: float = DEFAULT_DEDUP_THRESHOLD) -> Tuple[List[dict], dict]:
+    """
+    Drop empty documents and collapse near-duplicates into one representative
+
+    Args:
+        documents: (source filename, text) pairs
+        threshold: Jaccard similarity for two documents to be duplicates
+            (0 or less disables collapsing)
+
+    Returns:
+        (kept documents as {"source", "text", "duplicates"}, report dict)
+    """
+    documents = list(documents)
+    empty = [source for source, text in documents if not text.strip()]
+    documents = [(source, text) for source, text in documents if text.strip()]
+    groups = find_near_duplicates([text for _, text in documents], threshold) if threshold > 0 else []
+
+    dropped: Dict[int, int] = {}
+    clusters = []
+    for members in groups:
+        # Keep the most complete copy; ties go to the first source name
+        keep = max(members, key=lambda i: (len(documents[i][1]), -i))
+        for index in members:
+            if index != keep:
+                dropped[index] = keep
+        clusters.append({
+            "kept": documents[keep][0],
+            "collapsed": [documents[i][0] for i in members if i != keep]
+        })
+
+    kept = []
+    for index, (source, text) in enumerate(documents):
+        if index in dropped:
+            continue
+        duplicates = [documents[i][0] for i, target in dropped.items() if target == index]
+        kept.append({"source": source, "text": text, "duplicates": sorted(duplicates)})
+
+    report = {
+        "threshold": threshold,
+        "input_documents": len(documents) + len(empty),
+        "empty_documents": empty,
+        "kept_documents": len(kept),
+        "clusters": clusters
+    }
+    return kept, report
+
+
+def mark_duplicate_chunks(chunks: List[dict], threshold: float = 0.9,
+                          text_key: str = "content", id_key: str = "chunk_id") -> int:
+    """
+    Set "duplicate_of" on chunks that nearly repeat an earlier chunk
+
+    Returns:
+        Number of chunks marked
+    """
+    marked = 0
+    for members in find_near_duplicates([c[text_key] for c in chunks], threshold):
+        first = chunks[members[0]][id_key]
+        for index in members[1:]:
+            chunks[index]["duplicate_of"] = first
+            marked += 1
+    return marked
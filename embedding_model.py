@@ -0,0 +1,168 @@
+# ==================================
+# SwiftVisa Embedding Model Loading
+# ==================================
+#
+# By default the embedding model is resolved through the Hugging Face hub
+# (downloaded on first use). When EMBEDDING_MODEL_PATH points at a directory
+# written by scripts/package_model.py, the model is loaded from local disk
+# only: hub access is switched off before the ML libraries are imported (at
+# the top of main.py for the app, since huggingface_hub reads the setting
+# once on import, and in load_embeddings for the scripts), so startup
+# behaves the same on air-gapped nodes and never waits on the network.
+#
+# A packaged model directory holds the sentence-transformers files (weights,
+# config, fast tokenizer.json) plus model_manifest.json with the model name,
+# embedding dimension and a SHA-256 of every file.
+
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import Optional
+
+MODEL_MANIFEST = "model_manifest.json"
+# Sample inputs embedded once at packaging time so a broken bundle fails the build
+PREWARM_TEXTS = ("Student visa requirements for Canada", "Work permit eligibility in the UK")
+
+
+class ModelBundleError(RuntimeError):
+    """Raised when a packaged model directory is missing or incomplete"""
+
+
+def _file_digests(model_dir: str) -> dict:
+    digests = {}
+    for directory, _, files in os.walk(model_dir):
+        for name in sorted(files):
+            path = os.path.join(directory, name)
+            relative = os.path.relpath(path, model_dir).replace(os.sep, "/")
+            if relative == MODEL_MANIFEST:
+                continue
+            sha = hashlib.sha256()
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    sha.update(block)
+            digests[relative] = sha.hexdigest()
+    return dict(sorted(digests.items()))
+
+
+def read_model_manifest(model_dir: str) -> dict:
+    """
+    Manifest of a packaged model directory
+
+    Raises:
+        ModelBundleError: If the directory or its manifest is missing
+    """
+    path = os.path.join(model_dir, MODEL_MANIFEST)
+    if not os.path.isfile(path):
+        raise ModelBundleError(
+            f"No packaged embedding model at {model_dir} (missing {MODEL_MANIFEST}); "
+            "run scripts/package_model.py or unset EMBEDDING_MODEL_PATH"
+        )
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def verify_model_dir(model_dir: str) -> dict:
+    """
+    Check every file of a packaged model against its manifest
+
+    Returns:
+        The manifest
+
+    Raises:
+        ModelBundleError: If a file is missing or its checksum differs
+    """
+    manifest = read_model_manifest(model_dir)
+    actual = _file_digests(model_dir)
+    expected = manifest.get("files", {})
+    missing = sorted(set(expected) - set(actual))
+    changed = sorted(name for name in expected if name in actual and actual[name] != expected[name])
+    if missing or changed:
+        raise ModelBundleError(
+            f"Packaged embedding model at {model_dir} is incomplete "
+            f"(missing: {', '.join(missing) or 'none'}; changed: {', '.join(changed) or 'none'})"
+        )
+    return manifest
+
+
+def enable_offline_mode():
+    """Stop huggingface_hub / transformers from contacting the hub"""
+    os.environ["HF_HUB_OFFLINE"] = "1"
+    os.environ["TRANSFORMERS_OFFLINE"] = "1"
+    os.environ.setdefault("HF_HUB_DISABLE_TELEMETRY", "1")
+
+
+def load_embeddings(model_name: str, model_path: Optional[str] = None, verify: bool = False):
+    """
+    Embedding model for indexing and queries
+
+    Args:
+        model_name: Hub model name, used when no local path is configured
+        model_path: Directory written by scripts/package_model.py (offline load)
+        verify: Also check file checksums against the manifest
+
+    Returns:
+        HuggingFaceEmbeddings instance
+
+    Raises:
+        ModelBundleError: If model_path is set but not a complete packaged model
+    """
+    if not model_path:
+        from langchain_huggingface import HuggingFaceEmbeddings
+        return HuggingFaceEmbeddings(model_name=model_name)
+
+    manifest = verify_model_dir(model_path) if verify else read_model_manifest(model_path)
+    if manifest.get("model_name") != model_name:
+        raise ModelBundleError(
+            f"Packaged model at {model_path} is {manifest.get('model_name')}, "
+            f"but EMBEDDING_MODEL is {model_name}; the index would not match"
+        )
+    enable_offline_mode()
+    from langchain_huggingface import HuggingFaceEmbeddings
+    return HuggingFaceEmbeddings(model_name=os.path.abspath(model_path), model_kwargs={"local_files_only": True})
+
+
+def package_model(model_name: str, output_dir: str, cache_dir: Optional[str] = None) -> dict:
+    """
+    Download a sentence-transformers model and write a self-contained copy
+
+    The copy includes the weights, config and fast tokenizer (tokenizer.json is
+    serialized up front so no slow-to-fast tokenizer conversion happens at
+    startup). The copy is loaded offline and embeds PREWARM_TEXTS before the
+    manifest is written.
+
+    Returns:
+        The manifest written to output_dir
+    """
+    import shutil
+
+    from sentence_transformers import SentenceTransformer
+    from transformers import AutoTokenizer
+
+    staging = f"{output_dir.rstrip(os.sep)}.building"
+    shutil.rmtree(staging, ignore_errors=True)
+    try:
+        SentenceTransformer(model_name, cache_folder=cache_dir).save(staging)
+        tokenizer = AutoTokenizer.from_pretrained(staging, local_files_only=True)
+        if tokenizer.is_fast:
+            tokenizer.save_pretrained(staging)
+
+        model = SentenceTransformer(staging, local_files_only=True)
+        vectors = model.encode(list(PREWARM_TEXTS))
+        manifest = {
+            "model_name": model_name,
+            "dimension": int(vectors.shape[1]),
+            "fast_tokenizer": bool(tokenizer.is_fast),
+            "packaged_at": datetime.now().isoformat(),
+            "files": _file_digests(staging)
+        }
+        with open(os.path.join(staging, MODEL_MANIFEST), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    shutil.rmtree(output_dir, ignore_errors=True)
+    os.makedirs(os.path.dirname(os.path.abspath(output_dir)), exist_ok=True)
+    os.rename(staging, output_dir)
+    return manifest
@@ -0,0 +1,202 @@
+# ==================================
+# SwiftVisa Extractive Answers
+# ==================================
+#
+# Retrieval-only answers made of the few policy sentences that best match the
+# query, with source citations, instead of a whole retrieved chunk.
+#
+# At ingestion every chunk is split into sentences and each sentence is
+# embedded once; at query time the sentences of the retrieved chunks are
+# scored against the query vector with a single matrix product.
+#
+# Files (written next to the Chroma index of each build):
+#   sentences.npy    (count, dim) unit-normalized float32 sentence vectors
+#   sentences.json   {"sentences": [...], "sources": [...], "chunks": {id: [start, end]}}
+
+import json
+import os
+import re
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+SENTENCE_VECTORS_FILE = "sentences.npy"
+SENTENCE_INDEX_FILE = "sentences.json"
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9*(\"'])")
+_BULLET = re.compile(r"^[\s\-•*]+(?=\S)")
+
+
+class SentenceHit(NamedTuple):
+    text: str
+    source: Optional[str]
+    score: float
+
+
+def split_sentences(text: str, min_chars: int = 25, max_chars: int = 400) -> List[str]:
+    """
+    Sentences of a policy text
+
+    Lines are split at sentence punctuation, list bullets are stripped, and
+    fragments shorter than min_chars (headings, stray words) are dropped.
+    """
+    sentences = []
+    for line in (text or "").splitlines():
+        for part in _SENTENCE_END.split(line.strip()):
+            sentence = _BULLET.sub("", part).strip()
+            if len(sentence) >= min_chars:
+                sentences.append(sentence if len(sentence) <= max_chars else sentence[:max_chars].rstrip() + "…")
+    return sentences
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.size == 0:
+        return vectors
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+# ----------------------------------------
+# BUILD
+# ----------------------------------------
+def write_sentence_index(index_dir: str, ids: Sequence[str], documents: Sequence[str],
+                         metadatas: Sequence[Optional[dict]], embeddings, batch_size: int = 256) -> int:
+    """
+    Split chunks into sentences and write their embeddings
+
+    Returns:
+        Number of sentences written
+    """
+    sentences: List[str] = []
+    sources: List[Optional[str]] = []
+    chunks: Dict[str, List[int]] = {}
+    for chunk_id, text, metadata in zip(ids, documents, metadatas):
+        parts = split_sentences(text)
+        chunks[chunk_id] = [len(sentences), len(sentences) + len(parts)]
+        sentences.extend(parts)
+        sources.extend([(metadata or {}).get("source")] * len(parts))
+
+    vectors = [
+        vector
+        for start in range(0, len(sentences), batch_size)
+        for vector in embeddings.embed_documents(sentences[start:start + batch_size])
+    ]
+    os.makedirs(index_dir, exist_ok=True)
+    np.save(os.path.join(index_dir, SENTENCE_VECTORS_FILE), _normalize(np.asarray(vectors, dtype=np.float32)))
+    with open(os.path.join(index_dir, SENTENCE_INDEX_FILE), "w", encoding="utf-8") as f:
+        json.dump({"sentences": sentences, "sources": sources, "chunks": chunks}, f, ensure_ascii=False)
+    return len(sentences)
+
+
+def export_sentence_index(db, index_dir: str, embeddings) -> int:
+    """Write the sentence index for a langchain Chroma store's collection"""
+    data = db.get(include=["documents", "metadatas"])
+    return write_sentence_index(index_dir, data["ids"], data["documents"], data["metadatas"], embeddings)
+
+
+# ----------------------------------------
+# RANK
+# ----------------------------------------
+class SentenceIndex:
+    """Precomputed sentence vectors, grouped by chunk id"""
+
+    def __init__(self, vectors: np.ndarray, sentences: List[str], sources: List[Optional[str]],
+                 chunks: Dict[str, List[int]]):
+        self.vectors = vectors
+        self.sentences = sentences
+        self.sources = sources
+        self.chunks = chunks
+
+    @classmethod
+    def load(cls, index_dir: str) -> Optional["SentenceIndex"]:
+        """The sentence index of a build, or None if it has none"""
+        index_path = os.path.join(index_dir, SENTENCE_INDEX_FILE)
+        if not os.path.exists(index_path):
+            return None
+        with open(index_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        vectors = np.load(os.path.join(index_dir, SENTENCE_VECTORS_FILE))
+        return cls(vectors, data["sentences"], data["sources"], data["chunks"])
+
+    def rows(self, chunk_ids: Sequence[Optional[str]]) -> Optional[np.ndarray]:
+        """Sentence rows of the given chunks, or None if any chunk is unknown"""
+        spans = [self.chunks.get(chunk_id) for chunk_id in chunk_ids]
+        if any(span is None for span in spans):
+            return None
+        return np.concatenate([np.arange(start, end) for start, end in spans] or [np.arange(0)])
+
+
+def rank_sentences(query_vector: Sequence[float], docs: list, sentence_index: Optional[SentenceIndex] = None,
+                   embeddings=None, limit: int = 5, min_score: float = 0.25) -> List[SentenceHit]:
+    """
+    The sentences of the retrieved chunks that best match the query
+
+    Sentences come from the precomputed index when it covers every chunk;
+    otherwise (older builds, sharded ids) they are split and embedded here.
+
+    Args:
+        query_vector: Query embedding
+        docs: Retrieved chunks, best first
+        sentence_index: Precomputed sentence index of the serving build
+        embeddings: Embedding model, used only when the index does not cover docs
+        limit: Maximum number of sentences returned
+        min_score: Cosine similarity below which sentences are dropped (the
+            best sentence is always kept)
+
+    Returns:
+        Hits ordered by score, exact repeats removed
+    """
+    rows = sentence_index.rows([doc.id for doc in docs]) if sentence_index is not None else None
+    if rows is not None:
+        matrix = sentence_index.vectors[rows]
+        sentences = [sentence_index.sentences[row] for row in rows]
+        sources = [sentence_index.sources[row] for row in rows]
+    elif embeddings is not None:
+        sentences, sources = [], []
+        for doc in docs:
+            parts = split_sentences(doc.page_content)
+            sentences.extend(parts)
+            sources.extend([(doc.metadata or {}).get("source")] * len(parts))
+        matrix = _normalize(embeddings.embed_documents(sentences)) if sentences else np.zeros((0, 0))
+    else:
+        return []
+    if not sentences:
+        return []
+
+    scores = matrix @ _normalize(np.asarray(query_vector, dtype=np.float32))
+    hits, seen = [], set()
+    for row in np.argsort(-scores, kind="stable"):
+        key = sentences[row].lower()
+        if key in seen:
+            continue
+        if hits and scores[row] < min_score:
+            break
+        seen.add(key)
+        hits.append(SentenceHit(sentences[row], sources[row], round(float(scores[row]), 4)))
+        if len(hits) >= limit:
+            break
+    return hits
+
+
+def format_extractive_answer(hits: List[SentenceHit]) -> str:
+    """Markdown answer listing the sentences with numbered source citations"""
+    citations: Dict[str, int] = {}
+    lines = []
+    for hit in hits:
+        source = hit.source or "policy document"
+        number = citations.setdefault(source, len(citations) + 1)
+        lines.append(f"• {hit.text} [{number}]")
+    sources = "\n".join(f"[{number}] {source}" for source, number in citations.items())
+    body = "\n".join(lines)
+    return f"""🔍 **VISA ELIGIBILITY ASSESSMENT**
+
+Most relevant statements from the visa policy documents:
+
+{body}
+
+📚 **Sources**:
+{sources}
+
+---
+💡 **Note**: This result is based on official visa policy documents. For the most accurate and up-to-date information, please verify with the official embassy or consulate."""
@@ -0,0 +1,75 @@
+# ==================================
+# SwiftVisa Chroma HNSW Parameters
+# ==================================
+#
+# space, M and construction_ef are fixed when a collection is built;
+# search_ef can be changed on an existing collection at query time.
+
+import json
+import os
+from datetime import datetime
+from typing import Optional
+
+SPACES = ("l2", "cosine", "ip")
+
+
+def hnsw_collection_metadata(space: str = "l2", m: int = 16, construction_ef: int = 100,
+                             search_ef: int = 10) -> dict:
+    """
+    Collection metadata that configures Chroma's HNSW index at build time
+
+    Raises:
+        ValueError: If the distance space is not supported by Chroma
+    """
+    if space not in SPACES:
+        raise ValueError(f"Unknown HNSW space: {space} (expected one of {SPACES})")
+    return {
+        "hnsw:space": space,
+        "hnsw:M": int(m),
+        "hnsw:construction_ef": int(construction_ef),
+        "hnsw:search_ef": int(search_ef)
+    }
+
+
+def current_search_ef(collection) -> Optional[int]:
+    """Read the search_ef a chromadb collection is configured with"""
+    configuration = getattr(collection, "configuration", None)
+    if isinstance(configuration, dict) and configuration.get("hnsw"):
+        return configuration["hnsw"].get("ef_search")
+    return (collection.metadata or {}).get("hnsw:search_ef")
+
+
+def apply_search_ef(collection, search_ef: int) -> bool:
+    """
+    Change a chromadb collection's query-time search_ef
+
+    Returns:
+        True if the collection was modified
+    """
+    if current_search_ef(collection) == search_ef:
+        return False
+    try:
+        collection.modify(configuration={"hnsw": {"ef_search": int(search_ef)}})
+    except TypeError:
+        # chromadb < 0.6 has no configuration argument; search_ef lives in metadata
+        metadata = dict(collection.metadata or {})
+        metadata["hnsw:search_ef"] = int(search_ef)
+        collection.modify(metadata=metadata)
+    return True
+
+
+def write_tuned_config(path: str, space: str, m: int, construction_ef: int, search_ef: int, **measurements) -> dict:
+    """Persist an auto-tuned configuration for Settings to pick up"""
+    config = {
+        "space": space,
+        "M": int(m),
+        "construction_ef": int(construction_ef),
+        "search_ef": int(search_ef),
+        "tuned_at": datetime.now().isoformat(),
+        **measurements
+    }
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=2)
+    os.replace(tmp_path, path)
+    return config
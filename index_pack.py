@@ -0,0 +1,359 @@
+# ==================================
+# SwiftVisa Index Packs
+# ==================================
+#
+# A built index (vectors, chunk texts, metadata and the build's sidecar
+# files) in one versioned, memory-mappable file, for shipping prebuilt
+# indexes to API nodes instead of copying or rebuilding Chroma directories.
+#
+# Layout (all integers little-endian, every section 64-byte aligned):
+#   [0:8]     magic b"SVXPACK\0"
+#   [8:12]    format version (uint32)
+#   [12:16]   manifest length in bytes (uint32)
+#   [16:48]   SHA-256 of everything after the 64-byte header
+#   [48:64]   zero
+#   [64:...]  manifest JSON (sorted keys, space padded), then the sections
+#
+# The manifest lists each section's offset, length, dtype, shape and SHA-256,
+# plus the embedding model, distance space and build info. Nothing machine-
+# or time-dependent is written (no timestamps, fixed padding, sorted keys),
+# so packing the same index yields the same bytes on every machine.
+#
+# Opening maps the file and parses the manifest only: vectors are a numpy
+# view of the mapping and texts are decoded per chunk on access.
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from dedup import DEDUP_REPORT_FILE
+from extractive import SENTENCE_INDEX_FILE, SENTENCE_VECTORS_FILE
+from materialize import BUILD_INFO_FILE
+from readonly_index import ReadOnlyChromaStore, load_vectors, read_collection
+from rules_engine import RULES_FILE
+from suggest import SUGGEST_INDEX_FILE
+
+PACK_FILE = "index.svpack"
+PACK_MAGIC = b"SVXPACK\0"
+PACK_FORMAT = 1
+HEADER_SIZE = 64
+ALIGNMENT = 64
+# Build files carried in the pack and restored next to it on import
+PACKED_FILES = (RULES_FILE, SUGGEST_INDEX_FILE, SENTENCE_INDEX_FILE, SENTENCE_VECTORS_FILE, DEDUP_REPORT_FILE)
+# Build info fields that differ between otherwise identical builds
+VOLATILE_BUILD_FIELDS = ("build_id", "created_at")
+
+
+class IndexPackError(ValueError):
+    """Raised for files that are not valid index packs"""
+
+
+def _padding(size: int) -> int:
+    return -size % ALIGNMENT
+
+
+def _json_bytes(value) -> bytes:
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+# ----------------------------------------
+# WRITE
+# ----------------------------------------
+def write_pack(path: str, ids: List[str], documents: Sequence[Optional[str]], metadatas: List[dict],
+               vectors: np.ndarray, space: str, embedding_model: str, build_info: Optional[dict] = None,
+               files: Optional[Dict[str, bytes]] = None) -> dict:
+    """
+    Write an index pack atomically
+
+    Args:
+        path: Destination file
+        ids, documents, metadatas: Chunks, in index order
+        vectors: (len(ids), dim) embeddings
+        space: Chroma distance space ("l2", "cosine" or "ip")
+        embedding_model: Model the vectors were computed with
+        build_info: Build info to carry (volatile fields are dropped)
+        files: Sidecar files by name, restored on import
+
+    Returns:
+        The manifest
+    """
+    vectors = np.ascontiguousarray(vectors, dtype="<f4").reshape(len(ids), -1)
+    texts = [(text or "").encode("utf-8") for text in documents]
+    offsets = np.zeros(len(texts) + 1, dtype="<u8")
+    np.cumsum([len(text) for text in texts], out=offsets[1:])
+
+    sections = [
+        ("vectors", vectors.tobytes(), "<f4", list(vectors.shape)),
+        ("ids", _json_bytes(ids), "json", [len(ids)]),
+        ("metadatas", _json_bytes(metadatas), "json", [len(metadatas)]),
+        ("text_offsets", offsets.tobytes(), "<u8", [len(offsets)]),
+        ("texts", b"".join(texts), "utf-8", [int(offsets[-1])]),
+    ]
+    sections += [(f"file:{name}", data, "bytes", [len(data)]) for name, data in sorted((files or {}).items())]
+
+    # Section offsets depend on the manifest length, which depends on the
+    # offsets' digits: grow the reserved manifest size until it fits
+    reserved = ALIGNMENT
+    while True:
+        position = HEADER_SIZE + reserved
+        table = {}
+        for name, data, dtype, shape in sections:
+            table[name] = {"offset": position, "length": len(data), "dtype": dtype, "shape": shape,
+                           "sha256": hashlib.sha256(data).hexdigest()}
+            position += len(data) + _padding(len(data))
+        manifest = {
+            "format": PACK_FORMAT,
+            "embedding_model": embedding_model,
+            "count": len(ids),
+            "dim": int(vectors.shape[1]) if len(ids) else 0,
+            "space": space,
+            "build": {k: v for k, v in (build_info or {}).items() if k not in VOLATILE_BUILD_FIELDS},
+            "sections": table
+        }
+        encoded = _json_bytes(manifest)
+        if len(encoded) <= reserved:
+            break
+        reserved = len(encoded) + _padding(len(encoded))
+
+    body = hashlib.sha256()
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(b"\0" * HEADER_SIZE)
+        chunk = encoded + b" " * (reserved - len(encoded))
+        f.write(chunk)
+        body.update(chunk)
+        for _, data, _, _ in sections:
+            chunk = data + b"\0" * _padding(len(data))
+            f.write(chunk)
+            body.update(chunk)
+        f.seek(0)
+        f.write(PACK_MAGIC + struct.pack("<II", PACK_FORMAT, len(encoded)) + body.digest() + b"\0" * 16)
+    os.replace(tmp_path, path)
+    return manifest
+
+
+def export_pack(persist_dir: str, path: str, embedding_model: Optional[str] = None) -> dict:
+    """
+    Pack a built Chroma persist directory (read immutably, no Chroma client)
+
+    Returns:
+        The manifest
+    """
+    collection = read_collection(persist_dir)
+    vectors, _ = load_vectors(persist_dir, collection["ids"], collection["queue"])
+    build_info = {}
+    if os.path.exists(os.path.join(persist_dir, BUILD_INFO_FILE)):
+        with open(os.path.join(persist_dir, BUILD_INFO_FILE), "r", encoding="utf-8") as f:
+            build_info = json.load(f)
+    files = {}
+    for name in PACKED_FILES:
+        file_path = os.path.join(persist_dir, name)
+        if os.path.exists(file_path):
+            with open(file_path, "rb") as f:
+                files[name] = f.read()
+    return write_pack(path, collection["ids"], collection["documents"], collection["metadatas"], vectors,
+                      collection["space"], embedding_model or build_info.get("embedding_model", "unknown"),
+                      build_info, files)
+
+
+# ----------------------------------------
+# READ
+# ----------------------------------------
+class PackTexts:
+    """Chunk texts of a pack, decoded per item from the mapping"""
+
+    def __init__(self, data, offsets: np.ndarray):
+        self._data = data
+        self._offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, row: int) -> str:
+        return str(self.raw(row), "utf-8")
+
+    def __iter__(self):
+        return (self[row] for row in range(len(self)))
+
+    def raw(self, row: int) -> memoryview:
+        return self._data[int(self._offsets[row]):int(self._offsets[row + 1])]
+
+
+class IndexPack:
+    """Memory-mapped, read-only index pack"""
+
+    def __init__(self, path: str, verify: bool = False):
+        """
+        Args:
+            path: Pack file
+            verify: Check the SHA-256 of the whole file (reads every byte)
+
+        Raises:
+            IndexPackError: If the file is not a valid pack (or fails verification)
+        """
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise IndexPackError(f"{path} is empty")
+        header = self._map[:HEADER_SIZE]
+        if len(header) < HEADER_SIZE or header[:8] != PACK_MAGIC:
+            self.close()
+            raise IndexPackError(f"{path} is not an index pack")
+        version, manifest_length = struct.unpack("<II", header[8:16])
+        if version != PACK_FORMAT:
+            self.close()
+            raise IndexPackError(f"{path} has pack format {version}, expected {PACK_FORMAT}")
+        self.checksum = header[16:48].hex()
+        self._view = memoryview(self._map)
+        self.manifest = json.loads(bytes(self._view[HEADER_SIZE:HEADER_SIZE + manifest_length]))
+        if verify:
+            self.verify()
+
+        self.count = self.manifest["count"]
+        self.dim = self.manifest["dim"]
+        self.space = self.manifest["space"]
+        self.embedding_model = self.manifest["embedding_model"]
+        self.vectors = self._array("vectors").reshape(self.count, self.dim)
+        self.ids: List[str] = json.loads(bytes(self.section("ids")))
+        self.metadatas: List[dict] = json.loads(bytes(self.section("metadatas")))
+        self.texts = PackTexts(self.section("texts"), self._array("text_offsets"))
+
+    def section(self, name: str) -> memoryview:
+        entry = self.manifest["sections"].get(name)
+        if entry is None:
+            raise KeyError(name)
+        return self._view[entry["offset"]:entry["offset"] + entry["length"]]
+
+    def _array(self, name: str) -> np.ndarray:
+        return np.frombuffer(self.section(name), dtype=self.manifest["sections"][name]["dtype"])
+
+    def files(self) -> List[str]:
+        return [name[5:] for name in self.manifest["sections"] if name.startswith("file:")]
+
+    def verify(self):
+        """
+        Check the file checksum and every section's checksum
+
+        Raises:
+            IndexPackError: On a mismatch
+        """
+        if hashlib.sha256(self._view[HEADER_SIZE:]).hexdigest() != self.checksum:
+            raise IndexPackError(f"{self.path} is corrupt (file checksum mismatch)")
+        for name, entry in self.manifest["sections"].items():
+            if hashlib.sha256(self.section(name)).hexdigest() != entry["sha256"]:
+                raise IndexPackError(f"{self.path} is corrupt (section {name})")
+
+    def vector_store(self, embedding_function) -> ReadOnlyChromaStore:
+        """LangChain vector store over the pack; vectors are not copied"""
+        return ReadOnlyChromaStore(self.ids, self.texts, self.metadatas, self.vectors, embedding_function,
+                                   self.space, source="pack")
+
+    def chunk_store(self) -> "PackChunkStore":
+        return PackChunkStore(self)
+
+    def stats(self) -> dict:
+        return {
+            "file": self.path,
+            "format": self.manifest["format"],
+            "checksum": self.checksum,
+            "embedding_model": self.embedding_model,
+            "count": self.count,
+            "dim": self.dim,
+            "space": self.space,
+            "size_bytes": len(self._map)
+        }
+
+    def close(self):
+        """Close the file; the mapping stays valid while vectors or texts use it"""
+        self._file.close()
+
+
+class PackChunkStore:
+    """ChunkStore interface (byte-range reads by chunk id) over a pack"""
+
+    def __init__(self, pack: IndexPack):
+        self._texts = pack.texts
+        self._rows = {chunk_id: row for row, chunk_id in enumerate(pack.ids)}
+
+    def __contains__(self, chunk_id: str) -> bool:
+        return chunk_id in self._rows
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def length(self, chunk_id: str) -> Optional[int]:
+        row = self._rows.get(chunk_id)
+        return len(self._texts.raw(row)) if row is not None else None
+
+    def read(self, chunk_id: str, start: int = 0, end: Optional[int] = None) -> Optional[bytes]:
+        row = self._rows.get(chunk_id)
+        if row is None:
+            return None
+        data = self._texts.raw(row)
+        end = len(data) if end is None else min(end, len(data))
+        start = max(0, min(start, end))
+        return bytes(data[start:end])
+
+    def close(self):
+        pass
+
+
+# ----------------------------------------
+# INSTALL
+# ----------------------------------------
+def install_pack(pack_path: str, target_dir: str) -> dict:
+    """
+    Verify a pack and install it as a serving directory
+
+    The pack is copied to target_dir/index.svpack and its sidecar files
+    (rules, suggestions, sentence index, dedup report) are restored next to
+    it, with a build_info.json whose build id is derived from the checksum.
+
+    Returns:
+        The installed build info
+
+    Raises:
+        IndexPackError: If the pack is invalid or carries a file other than PACKED_FILES
+    """
+    pack = IndexPack(pack_path, verify=True)
+    try:
+        # Names come from the pack's own manifest: only the known sidecar files
+        # are restored, so an entry like "../CURRENT" cannot write elsewhere
+        unexpected = [name for name in pack.files() if name not in PACKED_FILES]
+        if unexpected:
+            raise IndexPackError(f"{pack_path} carries unexpected files: {', '.join(sorted(unexpected))}")
+        os.makedirs(target_dir, exist_ok=True)
+        for name in pack.files():
+            with open(os.path.join(target_dir, name), "wb") as f:
+                f.write(pack.section(f"file:{name}"))
+        info = {
+            **pack.manifest["build"],
+            "build_id": f"pack-{pack.checksum[:16]}",
+            "embedding_model": pack.embedding_model,
+            "pack_checksum": pack.checksum
+        }
+    finally:
+        pack.close()
+    target = os.path.join(target_dir, PACK_FILE)
+    with open(pack_path, "rb") as src, open(f"{target}.tmp", "wb") as dst:
+        while True:
+            block = src.read(1 << 20)
+            if not block:
+                break
+            dst.write(block)
+    os.replace(f"{target}.tmp", target)
+    with open(os.path.join(target_dir, BUILD_INFO_FILE), "w", encoding="utf-8") as f:
+        json.dump(info, f, indent=2)
+    return info
+
+
+def has_pack(persist_dir: str) -> bool:
+    return os.path.exists(os.path.join(persist_dir, PACK_FILE))
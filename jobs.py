@@ -0,0 +1,170 @@
+# ==================================
+# SwiftVisa Background Jobs
+# ==================================
+#
+# Bounded job queue for slow requests (/analyze-profile). Submitting returns
+# a job id at once; a fixed pool of worker threads runs the jobs, and at most
+# max_pending jobs may be queued or running, so bursts are absorbed without
+# unbounded memory growth. Finished jobs stay readable for result_ttl seconds
+# and can additionally be POSTed to a webhook on an allowed (local) host.
+
+import contextvars
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Iterable, Optional
+from urllib.parse import urlparse
+
+from ttl_store import TTLStore
+
+logger = logging.getLogger("swiftvisa.jobs")
+
+
+class QueueFull(Exception):
+    """Raised when max_pending jobs are already queued or running"""
+
+
+def validate_webhook_url(url: str, allowed_hosts: Iterable[str]):
+    """
+    Accept only http(s) URLs on an allowed host
+
+    Raises:
+        ValueError: If the URL is malformed or its host is not allowed
+    """
+    parsed = urlparse(url)
+    if parsed.scheme not in ("http", "https") or not parsed.hostname:
+        raise ValueError("callback_url must be an http(s) URL")
+    allowed = {host.strip().lower() for host in allowed_hosts if host.strip()}
+    if parsed.hostname.lower() not in allowed:
+        raise ValueError(f"callback_url host must be one of: {', '.join(sorted(allowed))}")
+
+
+class JobQueue:
+    """Fixed worker pool with a bounded backlog and a TTL result store"""
+
+    def __init__(self, workers: int = 4, max_pending: int = 100, result_ttl: float = 3600,
+                 max_results: int = 10000, webhook_timeout: float = 5.0, webhook_retries: int = 2):
+        self.workers = max(1, workers)
+        self.max_pending = max_pending
+        self.webhook_timeout = webhook_timeout
+        self.webhook_retries = webhook_retries
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="job-worker")
+        self._active = {}
+        self._lock = threading.Lock()
+        self.results = TTLStore(result_ttl, max_entries=max_results)
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    def submit(self, kind: str, fn: Callable[[], dict], callback_url: Optional[str] = None) -> dict:
+        """
+        Queue a job
+
+        Args:
+            kind: Job type, reported back to clients
+            fn: Work to run; its return value becomes the job result
+            callback_url: Optional webhook notified when the job finishes
+
+        Returns:
+            The queued job record
+
+        Raises:
+            QueueFull: If max_pending jobs are already queued or running
+        """
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "kind": kind,
+            "status": "queued",
+            "submitted_at": datetime.now().isoformat(),
+            "started_at": None,
+            "finished_at": None,
+            "result": None,
+            "error": None,
+            "callback_url": callback_url,
+            "webhook": None
+        }
+        with self._lock:
+            if len(self._active) >= self.max_pending:
+                self.rejected += 1
+                raise QueueFull(f"{len(self._active)} jobs already pending")
+            self._active[job["job_id"]] = job
+            self.submitted += 1
+            record = dict(job)
+        # The job runs in the submitting request's context (trace, client)
+        self._executor.submit(contextvars.copy_context().run, self._run, job, fn)
+        return record
+
+    def _run(self, job: dict, fn: Callable[[], dict]):
+        job["status"] = "running"
+        job["started_at"] = datetime.now().isoformat()
+        started = time.perf_counter()
+        try:
+            job["result"] = fn()
+            job["status"] = "done"
+        except Exception as e:
+            logger.error(f"❌ Job {job['job_id']} failed: {e}")
+            job["error"] = str(e)
+            job["status"] = "failed"
+        job["finished_at"] = datetime.now().isoformat()
+        job["duration_seconds"] = round(time.perf_counter() - started, 3)
+
+        with self._lock:
+            self.completed += 1 if job["status"] == "done" else 0
+            self.failed += 1 if job["status"] == "failed" else 0
+            self.results.put(job["job_id"], job)
+            self._active.pop(job["job_id"], None)
+        if job["callback_url"]:
+            job["webhook"] = self._notify(job)
+
+    def _notify(self, job: dict) -> dict:
+        """POST the finished job to its webhook, retrying with backoff"""
+        import httpx
+
+        payload = {k: v for k, v in job.items() if k != "webhook"}
+        error = None
+        for attempt in range(1 + self.webhook_retries):
+            try:
+                response = httpx.post(job["callback_url"], json=payload, timeout=self.webhook_timeout)
+                if response.status_code < 400:
+                    return {"delivered": True, "status_code": response.status_code, "attempts": attempt + 1}
+                error = f"HTTP {response.status_code}"
+            except httpx.HTTPError as e:
+                error = str(e)
+            time.sleep(0.5 * 2 ** attempt)
+        logger.warning(f"⚠️ Webhook for job {job['job_id']} failed: {error}")
+        return {"delivered": False, "error": error, "attempts": 1 + self.webhook_retries}
+
+    def get(self, job_id: str) -> Optional[dict]:
+        """Current record of a job, or None if unknown or expired"""
+        with self._lock:
+            job = self._active.get(job_id)
+            if job is not None:
+                record = dict(job)
+                if record["status"] == "queued":
+                    queued = [j for j in self._active.values() if j["status"] == "queued"]
+                    record["queue_position"] = queued.index(job) + 1 if job in queued else None
+                return record
+        job = self.results.get(job_id)
+        return dict(job) if job is not None else None
+
+    def stats(self) -> dict:
+        with self._lock:
+            statuses = [job["status"] for job in self._active.values()]
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "queued": statuses.count("queued"),
+            "running": statuses.count("running"),
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "results": self.results.stats()
+        }
+
+    def shutdown(self, wait: bool = False):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
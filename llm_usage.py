@@ -0,0 +1,168 @@
+# ==================================
+# SwiftVisa LLM Usage Accounting
+# ==================================
+#
+# Prompt/completion tokens, estimated cost and model latency of every LLM
+# call, aggregated in memory by (endpoint, provider, destination) and per
+# client per day. Daily budgets - one for the whole deployment, one per
+# client - are checked before each LLM call; once spent, callers serve
+# retrieval-only answers until the next (UTC) day.
+
+import threading
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+COUNTERS = ("calls", "prompt_tokens", "completion_tokens", "cost_usd", "llm_seconds")
+
+
+def llm_cost(prompt_tokens: int, completion_tokens: int, prompt_price_per_1k: float,
+             completion_price_per_1k: float) -> float:
+    """Estimated USD cost of one call at per-1K-token list prices"""
+    return prompt_tokens / 1000 * prompt_price_per_1k + completion_tokens / 1000 * completion_price_per_1k
+
+
+def _utc_day() -> str:
+    return datetime.now(timezone.utc).date().isoformat()
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class UsageLedger:
+    """Thread-safe usage totals with daily and per-client budgets"""
+
+    def __init__(self, prompt_price_per_1k: float, completion_price_per_1k: float, daily_budget_usd: float = 0.0,
+                 client_daily_budget_usd: float = 0.0, max_clients: int = 10000,
+                 day: Callable[[], str] = _utc_day):
+        """
+        Args:
+            prompt_price_per_1k: USD per 1K prompt tokens
+            completion_price_per_1k: USD per 1K completion tokens
+            daily_budget_usd: Spend per day across all clients (0 = unlimited)
+            client_daily_budget_usd: Spend per client per day (0 = unlimited)
+            max_clients: Clients tracked per day; further clients share one bucket
+            day: Returns the current budget day (UTC date by default)
+        """
+        self.prompt_price_per_1k = prompt_price_per_1k
+        self.completion_price_per_1k = completion_price_per_1k
+        self.daily_budget_usd = daily_budget_usd
+        self.client_daily_budget_usd = client_daily_budget_usd
+        self.max_clients = max_clients
+        self._day = day
+        self._lock = threading.Lock()
+        self._totals: Dict[Tuple[str, str, str], Dict[str, float]] = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+        self._today = day()
+        self._today_cost = 0.0
+        self._client_cost: Dict[str, float] = defaultdict(float)
+        self.denied = {"daily": 0, "client": 0}
+
+    def _roll_day(self):
+        today = self._day()
+        if today != self._today:
+            self._today = today
+            self._today_cost = 0.0
+            self._client_cost.clear()
+
+    def _client_key(self, client: Optional[str]) -> str:
+        client = client or "anonymous"
+        if client in self._client_cost or len(self._client_cost) < self.max_clients:
+            return client
+        return "other"
+
+    def record(self, endpoint: Optional[str], provider: Optional[str], destination: Optional[str],
+               client: Optional[str], prompt_tokens: int, completion_tokens: int, llm_seconds: float) -> float:
+        """
+        Add one LLM call
+
+        Returns:
+            Its estimated cost in USD
+        """
+        cost = llm_cost(prompt_tokens, completion_tokens, self.prompt_price_per_1k, self.completion_price_per_1k)
+        key = (endpoint or "background", provider or "unknown", destination or "unknown")
+        with self._lock:
+            self._roll_day()
+            totals = self._totals[key]
+            totals["calls"] += 1
+            totals["prompt_tokens"] += prompt_tokens
+            totals["completion_tokens"] += completion_tokens
+            totals["cost_usd"] += cost
+            totals["llm_seconds"] += llm_seconds
+            self._today_cost += cost
+            self._client_cost[self._client_key(client)] += cost
+        return cost
+
+    def check(self, client: Optional[str]) -> Optional[str]:
+        """
+        Budget that blocks another LLM call for a client
+
+        Returns:
+            None if the call is allowed, otherwise "daily" or "client"
+        """
+        with self._lock:
+            self._roll_day()
+            if self.daily_budget_usd > 0 and self._today_cost >= self.daily_budget_usd:
+                self.denied["daily"] += 1
+                return "daily"
+            if (self.client_daily_budget_usd > 0
+                    and self._client_cost.get(self._client_key(client), 0.0) >= self.client_daily_budget_usd):
+                self.denied["client"] += 1
+                return "client"
+        return None
+
+    def _grouped(self, index: int) -> Dict[str, Dict[str, float]]:
+        grouped: Dict[str, Dict[str, float]] = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+        for key, totals in self._totals.items():
+            for counter, value in totals.items():
+                grouped[key[index]][counter] += value
+        return {name: {k: round(v, 6) for k, v in totals.items()} for name, totals in sorted(grouped.items())}
+
+    def snapshot(self, top_clients: int = 10) -> dict:
+        """Totals by endpoint, provider and destination, and today's budget state"""
+        with self._lock:
+            self._roll_day()
+            clients = sorted(self._client_cost.items(), key=lambda item: -item[1])[:top_clients]
+            return {
+                "by_endpoint": self._grouped(0),
+                "by_provider": self._grouped(1),
+                "by_destination": self._grouped(2),
+                "budget": {
+                    "day": self._today,
+                    "spent_usd": round(self._today_cost, 6),
+                    "daily_budget_usd": self.daily_budget_usd or None,
+                    "client_daily_budget_usd": self.client_daily_budget_usd or None,
+                    "daily_exceeded": self.daily_budget_usd > 0 and self._today_cost >= self.daily_budget_usd,
+                    "denied_calls": dict(self.denied),
+                    "top_clients": [{"client": c, "spent_usd": round(v, 6)} for c, v in clients]
+                }
+            }
+
+    def prometheus_lines(self, prefix: str = "swiftvisa") -> List[str]:
+        """Counters and budget gauges in the Prometheus text exposition format"""
+        metrics = {
+            "calls": ("llm_calls_total", "LLM calls"),
+            "prompt_tokens": ("llm_prompt_tokens_total", "Prompt tokens sent to the LLM"),
+            "completion_tokens": ("llm_completion_tokens_total", "Completion tokens returned by the LLM"),
+            "cost_usd": ("llm_cost_usd_total", "Estimated LLM cost in USD"),
+            "llm_seconds": ("llm_latency_seconds_total", "Time spent waiting for the LLM"),
+        }
+        lines = []
+        with self._lock:
+            self._roll_day()
+            items = sorted(self._totals.items())
+            for counter, (name, help_text) in metrics.items():
+                lines.append(f"# HELP {prefix}_{name} {help_text}")
+                lines.append(f"# TYPE {prefix}_{name} counter")
+                for (endpoint, provider, destination), totals in items:
+                    labels = (f'endpoint="{_escape(endpoint)}",provider="{_escape(provider)}",'
+                              f'destination="{_escape(destination)}"')
+                    lines.append(f"{prefix}_{name}{{{labels}}} {round(totals[counter], 6)}")
+            lines.append(f"# HELP {prefix}_llm_spend_today_usd Estimated LLM spend of the current UTC day")
+            lines.append(f"# TYPE {prefix}_llm_spend_today_usd gauge")
+            lines.append(f"{prefix}_llm_spend_today_usd {round(self._today_cost, 6)}")
+            lines.append(f"# HELP {prefix}_llm_budget_denied_total LLM calls replaced by retrieval-only answers")
+            lines.append(f"# TYPE {prefix}_llm_budget_denied_total counter")
+            for scope, count in sorted(self.denied.items()):
+                lines.append(f'{prefix}_llm_budget_denied_total{{scope="{scope}"}} {count}')
+        return lines
@@ -5,11 +5,18 @@
 import os
 from datetime import datetime
 from dotenv import load_dotenv
-from fastapi import FastAPI, Request
+from fastapi import Depends, FastAPI, Header, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel
+from typing import Optional
+import hmac
+import json
+import threading
 import time
 
+import numpy as np
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -31,26 +38,104 @@ except ImportError as e:
     logger = logging.getLogger("swiftvisa")
     logger.warning(f"Could not import config/logging modules: {e}")
 
+# A packaged embedding model (EMBEDDING_MODEL_PATH) is loaded without the hub.
+# Switched off before the heavy imports below: huggingface_hub reads the
+# setting once, when it is first imported (by chromadb or the ML runtime)
+from embedding_model import enable_offline_mode
+
+if settings.EMBEDDING_MODEL_PATH:
+    enable_offline_mode()
+
+# Memory profile (MEMORY_PROFILE=True): created before the heavy imports below
+# so each startup phase's RSS and allocations are recorded (/admin/memory)
+from memory_profile import MemoryProfiler
+
+memory_profile = MemoryProfiler(
+    settings.MEMORY_PROFILE, every=settings.MEMORY_PROFILE_EVERY, frames=settings.MEMORY_PROFILE_FRAMES
+)
+
 # --- LangChain imports (final for your versions) ---
 from langchain_chroma import Chroma
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_classic.chains import RetrievalQA
+from langchain_classic.chains.question_answering import load_qa_chain
 from langchain_openai import ChatOpenAI
 
+memory_profile.mark("langchain_and_chroma_imports")
+
+from catalog import catalog_pairs, load_catalog
+from embedding_model import load_embeddings
+from chunk_store import decode_cursor, encode_cursor, open_chunk_store, parse_byte_range
+from materialize import (
+    build_answer_items,
+    canonical_query,
+    eligibility_key,
+    index_fingerprint,
+    open_answer_store,
+    requirements_key,
+    top_profiles,
+    write_answer_store,
+)
+from snapshots import (
+    LiveIndex,
+    build_snapshot,
+    current_version,
+    gc_snapshots,
+    list_snapshots,
+    publish_snapshot,
+    resolve_live_dir,
+)
+from extractive import SentenceIndex, format_extractive_answer, rank_sentences
+from quantized_index import QUANTIZED_DIR, QuantizedVectorStore
+from readonly_index import CHROMA_SQLITE_FILE, ReadOnlyChromaStore, ReadOnlyIndexError
+from index_pack import PACK_FILE, IndexPack, has_pack
+from sharding import COUNTRY_ALIASES, ShardedChunks, ShardedVectorStore, read_shard_manifest
+from static_frontend import PrecompressedStaticFiles
+from hnsw_config import apply_search_ef, hnsw_collection_metadata
+from profiling import ProfileStore, StackSampler, should_sample, to_collapsed
+from rules_engine import RuleStats, RuleTable, format_rules_answer
+from jobs import JobQueue, QueueFull, validate_webhook_url
+from sessions import RetrievalSession
+from suggest import KINDS as SUGGEST_KINDS, QueryPopularity, SuggestIndex
+from ttl_store import TTLStore
+from llm_usage import UsageLedger
+from answer_chain import CHAIN_MODES, context_tokens, map_reduce_events, select_chain_mode
+from stub_llm import StubChatModel
+from traffic_capture import TrafficCapture, route_key
+from retrieval_params import (
+    RetrievalParams,
+    RetrievalParamsError,
+    RetrievalTuner,
+    current_params,
+    mmr_select,
+    use_params,
+)
+from prefetch import PrefetchCache, PrefetchedContext, SlidingWindowLimiter, prefetch_key
+from request_trace import (
+    SlowRequestLog,
+    TokenUsageCallback,
+    annotate,
+    current_trace,
+    record_chunks,
+    start_trace,
+    trace_stage,
+)
+
+memory_profile.mark("app_modules")
+
 
 # ----------------------------------------
 # CONFIG
 # ----------------------------------------
 CHROMA_DB_DIR = "vectorstore"
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")  # Optional
-TOP_K = 5
+# Startup default only - the live value is retrieval_tuner.defaults.k
+TOP_K = settings.TOP_K
 
 # Check if we have a valid OpenAI API key (not placeholder)
 USE_OPENAI = OPENAI_API_KEY and OPENAI_API_KEY.startswith("sk-") and "your-" not in OPENAI_API_KEY.lower() and len(OPENAI_API_KEY) > 20
 
 # Determine which LLM to use
-USE_LLM = USE_OPENAI
-LLM_PROVIDER = "openai" if USE_OPENAI else "none"
+USE_LLM = USE_OPENAI or settings.STUB_LLM
+LLM_PROVIDER = "stub" if settings.STUB_LLM else "openai" if USE_OPENAI else "none"
 
 # ----------------------------------------
 # FASTAPI SETUP
@@ -73,33 +158,242 @@ app.add_middleware(
 )
 
 
+# Slow requests keep full diagnostics (query, chunks, stage timings, tokens, provider)
+slow_request_log = SlowRequestLog(
+    threshold_ms=settings.SLOW_REQUEST_THRESHOLD_MS,
+    capacity=settings.SLOW_REQUEST_BUFFER_SIZE,
+    log_file=settings.SLOW_REQUEST_LOG_FILE
+)
+
+# LLM tokens, cost and latency per endpoint/provider/destination, with budgets
+usage_ledger = UsageLedger(
+    settings.LLM_PROMPT_PRICE_PER_1K,
+    settings.LLM_COMPLETION_PRICE_PER_1K,
+    daily_budget_usd=settings.LLM_DAILY_BUDGET_USD,
+    client_daily_budget_usd=settings.LLM_CLIENT_DAILY_BUDGET_USD
+)
+
+
 # Request Logging Middleware
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
     """Log all incoming requests"""
     start_time = time.time()
+    trace = start_trace(request.method, request.url.path)
+    # Budgets and usage are per X-Client-Id, or per client address without one
+    trace.client = request.headers.get("x-client-id") or (request.client.host if request.client else None)
     
     logger.info(f"→ {request.method} {request.url.path} from {request.client.host if request.client else 'unknown'}")
     
     try:
         response = await call_next(request)
-        duration = time.time() - start_time
-        logger.info(f"← {request.method} {request.url.path} - Status: {response.status_code} - Duration: {duration:.3f}s")
-        return response
     except Exception as e:
         duration = time.time() - start_time
         logger.error(f"✗ {request.method} {request.url.path} - Error: {str(e)} - Duration: {duration:.3f}s")
+        trace.finish(500)
+        slow_request_log.observe(trace)
         raise
 
+    def finish(status: int):
+        duration = time.time() - start_time
+        logger.info(f"← {request.method} {request.url.path} - Status: {status} - Duration: {duration:.3f}s")
+        trace.finish(status)
+        if trace.variant is not None:
+            retrieval_tuner.observe(trace.variant, request.url.path, trace.duration_ms, trace.status, trace.stages,
+                                    trace.prompt_tokens, trace.completion_tokens)
+        if slow_request_log.observe(trace):
+            logger.warning(f"🐢 Slow request {request.method} {request.url.path}: {trace.duration_ms:.0f}ms {trace.stages}")
+
+    # Streaming endpoints do their retrieval/LLM work while the body is sent,
+    # so the trace is finished once the body is exhausted, not when call_next returns
+    body_iterator = response.body_iterator
+
+    async def traced_body():
+        status = response.status_code
+        try:
+            async for chunk in body_iterator:
+                yield chunk
+        except Exception:
+            status = 500
+            raise
+        finally:
+            finish(status)
+
+    response.body_iterator = traced_body()
+    return response
+
+
+# Traffic Capture Middleware (opt-in via TRAFFIC_CAPTURE_FILE)
+traffic_capture = TrafficCapture(
+    settings.TRAFFIC_CAPTURE_FILE,
+    [p.strip() for p in settings.TRAFFIC_CAPTURE_ENDPOINTS.split(",")],
+    sample_rate=settings.TRAFFIC_CAPTURE_SAMPLE_RATE,
+    salt=settings.TRAFFIC_CAPTURE_SALT
+) if settings.TRAFFIC_CAPTURE_FILE else None
+
+
+@app.middleware("http")
+async def capture_traffic(request: Request, call_next):
+    """Write sanitized requests to TRAFFIC_CAPTURE_FILE for offline replay"""
+    if traffic_capture is None or not traffic_capture.wants(request.url.path):
+        return await call_next(request)
+    arrived = time.time()
+    body = await request.body()
+    response = await call_next(request)
+    traffic_capture.record(
+        arrived, request.method, request.url.path, request.url.query, body, response.status_code,
+        (time.time() - arrived) * 1000,
+        request.headers.get("x-client-id") or (request.client.host if request.client else None)
+    )
+    return response
+
+
+# Memory Accounting Middleware (opt-in via MEMORY_PROFILE)
+@app.middleware("http")
+async def account_memory(request: Request, call_next):
+    """Per-endpoint retained/peak Python allocation (MEMORY_PROFILE=True)"""
+    if not memory_profile.enabled:
+        return await call_next(request)
+    started = memory_profile.request_started()
+    response = await call_next(request)
+    # The matched route template when routing got that far, so path parameters do not split endpoints
+    route = getattr(request.scope.get("route"), "path", None) or route_key(request.url.path)
+    memory_profile.request_finished(f"{request.method} {route}", started)
+    return response
+
+
+def is_admin_token(token: Optional[str]) -> bool:
+    """Check a caller-supplied admin token against ADMIN_TOKEN"""
+    return bool(settings.ADMIN_TOKEN and token and hmac.compare_digest(token, settings.ADMIN_TOKEN))
+
+
+# Sampling Profiler Middleware
+profile_store = ProfileStore(max_profiles=settings.PROFILE_MAX_STORED)
+PROFILED_ENDPOINTS = {p.strip() for p in settings.PROFILE_ENDPOINTS.split(",") if p.strip()}
+
+
+@app.middleware("http")
+async def profile_requests(request: Request, call_next):
+    """
+    Profile admin requests sent with X-Profile: 1 (or ?profile=1) and a random
+    PROFILE_SAMPLE_RATE fraction of PROFILED_ENDPOINTS traffic
+    """
+    flag = request.headers.get("x-profile") or request.query_params.get("profile")
+    explicit = flag in ("1", "true") and is_admin_token(request.headers.get("x-admin-token"))
+    sampled = request.url.path in PROFILED_ENDPOINTS and should_sample(settings.PROFILE_SAMPLE_RATE)
+    if not (explicit or sampled):
+        return await call_next(request)
+
+    sampler = StackSampler(threading.get_ident(), settings.PROFILE_INTERVAL_MS / 1000).start()
+    start_time = time.time()
+    try:
+        response = await call_next(request)
+    finally:
+        stacks = sampler.stop()
+
+    if sampled:
+        profile_store.add_to_aggregate(request.url.path, stacks)
+    if explicit:
+        profile_id = profile_store.save(request.url.path, stacks, time.time() - start_time)
+        response.headers["X-Profile-Id"] = profile_id
+    return response
+
 # ----------------------------------------
 # LOAD VECTORSTORE
 # ----------------------------------------
+class IndexHandle:
+    """One opened vectorstore snapshot and its stores"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.version = current_version(CHROMA_DB_DIR) if path != CHROMA_DB_DIR else "legacy"
+        self.fingerprint = index_fingerprint(path)
+        self.backend = "chroma"
+        quantized_dir = os.path.join(path, QUANTIZED_DIR)
+        self.pack = None
+        # Installed packs have no Chroma files, so they are served whatever the backend setting
+        if has_pack(path) and (settings.VECTOR_INDEX_BACKEND == "pack"
+                               or not os.path.exists(os.path.join(path, CHROMA_SQLITE_FILE))):
+            self.pack = IndexPack(os.path.join(path, PACK_FILE))
+            self.db = self.pack.vector_store(embeddings)
+            self.backend = "pack"
+            logger.info(f"📦 Serving {self.pack.count} chunks from {PACK_FILE} (memory-mapped)")
+            if self.pack.embedding_model != settings.EMBEDDING_MODEL:
+                logger.warning(f"⚠️ {PACK_FILE} was built with {self.pack.embedding_model}, "
+                               f"queries use {settings.EMBEDDING_MODEL}")
+        elif settings.VECTOR_INDEX_BACKEND == "quantized" and os.path.exists(os.path.join(quantized_dir, "manifest.json")):
+            self.db = QuantizedVectorStore.load(
+                quantized_dir, embeddings,
+                mode=settings.QUANTIZED_MODE, oversample=settings.QUANTIZED_OVERSAMPLE
+            )
+            self.backend = "quantized"
+        elif settings.VECTOR_INDEX_BACKEND == "sharded" and read_shard_manifest(path):
+            self.db = ShardedVectorStore(
+                path, embeddings, max_workers=settings.SHARD_SEARCH_WORKERS, search_ef=settings.HNSW_SEARCH_EF
+            )
+            self.backend = "sharded"
+        elif settings.VECTOR_INDEX_BACKEND == "readonly" and self._open_readonly(path):
+            self.backend = "readonly"
+        else:
+            if settings.VECTOR_INDEX_BACKEND in ("quantized", "sharded", "readonly", "pack"):
+                logger.warning(f"⚠️ No {settings.VECTOR_INDEX_BACKEND} index in {path} - serving from Chroma")
+            self.db = Chroma(persist_directory=path, embedding_function=embeddings)
+            try:
+                if apply_search_ef(self.db._collection, settings.HNSW_SEARCH_EF):
+                    logger.info(f"🔧 HNSW search_ef set to {settings.HNSW_SEARCH_EF}")
+            except Exception as e:
+                logger.warning(f"⚠️ Could not apply HNSW search_ef: {e}")
+        if self.backend == "pack":
+            self.chunks = self.pack.chunk_store()
+        else:
+            self.chunks = ShardedChunks(path) if self.backend == "sharded" else open_chunk_store(path)
+        if self.chunks is None:
+            logger.warning(f"⚠️ No chunk store in {path} - /chunks reads from the collection until the next build")
+        # Catalog read once per index, for /countries, /visa-types and /stats
+        self.catalog = load_catalog(settings.DATA_CLEAN_DIR)
+        pairs = sorted({(entry.country, entry.visa_type) for entry in self.catalog})
+        self.rules = RuleTable.load(path, pairs, settings.DATA_CLEAN_DIR)
+        self.suggest = SuggestIndex.load(path, settings.DATA_CLEAN_DIR)
+        self.sentences = SentenceIndex.load(path) if self.backend != "sharded" else None
+        self.loaded_at = datetime.now().isoformat()
+
+    def close(self):
+        """Release what a drained index holds beyond memory"""
+        if self.backend == "sharded":
+            self.db.close()
+
+    def _open_readonly(self, path: str) -> bool:
+        """Load the collection into memory from an immutable SQLite open"""
+        try:
+            self.db = ReadOnlyChromaStore.load(path, embeddings)
+        except ReadOnlyIndexError as e:
+            logger.warning(f"⚠️ {e}")
+            return False
+        logger.info(f"🔒 Serving {len(self.db.ids)} chunks read-only from memory ({self.db.source} vectors)")
+        return True
+
+
+def _on_index_drained(handle: IndexHandle):
+    """Garbage-collect old snapshots once a swapped-out index is idle"""
+    logger.info(f"♻️ Index {handle.version} drained")
+    handle.close()
+    in_use = [live_index.current.path] + [h.path for h in live_index.draining()]
+    removed = gc_snapshots(CHROMA_DB_DIR, keep=settings.SNAPSHOT_KEEP, in_use=in_use)
+    if removed:
+        logger.info(f"🗑️ Removed old snapshots: {', '.join(removed)}")
+
+
 logger.info("🔍 Loading embeddings and Chroma vectorstore...")
 try:
-    embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
-    db = Chroma(persist_directory=CHROMA_DB_DIR, embedding_function=embeddings)
-    retriever = db.as_retriever(search_type="similarity", search_kwargs={"k": TOP_K})
-    logger.info("✅ Vectorstore loaded successfully.")
+    # The ML runtime is imported on its own first so its cost is not counted as model weights
+    memory_profile.preimport("torch", "sentence_transformers")
+    memory_profile.mark("ml_runtime")
+    embeddings = load_embeddings(settings.EMBEDDING_MODEL, settings.EMBEDDING_MODEL_PATH,
+                                 verify=settings.EMBEDDING_MODEL_VERIFY)
+    memory_profile.mark("embedding_model")
+    live_index = LiveIndex(IndexHandle(resolve_live_dir(CHROMA_DB_DIR)), on_drained=_on_index_drained)
+    memory_profile.mark("vectorstore")
+    logger.info(f"✅ Vectorstore loaded successfully (version: {live_index.current.version}).")
 except Exception as e:
     logger.error(f"❌ Failed to load vectorstore: {e}")
     raise
@@ -120,6 +414,13 @@ class VectorStoreQuery(BaseModel):
     k: int = TOP_K
 
 
+class VectorStoreSearch(BaseModel):
+    query: str
+    page_size: int = 10
+    cursor: Optional[str] = None
+    country: Optional[str] = None
+
+
 class PolicyDocument(BaseModel):
     country: str
     visa_type: str
@@ -127,20 +428,248 @@ class PolicyDocument(BaseModel):
     metadata: dict = {}
 
 
+# ----------------------------------------
+# RETRIEVAL PARAMETERS
+# ----------------------------------------
+# k, search type and answer chain, tunable at runtime via /admin/retrieval,
+# split across named variants and overridable per request (see retrieval_params.py)
+retrieval_tuner = RetrievalTuner(
+    RetrievalParams(
+        k=settings.TOP_K, fetch_k=settings.RETRIEVAL_FETCH_K, search_type=settings.RETRIEVAL_SEARCH_TYPE,
+        score_threshold=settings.RETRIEVAL_SCORE_THRESHOLD, lambda_mult=settings.RETRIEVAL_MMR_LAMBDA,
+        chain_type=settings.LLM_CHAIN_MODE, requirements_k=settings.REQUIREMENTS_TOP_K
+    ),
+    max_k=settings.RETRIEVAL_MAX_K,
+    max_fetch_k=settings.RETRIEVAL_MAX_FETCH_K,
+    allow_overrides=settings.RETRIEVAL_ALLOW_OVERRIDES
+)
+
+
+def retrieval_params() -> RetrievalParams:
+    """Parameters the current request is served with, or the live defaults"""
+    current = current_params()
+    return current[0] if current is not None else retrieval_tuner.defaults
+
+
+async def select_retrieval_params(variant: Optional[str] = None, k: Optional[int] = None,
+                                  fetch_k: Optional[int] = None, search_type: Optional[str] = None,
+                                  score_threshold: Optional[float] = None, lambda_mult: Optional[float] = None,
+                                  chain_type: Optional[str] = None, requirements_k: Optional[int] = None):
+    """
+    Dependency of the retrieval endpoints: pick the request's variant (the
+    ?variant= query parameter, else by client) and apply any per-request
+    overrides given as query parameters
+    """
+    trace = current_trace()
+    overrides = {"k": k, "fetch_k": fetch_k, "search_type": search_type, "score_threshold": score_threshold,
+                 "lambda_mult": lambda_mult, "chain_type": chain_type, "requirements_k": requirements_k}
+    try:
+        params, name = retrieval_tuner.resolve(trace.client if trace else None, variant, overrides)
+    except RetrievalParamsError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    use_params(params, name)
+    annotate(variant=name)
+
+
 # ----------------------------------------
 # RAG + LLM LOGIC
 # ----------------------------------------
-def run_rag_with_llm(query: str) -> str:
-    """Use LLM (OpenAI) + Chroma for reasoning."""
+def search_with_scores(index, query: str, k: int, country: Optional[str] = None) -> list:
+    """
+    (document, distance) pairs for a query
+
+    With the sharded backend a known destination country searches only that
+    country's shard; otherwise all shards are searched and merged.
+    """
+    if index.backend == "sharded":
+        return index.db.similarity_search_with_score(query, k=k, country=country)
+    return index.db.similarity_search_with_score(query, k=k)
+
+
+def search_by_vector(index, vector, k: int, country: Optional[str] = None) -> list:
+    """(document, distance) pairs for an already embedded query"""
+    if index.backend == "chroma":
+        # Despite the name, langchain_chroma returns raw distances here
+        return index.db.similarity_search_by_vector_with_relevance_scores(vector, k=k)
+    if index.backend == "sharded":
+        return index.db.similarity_search_by_vector_with_score(vector, k, country)
+    return index.db.similarity_search_by_vector_with_score(vector, k)
+
+
+def stored_vectors(index, docs: list) -> Optional[np.ndarray]:
+    """Vectors of retrieved chunks as stored in the index, or None if the backend cannot return them"""
+    ids = [getattr(doc, "id", None) for doc in docs]
+    if docs and all(ids) and index.backend != "sharded" and hasattr(index.db, "get"):
+        stored = index.db.get(ids=ids, include=["embeddings"])
+        by_id = dict(zip(stored.get("ids", []), stored.get("embeddings", [])))
+        if all(chunk_id in by_id for chunk_id in ids):
+            return np.asarray([by_id[chunk_id] for chunk_id in ids], dtype=np.float32)
+    return None
+
+
+def candidate_vectors(index, docs: list) -> np.ndarray:
+    """Stored vectors of retrieved chunks, embedded again only if the backend cannot return them"""
+    vectors = stored_vectors(index, docs)
+    if vectors is not None:
+        return vectors
+    return np.asarray(embeddings.embed_documents([doc.page_content for doc in docs]), dtype=np.float32)
+
+
+def search_with_params(index, query: str, k: int, country: Optional[str], params: RetrievalParams) -> list:
+    """
+    (document, score) pairs by the request's search type
+
+    "similarity": the k nearest chunks, scored by distance.
+    "similarity_score_threshold": those of the k nearest whose relevance
+    (0-1, higher is better) reaches score_threshold, scored by relevance.
+    "mmr": k of the fetch_k nearest chosen by maximal marginal relevance,
+    scored by distance.
+    """
+    if params.search_type == "similarity_score_threshold":
+        relevance = index.db._select_relevance_score_fn()
+        scored = [(doc, relevance(score)) for doc, score in search_with_scores(index, query, k, country)]
+        return [(doc, score) for doc, score in scored if score >= params.score_threshold]
+    if params.search_type == "mmr":
+        vector = embeddings.embed_query(query)
+        candidates = search_by_vector(index, vector, max(params.fetch_k, k), country)
+        if len(candidates) <= k:
+            return candidates
+        rows = mmr_select(vector, candidate_vectors(index, [doc for doc, _ in candidates]), k, params.lambda_mult)
+        return [candidates[row] for row in rows]
+    return search_with_scores(index, query, k, country)
+
+
+def retrieve_documents(index, query: str, k: Optional[int] = None, country: Optional[str] = None) -> list:
+    """
+    Search with the request's retrieval parameters (k defaults to theirs),
+    recording chunk ids and scores on the request trace
+    """
+    params = retrieval_params()
+    annotate(query=canonical_query(query))
+    with trace_stage("retrieval"):
+        results = search_with_params(index, query, k or params.k, country, params)
+    record_chunks(results)
+    return [doc for doc, _ in results]
+
+
+def create_llm():
+    """Chat model of the configured provider"""
+    if settings.STUB_LLM:
+        return StubChatModel(latency_ms=settings.STUB_LLM_LATENCY_MS)
+    if USE_OPENAI:
+        return ChatOpenAI(model="gpt-3.5-turbo", temperature=0)
+    raise ValueError("No LLM configured")
+
+
+def answer_events(llm, query: str, docs: list, callbacks: Optional[list] = None,
+                  chain_mode: Optional[str] = None):
+    """
+    Answer over already retrieved documents, yielding progress events
+
+    "stuff" runs the QA chain RetrievalQA uses, in one call; "map_reduce"
+    extracts from each chunk concurrently, then combines the extracts (see
+    answer_chain). The request's chain_type (or chain_mode) "auto" picks by
+    context size.
+    Tokens, estimated cost and latency of the calls are added to usage_ledger
+    under the current request's endpoint, destination and client.
+
+    Yields:
+        {"event": "chain", "mode", "context_tokens"}, then, for map_reduce,
+        {"event": "partial", ...} per extract, and finally {"event": "answer", "text", ...}
+    """
+    callbacks = list(callbacks or [])
+    usage = next((c for c in callbacks if isinstance(c, TokenUsageCallback)), None)
+    if usage is None:
+        usage = TokenUsageCallback()
+        callbacks.append(usage)
+    mode = select_chain_mode(chain_mode or retrieval_params().chain_type, query, docs, settings.MAP_REDUCE_MIN_TOKENS)
+    annotate(chain_mode=mode)
+    yield {"event": "chain", "mode": mode, "context_tokens": context_tokens(query, docs)}
+
+    started = time.perf_counter()
+    try:
+        if mode == "map_reduce":
+            yield from map_reduce_events(llm, query, docs, settings.MAP_REDUCE_CONCURRENCY,
+                                         settings.MAP_REDUCE_MAP_MAX_TOKENS, callbacks)
+        else:
+            qa = load_qa_chain(llm, chain_type="stuff")
+            yield {"event": "answer", "text": qa.run(input_documents=docs, question=query, callbacks=callbacks)}
+    finally:
+        trace = current_trace()
+        usage_ledger.record(
+            trace.path if trace else None, LLM_PROVIDER, trace.destination if trace else None,
+            trace.client if trace else None, usage.prompt_tokens, usage.completion_tokens,
+            time.perf_counter() - started
+        )
+
+
+def answer_with_llm(llm, query: str, docs: list, callbacks: Optional[list] = None,
+                    chain_mode: Optional[str] = None) -> str:
+    """Final answer of answer_events()"""
+    answer = ""
+    for event in answer_events(llm, query, docs, callbacks, chain_mode):
+        if event["event"] == "answer":
+            answer = event["text"]
+    return answer
+
+
+def llm_allowed() -> bool:
+    """Whether to call the LLM: one is configured and no budget is spent"""
+    if not USE_LLM:
+        return False
+    trace = current_trace()
+    breached = usage_ledger.check(trace.client if trace else None)
+    if breached is not None:
+        logger.warning(f"💸 {'Daily' if breached == 'daily' else 'Client'} LLM budget spent - using retrieval-only mode")
+        return False
+    return True
+
+
+def format_retrieval_answer(docs: list) -> str:
+    """Retrieval-only answer built from the most relevant document"""
+    if not docs:
+        return "❌ No relevant visa information found for your query. Please try different search terms or contact support."
+
+    # Get only the most relevant document (top result)
+    content = docs[0].page_content.strip()
+    return f"""🔍 **VISA ELIGIBILITY ASSESSMENT**
+
+Based on the most relevant visa policy document:
+
+📋 {content}
+
+---
+💡 **Note**: This result is based on official visa policy documents. For the most accurate and up-to-date information, please verify with the official embassy or consulate."""
+
+
+def retrieval_answer(index, query: str, docs: list) -> str:
+    """
+    Retrieval-only answer: the retrieved chunks' sentences that best match the
+    query, with citations, or the top document if extraction is off or finds nothing
+    """
+    if settings.EXTRACTIVE_ANSWERS and docs:
+        with trace_stage("extract"):
+            hits = rank_sentences(
+                embeddings.embed_query(query), docs, index.sentences, embeddings,
+                limit=settings.EXTRACTIVE_MAX_SENTENCES, min_score=settings.EXTRACTIVE_MIN_SCORE
+            )
+        if hits:
+            return format_extractive_answer(hits)
+    return format_retrieval_answer(docs)
+
+
+def run_rag_with_llm(query: str, country: Optional[str] = None, docs: Optional[list] = None) -> str:
+    """Use LLM (OpenAI) + Chroma for reasoning (docs: already retrieved, e.g. prefetched)."""
     try:
         if USE_OPENAI:
             logger.info("🧠 Using ChatOpenAI (GPT-3.5) RAG reasoning...")
-            llm = ChatOpenAI(model="gpt-3.5-turbo", temperature=0)
-        else:
-            raise ValueError("No LLM configured")
+        llm = create_llm()
         
-        qa = RetrievalQA.from_chain_type(llm=llm, retriever=retriever, chain_type="stuff")
-        result = qa.run(query)
+        if docs is None:
+            with live_index.acquire() as index:
+                docs = retrieve_documents(index, query, country=country)
+        with trace_stage("llm"):
+            result = answer_with_llm(llm, query, docs, [TokenUsageCallback()])
         logger.info("✅ LLM reasoning completed successfully")
         return result
     except Exception as e:
@@ -148,76 +677,634 @@ def run_rag_with_llm(query: str) -> str:
         raise
 
 
-def run_retrieval_only(query: str) -> str:
+def run_retrieval_only(query: str, country: Optional[str] = None, docs: Optional[list] = None) -> str:
     """Fallback retrieval if no LLM key is found."""
     logger.info("ℹ️ Running retrieval-only mode (using vectorstore search).")
     try:
-        docs = retriever.invoke(query)
-        if not docs:
-            logger.warning("No documents retrieved for query")
-            return "❌ No relevant visa information found for your query. Please try different search terms or contact support."
-        
-        # Get only the most relevant document (top result)
-        top_doc = docs[0]
-        content = top_doc.page_content.strip()
-        
-        logger.info(f"✅ Retrieved the most relevant document successfully.")
-        
-        return f"""🔍 **VISA ELIGIBILITY ASSESSMENT**
-
-Based on the most relevant visa policy document:
-
-📋 {content}
-
----
-💡 **Note**: This result is based on official visa policy documents. For the most accurate and up-to-date information, please verify with the official embassy or consulate."""
+        with live_index.acquire() as index:
+            if docs is None:
+                docs = retrieve_documents(index, query, country=country)
+            if not docs:
+                logger.warning("No documents retrieved for query")
+            else:
+                logger.info(f"✅ Retrieved the most relevant document successfully.")
+            return retrieval_answer(index, query, docs)
     except Exception as e:
         logger.error(f"❌ Retrieval failed: {e}")
         raise
 
 
 
-# ----------------------------------------
-# API ENDPOINT
-# ----------------------------------------
-@app.post("/check-eligibility")
-async def check_eligibility(data: VisaRequest):
-    """Main visa eligibility checking endpoint"""
-    query = (
+def eligibility_query(data: VisaRequest) -> str:
+    """Build the retrieval/LLM query for an eligibility check"""
+    return (
         f"Determine eligibility for a {data.purposeOfVisit} visa to {data.destinationCountry} "
         f"for a citizen of {data.countryOfCitizenship}, aged {data.age}, "
         f"staying {data.lengthOfStay} days. Provide reasoning and reference policy data."
     )
-    logger.info(f"📩 Received eligibility check request: {data.destinationCountry} - {data.purposeOfVisit}")
 
-    if USE_LLM:
+
+def answer_eligibility(query: str, use_llm: bool = True, country: Optional[str] = None,
+                       docs: Optional[list] = None) -> tuple:
+    """
+    Answer an eligibility query with the LLM, falling back to retrieval-only
+
+    Args:
+        country: Destination country, used to route sharded retrieval
+        docs: Already retrieved documents (prefetched); searched for if None
+
+    Returns:
+        (result, provider) tuple
+    """
+    annotate(destination=country)
+    if use_llm and llm_allowed():
         try:
             logger.info(f"🔮 Using {LLM_PROVIDER.upper()} for intelligent reasoning...")
-            result = run_rag_with_llm(query)
+            result = run_rag_with_llm(query, country, docs)
             logger.info("✅ Eligibility check completed successfully via LLM")
-            return {
-                "eligibility": result, 
-                "provider": LLM_PROVIDER,
-                "timestamp": datetime.now().isoformat()
-            }
+            annotate(provider=LLM_PROVIDER)
+            return result, LLM_PROVIDER
         except Exception as e:
             logger.warning(f"⚠️ LLM error: {e}")
             logger.info("⚠️ Falling back to retrieval-only mode")
-            result = run_retrieval_only(query)
-            return {
-                "eligibility": result, 
-                "provider": "retrieval-only",
-                "timestamp": datetime.now().isoformat()
-            }
-    else:
+    elif not USE_LLM:
         logger.info("ℹ️ No LLM API key configured - using retrieval-only mode")
-        result = run_retrieval_only(query)
+    annotate(provider="retrieval-only")
+    return run_retrieval_only(query, country, docs), "retrieval-only"
+
+
+def search_visa_requirements(destination: str, visa_type: str) -> dict:
+    """Retrieve the top policy passages for a destination and visa type"""
+    query = f"What are the requirements for a {visa_type} visa to {destination}?"
+    with live_index.acquire() as index:
+        docs = retrieve_documents(index, query, k=retrieval_params().requirements_k, country=destination)
+
+    if not docs:
+        return {
+            "status": "not_found",
+            "message": f"No information found for {visa_type} visa to {destination}",
+            "destination": destination,
+            "visa_type": visa_type
+        }
+
+    requirements = []
+    for doc in docs:
+        requirements.append({
+            "content": doc.page_content[:800],
+            "metadata": doc.metadata if hasattr(doc, 'metadata') else {}
+        })
+
+    return {
+        "status": "success",
+        "destination": destination,
+        "visa_type": visa_type,
+        "requirements": requirements,
+        "total_documents": len(docs)
+    }
+
+
+# ----------------------------------------
+# FAST-PATH RULES
+# ----------------------------------------
+# The rule table itself lives on each IndexHandle (rules.json in the build)
+rule_stats = RuleStats()
+
+# ----------------------------------------
+# TYPEAHEAD
+# ----------------------------------------
+# The prefix index lives on each IndexHandle (suggest.json in the build);
+# submitted destinations, purposes and visa types rank its suggestions
+query_popularity = QueryPopularity()
+
+# ----------------------------------------
+# PREFETCH
+# ----------------------------------------
+# Chunk pools retrieved by /prefetch while the form is filled in, per
+# destination/purpose pair and index version (see prefetch.py)
+prefetch_cache = PrefetchCache(
+    settings.PREFETCH_TTL_SECONDS,
+    max_entries=settings.PREFETCH_MAX_ENTRIES,
+    max_inflight=settings.PREFETCH_MAX_INFLIGHT
+)
+prefetch_limiter = SlidingWindowLimiter(settings.PREFETCH_RATE_LIMIT, settings.PREFETCH_RATE_WINDOW_SECONDS)
+
+
+def catalog_country(index, destination: Optional[str]) -> Optional[str]:
+    """The catalog spelling of a destination country (aliases resolved), or None"""
+    if not destination or not destination.strip():
+        return None
+    name = COUNTRY_ALIASES.get(destination.strip().lower(), destination.strip()).lower()
+    return next((entry.country for entry in index.catalog if entry.country.lower() == name), None)
+
+
+def prefetch_query(destination: str, purpose: Optional[str]) -> str:
+    """The part of eligibility_query() known before the form is complete"""
+    return (
+        f"Determine eligibility for a {purpose or 'travel'} visa to {destination}. "
+        f"Provide reasoning and reference policy data."
+    )
+
+
+def prefetch_pool_size(params: RetrievalParams) -> int:
+    """Pooled chunks a request with these parameters is ranked from"""
+    return max(params.k, params.fetch_k) if params.search_type == "mmr" else params.k
+
+
+def fetch_prefetch_context(destination: str, purpose: Optional[str], version: str,
+                           k: int) -> Optional[PrefetchedContext]:
+    """Pool k chunks for a pair and embed them (runs on the prefetch pool)"""
+    query = prefetch_query(destination, purpose)
+    with live_index.acquire() as index:
+        if index.version != version:
+            return None
+        docs = [doc for doc, _ in search_with_scores(index, query, k, destination)]
+    logger.info(f"🛫 Prefetched {len(docs)} chunks for {destination} / {purpose or 'any purpose'}")
+    return PrefetchedContext.build(query, docs, embeddings, version, k)
+
+
+def prefetched_documents(query: str, destination: str, purpose: Optional[str]) -> Optional[list]:
+    """
+    The prefetched chunks for the full query by the request's search type, or None
+
+    Looks up the destination/purpose pool first, then the destination-only
+    one; the pool is re-ranked by cosine similarity (or MMR) instead of
+    searching the index. Pools smaller than the request needs are skipped.
+    """
+    params = retrieval_params()
+    # Pool scores are cosine similarities, not the index's relevance scale the threshold is on
+    if not settings.ENABLE_PREFETCH or params.search_type == "similarity_score_threshold":
+        return None
+    with live_index.acquire() as index:
+        country = catalog_country(index, destination)
+        if country is None:
+            return None
+        context = prefetch_cache.lookup(prefetch_key(index.version, country, purpose),
+                                        prefetch_key(index.version, country, None),
+                                        min_k=prefetch_pool_size(params))
+    if context is None:
+        return None
+    annotate(query=canonical_query(query))
+    with trace_stage("prefetch_rank"):
+        vector = embeddings.embed_query(query)
+        if params.search_type == "mmr":
+            ranked = context.mmr(vector, params.k, params.fetch_k, params.lambda_mult)
+        else:
+            ranked = context.rank(vector, params.k)
+    record_chunks(ranked)
+    return [doc for doc, _ in ranked]
+
+
+# ----------------------------------------
+# MATERIALIZED ANSWERS
+# ----------------------------------------
+answer_store = None
+_answer_store_lock = threading.Lock()
+
+
+def rebuild_answer_store() -> int:
+    """
+    Precompute requirement lookups for every catalog pair and the top profiles
+
+    Writes the read-only answer store and swaps it in for serving. Runs on a
+    background thread, so answers are built with the live default parameters,
+    which are recorded in the store.
+
+    Returns:
+        Number of records written
+    """
+    global answer_store
+
+    with _answer_store_lock:
+        fingerprint = live_index.current.fingerprint
+        params = retrieval_tuner.defaults
+        pairs = catalog_pairs(settings.DATA_CLEAN_DIR)
+
+        queries = []
+        destinations = {}
+        for profile in top_profiles(settings.PROFILE_TEMPLATES_FILE, settings.MATERIALIZE_TOP_PROFILES):
+            try:
+                request = VisaRequest(**profile)
+            except Exception as e:
+                logger.warning(f"⚠️ Skipping invalid profile template {profile}: {e}")
+                continue
+            query = eligibility_query(request)
+            queries.append(query)
+            destinations[query] = request.destinationCountry
+
+        def answer_for(query: str) -> dict:
+            result, provider = answer_eligibility(
+                query, use_llm=settings.MATERIALIZE_WITH_LLM, country=destinations.get(query)
+            )
+            return {"eligibility": result, "provider": provider}
+
+        logger.info(f"🧮 Materializing {len(pairs)} requirement lookups and {len(queries)} profiles...")
+        items = build_answer_items(search_visa_requirements, pairs, queries, answer_for)
+        count = write_answer_store(
+            settings.ANSWER_STORE_PATH, items, fingerprint,
+            embedding_model=settings.EMBEDDING_MODEL, retrieval_params=params.to_dict()
+        )
+        # The previous store is unmapped by its finalizer once in-flight lookups release it
+        answer_store = open_answer_store(settings.ANSWER_STORE_PATH, fingerprint)
+        logger.info(f"✅ Answer store written: {count} records -> {settings.ANSWER_STORE_PATH}")
+        return count
+
+
+def _rebuild_answer_store_in_background():
+    try:
+        rebuild_answer_store()
+    except Exception as e:
+        logger.error(f"❌ Answer store materialization failed: {e}")
+
+
+def answer_store_fits(store) -> bool:
+    """
+    Whether a store's answers are what this request would compute: built from
+    the live index (not until the rebuild after a swap) with the parameters the
+    request is served with (not for other variants, overrides or after the
+    defaults changed, until the rebuild that follows)
+    """
+    return (store.fingerprint == live_index.current.fingerprint
+            and store.header.get("retrieval_params") == retrieval_params().to_dict())
+
+
+def serving_answer_store():
+    """The answer store, if it fits the current request"""
+    store = answer_store
+    if store is None or not answer_store_fits(store):
+        return None
+    return store
+
+
+def lookup_materialized_eligibility(query: str):
+    """Return a precomputed eligibility answer usable in the current LLM mode"""
+    store = serving_answer_store()
+    if store is None:
+        return None
+    cached = store.get(eligibility_key(query))
+    if cached is None:
+        return None
+    # Never downgrade an LLM deployment to a precomputed retrieval-only answer
+    if USE_LLM and cached.get("provider") == "retrieval-only":
+        return None
+    return cached
+
+
+if settings.ENABLE_ANSWER_STORE:
+    answer_store = open_answer_store(settings.ANSWER_STORE_PATH, live_index.current.fingerprint)
+    if answer_store is not None and answer_store_fits(answer_store):
+        logger.info(f"✅ Answer store loaded: {answer_store.count} precomputed records")
+    elif settings.MATERIALIZE_ON_INDEX_CHANGE:
+        logger.info("🧮 Answer store missing or stale - regenerating in background...")
+        threading.Thread(target=_rebuild_answer_store_in_background, daemon=True).start()
+
+
+# ----------------------------------------
+# INDEX HOT SWAP
+# ----------------------------------------
+_swap_lock = threading.Lock()
+_reindex_lock = threading.Lock()
+reindex_status = {"state": "idle", "version": None, "error": None, "started_at": None, "finished_at": None}
+
+
+def swap_to_published() -> bool:
+    """
+    Swap the live index to the published snapshot if it changed
+
+    The new snapshot is opened and warmed before it takes traffic; in-flight
+    requests finish on the old one.
+
+    Returns:
+        True if a swap happened
+    """
+    with _swap_lock:
+        path = resolve_live_dir(CHROMA_DB_DIR)
+        if os.path.abspath(path) == os.path.abspath(live_index.current.path):
+            return False
+
+        handle = IndexHandle(path)
+        if handle.backend == "sharded":
+            # Warm only the shards this node already serves, keeping the rest unmapped
+            previous = live_index.current
+            for name in previous.db.loaded_shards() if previous.backend == "sharded" else []:
+                handle.db.shard(name)
+        else:
+            handle.db.similarity_search("visa eligibility requirements", k=1)
+        old = live_index.swap(handle)
+        logger.info(f"🔁 Swapped live index {old.version} -> {handle.version}")
+
+    if settings.ENABLE_ANSWER_STORE and settings.MATERIALIZE_ON_INDEX_CHANGE:
+        threading.Thread(target=_rebuild_answer_store_in_background, daemon=True).start()
+    return True
+
+
+def reindex_snapshot():
+    """Build a new snapshot from data/clean, publish it and swap it in"""
+    if not _reindex_lock.acquire(blocking=False):
+        raise RuntimeError("A reindex is already running")
+    try:
+        reindex_status.update(state="building", version=None, error=None,
+                              started_at=datetime.now().isoformat(), finished_at=None)
+        logger.info("🏗️ Building new vectorstore snapshot...")
+        version = build_snapshot(
+            CHROMA_DB_DIR, embeddings, settings.DATA_CLEAN_DIR, settings.EMBEDDING_MODEL,
+            quantize=settings.VECTOR_INDEX_BACKEND == "quantized",
+            shard=settings.VECTOR_INDEX_BACKEND == "sharded",
+            collection_metadata=hnsw_collection_metadata(
+                settings.HNSW_SPACE, settings.HNSW_M, settings.HNSW_CONSTRUCTION_EF, settings.HNSW_SEARCH_EF
+            ),
+            dedup_threshold=settings.DEDUP_THRESHOLD
+        )
+        publish_snapshot(CHROMA_DB_DIR, version)
+        swap_to_published()
+        reindex_status.update(state="done", version=version, finished_at=datetime.now().isoformat())
+    except Exception as e:
+        logger.error(f"❌ Reindex failed: {e}")
+        reindex_status.update(state="failed", error=str(e), finished_at=datetime.now().isoformat())
+    finally:
+        _reindex_lock.release()
+
+
+def _watch_published_snapshot():
+    """Pick up snapshots published by external builds (create_vectorstore.py --snapshot)"""
+    while True:
+        time.sleep(settings.SNAPSHOT_WATCH_INTERVAL)
+        try:
+            swap_to_published()
+        except Exception as e:
+            logger.error(f"❌ Snapshot swap failed: {e}")
+
+
+if settings.SNAPSHOT_WATCH_INTERVAL > 0:
+    threading.Thread(target=_watch_published_snapshot, daemon=True).start()
+
+
+# ----------------------------------------
+# API ENDPOINT
+# ----------------------------------------
+@app.post("/check-eligibility", dependencies=[Depends(select_retrieval_params)])
+async def check_eligibility(data: VisaRequest):
+    """Main visa eligibility checking endpoint"""
+    query = eligibility_query(data)
+    logger.info(f"📩 Received eligibility check request: {data.destinationCountry} - {data.purposeOfVisit}")
+    query_popularity.record("country", data.destinationCountry)
+    query_popularity.record("purpose", data.purposeOfVisit)
+
+    with trace_stage("answer_store"):
+        cached = lookup_materialized_eligibility(query)
+    if cached is not None:
+        logger.info("⚡ Served precomputed eligibility answer")
+        annotate(query=canonical_query(query), provider="materialized")
         return {
-            "eligibility": result, 
-            "provider": "retrieval-only",
-            "timestamp": datetime.now().isoformat()
+            "eligibility": cached["eligibility"],
+            "provider": cached["provider"],
+            "timestamp": datetime.now().isoformat(),
+            "source": "materialized"
         }
 
+    if settings.ENABLE_RULES_ENGINE:
+        with trace_stage("rules"), live_index.acquire() as index:
+            decision = index.rules.evaluate(data.destinationCountry, data.purposeOfVisit, data.age, data.lengthOfStay)
+        rule_stats.record(decision is not None)
+        if decision is not None:
+            logger.info(f"⚡ Answered from the rule table ({decision['country']} {decision['category']})")
+            annotate(provider="rules")
+            return {
+                "eligibility": format_rules_answer(decision),
+                "provider": "rules",
+                "timestamp": datetime.now().isoformat(),
+                "source": "rules"
+            }
+
+    docs = prefetched_documents(query, data.destinationCountry, data.purposeOfVisit)
+    if docs is not None:
+        logger.info("🛬 Using prefetched retrieval context")
+    result, provider = answer_eligibility(query, country=data.destinationCountry, docs=docs)
+    response = {
+        "eligibility": result,
+        "provider": provider,
+        "timestamp": datetime.now().isoformat()
+    }
+    if docs is not None:
+        response["prefetched"] = True
+    return response
+
+
+@app.post("/check-eligibility/stream", dependencies=[Depends(select_retrieval_params)])
+async def check_eligibility_stream(data: VisaRequest, chain_mode: Optional[str] = None):
+    """
+    Eligibility check streamed as newline-delimited JSON events
+
+    Sends the retrieved sources, then the events of answer_events() - with
+    map-reduce, each chunk's extract as soon as its call returns - and the
+    final answer with its provider. Always runs retrieval and the LLM (no
+    precomputed or rule-table answers); without an LLM, or once a budget is
+    spent, the retrieval-only answer is sent as the only answer event.
+    """
+    if chain_mode is not None and chain_mode not in CHAIN_MODES:
+        raise HTTPException(status_code=400, detail=f"chain_mode must be one of: {', '.join(CHAIN_MODES)}")
+    query = eligibility_query(data)
+    query_popularity.record("country", data.destinationCountry)
+    query_popularity.record("purpose", data.purposeOfVisit)
+    annotate(destination=data.destinationCountry)
+    docs = prefetched_documents(query, data.destinationCountry, data.purposeOfVisit)
+    prefetched = docs is not None
+    if docs is None:
+        with live_index.acquire() as index:
+            docs = retrieve_documents(index, query, country=data.destinationCountry)
+
+    def events():
+        yield {"event": "sources", "sources": [(doc.metadata or {}).get("source") for doc in docs],
+               "prefetched": prefetched}
+        if llm_allowed():
+            try:
+                with trace_stage("llm"):
+                    for event in answer_events(create_llm(), query, docs, chain_mode=chain_mode):
+                        if event["event"] == "answer":
+                            annotate(provider=LLM_PROVIDER)
+                            event["provider"] = LLM_PROVIDER
+                        yield event
+                return
+            except Exception as e:
+                logger.warning(f"⚠️ LLM error: {e} - falling back to retrieval-only mode")
+        annotate(provider="retrieval-only")
+        with live_index.acquire() as index:
+            yield {"event": "answer", "text": retrieval_answer(index, query, docs), "provider": "retrieval-only"}
+
+    return StreamingResponse(
+        (json.dumps(event, ensure_ascii=False) + "\n" for event in events()),
+        media_type="application/x-ndjson"
+    )
+
+
+class PrefetchRequest(BaseModel):
+    destinationCountry: str
+    purposeOfVisit: Optional[str] = None
+
+
+@app.post("/prefetch", status_code=202, dependencies=[Depends(select_retrieval_params)])
+async def prefetch(data: PrefetchRequest, request: Request):
+    """
+    Start retrieval for a partially filled form (fire-and-forget)
+
+    Pools PREFETCH_K chunks (more if the client's retrieval parameters need
+    them) for the destination and purpose in the background;
+    a /check-eligibility for the same pair within PREFETCH_TTL_SECONDS re-ranks
+    them instead of searching the index. Limited to PREFETCH_RATE_LIMIT
+    requests per client per PREFETCH_RATE_WINDOW_SECONDS (429 beyond it);
+    unknown destinations and requests while PREFETCH_MAX_INFLIGHT fetches run
+    are accepted but not fetched.
+    """
+    client = request.headers.get("x-client-id") or (request.client.host if request.client else None)
+    retry_after = prefetch_limiter.check(client)
+    if retry_after is not None:
+        raise HTTPException(status_code=429, detail="Too many prefetch requests",
+                            headers={"Retry-After": str(max(1, int(retry_after + 0.999)))})
+    if not settings.ENABLE_PREFETCH:
+        return {"status": "disabled"}
+    with live_index.acquire() as index:
+        country = catalog_country(index, data.destinationCountry)
+        version = index.version
+    if country is None:
+        return {"status": "unknown_destination"}
+    purpose = data.purposeOfVisit.strip() if data.purposeOfVisit and data.purposeOfVisit.strip() else None
+    # Resolved here: the fetch runs on another thread, outside this request's parameters
+    k = max(settings.PREFETCH_K, prefetch_pool_size(retrieval_params()))
+    status = prefetch_cache.submit(
+        prefetch_key(version, country, purpose),
+        lambda: fetch_prefetch_context(country, purpose, version, k)
+    )
+    return {"status": status, "destination": country, "purpose": purpose, "ttl_seconds": settings.PREFETCH_TTL_SECONDS}
+
+
+@app.get("/rules")
+async def get_rules():
+    """Fast-path rule table of the live index and its hit ratio"""
+    with live_index.acquire() as index:
+        table = index.rules
+    return {
+        "enabled": settings.ENABLE_RULES_ENGINE,
+        "index_version": live_index.current.version,
+        **table.stats(),
+        **rule_stats.to_dict(),
+        "table": [
+            {k: v for k, v in rule._asdict().items() if v is not None and k != "evidence"}
+            for rule in table.rules
+        ]
+    }
+
+
+# ----------------------------------------
+# FOLLOW-UP SESSIONS
+# ----------------------------------------
+# Sessions expire SESSION_TTL_SECONDS after their last use
+sessions = TTLStore(settings.SESSION_TTL_SECONDS, max_entries=settings.SESSION_MAX, sliding=True)
+
+
+class SessionQuestion(BaseModel):
+    question: str
+
+
+def answer_from_docs(question: str, docs: list, extract_query: Optional[str] = None) -> tuple:
+    """
+    Answer over an already selected set of documents
+
+    Args:
+        question: Question for the LLM
+        docs: Documents to answer from
+        extract_query: Query sentences are matched against in retrieval-only
+            mode (defaults to question)
+
+    Returns:
+        (answer, provider) tuple; falls back to retrieval-only if the LLM fails
+    """
+    if llm_allowed():
+        try:
+            with trace_stage("llm"):
+                answer = answer_with_llm(create_llm(), question, docs, [TokenUsageCallback()])
+            annotate(provider=LLM_PROVIDER)
+            return answer, LLM_PROVIDER
+        except Exception as e:
+            logger.warning(f"⚠️ LLM error: {e} - falling back to retrieval-only mode")
+    annotate(provider="retrieval-only")
+    with live_index.acquire() as index:
+        return retrieval_answer(index, extract_query or question, docs), "retrieval-only"
+
+
+def get_session(session_id: str) -> RetrievalSession:
+    session = sessions.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Session not found or expired")
+    return session
+
+
+@app.post("/sessions", status_code=201, dependencies=[Depends(select_retrieval_params)])
+async def create_session(data: VisaRequest):
+    """
+    Start a follow-up session for a profile
+
+    Retrieves the profile's context once (SESSION_CONTEXT_K chunks), answers the
+    eligibility question from its top k, and keeps the chunks for
+    follow-ups asked via /sessions/{session_id}/ask.
+    """
+    query = eligibility_query(data)
+    annotate(destination=data.destinationCountry)
+    with live_index.acquire() as index:
+        docs = retrieve_documents(index, query, k=max(settings.SESSION_CONTEXT_K, retrieval_params().k),
+                                  country=data.destinationCountry)
+        version = index.version
+        vectors = stored_vectors(index, docs)
+    session = RetrievalSession(data.dict(), query, docs, version, max_turns=settings.SESSION_HISTORY_TURNS,
+                               vectors=vectors)
+    eligibility, provider = answer_from_docs(query, docs[:retrieval_params().k])
+    session.remember("Am I eligible?", eligibility)
+    sessions.put(session.session_id, session)
+    logger.info(f"🧵 Session {session.session_id[:8]} started with {len(docs)} chunks")
+    return {
+        "session_id": session.session_id,
+        "eligibility": eligibility,
+        "provider": provider,
+        "context_chunks": len(docs),
+        "expires_in": sessions.ttl(session.session_id),
+        "timestamp": datetime.now().isoformat()
+    }
+
+
+@app.post("/sessions/{session_id}/ask", dependencies=[Depends(select_retrieval_params)])
+async def ask_session(session_id: str, body: SessionQuestion):
+    """Answer a follow-up question from the session's re-ranked chunks (no index search)"""
+    session = get_session(session_id)
+    with session.lock:
+        with trace_stage("session_rerank"):
+            ranked = session.rerank(body.question, embeddings, retrieval_params().k)
+        annotate(query=canonical_query(body.question), destination=session.profile.get("destinationCountry"))
+        record_chunks(ranked)
+        docs = [doc for doc, _ in ranked]
+        answer, provider = answer_from_docs(session.follow_up_prompt(body.question), docs, body.question)
+        session.remember(body.question, answer)
+        turn = session.turns
+    return {
+        "session_id": session_id,
+        "answer": answer,
+        "provider": provider,
+        "turn": turn,
+        "sources": [(doc.metadata or {}).get("source") for doc in docs],
+        "expires_in": sessions.ttl(session_id),
+        "timestamp": datetime.now().isoformat()
+    }
+
+
+@app.get("/sessions/{session_id}")
+async def get_session_state(session_id: str):
+    """Profile, compact history and pooled chunk sources of a session"""
+    return {**get_session(session_id).to_dict(), "expires_in": sessions.ttl(session_id)}
+
+
+@app.delete("/sessions/{session_id}")
+async def delete_session(session_id: str):
+    if sessions.pop(session_id) is None:
+        raise HTTPException(status_code=404, detail="Session not found or expired")
+    return {"status": "deleted", "session_id": session_id}
+
 
 # ----------------------------------------
 # ADDITIONAL API ENDPOINTS
@@ -232,6 +1319,7 @@ async def health_check():
         "service": "SwiftVisa Backend",
         "timestamp": __import__("datetime").datetime.now().isoformat(),
         "vectorstore_loaded": os.path.exists(CHROMA_DB_DIR),
+        "index_version": live_index.current.version,
         "llm_available": USE_LLM,
         "llm_provider": LLM_PROVIDER if USE_LLM else None
     }
@@ -241,18 +1329,7 @@ async def health_check():
 @app.get("/countries")
 async def get_available_countries():
     """Get list of countries with visa data available"""
-    import os
-    countries = set()
-    clean_dir = "data/clean"
-    
-    if os.path.exists(clean_dir):
-        for filename in os.listdir(clean_dir):
-            if filename.endswith(".txt"):
-                # Extract country from filename (format: Country_Country_VisaType_Eligibility.txt)
-                parts = filename.split("_")
-                if len(parts) >= 2:
-                    countries.add(parts[0])
-    
+    countries = {entry.country for entry in live_index.current.catalog}
     return {
         "countries": sorted(list(countries)),
         "count": len(countries)
@@ -262,19 +1339,7 @@ async def get_available_countries():
 @app.get("/visa-types/{country}")
 async def get_visa_types(country: str):
     """Get available visa types for a specific country"""
-    import os
-    visa_types = set()
-    clean_dir = "data/clean"
-    
-    if os.path.exists(clean_dir):
-        for filename in os.listdir(clean_dir):
-            if filename.startswith(f"{country}_") and filename.endswith(".txt"):
-                # Extract visa type from filename
-                parts = filename.replace(".txt", "").split("_")
-                if len(parts) >= 3:
-                    visa_type = parts[2]
-                    visa_types.add(visa_type)
-    
+    visa_types = {entry.visa_type for entry in live_index.current.catalog if entry.country == country}
     return {
         "country": country,
         "visa_types": sorted(list(visa_types)),
@@ -282,14 +1347,33 @@ async def get_visa_types(country: str):
     }
 
 
-@app.post("/vectorstore/query")
+@app.get("/suggest")
+async def suggest(q: str = "", kind: Optional[str] = None, country: Optional[str] = None, limit: int = 8):
+    """
+    Typeahead suggestions for the form fields
+
+    Countries, visa types (optionally of one country) and purposes of visit
+    with a word starting with q, most requested first.
+    """
+    if kind is not None and kind not in SUGGEST_KINDS:
+        raise HTTPException(status_code=400, detail=f"kind must be one of: {', '.join(SUGGEST_KINDS)}")
+    return {
+        "query": q,
+        "suggestions": live_index.current.suggest.suggest(
+            q, kind, country, max(1, min(limit, 20)), query_popularity
+        )
+    }
+
+
+@app.post("/vectorstore/query", dependencies=[Depends(select_retrieval_params)])
 async def query_vectorstore(request: VectorStoreQuery):
     """Direct vectorstore query for custom searches"""
     if not request.query:
         return {"error": "Query parameter is required"}
     
     try:
-        docs = db.similarity_search(request.query, k=request.k)
+        with live_index.acquire() as index:
+            docs = retrieve_documents(index, request.query, k=request.k)
         results = []
         
         for i, doc in enumerate(docs, 1):
@@ -311,6 +1395,123 @@ async def query_vectorstore(request: VectorStoreQuery):
         return {"error": str(e), "query": request.query}
 
 
+def compact_metadata(metadata: dict) -> dict:
+    """Keep only short scalar metadata values for id-only search results"""
+    return {
+        key: value for key, value in (metadata or {}).items()
+        if isinstance(value, (int, float, bool)) or (isinstance(value, str) and len(value) <= 64)
+    }
+
+
+def read_chunks(index, chunk_ids: list) -> dict:
+    """Chunk contents as bytes by id, from the chunk store or the collection"""
+    if index.chunks is not None:
+        return {cid: index.chunks.read(cid) for cid in chunk_ids if cid in index.chunks}
+    if not hasattr(index.db, "get"):
+        return {}
+    data = index.db.get(ids=chunk_ids, include=["documents"])
+    return {cid: (text or "").encode("utf-8") for cid, text in zip(data["ids"], data["documents"])}
+
+
+@app.post("/vectorstore/search")
+async def search_vectorstore(request: VectorStoreSearch):
+    """
+    Lightweight search: chunk ids, scores and compact metadata only
+
+    Pages are requested with the returned next_cursor; content is fetched
+    separately from /chunks.
+    """
+    if not request.query:
+        return {"error": "Query parameter is required"}
+    page_size = max(1, min(request.page_size, settings.SEARCH_MAX_PAGE_SIZE))
+
+    with live_index.acquire() as index:
+        index_version = index.fingerprint or index.version
+        try:
+            offset = decode_cursor(request.cursor, request.query, index_version) if request.cursor else 0
+        except ValueError as e:
+            return {"error": str(e), "query": request.query}
+
+        depth = min(offset + page_size, settings.SEARCH_MAX_DEPTH)
+        annotate(query=canonical_query(request.query))
+        with trace_stage("retrieval"):
+            hits = search_with_scores(index, request.query, depth, request.country) if depth > offset else []
+        page = hits[offset:depth]
+        record_chunks(page)
+
+        results = []
+        for rank, (doc, score) in enumerate(page, offset + 1):
+            results.append({
+                "rank": rank,
+                "id": doc.id,
+                "score": float(score),
+                "length": index.chunks.length(doc.id) if index.chunks is not None else len(doc.page_content.encode("utf-8")),
+                "metadata": compact_metadata(doc.metadata)
+            })
+
+    has_more = len(hits) == depth and depth < settings.SEARCH_MAX_DEPTH
+    return {
+        "query": request.query,
+        "results_count": len(results),
+        "results": results,
+        "next_cursor": encode_cursor(request.query, depth, index_version) if has_more else None,
+        "index_version": index_version,
+        "timestamp": datetime.now().isoformat()
+    }
+
+
+@app.get("/chunks")
+async def get_chunks(ids: str, offset: int = 0, length: Optional[int] = None):
+    """
+    Fetch chunk contents by id (comma-separated)
+
+    offset/length select a byte range of every chunk, for paging through
+    large documents.
+    """
+    chunk_ids = [cid for cid in ids.split(",") if cid][:settings.CHUNKS_MAX_IDS]
+    end = offset + length if length is not None else None
+    with live_index.acquire() as index:
+        contents = read_chunks(index, chunk_ids)
+
+    chunks = []
+    for cid in chunk_ids:
+        data = contents.get(cid)
+        if data is None:
+            continue
+        part = data[offset:end]
+        chunks.append({
+            "id": cid,
+            "length": len(data),
+            "offset": min(offset, len(data)),
+            "content": part.decode("utf-8", errors="ignore")
+        })
+
+    return {
+        "chunks": chunks,
+        "missing": [cid for cid in chunk_ids if cid not in contents],
+        "timestamp": datetime.now().isoformat()
+    }
+
+
+@app.get("/chunks/{chunk_id}")
+async def get_chunk(chunk_id: str, range_header: Optional[str] = Header(None, alias="Range")):
+    """Fetch one chunk as text, honouring HTTP byte ranges"""
+    with live_index.acquire() as index:
+        data = read_chunks(index, [chunk_id]).get(chunk_id)
+    if data is None:
+        raise HTTPException(status_code=404, detail=f"Chunk not found: {chunk_id}")
+
+    headers = {"Accept-Ranges": "bytes"}
+    if not range_header:
+        return Response(content=data, media_type="text/plain; charset=utf-8", headers=headers)
+    try:
+        start, end = parse_byte_range(range_header, len(data))
+    except ValueError:
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{len(data)}"})
+    headers["Content-Range"] = f"bytes {start}-{end - 1}/{len(data)}"
+    return Response(content=data[start:end], status_code=206, media_type="text/plain; charset=utf-8", headers=headers)
+
+
 @app.get("/stats")
 async def get_stats():
     """Get system statistics"""
@@ -318,20 +1519,11 @@ async def get_stats():
     from datetime import datetime
     
     # Count documents
-    clean_dir = "data/clean"
-    doc_count = 0
-    countries = set()
-    visa_types = set()
-    
-    if os.path.exists(clean_dir):
-        for f in os.listdir(clean_dir):
-            if f.endswith(".txt"):
-                doc_count += 1
-                parts = f.split("_")
-                if len(parts) >= 3:
-                    countries.add(parts[0])
-                    visa_types.add(parts[2])
-    
+    catalog = live_index.current.catalog
+    doc_count = len(catalog)
+    countries = {entry.country for entry in catalog}
+    visa_types = {entry.visa_type for entry in catalog}
+
     # Check vectorstore
     vectorstore_size = 0
     if os.path.exists("vectorstore"):
@@ -346,22 +1538,41 @@ async def get_stats():
         "countries": sorted(list(countries)),
         "visa_types_count": len(visa_types),
         "vectorstore_size_mb": round(vectorstore_size / (1024 * 1024), 2),
-        "embedding_model": "all-MiniLM-L6-v2",
+        "embedding_model": settings.EMBEDDING_MODEL,
         "llm_enabled": USE_LLM,
         "llm_provider": LLM_PROVIDER,
         "openai_available": USE_OPENAI,
-        "gemini_available": USE_GEMINI,
-        "top_k_retrieval": TOP_K,
+        "gemini_available": False,  # no Gemini client is wired into this service
+        "top_k_retrieval": retrieval_tuner.defaults.k,
+        "retrieval": retrieval_tuner.defaults.to_dict(),
+        "answer_chain": {
+            "mode": retrieval_tuner.defaults.chain_type,
+            "map_reduce_min_tokens": settings.MAP_REDUCE_MIN_TOKENS,
+            "map_reduce_concurrency": settings.MAP_REDUCE_CONCURRENCY
+        },
+        "answer_store": answer_store.stats() if answer_store is not None else None,
+        "rules_engine": {"enabled": settings.ENABLE_RULES_ENGINE, **rule_stats.to_dict()},
+        "typeahead": {**live_index.current.suggest.stats(), "top_queries": query_popularity.top(5)},
+        "prefetch": {"enabled": settings.ENABLE_PREFETCH, **prefetch_cache.stats(),
+                     "rate_limited": prefetch_limiter.rejected},
+        "analysis_jobs": job_queue.stats(),
+        "llm_usage": usage_ledger.snapshot(),
+        "traffic_capture": traffic_capture.stats() if traffic_capture is not None else None,
         "api_version": "1.0.0"
     }
 
 
-@app.post("/analyze-profile")
-async def analyze_profile(data: VisaRequest):
-    """
-    Advanced profile analysis endpoint
-    Returns detailed eligibility with confidence scores
-    """
+@app.get("/metrics")
+async def get_metrics():
+    """LLM usage counters and budget gauges in the Prometheus text format"""
+    return Response(
+        content="\n".join(usage_ledger.prometheus_lines()) + "\n",
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+def run_profile_analysis(data: VisaRequest) -> dict:
+    """Full RAG analysis of a profile (the body of /analyze-profile and its jobs)"""
     query = (
         f"Analyze visa eligibility comprehensively for:\n"
         f"- Citizen of: {data.countryOfCitizenship}\n"
@@ -372,9 +1583,11 @@ async def analyze_profile(data: VisaRequest):
         f"Provide: 1) Eligibility status, 2) Key requirements, 3) Recommendations, 4) Next steps"
     )
     
+    annotate(destination=data.destinationCountry)
     try:
-        if USE_LLM:
-            result = run_rag_with_llm(query)
+        if llm_allowed():
+            result = run_rag_with_llm(query, data.destinationCountry)
+            annotate(provider=LLM_PROVIDER)
             return {
                 "status": "success",
                 "analysis": result,
@@ -383,7 +1596,8 @@ async def analyze_profile(data: VisaRequest):
                 "timestamp": __import__("datetime").datetime.now().isoformat()
             }
         else:
-            result = run_retrieval_only(query)
+            result = run_retrieval_only(query, data.destinationCountry)
+            annotate(provider="retrieval-only")
             return {
                 "status": "success",
                 "analysis": result,
@@ -400,36 +1614,85 @@ async def analyze_profile(data: VisaRequest):
         }
 
 
-@app.get("/visa-requirements/{destination}/{visa_type}")
+@app.post("/analyze-profile", dependencies=[Depends(select_retrieval_params)])
+async def analyze_profile(data: VisaRequest):
+    """
+    Advanced profile analysis endpoint
+    Returns detailed eligibility with confidence scores
+    """
+    return run_profile_analysis(data)
+
+
+# ----------------------------------------
+# ANALYSIS JOBS (async /analyze-profile)
+# ----------------------------------------
+job_queue = JobQueue(
+    workers=settings.JOB_WORKERS,
+    max_pending=settings.JOB_MAX_PENDING,
+    result_ttl=settings.JOB_RESULT_TTL_SECONDS
+)
+
+
+class AnalyzeJobRequest(VisaRequest):
+    callback_url: Optional[str] = None
+
+
+@app.post("/analyze-profile/jobs", status_code=202)
+async def submit_analyze_profile_job(data: AnalyzeJobRequest):
+    """
+    Queue a profile analysis and return its job id immediately
+
+    Poll GET /analyze-profile/jobs/{job_id}, or pass callback_url (a local
+    host from JOB_WEBHOOK_ALLOWED_HOSTS) to receive the finished job as a POST.
+    """
+    if data.callback_url:
+        try:
+            validate_webhook_url(data.callback_url, settings.JOB_WEBHOOK_ALLOWED_HOSTS.split(","))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    profile = VisaRequest(**data.dict(exclude={"callback_url"}))
+    try:
+        job = job_queue.submit("analyze-profile", lambda: run_profile_analysis(profile), data.callback_url)
+    except QueueFull as e:
+        raise HTTPException(status_code=503, detail=f"Analysis queue is full ({e}); retry later",
+                            headers={"Retry-After": "5"})
+    logger.info(f"📥 Queued analysis job {job['job_id'][:8]}")
+    return {
+        "job_id": job["job_id"],
+        "status": job["status"],
+        "status_url": f"/analyze-profile/jobs/{job['job_id']}",
+        "submitted_at": job["submitted_at"]
+    }
+
+
+@app.get("/analyze-profile/jobs/{job_id}")
+async def get_analyze_profile_job(job_id: str):
+    """Status of an analysis job; "result" holds the /analyze-profile response once done"""
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return job
+
+
+@app.get("/analyze-profile/jobs")
+async def get_analyze_profile_queue():
+    """Queue depth and counters of the analysis worker pool"""
+    return job_queue.stats()
+
+
+@app.get("/visa-requirements/{destination}/{visa_type}", dependencies=[Depends(select_retrieval_params)])
 async def get_visa_requirements(destination: str, visa_type: str):
     """Get specific visa requirements for a destination and visa type"""
-    query = f"What are the requirements for a {visa_type} visa to {destination}?"
-    
+    query_popularity.record("country", destination)
+    query_popularity.record("visa_type", visa_type)
     try:
-        docs = db.similarity_search(query, k=3)
-        
-        if not docs:
-            return {
-                "status": "not_found",
-                "message": f"No information found for {visa_type} visa to {destination}",
-                "destination": destination,
-                "visa_type": visa_type
-            }
-        
-        requirements = []
-        for doc in docs:
-            requirements.append({
-                "content": doc.page_content[:800],
-                "metadata": doc.metadata if hasattr(doc, 'metadata') else {}
-            })
-        
-        return {
-            "status": "success",
-            "destination": destination,
-            "visa_type": visa_type,
-            "requirements": requirements,
-            "total_documents": len(docs)
-        }
+        store = serving_answer_store()
+        if store is not None:
+            cached = store.get(requirements_key(destination, visa_type))
+            if cached is not None:
+                return {**cached, "destination": destination, "visa_type": visa_type}
+
+        return search_visa_requirements(destination, visa_type)
     except Exception as e:
         return {
             "status": "error",
@@ -439,6 +1702,150 @@ async def get_visa_requirements(destination: str, visa_type: str):
         }
 
 
+# ----------------------------------------
+# ADMIN ENDPOINTS
+# ----------------------------------------
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Allow the request only with a valid X-Admin-Token header"""
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin API disabled - set ADMIN_TOKEN to enable")
+    if not is_admin_token(x_admin_token):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+@app.get("/admin/index", dependencies=[Depends(require_admin)])
+async def get_index_status():
+    """Live index version, available snapshots and reindex progress"""
+    current = live_index.current
+    return {
+        "live_version": current.version,
+        "live_path": current.path,
+        "backend": current.backend,
+        "shards": current.db.stats() if current.backend == "sharded" else None,
+        "readonly": current.db.stats() if current.backend == "readonly" else None,
+        "pack": current.pack.stats() if current.pack is not None else None,
+        "loaded_at": current.loaded_at,
+        "published_version": current_version(CHROMA_DB_DIR),
+        "snapshots": list_snapshots(CHROMA_DB_DIR),
+        "draining": [h.version for h in live_index.draining()],
+        "reindex": reindex_status
+    }
+
+
+@app.post("/admin/reindex", status_code=202, dependencies=[Depends(require_admin)])
+async def trigger_reindex():
+    """Build a new snapshot in the background and hot-swap it when ready"""
+    if _reindex_lock.locked():
+        raise HTTPException(status_code=409, detail="A reindex is already running")
+    threading.Thread(target=reindex_snapshot, daemon=True).start()
+    return {"status": "started", "timestamp": datetime.now().isoformat()}
+
+
+@app.post("/admin/swap", dependencies=[Depends(require_admin)])
+async def trigger_swap():
+    """Swap to the published snapshot without waiting for the file watcher"""
+    swapped = swap_to_published()
+    return {
+        "swapped": swapped,
+        "live_version": live_index.current.version,
+        "timestamp": datetime.now().isoformat()
+    }
+
+
+@app.get("/admin/profiles", dependencies=[Depends(require_admin)])
+async def list_profiles():
+    """Stored per-request profiles and continuous sampling aggregates"""
+    return {
+        "sample_rate": settings.PROFILE_SAMPLE_RATE,
+        "interval_ms": settings.PROFILE_INTERVAL_MS,
+        "profiled_endpoints": sorted(PROFILED_ENDPOINTS),
+        "profiles": profile_store.list(),
+        "aggregates": profile_store.aggregate_summary()
+    }
+
+
+@app.get("/admin/profiles/aggregate", response_class=PlainTextResponse, dependencies=[Depends(require_admin)])
+async def download_aggregate_profile(endpoint: str = "/check-eligibility", reset: bool = False):
+    """Download continuous-sampling flame-graph data (collapsed stacks) for an endpoint"""
+    stacks = profile_store.aggregate(endpoint)
+    if reset:
+        profile_store.reset_aggregate(endpoint)
+    return to_collapsed(stacks)
+
+
+@app.get("/admin/profiles/{profile_id}", response_class=PlainTextResponse, dependencies=[Depends(require_admin)])
+async def download_profile(profile_id: str):
+    """Download one request's profile as collapsed stacks"""
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail=f"Profile not found: {profile_id}")
+    return to_collapsed(profile["stacks"])
+
+
+@app.get("/admin/slow-requests", dependencies=[Depends(require_admin)])
+async def get_slow_requests(path: Optional[str] = None, min_ms: Optional[float] = None, limit: int = 50):
+    """Recent requests slower than SLOW_REQUEST_THRESHOLD_MS, newest first"""
+    records = slow_request_log.query(path=path, min_ms=min_ms, limit=limit)
+    return {
+        "threshold_ms": slow_request_log.threshold_ms,
+        "total_recorded": slow_request_log.total_recorded,
+        "count": len(records),
+        "requests": records
+    }
+
+
+class RetrievalConfig(BaseModel):
+    defaults: Optional[dict] = None
+    variants: Optional[dict] = None
+
+
+@app.get("/admin/retrieval", dependencies=[Depends(require_admin)])
+async def get_retrieval_config(reset_stats: bool = False):
+    """Live retrieval defaults, variants and per-variant latency/token statistics"""
+    snapshot = retrieval_tuner.snapshot()
+    if reset_stats:
+        retrieval_tuner.reset_stats()
+    return snapshot
+
+
+@app.put("/admin/retrieval", dependencies=[Depends(require_admin)])
+async def update_retrieval_config(body: RetrievalConfig):
+    """
+    Change retrieval defaults and/or replace the variants, without a restart
+
+    Applies to this process only; restarts go back to the Settings defaults.
+    """
+    previous = retrieval_tuner.defaults.to_dict()
+    try:
+        retrieval_tuner.configure(defaults=body.defaults, variants=body.variants)
+    except RetrievalParamsError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    logger.info(f"🎛️ Retrieval parameters updated: {retrieval_tuner.defaults.to_dict()}, "
+                f"variants: {sorted(retrieval_tuner.variants)}")
+    # Precomputed answers are not served until rebuilt with the new defaults
+    if (retrieval_tuner.defaults.to_dict() != previous and settings.ENABLE_ANSWER_STORE
+            and settings.MATERIALIZE_ON_INDEX_CHANGE):
+        threading.Thread(target=_rebuild_answer_store_in_background, daemon=True).start()
+    return retrieval_tuner.snapshot()
+
+
+# Plain def: FastAPI runs it in the threadpool, so walking the traces does not block the event loop
+@app.get("/admin/memory", dependencies=[Depends(require_admin)])
+def get_memory_profile(current: bool = False, reset: bool = False):
+    """
+    RSS and tracemalloc accounting per startup phase and per endpoint
+
+    Only RSS is reported unless MEMORY_PROFILE=True. current=true adds the
+    live Python heap per package and the allocation sites grown since startup
+    (walks every trace, takes seconds); reset=true clears the endpoint totals
+    after reading them and measures growth from then on.
+    """
+    report = memory_profile.report(include_current=current)
+    if reset:
+        memory_profile.reset_endpoints()
+    return report
+
+
 # ----------------------------------------
 # HEALTH CHECK
 # ----------------------------------------
@@ -447,6 +1854,22 @@ async def root():
     return {"message": "✅ SwiftVisa Backend Running Perfectly!"}
 
 
+# ----------------------------------------
+# PRODUCTION FRONTEND
+# ----------------------------------------
+# Mounted last so the API routes above always take precedence
+if settings.SERVE_FRONTEND:
+    for mount_path, site in (("/app", "app"), ("/home", "home")):
+        site_dir = os.path.join(settings.FRONTEND_DIST_DIR, site)
+        if os.path.isdir(site_dir):
+            app.mount(mount_path, PrecompressedStaticFiles(directory=site_dir, html=True), name=f"frontend-{site}")
+            logger.info(f"🌐 Serving {site_dir} at {mount_path}")
+        else:
+            logger.warning(f"⚠️ SERVE_FRONTEND is on but {site_dir} is missing; run scripts/build_frontend.py")
+
+
+memory_profile.mark("ready", final=True)
+
 # ----------------------------------------
 # RUN SERVER
 # ----------------------------------------
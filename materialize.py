@@ -0,0 +1,311 @@
+# ==================================
+# SwiftVisa Materialized Answer Store
+# ==================================
+#
+# Read-only key-value file holding precomputed answers for the finite set of
+# (destination, visa_type) requirement lookups and the most common eligibility
+# profiles. The API memory-maps the file and answers hits without touching the
+# embedding model or Chroma.
+#
+# File layout (little endian):
+#   magic      8 bytes   b"SVKV0001"
+#   header_len uint32    length of the JSON header
+#   header     JSON      {"fingerprint", "created_at", "count", ...}
+#   index      count x (uint64 key_hash, uint64 offset, uint32 length),
+#              sorted by key_hash
+#   data       UTF-8 JSON records {"k": key, "v": value}
+
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+import tempfile
+import weakref
+from collections import Counter
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+MAGIC = b"SVKV0001"
+_HEADER_LEN = struct.Struct("<I")
+_INDEX_ENTRY = struct.Struct("<QQI")
+
+BUILD_INFO_FILE = "build_info.json"
+
+
+# ----------------------------------------
+# KEYS & FINGERPRINTS
+# ----------------------------------------
+def _key_hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def canonical_query(query: str) -> str:
+    """Normalize a query so equivalent requests share one key"""
+    return re.sub(r"\s+", " ", query).strip().lower()
+
+
+def requirements_key(destination: str, visa_type: str) -> str:
+    """Key for a /visa-requirements lookup"""
+    return f"requirements:{destination.strip().lower()}:{visa_type.strip().lower()}"
+
+
+def eligibility_key(query: str) -> str:
+    """Key for a precomputed eligibility answer"""
+    return f"eligibility:{canonical_query(query)}"
+
+
+def index_fingerprint(persist_dir: str) -> Optional[str]:
+    """
+    Identify the vectorstore build currently on disk
+
+    Uses the build id written by ``scripts/create_vectorstore.py`` and falls back
+    to hashing file sizes for indexes built before build info existed.
+
+    Args:
+        persist_dir: Chroma persist directory
+
+    Returns:
+        Fingerprint string, or None if the directory does not exist
+    """
+    if not os.path.isdir(persist_dir):
+        return None
+
+    build_info = os.path.join(persist_dir, BUILD_INFO_FILE)
+    if os.path.exists(build_info):
+        try:
+            with open(build_info, "r", encoding="utf-8") as f:
+                return json.load(f)["build_id"]
+        except (OSError, ValueError, KeyError):
+            pass
+
+    digest = hashlib.sha1()
+    for root, dirs, files in os.walk(persist_dir):
+        dirs.sort()
+        for name in sorted(files):
+            if name.endswith("-journal"):
+                continue
+            path = os.path.join(root, name)
+            digest.update(os.path.relpath(path, persist_dir).encode("utf-8"))
+            digest.update(str(os.path.getsize(path)).encode("utf-8"))
+    return "stat-" + digest.hexdigest()[:16]
+
+
+def write_build_info(persist_dir: str, **extra) -> str:
+    """Stamp a freshly built vectorstore with a new build id"""
+    build_id = datetime.now().strftime("%Y%m%d%H%M%S%f")
+    info = {"build_id": build_id, "created_at": datetime.now().isoformat(), **extra}
+    with open(os.path.join(persist_dir, BUILD_INFO_FILE), "w", encoding="utf-8") as f:
+        json.dump(info, f, indent=2)
+    return build_id
+
+
+# ----------------------------------------
+# WRITER
+# ----------------------------------------
+def write_answer_store(path: str, items: Dict[str, object], fingerprint: Optional[str], **header_extra) -> int:
+    """
+    Write a read-only answer store atomically
+
+    Args:
+        path: Destination file
+        items: Mapping of key to JSON-serializable value
+        fingerprint: Index fingerprint the answers were computed from
+        header_extra: Additional header fields
+
+    Returns:
+        Number of records written
+    """
+    records = []
+    for key, value in items.items():
+        blob = json.dumps({"k": key, "v": value}, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        records.append((_key_hash(key), blob))
+    records.sort(key=lambda r: r[0])
+
+    header = json.dumps({
+        "fingerprint": fingerprint,
+        "created_at": datetime.now().isoformat(),
+        "count": len(records),
+        **header_extra
+    }).encode("utf-8")
+
+    data_start = len(MAGIC) + _HEADER_LEN.size + len(header) + _INDEX_ENTRY.size * len(records)
+    index = bytearray()
+    offset = data_start
+    for key_hash, blob in records:
+        index += _INDEX_ENTRY.pack(key_hash, offset, len(blob))
+        offset += len(blob)
+
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    # A temporary file of its own: every worker (and replicas sharing the
+    # directory) rebuilds the store at startup and after a swap
+    tmp = tempfile.NamedTemporaryFile(dir=directory, prefix=f"{os.path.basename(path)}.", suffix=".tmp",
+                                      delete=False)
+    try:
+        with tmp as f:
+            f.write(MAGIC)
+            f.write(_HEADER_LEN.pack(len(header)))
+            f.write(header)
+            f.write(index)
+            for _, blob in records:
+                f.write(blob)
+        # Temporary files are created owner-only; the store is read by every worker
+        os.chmod(tmp.name, 0o644)
+        os.replace(tmp.name, path)
+    except BaseException:
+        if os.path.exists(tmp.name):
+            os.unlink(tmp.name)
+        raise
+    return len(records)
+
+
+# ----------------------------------------
+# READER
+# ----------------------------------------
+class AnswerStore:
+    """Memory-mapped, read-only view of an answer store file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mm[:len(MAGIC)] != MAGIC:
+            self._mm.close()
+            raise ValueError(f"Not an answer store file: {path}")
+        # A replaced store is unmapped once the last in-flight lookup drops it
+        self._finalizer = weakref.finalize(self, self._mm.close)
+
+        (header_len,) = _HEADER_LEN.unpack_from(self._mm, len(MAGIC))
+        header_start = len(MAGIC) + _HEADER_LEN.size
+        self.header = json.loads(self._mm[header_start:header_start + header_len])
+        self.count = self.header["count"]
+        self._index_start = header_start + header_len
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def fingerprint(self) -> Optional[str]:
+        return self.header.get("fingerprint")
+
+    def _entry(self, i: int) -> Tuple[int, int, int]:
+        return _INDEX_ENTRY.unpack_from(self._mm, self._index_start + i * _INDEX_ENTRY.size)
+
+    def get(self, key: str) -> Optional[object]:
+        """Look up a key; returns None on a miss"""
+        target = _key_hash(key)
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._entry(mid)[0] < target:
+                lo = mid + 1
+            else:
+                hi = mid
+
+        # Walk the (rare) run of colliding hashes
+        while lo < self.count:
+            key_hash, offset, length = self._entry(lo)
+            if key_hash != target:
+                break
+            record = json.loads(self._mm[offset:offset + length])
+            if record["k"] == key:
+                self.hits += 1
+                return record["v"]
+            lo += 1
+
+        self.misses += 1
+        return None
+
+    def stats(self) -> dict:
+        """Hit/miss counters for /stats"""
+        return {
+            "path": self.path,
+            "records": self.count,
+            "fingerprint": self.fingerprint,
+            "created_at": self.header.get("created_at"),
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+    def close(self):
+        self._finalizer()
+
+
+def open_answer_store(path: str, fingerprint: Optional[str]) -> Optional[AnswerStore]:
+    """
+    Open an answer store if it exists and matches the live index
+
+    Returns:
+        AnswerStore, or None if the file is missing, corrupt or stale
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        store = AnswerStore(path)
+    except (OSError, ValueError):
+        return None
+    if store.fingerprint != fingerprint:
+        store.close()
+        return None
+    return store
+
+
+# ----------------------------------------
+# MATERIALIZATION JOB
+# ----------------------------------------
+def top_profiles(profiles_file: str, limit: int) -> List[dict]:
+    """
+    Rank profile templates from a JSONL file of VisaRequest records
+
+    Identical profiles are counted; records may also carry an explicit
+    ``count`` field. The ``limit`` most frequent profiles are returned.
+    """
+    if not profiles_file or not os.path.exists(profiles_file) or limit <= 0:
+        return []
+
+    counts = Counter()
+    with open(profiles_file, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            weight = int(record.pop("count", 1))
+            counts[json.dumps(record, sort_keys=True)] += weight
+
+    return [json.loads(profile) for profile, _ in counts.most_common(limit)]
+
+
+def build_answer_items(
+    requirements_for: Callable[[str, str], dict],
+    pairs: Iterable[Tuple[str, str]],
+    profile_queries: Iterable[str] = (),
+    answer_for: Optional[Callable[[str], dict]] = None
+) -> Dict[str, object]:
+    """
+    Compute every record of the answer store
+
+    Args:
+        requirements_for: Returns the /visa-requirements payload for a pair
+        pairs: (destination, visa_type) pairs to precompute
+        profile_queries: Eligibility queries to precompute
+        answer_for: Returns {"eligibility", "provider"} for a query
+
+    Returns:
+        Mapping of store key to value
+    """
+    items = {}
+    for destination, visa_type in pairs:
+        items[requirements_key(destination, visa_type)] = requirements_for(destination, visa_type)
+
+    if answer_for is not None:
+        for query in profile_queries:
+            items[eligibility_key(query)] = answer_for(query)
+
+    return items
+
@@ -0,0 +1,306 @@
+# ==================================
+# SwiftVisa Memory Profile
+# ==================================
+#
+# Opt-in (MEMORY_PROFILE=True) accounting of where the process's memory goes.
+# Startup is split into phases - LangChain imports, the ML runtime, the
+# embedding weights, the vector store - and each phase records the RSS it
+# added and, through tracemalloc, the Python allocations it left behind,
+# grouped by package. While serving, every request's retained and peak
+# Python allocation is added to its endpoint's totals, and every N requests
+# per endpoint a checkpoint records RSS and the allocation sites that grew
+# since the app became ready (or the totals were reset) - a site that keeps
+# climbing from one checkpoint to the next is a leak.
+#
+# tracemalloc only sees memory allocated through Python's allocators; torch
+# tensors and the Chroma/HNSW native heaps show up in RSS only, which is why
+# both are recorded. Tracing slows allocation-heavy code noticeably, so the
+# mode is for benchmarks and staging, not for production traffic.
+
+import importlib
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def read_rss() -> Optional[int]:
+    """Resident set size of this process in bytes (None where unsupported)"""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # Not Linux: only the peak is available (bytes on macOS, KiB elsewhere)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def read_peak_rss() -> Optional[int]:
+    """Highest resident set size of this process so far, in bytes"""
+    try:
+        with open("/proc/self/status", "r", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    return read_rss()
+
+
+def package_of(filename: str) -> str:
+    """Package an allocation site belongs to ("torch", "chromadb", "<app>" ...)"""
+    path = filename.replace("\\", "/")
+    for marker in ("/site-packages/", "/dist-packages/"):
+        if marker in path:
+            return path.split(marker, 1)[1].split("/", 1)[0].split(".", 1)[0]
+    if "/lib/python" in path:
+        return "<stdlib>"
+    return "<app>"
+
+
+def by_package(statistics: list, limit: int = 10) -> List[dict]:
+    """tracemalloc (size or size_diff) statistics summed per package, largest first"""
+    totals: Dict[str, int] = {}
+    for stat in statistics:
+        name = package_of(stat.traceback[0].filename)
+        totals[name] = totals.get(name, 0) + getattr(stat, "size_diff", stat.size)
+    ordered = sorted(totals.items(), key=lambda item: -abs(item[1]))[:limit]
+    return [{"package": name, "bytes": size} for name, size in ordered]
+
+
+def site_sizes() -> Dict[str, Tuple[int, int]]:
+    """Live Python allocation per site: {"file:line": (bytes, blocks)}"""
+    sizes = {}
+    # Not the profiler's own bookkeeping (the previous result is alive while this one is built)
+    snapshot = tracemalloc.take_snapshot().filter_traces([
+        tracemalloc.Filter(False, __file__), tracemalloc.Filter(False, tracemalloc.__file__)
+    ])
+    for stat in snapshot.statistics("lineno"):
+        frame = stat.traceback[0]
+        sizes[f"{frame.filename}:{frame.lineno}"] = (stat.size, stat.count)
+    return sizes
+
+
+def top_growth(baseline: Dict[str, Tuple[int, int]], current: Dict[str, Tuple[int, int]],
+               limit: int = 10) -> List[dict]:
+    """Sites whose live allocation grew the most between two site_sizes() results"""
+    growth = []
+    for site, (size, count) in current.items():
+        before_size, before_count = baseline.get(site, (0, 0))
+        if size > before_size:
+            growth.append({"site": site, "bytes": size - before_size, "count": count - before_count})
+    return sorted(growth, key=lambda row: -row["bytes"])[:limit]
+
+
+class EndpointMemory:
+    """Allocation totals and periodic checkpoints of one endpoint"""
+
+    def __init__(self, max_checkpoints: int):
+        self.requests = 0
+        self.retained_bytes = 0
+        self.max_peak_bytes = 0
+        self.checkpoints = deque(maxlen=max_checkpoints)
+
+    def to_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "retained_bytes": self.retained_bytes,
+            "retained_bytes_per_request": round(self.retained_bytes / self.requests, 1) if self.requests else 0.0,
+            "max_request_peak_bytes": self.max_peak_bytes,
+            "checkpoints": list(self.checkpoints)
+        }
+
+
+class MemoryProfiler:
+    """Startup phases and per-endpoint allocation accounting (no-op when disabled)"""
+
+    def __init__(self, enabled: bool = False, every: int = 100, frames: int = 1, top: int = 10,
+                 max_checkpoints: int = 20):
+        """
+        Args:
+            enabled: Start tracemalloc and record; otherwise every method is a no-op
+            every: Requests per endpoint between checkpoints
+            frames: Traceback depth kept by tracemalloc (deeper is slower)
+            top: Packages / sites listed per phase or checkpoint
+            max_checkpoints: Checkpoints kept per endpoint (oldest dropped)
+
+        Snapshots are kept as per-site totals rather than tracemalloc.Snapshot
+        objects: with torch loaded a full snapshot holds millions of traces.
+        """
+        self.enabled = enabled
+        self.every = max(1, every)
+        self.top = top
+        self.max_checkpoints = max_checkpoints
+        self.phases: List[dict] = []
+        self.endpoints: Dict[str, EndpointMemory] = {}
+        self._lock = threading.Lock()
+        self._last_rss = None
+        self._last_snapshot = None
+        self._baseline_sites = None
+        self.started_at = datetime.now().isoformat()
+        if enabled:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(frames)
+            self._last_rss = read_rss()
+            self._last_snapshot = tracemalloc.take_snapshot()
+            self.phases.append({"phase": "baseline", "rss_bytes": self._last_rss, "rss_added_bytes": self._last_rss,
+                                "traced_bytes": tracemalloc.get_traced_memory()[0], "seconds": 0.0})
+            self._last_mark = time.perf_counter()
+
+    def preimport(self, *modules: str):
+        """Import optional heavy modules now, so their cost gets its own phase"""
+        if not self.enabled:
+            return
+        for name in modules:
+            try:
+                importlib.import_module(name)
+            except ImportError:
+                pass
+
+    def mark(self, phase: str, final: bool = False):
+        """
+        Close a startup phase: RSS and Python allocations added since the last mark
+
+        Args:
+            final: Last phase; the comparison snapshot is released and the
+                sites live now become the baseline of endpoint checkpoints
+        """
+        if not self.enabled or self._last_snapshot is None:
+            return
+        rss = read_rss()
+        snapshot = tracemalloc.take_snapshot()
+        growth = snapshot.compare_to(self._last_snapshot, "filename")
+        now = time.perf_counter()
+        self.phases.append({
+            "phase": phase,
+            "rss_bytes": rss,
+            "rss_added_bytes": rss - self._last_rss if rss is not None and self._last_rss is not None else None,
+            "traced_bytes": tracemalloc.get_traced_memory()[0],
+            "seconds": round(now - self._last_mark, 3),
+            "packages": by_package(growth, self.top)
+        })
+        self._last_rss, self._last_snapshot, self._last_mark = rss, None if final else snapshot, now
+        if final:
+            del snapshot, growth
+            self._baseline_sites = site_sizes()
+
+    def request_started(self) -> Optional[int]:
+        """Traced bytes at the start of a request (pass to request_finished)"""
+        if not self.enabled:
+            return None
+        tracemalloc.reset_peak()
+        return tracemalloc.get_traced_memory()[0]
+
+    def request_finished(self, endpoint: str, started_bytes: Optional[int]):
+        """
+        Add a request's retained and peak allocation to its endpoint
+
+        Retained is what is still allocated when the response is handed back,
+        an upper bound: it includes the response and objects freed right after.
+        Concurrent requests share the process-wide counters, so the figures are
+        exact only when requests do not overlap (as in the benchmark).
+        """
+        if not self.enabled or started_bytes is None:
+            return
+        current, peak = tracemalloc.get_traced_memory()
+        with self._lock:
+            stats = self.endpoints.get(endpoint)
+            if stats is None:
+                stats = self.endpoints[endpoint] = EndpointMemory(self.max_checkpoints)
+            stats.requests += 1
+            stats.retained_bytes += current - started_bytes
+            stats.max_peak_bytes = max(stats.max_peak_bytes, peak - started_bytes)
+            due = stats.requests % self.every == 0
+        if due:
+            checkpoint = {
+                "requests": stats.requests,
+                "rss_bytes": read_rss(),
+                "traced_bytes": tracemalloc.get_traced_memory()[0],
+                "timestamp": datetime.now().isoformat(),
+                "growth_sites": self.growth_sites()
+            }
+            with self._lock:
+                stats.checkpoints.append(checkpoint)
+
+    def growth_sites(self) -> List[dict]:
+        """Allocation sites that grew the most since the baseline (slow: walks every trace)"""
+        if not self.enabled:
+            return []
+        current = site_sizes()
+        with self._lock:
+            if self._baseline_sites is None:
+                self._baseline_sites = current
+            baseline = self._baseline_sites
+        return top_growth(baseline, current, self.top)
+
+    def report(self, include_current: bool = False) -> dict:
+        """
+        Everything recorded so far
+
+        Args:
+            include_current: Add the live heap per package and the sites grown
+                since the baseline (slow: walks every trace)
+        """
+        if not self.enabled:
+            return {"enabled": False, "rss_bytes": read_rss(), "peak_rss_bytes": read_peak_rss()}
+        current, peak = tracemalloc.get_traced_memory()
+        with self._lock:
+            endpoints = {name: stats.to_dict() for name, stats in sorted(self.endpoints.items())}
+        report = {
+            "enabled": True,
+            "started_at": self.started_at,
+            "rss_bytes": read_rss(),
+            "peak_rss_bytes": read_peak_rss(),
+            "traced_bytes": current,
+            "traced_peak_bytes": peak,
+            "startup": self.phases,
+            "endpoints": endpoints
+        }
+        if include_current:
+            report["packages"] = by_package(tracemalloc.take_snapshot().statistics("filename"), self.top)
+            report["growth_sites"] = self.growth_sites()
+        return report
+
+    def reset_endpoints(self):
+        """Clear the endpoint totals; growth is measured from now on"""
+        if not self.enabled:
+            return
+        baseline = site_sizes()
+        with self._lock:
+            self.endpoints = {}
+            self._baseline_sites = baseline
+
+
+def compare_memory(baseline: dict, current: dict, rss_threshold: float = 1.10, growth_threshold: float = 1.5,
+                   growth_slack_bytes: int = 2048) -> List[dict]:
+    """
+    Compare two scripts/benchmark_memory.py reports
+
+    Steady-state RSS regresses when it grew by more than rss_threshold (as a
+    ratio). An endpoint's heap growth per request regresses when it grew by
+    more than growth_threshold and by more than growth_slack_bytes, so a few
+    hundred bytes of noise on a near-zero baseline do not fail the run.
+
+    Returns:
+        {"metric", "baseline", "current", "regressed"} rows, steady RSS first
+    """
+    before, after = baseline.get("steady_rss_bytes"), current.get("steady_rss_bytes")
+    rows = [{"metric": "steady_rss_bytes", "baseline": before, "current": after,
+             "regressed": bool(before and after and after > before * rss_threshold)}]
+    for endpoint in sorted(set(baseline.get("endpoints", {})) & set(current.get("endpoints", {}))):
+        before = baseline["endpoints"][endpoint]["growth_bytes_per_request"]
+        after = current["endpoints"][endpoint]["growth_bytes_per_request"]
+        rows.append({"metric": f"{endpoint} growth_bytes_per_request", "baseline": before, "current": after,
+                     "regressed": after - before > growth_slack_bytes and after > max(before, 0) * growth_threshold})
+    return rows
@@ -2,6 +2,9 @@ import React, { useState, useEffect } from 'react';
 import axios from 'axios';
 import './App.css';
 
+// Backend origin; builds served by FastAPI itself set REACT_APP_API_URL="" (same origin)
+const API_URL = process.env.REACT_APP_API_URL ?? 'http://localhost:8000';
+
 function App() {
   const [formData, setFormData] = useState({
     countryOfCitizenship: '',
@@ -16,15 +19,30 @@ function App() {
   const [error, setError] = useState(null);
   const [backendStatus, setBackendStatus] = useState('checking');
   const [provider, setProvider] = useState(null);
+  const [destinationSuggestions, setDestinationSuggestions] = useState([]);
 
   // Check backend health on component mount
   useEffect(() => {
     checkBackendHealth();
   }, []);
 
+  // Warm the backend's retrieval for this destination/purpose while the rest
+  // of the form is filled in (fire-and-forget; failures are irrelevant)
+  useEffect(() => {
+    const { destinationCountry, purposeOfVisit } = formData;
+    if (!destinationCountry.trim() || !purposeOfVisit) {
+      return undefined;
+    }
+    const timer = setTimeout(() => {
+      axios.post(`${API_URL}/prefetch`, { destinationCountry, purposeOfVisit }, { timeout: 2000 })
+        .catch(() => {});
+    }, 800);
+    return () => clearTimeout(timer);
+  }, [formData.destinationCountry, formData.purposeOfVisit]);
+
   const checkBackendHealth = async () => {
     try {
-      const response = await axios.get('http://localhost:8000/health', { timeout: 5000 });
+      const response = await axios.get(`${API_URL}/health`, { timeout: 5000 });
       if (response.data.status === 'healthy') {
         setBackendStatus('online');
       }
@@ -34,11 +52,26 @@ function App() {
     }
   };
 
+  const fetchDestinationSuggestions = async (prefix) => {
+    try {
+      const response = await axios.get(`${API_URL}/suggest`, {
+        params: { q: prefix, kind: 'country', limit: 8 },
+        timeout: 2000
+      });
+      setDestinationSuggestions(response.data.suggestions.map((s) => s.value));
+    } catch (err) {
+      setDestinationSuggestions([]);
+    }
+  };
+
   const handleChange = (e) => {
     setFormData({
       ...formData,
       [e.target.name]: e.target.value
     });
+    if (e.target.name === 'destinationCountry') {
+      fetchDestinationSuggestions(e.target.value);
+    }
     // Clear previous results when form changes
     if (result) {
       setResult(null);
@@ -55,7 +88,7 @@ function App() {
 
     try {
       const response = await axios.post(
-        'http://localhost:8000/check-eligibility', 
+        `${API_URL}/check-eligibility`, 
         formData,
         { timeout: 30000 } // 30 second timeout
       );
@@ -67,7 +100,7 @@ function App() {
       } else if (err.response) {
         setError(err.response.data?.detail || 'Server error occurred. Please try again.');
       } else if (err.request) {
-        setError('Unable to connect to the server. Please ensure the backend is running on http://localhost:8000');
+        setError(`Unable to connect to the server. Please ensure the backend is running on ${API_URL || window.location.origin}`);
       } else {
         setError('An unexpected error occurred. Please try again.');
       }
@@ -124,8 +157,15 @@ function App() {
             value={formData.destinationCountry}
             onChange={handleChange}
             placeholder="e.g., Canada, Germany, UK"
+            list="destinationSuggestions"
+            autoComplete="off"
             required
           />
+          <datalist id="destinationSuggestions">
+            {destinationSuggestions.map((country) => (
+              <option key={country} value={country} />
+            ))}
+          </datalist>
         </div>
 
         <div className="form-group">
@@ -0,0 +1,204 @@
+# ==================================
+# SwiftVisa Retrieval Prefetch
+# ==================================
+#
+# The form knows the destination and purpose of visit long before the user
+# submits the full profile. POST /prefetch retrieves a pool of chunks for that
+# pair in the background and parks it, with the chunk vectors, in a short-TTL
+# cache; the eligibility check then re-ranks the pool against its full query
+# (one query embedding, no index search) and only the LLM call remains.
+#
+# Prefetch must never add load of its own: each client gets a sliding window
+# of requests, a pair already cached or being fetched is not fetched again,
+# and at most max_inflight fetches run at once - further requests are dropped
+# rather than queued.
+
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Optional
+
+import numpy as np
+
+from retrieval_params import mmr_select
+from suggest import normalize
+from ttl_store import TTLStore
+
+logger = logging.getLogger("swiftvisa.prefetch")
+
+
+def prefetch_key(index_version: str, destination: str, purpose: Optional[str]) -> str:
+    """Cache key of a destination/purpose pair on one index version"""
+    return f"{index_version}|{normalize(destination)}|{normalize(purpose or '')}"
+
+
+class PrefetchedContext:
+    """Chunk pool retrieved for a destination/purpose pair"""
+
+    def __init__(self, query: str, docs: list, vectors: np.ndarray, index_version: str, k: Optional[int] = None):
+        """
+        Args:
+            k: Chunks asked for (more than len(docs) when the index had fewer)
+        """
+        self.query = query
+        self.docs = docs
+        self.k = len(docs) if k is None else k
+        self.index_version = index_version
+        self.created_at = datetime.now().isoformat()
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True) if vectors.size else 1
+        self.vectors = vectors / np.where(norms == 0, 1, norms)
+
+    @classmethod
+    def build(cls, query: str, docs: list, embeddings, index_version: str,
+              k: Optional[int] = None) -> "PrefetchedContext":
+        """Embed the pooled chunks once, off the request path"""
+        texts = [doc.page_content for doc in docs]
+        vectors = np.asarray(embeddings.embed_documents(texts) if texts else [], dtype=np.float32)
+        return cls(query, docs, vectors, index_version, k)
+
+    def _order(self, query_vector, k: int) -> tuple:
+        target = np.asarray(query_vector, dtype=np.float32)
+        norm = np.linalg.norm(target)
+        scores = self.vectors @ (target / norm if norm else target)
+        return np.argsort(-scores, kind="stable")[:k], scores
+
+    def rank(self, query_vector, k: int) -> list:
+        """
+        The k pooled chunks most similar to a query vector
+
+        Returns:
+            (document, cosine similarity) pairs, best first
+        """
+        if not self.docs:
+            return []
+        order, scores = self._order(query_vector, k)
+        return [(self.docs[i], float(scores[i])) for i in order]
+
+    def mmr(self, query_vector, k: int, fetch_k: int, lambda_mult: float) -> list:
+        """
+        k of the fetch_k pooled chunks most similar to a query vector, chosen
+        by maximal marginal relevance
+
+        Returns:
+            (document, cosine similarity) pairs in selection order
+        """
+        if not self.docs:
+            return []
+        order, scores = self._order(query_vector, max(k, fetch_k))
+        rows = mmr_select(query_vector, self.vectors[order], k, lambda_mult)
+        return [(self.docs[order[row]], float(scores[order[row]])) for row in rows]
+
+
+class SlidingWindowLimiter:
+    """At most max_requests per key within any window_seconds"""
+
+    def __init__(self, max_requests: int, window_seconds: float, max_keys: int = 10000,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_requests = max_requests
+        self.window_seconds = window_seconds
+        self._clock = clock
+        # A key idle for a whole window has nothing left to remember
+        self._windows = TTLStore(window_seconds, max_entries=max_keys, sliding=True, clock=clock)
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    def check(self, key: Optional[str]) -> Optional[float]:
+        """Record a request; returns None if allowed, else seconds until one is"""
+        now = self._clock()
+        key = key or "anonymous"
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None:
+                window = deque()
+                self._windows.put(key, window)
+            while window and window[0] <= now - self.window_seconds:
+                window.popleft()
+            if len(window) >= self.max_requests:
+                self.rejected += 1
+                return round(window[0] + self.window_seconds - now, 3)
+            window.append(now)
+            return None
+
+
+class PrefetchCache:
+    """Background fetches of chunk pools and the short-TTL cache they fill"""
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 500, max_inflight: int = 2,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_inflight = max_inflight
+        self._store = TTLStore(ttl_seconds, max_entries=max_entries, clock=clock)
+        self._inflight = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_inflight), thread_name_prefix="prefetch")
+        self.counts = {"scheduled": 0, "cached": 0, "pending": 0, "busy": 0, "failed": 0, "hits": 0, "misses": 0}
+
+    def _count(self, name: str):
+        with self._lock:
+            self.counts[name] += 1
+
+    def submit(self, key: str, fetch: Callable[[], Optional[PrefetchedContext]]) -> str:
+        """
+        Start fetch() in the background unless its result is already at hand
+
+        Returns:
+            "scheduled", "cached" (still fresh), "pending" (already being
+            fetched) or "busy" (max_inflight fetches running; dropped)
+        """
+        if self._store.get(key) is not None:
+            status = "cached"
+        else:
+            with self._lock:
+                if key in self._inflight:
+                    status = "pending"
+                elif len(self._inflight) >= self.max_inflight:
+                    status = "busy"
+                else:
+                    self._inflight.add(key)
+                    status = "scheduled"
+            if status == "scheduled":
+                self._executor.submit(self._run, key, fetch)
+        self._count(status)
+        return status
+
+    def _run(self, key: str, fetch: Callable[[], Optional[PrefetchedContext]]):
+        try:
+            context = fetch()
+            if context is not None:
+                self._store.put(key, context)
+        except Exception as e:
+            self._count("failed")
+            logger.warning(f"⚠️ Prefetch {key} failed: {e}")
+        finally:
+            with self._lock:
+                self._inflight.discard(key)
+
+    def lookup(self, *keys: str, min_k: int = 0) -> Optional[PrefetchedContext]:
+        """
+        Cached pool of the first key that has one, counted as one hit or miss
+
+        Args:
+            min_k: Skip pools fetched with fewer chunks than this
+        """
+        context = next((c for c in (self._store.get(key) for key in keys) if c is not None and c.k >= min_k),
+                       None)
+        self._count("hits" if context is not None else "misses")
+        return context
+
+    def inflight(self) -> int:
+        with self._lock:
+            return len(self._inflight)
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self.counts)
+        lookups = counts["hits"] + counts["misses"]
+        return {
+            **self._store.stats(),
+            "inflight": self.inflight(),
+            "max_inflight": self.max_inflight,
+            **counts,
+            "hit_rate": round(counts["hits"] / lookups, 3) if lookups else 0.0
+        }
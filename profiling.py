@@ -0,0 +1,130 @@
+# ==================================
+# SwiftVisa Sampling Profiler
+# ==================================
+#
+# Pure-Python statistical profiler: a background thread periodically reads the
+# stack of the thread serving a request (sys._current_frames) and counts
+# collapsed stacks. Output uses the "collapsed" format understood by
+# flamegraph.pl, speedscope and most flame-graph viewers:
+#
+#   main.py:check_eligibility;chroma.py:similarity_search;... 42
+#
+# Endpoints in this app are ``async def`` with blocking work inside, so the
+# whole request runs on the event loop thread that the middleware samples.
+
+import os
+import random
+import sys
+import threading
+import uuid
+from collections import Counter, OrderedDict
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+
+def collapse_stack(frame, max_depth: int = 128) -> str:
+    """Render a frame and its callers root-first as a collapsed stack"""
+    names = []
+    while frame is not None and len(names) < max_depth:
+        code = frame.f_code
+        names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+def to_collapsed(stacks: Counter) -> str:
+    """Serialize stack counts as collapsed flame-graph text"""
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+class StackSampler:
+    """Samples one thread's stack at a fixed interval until stopped"""
+
+    def __init__(self, thread_id: int, interval: float = 0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[collapse_stack(frame)] += 1
+
+    def start(self) -> "StackSampler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+
+class ProfileStore:
+    """Keeps recent per-request profiles and per-endpoint aggregates"""
+
+    def __init__(self, max_profiles: int = 20):
+        self.max_profiles = max_profiles
+        self._lock = threading.Lock()
+        self._profiles: "OrderedDict[str, dict]" = OrderedDict()
+        self._aggregates: Dict[str, Counter] = {}
+        self._aggregate_requests: Dict[str, int] = {}
+
+    def save(self, path: str, stacks: Counter, duration: float) -> str:
+        """Store a single request's profile; returns its id"""
+        profile_id = uuid.uuid4().hex[:12]
+        with self._lock:
+            self._profiles[profile_id] = {
+                "id": profile_id,
+                "path": path,
+                "duration": round(duration, 4),
+                "samples": sum(stacks.values()),
+                "created_at": datetime.now().isoformat(),
+                "stacks": stacks
+            }
+            while len(self._profiles) > self.max_profiles:
+                self._profiles.popitem(last=False)
+        return profile_id
+
+    def get(self, profile_id: str) -> Optional[dict]:
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+    def list(self) -> list:
+        """Metadata of stored profiles, newest first"""
+        with self._lock:
+            return [
+                {k: v for k, v in p.items() if k != "stacks"}
+                for p in reversed(self._profiles.values())
+            ]
+
+    def add_to_aggregate(self, path: str, stacks: Counter):
+        with self._lock:
+            self._aggregates.setdefault(path, Counter()).update(stacks)
+            self._aggregate_requests[path] = self._aggregate_requests.get(path, 0) + 1
+
+    def aggregate(self, path: str) -> Counter:
+        with self._lock:
+            return Counter(self._aggregates.get(path, Counter()))
+
+    def aggregate_summary(self) -> dict:
+        with self._lock:
+            return {
+                path: {"requests": self._aggregate_requests[path], "samples": sum(stacks.values())}
+                for path, stacks in self._aggregates.items()
+            }
+
+    def reset_aggregate(self, path: Optional[str] = None):
+        with self._lock:
+            paths: Iterable[str] = [path] if path else list(self._aggregates)
+            for p in paths:
+                self._aggregates.pop(p, None)
+                self._aggregate_requests.pop(p, None)
+
+
+def should_sample(rate: float) -> bool:
+    """Decide whether to include a request in the continuous profile"""
+    return rate > 0 and random.random() < rate
@@ -0,0 +1,255 @@
+# ==================================
+# SwiftVisa Quantized Vector Index
+# ==================================
+#
+# Compact alternative to the Chroma index for serving. Each embedding is kept
+# as int8 codes (1 byte/dim) and sign bits (1 bit/dim) for a fast first pass;
+# the float32 vectors live in a memory-mapped .npy file and are only touched
+# for the shortlist that gets rescored.
+#
+# Directory layout:
+#   manifest.json    {"count", "dim", "ids", "embedding_model", "space"}
+#   int8.npy         (count, dim) int8 codes
+#   int8_scale.npy   (dim,) float32 per-dimension scale
+#   binary.npy       (count, dim / 8) uint8 packed sign bits of (vector - mean)
+#   mean.npy         (dim,) float32 corpus mean used to centre before binarizing
+#   float32.npy      (count, dim) unit-normalized vectors (memory-mapped)
+#   documents.jsonl  one {"page_content", "metadata"} record per vector
+#   offsets.npy      (count + 1,) int64 byte offsets into documents.jsonl
+
+import json
+import mmap
+import os
+from typing import Any, Iterable, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
+
+QUANTIZED_DIR = "quantized"
+MODES = ("binary", "int8")
+# Chroma distance spaces scores can be reported in
+SPACES = ("l2", "cosine", "ip")
+
+# Number of set bits for every byte value, for Hamming distances
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).astype(np.float32)
+
+
+# ----------------------------------------
+# BUILD
+# ----------------------------------------
+def write_quantized_index(
+    index_dir: str,
+    embeddings: np.ndarray,
+    documents: List[str],
+    metadatas: Optional[List[dict]] = None,
+    ids: Optional[List[str]] = None,
+    embedding_model: str = "all-MiniLM-L6-v2",
+    space: str = "l2"
+) -> dict:
+    """
+    Write a quantized index directory
+
+    Args:
+        index_dir: Output directory
+        embeddings: (count, dim) float embeddings
+        documents: Text of each vector
+        metadatas: Metadata of each vector
+        ids: Stable id of each vector
+        space: Distance space of the source collection ("l2", "cosine" or
+            "ip"), which search scores are reported in
+
+    Returns:
+        The manifest that was written
+    """
+    if space not in SPACES:
+        raise ValueError(f"Unsupported distance space: {space} (expected one of {SPACES})")
+    vectors = _normalize(np.asarray(embeddings, dtype=np.float32))
+    count, dim = vectors.shape
+    metadatas = metadatas or [{} for _ in range(count)]
+    ids = ids or [str(i) for i in range(count)]
+    os.makedirs(index_dir, exist_ok=True)
+
+    scale = np.abs(vectors).max(axis=0) / 127.0
+    scale[scale == 0] = 1.0
+    codes = np.clip(np.rint(vectors / scale), -127, 127).astype(np.int8)
+
+    np.save(os.path.join(index_dir, "float32.npy"), vectors)
+    np.save(os.path.join(index_dir, "int8.npy"), codes)
+    np.save(os.path.join(index_dir, "int8_scale.npy"), scale.astype(np.float32))
+    mean = vectors.mean(axis=0).astype(np.float32)
+    np.save(os.path.join(index_dir, "mean.npy"), mean)
+    np.save(os.path.join(index_dir, "binary.npy"), np.packbits(vectors > mean, axis=1))
+
+    offsets = [0]
+    with open(os.path.join(index_dir, "documents.jsonl"), "wb") as f:
+        for text, metadata in zip(documents, metadatas):
+            line = json.dumps({"page_content": text, "metadata": metadata or {}}, ensure_ascii=False)
+            f.write(line.encode("utf-8") + b"\n")
+            offsets.append(f.tell())
+    np.save(os.path.join(index_dir, "offsets.npy"), np.array(offsets, dtype=np.int64))
+
+    manifest = {"count": int(count), "dim": int(dim), "ids": list(ids), "embedding_model": embedding_model,
+                "space": space}
+    with open(os.path.join(index_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    return manifest
+
+
+def export_chroma_collection(db, index_dir: str, embedding_model: str = "all-MiniLM-L6-v2") -> dict:
+    """Write a quantized copy of a langchain Chroma store's collection, in its distance space"""
+    data = db.get(include=["embeddings", "documents", "metadatas"])
+    return write_quantized_index(
+        index_dir,
+        np.asarray(data["embeddings"], dtype=np.float32),
+        data["documents"],
+        data["metadatas"],
+        data["ids"],
+        embedding_model,
+        (db._collection.metadata or {}).get("hnsw:space", "l2")
+    )
+
+
+# ----------------------------------------
+# SEARCH
+# ----------------------------------------
+class QuantizedIndex:
+    """Two-pass search: quantized shortlist, float32 rescoring"""
+
+    def __init__(self, index_dir: str):
+        self.index_dir = index_dir
+        with open(os.path.join(index_dir, "manifest.json"), "r", encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        self.ids = self.manifest["ids"]
+        self.count = self.manifest["count"]
+        # Indexes written before the space was recorded came from "l2" collections
+        self.space = self.manifest.get("space", "l2")
+        self.codes = np.load(os.path.join(index_dir, "int8.npy"))
+        self.scale = np.load(os.path.join(index_dir, "int8_scale.npy"))
+        self.bits = np.load(os.path.join(index_dir, "binary.npy"))
+        self.mean = np.load(os.path.join(index_dir, "mean.npy"))
+        self.offsets = np.load(os.path.join(index_dir, "offsets.npy"), mmap_mode="r")
+        self._vectors = None
+        self._documents = None
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """Full-precision vectors, memory-mapped on first use"""
+        if self._vectors is None:
+            self._vectors = np.load(os.path.join(self.index_dir, "float32.npy"), mmap_mode="r")
+        return self._vectors
+
+    def document(self, i: int) -> Document:
+        """Read one document from the memory-mapped documents file"""
+        if self._documents is None:
+            with open(os.path.join(self.index_dir, "documents.jsonl"), "rb") as f:
+                self._documents = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        record = json.loads(self._documents[int(self.offsets[i]):int(self.offsets[i + 1])])
+        return Document(page_content=record["page_content"], metadata=record["metadata"], id=self.ids[i])
+
+    def shortlist(self, query: np.ndarray, size: int, mode: str = "binary") -> np.ndarray:
+        """First pass over the quantized codes; returns candidate row numbers"""
+        size = min(size, self.count)
+        if mode == "binary":
+            query_bits = np.packbits(query > self.mean)
+            distances = _POPCOUNT[np.bitwise_xor(self.bits, query_bits)].sum(axis=1, dtype=np.int32)
+            order_key = distances
+        elif mode == "int8":
+            weights = query * self.scale
+            peak = np.abs(weights).max() or 1.0
+            query_codes = np.rint(weights * (127.0 / peak)).astype(np.int32)
+            order_key = -(self.codes.astype(np.int32) @ query_codes)
+        else:
+            raise ValueError(f"Unknown quantization mode: {mode} (expected one of {MODES})")
+
+        if size >= self.count:
+            return np.argsort(order_key, kind="stable")
+        candidates = np.argpartition(order_key, size - 1)[:size]
+        return candidates[np.argsort(order_key[candidates], kind="stable")]
+
+    def search(self, query: np.ndarray, k: int = 5, mode: str = "binary",
+               oversample: int = 10) -> List[Tuple[int, float]]:
+        """
+        Find the k nearest vectors
+
+        Returns:
+            (row, cosine similarity) pairs, best first
+        """
+        if self.count == 0:
+            return []
+        query = _normalize(np.asarray(query, dtype=np.float32))
+        candidates = np.sort(self.shortlist(query, max(k * oversample, k), mode))
+        scores = np.asarray(self.vectors[candidates]) @ query
+        best = np.argsort(-scores, kind="stable")[:k]
+        return [(int(candidates[i]), float(scores[i])) for i in best]
+
+    def memory_bytes(self) -> dict:
+        """Resident size of the first-pass structures vs the mapped float32 vectors"""
+        return {
+            "int8_codes": int(self.codes.nbytes + self.scale.nbytes),
+            "binary_codes": int(self.bits.nbytes + self.mean.nbytes),
+            "float32_vectors_mapped": int(self.count * self.manifest["dim"] * 4)
+        }
+
+
+# ----------------------------------------
+# LANGCHAIN ADAPTER
+# ----------------------------------------
+class QuantizedVectorStore(VectorStore):
+    """
+    Read-only LangChain vector store over a QuantizedIndex
+
+    Scores are Chroma distances in the source collection's space, computed on
+    the unit-normalized vectors ("l2": squared L2, "cosine": 1 - cosine, "ip":
+    1 - inner product), lower is better, so callers can switch backends
+    transparently.
+    """
+
+    def __init__(self, index: QuantizedIndex, embedding_function, mode: str = "binary", oversample: int = 10):
+        self.index = index
+        self._embedding_function = embedding_function
+        self.mode = mode
+        self.oversample = oversample
+
+    @classmethod
+    def load(cls, index_dir: str, embedding_function, **kwargs) -> "QuantizedVectorStore":
+        return cls(QuantizedIndex(index_dir), embedding_function, **kwargs)
+
+    @property
+    def embeddings(self):
+        return self._embedding_function
+
+    def similarity_search_by_vector_with_score(self, embedding: List[float], k: int = 4) -> List[Tuple[Document, float]]:
+        hits = self.index.search(np.asarray(embedding), k=k, mode=self.mode, oversample=self.oversample)
+        # Between unit vectors the squared L2 distance is 2 - 2 * cosine
+        scale = 2.0 if self.index.space == "l2" else 1.0
+        return [(self.index.document(row), max(scale - scale * score, 0.0)) for row, score in hits]
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_by_vector_with_score(embedding, k)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.similarity_search_by_vector_with_score(self._embedding_function.embed_query(query), k)
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k)]
+
+    def _select_relevance_score_fn(self):
+        if self.index.space == "cosine":
+            return self._cosine_relevance_score_fn
+        if self.index.space == "ip":
+            return self._max_inner_product_relevance_score_fn
+        return self._euclidean_relevance_score_fn
+
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[List[dict]] = None, **kwargs: Any) -> List[str]:
+        raise NotImplementedError("QuantizedVectorStore is read-only; rebuild the index instead")
+
+    @classmethod
+    def from_texts(cls, texts: List[str], embedding, metadatas: Optional[List[dict]] = None, **kwargs: Any):
+        raise NotImplementedError("Build with write_quantized_index() or export_chroma_collection()")
@@ -0,0 +1,277 @@
+# ==================================
+# SwiftVisa Read-Only Index
+# ==================================
+#
+# Lock-free serving mode for a built Chroma persist directory. The Chroma
+# client opens chroma.sqlite3 read-write and takes SQLite locks, so several
+# workers or replicas sharing one volume contend with each other and with a
+# concurrent rebuild. Here the database is opened once with SQLite's
+# "immutable" URI flag (no locks, no journal, no writes), the collection is
+# copied into process memory and the file is closed again; searches are exact
+# numpy scans over the in-memory vectors, with Chroma's distance semantics.
+#
+# Snapshots are write-once (a rebuild publishes a new directory), which is
+# what makes the immutable open safe.
+#
+# Vectors are read from vectors.npy / vector_ids.json, written next to the
+# Chroma files at build time. Chroma keeps them in its HNSW segment files,
+# whose layout is internal; for stores built before the frozen copy existed
+# they are recovered from Chroma's embeddings queue when it is complete.
+
+import json
+import os
+import sqlite3
+from typing import Any, Iterable, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
+
+CHROMA_SQLITE_FILE = "chroma.sqlite3"
+FROZEN_VECTORS_FILE = "vectors.npy"
+FROZEN_IDS_FILE = "vector_ids.json"
+DOCUMENT_KEY = "chroma:document"
+
+
+class ReadOnlyIndexError(RuntimeError):
+    """Raised for writes to a read-only index, or when it cannot be opened"""
+
+
+# ----------------------------------------
+# BUILD
+# ----------------------------------------
+def freeze_vectors(db, persist_dir: str) -> int:
+    """
+    Write a frozen copy of a langchain Chroma store's vectors
+
+    Returns:
+        Number of vectors written
+    """
+    data = db.get(include=["embeddings"])
+    vectors = np.asarray(data["embeddings"], dtype=np.float32)
+    np.save(os.path.join(persist_dir, FROZEN_VECTORS_FILE), vectors.reshape(len(data["ids"]), -1))
+    with open(os.path.join(persist_dir, FROZEN_IDS_FILE), "w", encoding="utf-8") as f:
+        json.dump(data["ids"], f)
+    return len(data["ids"])
+
+
+# ----------------------------------------
+# READ
+# ----------------------------------------
+def connect_immutable(db_path: str) -> sqlite3.Connection:
+    """Open a SQLite file read-only without locking (the file must not change)"""
+    if not os.path.exists(db_path):
+        raise ReadOnlyIndexError(f"No Chroma database at {db_path}")
+    return sqlite3.connect(f"file:{db_path}?mode=ro&immutable=1", uri=True, check_same_thread=False)
+
+
+def _metadata_value(string_value, int_value, float_value, bool_value):
+    if string_value is not None:
+        return string_value
+    if bool_value is not None:
+        return bool(bool_value)
+    if int_value is not None:
+        return int_value
+    return float_value
+
+
+def read_collection(persist_dir: str, collection_name: str = "langchain") -> dict:
+    """
+    Ids, documents, metadata and distance space of a Chroma collection
+
+    Returns:
+        {"ids", "documents", "metadatas", "space", "queue"} where "queue" maps
+        ids to vectors still held in Chroma's embeddings queue
+    """
+    conn = connect_immutable(os.path.join(persist_dir, CHROMA_SQLITE_FILE))
+    try:
+        row = conn.execute("SELECT id FROM collections WHERE name = ?", (collection_name,)).fetchone()
+        if row is None:
+            raise ReadOnlyIndexError(f"No collection named {collection_name!r} in {persist_dir}")
+        collection_id = row[0]
+        space = conn.execute(
+            "SELECT str_value FROM collection_metadata WHERE collection_id = ? AND key = 'hnsw:space'",
+            (collection_id,)
+        ).fetchone()
+
+        rows = conn.execute(
+            "SELECT e.id, e.embedding_id FROM embeddings e JOIN segments s ON s.id = e.segment_id "
+            "WHERE s.collection = ? AND s.scope = 'METADATA' ORDER BY e.seq_id",
+            (collection_id,)
+        ).fetchall()
+        ids = [embedding_id for _, embedding_id in rows]
+        documents = {row_id: None for row_id, _ in rows}
+        metadatas = {row_id: {} for row_id, _ in rows}
+        for row_id, key, *values in conn.execute(
+            "SELECT m.id, m.key, m.string_value, m.int_value, m.float_value, m.bool_value "
+            "FROM embedding_metadata m JOIN embeddings e ON e.id = m.id "
+            "JOIN segments s ON s.id = e.segment_id WHERE s.collection = ? AND s.scope = 'METADATA'",
+            (collection_id,)
+        ):
+            if key == DOCUMENT_KEY:
+                documents[row_id] = values[0]
+            elif not key.startswith("chroma:"):
+                metadatas[row_id][key] = _metadata_value(*values)
+
+        # Latest queued write per id; DELETE (3) drops it again
+        queue = {}
+        topic = f"%/{collection_id}"
+        for embedding_id, operation, vector, encoding in conn.execute(
+            "SELECT id, operation, vector, encoding FROM embeddings_queue WHERE topic LIKE ? ORDER BY seq_id",
+            (topic,)
+        ):
+            if operation == 3:
+                queue.pop(embedding_id, None)
+            elif vector is not None and (encoding or "FLOAT32") == "FLOAT32":
+                queue[embedding_id] = np.frombuffer(vector, dtype=np.float32)
+    finally:
+        conn.close()
+
+    return {
+        "ids": ids,
+        "documents": [documents[row_id] for row_id, _ in rows],
+        "metadatas": [metadatas[row_id] for row_id, _ in rows],
+        "space": space[0] if space and space[0] else "l2",
+        "queue": queue
+    }
+
+
+def load_vectors(persist_dir: str, ids: List[str], queue: dict) -> Tuple[np.ndarray, str]:
+    """
+    Vectors for ids, in order
+
+    Returns:
+        ((len(ids), dim) float32 matrix, source: "frozen" or "queue")
+
+    Raises:
+        ReadOnlyIndexError: If no complete set of vectors is available
+    """
+    vectors_path = os.path.join(persist_dir, FROZEN_VECTORS_FILE)
+    ids_path = os.path.join(persist_dir, FROZEN_IDS_FILE)
+    if os.path.exists(vectors_path) and os.path.exists(ids_path):
+        with open(ids_path, "r", encoding="utf-8") as f:
+            rows = {chunk_id: i for i, chunk_id in enumerate(json.load(f))}
+        frozen = np.load(vectors_path)
+        missing = [chunk_id for chunk_id in ids if chunk_id not in rows]
+        if not missing:
+            return np.ascontiguousarray(frozen[[rows[chunk_id] for chunk_id in ids]], dtype=np.float32), "frozen"
+        raise ReadOnlyIndexError(f"{FROZEN_VECTORS_FILE} is missing {len(missing)} ids - rebuild the index")
+
+    if ids and all(chunk_id in queue for chunk_id in ids):
+        return np.stack([queue[chunk_id] for chunk_id in ids]).astype(np.float32), "queue"
+    raise ReadOnlyIndexError(
+        f"No {FROZEN_VECTORS_FILE} in {persist_dir} and the embeddings queue is incomplete - rebuild the index"
+    )
+
+
+# ----------------------------------------
+# LANGCHAIN ADAPTER
+# ----------------------------------------
+class ReadOnlyChromaStore(VectorStore):
+    """
+    In-memory, read-only LangChain vector store over a Chroma persist directory
+
+    Scores are Chroma distances for the collection's space ("l2": squared L2,
+    "cosine": 1 - cosine, "ip": 1 - inner product), lower is better, and
+    search is exact, so results match the Chroma client's.
+    """
+
+    def __init__(self, ids: List[str], documents: List[Optional[str]], metadatas: List[dict],
+                 vectors: np.ndarray, embedding_function, space: str = "l2", source: str = "frozen"):
+        if space not in ("l2", "cosine", "ip"):
+            raise ReadOnlyIndexError(f"Unsupported distance space: {space}")
+        self.ids = ids
+        self.documents = documents
+        self.metadatas = metadatas
+        self.vectors = vectors
+        self.vectors.setflags(write=False)
+        self.space = space
+        self.source = source
+        self._embedding_function = embedding_function
+        self._rows = {chunk_id: i for i, chunk_id in enumerate(ids)}
+        norms = np.linalg.norm(vectors, axis=1) if len(ids) else np.zeros(0, dtype=np.float32)
+        self._norms = np.where(norms == 0, 1, norms).astype(np.float32)
+        self._squared_norms = (norms ** 2).astype(np.float32)
+
+    @classmethod
+    def load(cls, persist_dir: str, embedding_function, collection_name: str = "langchain") -> "ReadOnlyChromaStore":
+        collection = read_collection(persist_dir, collection_name)
+        vectors, source = load_vectors(persist_dir, collection["ids"], collection["queue"])
+        return cls(collection["ids"], collection["documents"], collection["metadatas"], vectors,
+                   embedding_function, collection["space"], source)
+
+    @property
+    def embeddings(self):
+        return self._embedding_function
+
+    def _document(self, row: int) -> Document:
+        return Document(page_content=self.documents[row] or "", metadata=dict(self.metadatas[row]),
+                        id=self.ids[row])
+
+    def distances(self, embedding: List[float]) -> np.ndarray:
+        """Distance from a query vector to every stored vector"""
+        query = np.asarray(embedding, dtype=np.float32)
+        dots = self.vectors @ query
+        if self.space == "l2":
+            return self._squared_norms - 2 * dots + float(query @ query)
+        if self.space == "cosine":
+            norm = float(np.linalg.norm(query)) or 1.0
+            return 1 - dots / (self._norms * norm)
+        return 1 - dots
+
+    def similarity_search_by_vector_with_score(self, embedding: List[float], k: int = 4) -> List[Tuple[Document, float]]:
+        if not self.ids:
+            return []
+        distances = self.distances(embedding)
+        k = min(k, len(self.ids))
+        rows = np.argpartition(distances, k - 1)[:k]
+        rows = rows[np.argsort(distances[rows], kind="stable")]
+        return [(self._document(int(row)), float(max(distances[row], 0.0))) for row in rows]
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_by_vector_with_score(embedding, k)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.similarity_search_by_vector_with_score(self._embedding_function.embed_query(query), k)
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k)]
+
+    def _select_relevance_score_fn(self):
+        if self.space == "cosine":
+            return self._cosine_relevance_score_fn
+        if self.space == "ip":
+            return self._max_inner_product_relevance_score_fn
+        return self._euclidean_relevance_score_fn
+
+    def get(self, ids: Optional[List[str]] = None, include: Optional[List[str]] = None) -> dict:
+        """Chroma-style get by id (all chunks when ids is None)"""
+        rows = range(len(self.ids)) if ids is None else [self._rows[i] for i in ids if i in self._rows]
+        include = include or ["documents", "metadatas"]
+        result = {"ids": [self.ids[row] for row in rows]}
+        if "documents" in include:
+            result["documents"] = [self.documents[row] for row in rows]
+        if "metadatas" in include:
+            result["metadatas"] = [self.metadatas[row] for row in rows]
+        if "embeddings" in include:
+            result["embeddings"] = [self.vectors[row] for row in rows]
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "count": len(self.ids),
+            "dim": int(self.vectors.shape[1]) if self.vectors.ndim == 2 else 0,
+            "space": self.space,
+            "vector_source": self.source,
+            "memory_bytes": int(self.vectors.nbytes + sum(len(d or "") for d in self.documents))
+        }
+
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[List[dict]] = None, **kwargs: Any) -> List[str]:
+        raise ReadOnlyIndexError("Index is served read-only; rebuild the index instead")
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any):
+        raise ReadOnlyIndexError("Index is served read-only; rebuild the index instead")
+
+    @classmethod
+    def from_texts(cls, texts: List[str], embedding, metadatas: Optional[List[dict]] = None, **kwargs: Any):
+        raise ReadOnlyIndexError("Build with snapshots.build_vectorstore(), then open with ReadOnlyChromaStore.load()")
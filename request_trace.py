@@ -0,0 +1,202 @@
+# ==================================
+# SwiftVisa Request Tracing
+# ==================================
+#
+# Every request gets a RequestTrace (held in a context variable) that the
+# serving code annotates with the canonical query, retrieved chunks, stage
+# timings, prompt tokens and provider. Only requests slower than the
+# configured threshold are kept, in a bounded ring buffer and optionally a
+# rotating JSONL file.
+
+import json
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from typing import Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+_current_trace: ContextVar = ContextVar("swiftvisa_request_trace", default=None)
+
+
+class RequestTrace:
+    """Diagnostics collected while serving one request"""
+
+    def __init__(self, method: str, path: str):
+        self.method = method
+        self.path = path
+        self.started = time.perf_counter()
+        self.timestamp = datetime.now().isoformat()
+        self.query: Optional[str] = None
+        self.chunks: list = []
+        self.stages: dict = {}
+        self.prompt_tokens: Optional[int] = None
+        self.completion_tokens: Optional[int] = None
+        self.provider: Optional[str] = None
+        self.chain_mode: Optional[str] = None
+        self.variant: Optional[str] = None
+        self.destination: Optional[str] = None
+        self.client: Optional[str] = None
+        self.status: Optional[int] = None
+        self.duration_ms: Optional[float] = None
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a block; repeated stages of the same name accumulate"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            self.stages[name] = round(self.stages.get(name, 0.0) + elapsed, 3)
+
+    def add_prompt_tokens(self, tokens: int):
+        self.prompt_tokens = (self.prompt_tokens or 0) + int(tokens)
+
+    def add_completion_tokens(self, tokens: int):
+        self.completion_tokens = (self.completion_tokens or 0) + int(tokens)
+
+    def finish(self, status: int) -> float:
+        self.status = status
+        self.duration_ms = round((time.perf_counter() - self.started) * 1000, 3)
+        return self.duration_ms
+
+    def to_dict(self) -> dict:
+        return {
+            "timestamp": self.timestamp,
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "duration_ms": self.duration_ms,
+            "query": self.query,
+            "chunks": self.chunks,
+            "stages_ms": self.stages,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "provider": self.provider,
+            "chain_mode": self.chain_mode,
+            "variant": self.variant,
+            "destination": self.destination,
+            "client": self.client
+        }
+
+
+def start_trace(method: str, path: str) -> RequestTrace:
+    """Begin tracing the current request"""
+    trace = RequestTrace(method, path)
+    _current_trace.set(trace)
+    return trace
+
+
+def current_trace() -> Optional[RequestTrace]:
+    return _current_trace.get()
+
+
+@contextmanager
+def trace_stage(name: str):
+    """Time a stage of the current request (no-op outside a request)"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+    with trace.stage(name):
+        yield
+
+
+def annotate(**fields):
+    """Set fields such as query or provider on the current trace"""
+    trace = _current_trace.get()
+    if trace is not None:
+        for name, value in fields.items():
+            setattr(trace, name, value)
+
+
+def record_chunks(results: list):
+    """Record (document, score) pairs returned by a similarity search"""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.chunks.extend(
+            {
+                "id": getattr(doc, "id", None),
+                "score": round(float(score), 6),
+                "source": (doc.metadata or {}).get("source")
+            }
+            for doc, score in results
+        )
+
+
+class TokenUsageCallback(BaseCallbackHandler):
+    """
+    Counts the tokens reported by the LLM provider and adds them to the
+    current trace
+    """
+
+    def __init__(self):
+        self.trace = _current_trace.get()
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self._lock = threading.Lock()
+
+    def on_llm_end(self, response, **kwargs):
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        # Map-reduce chains end several calls concurrently
+        with self._lock:
+            self.prompt_tokens += usage.get("prompt_tokens") or 0
+            self.completion_tokens += usage.get("completion_tokens") or 0
+            if self.trace is not None and usage.get("prompt_tokens") is not None:
+                self.trace.add_prompt_tokens(usage["prompt_tokens"])
+            if self.trace is not None and usage.get("completion_tokens") is not None:
+                self.trace.add_completion_tokens(usage["completion_tokens"])
+
+
+class SlowRequestLog:
+    """Bounded ring buffer of slow-request traces, optionally spilled to JSONL"""
+
+    def __init__(self, threshold_ms: float, capacity: int = 200, log_file: Optional[str] = None,
+                 max_bytes: int = 10485760, backup_count: int = 5):
+        self.threshold_ms = threshold_ms
+        self._records = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self.total_recorded = 0
+        self._file_logger = None
+        if log_file:
+            Path(log_file).parent.mkdir(parents=True, exist_ok=True)
+            handler = RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self._file_logger = logging.getLogger(f"swiftvisa.slow_requests.{id(self)}")
+            self._file_logger.propagate = False
+            self._file_logger.setLevel(logging.INFO)
+            self._file_logger.addHandler(handler)
+
+    def observe(self, trace: RequestTrace) -> bool:
+        """Keep the trace if it was slower than the threshold"""
+        if trace.duration_ms is None or trace.duration_ms < self.threshold_ms:
+            return False
+        record = trace.to_dict()
+        with self._lock:
+            self._records.append(record)
+            self.total_recorded += 1
+        if self._file_logger is not None:
+            self._file_logger.info(json.dumps(record, ensure_ascii=False))
+        return True
+
+    def query(self, path: Optional[str] = None, min_ms: Optional[float] = None, limit: int = 50) -> list:
+        """Most recent slow requests first, optionally filtered"""
+        with self._lock:
+            records = list(self._records)
+        records.reverse()
+        if path:
+            records = [r for r in records if r["path"] == path]
+        if min_ms is not None:
+            records = [r for r in records if r["duration_ms"] >= min_ms]
+        return records[:limit]
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
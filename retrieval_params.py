@@ -0,0 +1,285 @@
+# ==================================
+# SwiftVisa Retrieval Parameters
+# ==================================
+#
+# The knobs of the retrieval and answer path - chunks per answer (k), the
+# candidate pool for MMR (fetch_k), the search type, a relevance threshold and
+# the answer chain - held at runtime instead of as constants, so they can be
+# changed through /admin/retrieval without a redeploy.
+#
+# Named variants override some of the defaults and get a weighted share of
+# the traffic, sticky per client. A request may also override parameters
+# itself, within the configured limits. Each request served with a variant
+# adds its latency, retrieval/LLM time and tokens to that variant's
+# statistics, so variants can be compared on live traffic.
+
+import hashlib
+import threading
+from collections import deque
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from answer_chain import CHAIN_MODES
+from traffic_capture import latency_summary
+
+SEARCH_TYPES = ("similarity", "similarity_score_threshold", "mmr")
+DEFAULT_VARIANT = "default"
+# Statistics of requests that overrode parameters themselves
+OVERRIDE_VARIANT = "override"
+
+_current_params: ContextVar = ContextVar("swiftvisa_retrieval_params", default=None)
+
+
+class RetrievalParamsError(ValueError):
+    """Parameters outside the allowed values or limits"""
+
+
+class RetrievalParams:
+    """One set of retrieval and answer-chain parameters"""
+
+    FIELDS = ("k", "fetch_k", "search_type", "score_threshold", "lambda_mult", "chain_type", "requirements_k")
+
+    def __init__(self, k: int = 5, fetch_k: int = 20, search_type: str = "similarity",
+                 score_threshold: float = 0.0, lambda_mult: float = 0.5, chain_type: str = "auto",
+                 requirements_k: int = 3):
+        """
+        Args:
+            k: Chunks retrieved per answer
+            fetch_k: Candidates MMR selects k from
+            search_type: "similarity", "similarity_score_threshold" or "mmr"
+            score_threshold: Minimum relevance (0-1) for similarity_score_threshold
+            lambda_mult: MMR trade-off, 1 = pure relevance, 0 = pure diversity
+            chain_type: Answer chain mode ("stuff", "map_reduce" or "auto")
+            requirements_k: Passages returned by /visa-requirements
+        """
+        self.k = k
+        self.fetch_k = fetch_k
+        self.search_type = search_type
+        self.score_threshold = score_threshold
+        self.lambda_mult = lambda_mult
+        self.chain_type = chain_type
+        self.requirements_k = requirements_k
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+    def replace(self, overrides: Optional[dict], max_k: int, max_fetch_k: int) -> "RetrievalParams":
+        """
+        A copy with some fields changed, validated against the limits
+
+        Raises:
+            RetrievalParamsError: unknown field, bad value or a value over a limit
+        """
+        values = self.to_dict()
+        for name, value in (overrides or {}).items():
+            if name not in self.FIELDS:
+                raise RetrievalParamsError(f"Unknown retrieval parameter: {name}")
+            if value is not None:
+                values[name] = value
+        try:
+            params = RetrievalParams(
+                k=int(values["k"]), fetch_k=int(values["fetch_k"]), search_type=str(values["search_type"]),
+                score_threshold=float(values["score_threshold"]), lambda_mult=float(values["lambda_mult"]),
+                chain_type=str(values["chain_type"]), requirements_k=int(values["requirements_k"])
+            )
+        except (TypeError, ValueError) as e:
+            raise RetrievalParamsError(f"Invalid retrieval parameter: {e}")
+        for name in ("k", "requirements_k"):
+            if not 1 <= getattr(params, name) <= max_k:
+                raise RetrievalParamsError(f"{name} must be between 1 and {max_k}")
+        if not 1 <= params.fetch_k <= max_fetch_k:
+            raise RetrievalParamsError(f"fetch_k must be between 1 and {max_fetch_k}")
+        if params.search_type not in SEARCH_TYPES:
+            raise RetrievalParamsError(f"search_type must be one of: {', '.join(SEARCH_TYPES)}")
+        if params.chain_type not in CHAIN_MODES:
+            raise RetrievalParamsError(f"chain_type must be one of: {', '.join(CHAIN_MODES)}")
+        for name in ("score_threshold", "lambda_mult"):
+            if not 0.0 <= getattr(params, name) <= 1.0:
+                raise RetrievalParamsError(f"{name} must be between 0 and 1")
+        return params
+
+
+def mmr_select(query_vector, vectors: np.ndarray, k: int, lambda_mult: float = 0.5) -> List[int]:
+    """
+    Maximal marginal relevance: k rows relevant to the query but unlike each other
+
+    Returns:
+        Row indices into vectors, in selection order
+    """
+    if len(vectors) == 0 or k <= 0:
+        return []
+    matrix = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    matrix = matrix / np.where(norms == 0, 1, norms)
+    query = np.asarray(query_vector, dtype=np.float32)
+    relevance = matrix @ (query / (np.linalg.norm(query) or 1.0))
+    selected = [int(np.argmax(relevance))]
+    max_similarity = matrix @ matrix[selected[0]]
+    while len(selected) < min(k, len(matrix)):
+        scores = lambda_mult * relevance - (1 - lambda_mult) * max_similarity
+        scores[selected] = -np.inf
+        row = int(np.argmax(scores))
+        selected.append(row)
+        max_similarity = np.maximum(max_similarity, matrix @ matrix[row])
+    return selected
+
+
+def use_params(params: RetrievalParams, variant: str):
+    """Serve the rest of the current request (or job) with these parameters"""
+    _current_params.set((params, variant))
+
+
+def current_params() -> Optional[Tuple[RetrievalParams, str]]:
+    """(params, variant) set for the current request, or None"""
+    return _current_params.get()
+
+
+class VariantStats:
+    """Recent per-request samples of one variant"""
+
+    def __init__(self, capacity: int = 1000):
+        self.requests = 0
+        self._samples = deque(maxlen=capacity)
+
+    def add(self, path: str, duration_ms: float, status: int, stages: dict,
+            prompt_tokens: Optional[int], completion_tokens: Optional[int]):
+        self.requests += 1
+        self._samples.append((path, duration_ms, status, stages.get("retrieval"), stages.get("llm"),
+                              prompt_tokens, completion_tokens))
+
+    def summary(self) -> dict:
+        samples = list(self._samples)
+
+        def mean(column: int) -> Optional[float]:
+            values = [sample[column] for sample in samples if sample[column] is not None]
+            return round(sum(values) / len(values), 2) if values else None
+
+        return {
+            "requests": self.requests,
+            "sampled": len(samples),
+            "latency": latency_summary([(path, ms, status) for path, ms, status, *_ in samples]),
+            "mean_retrieval_ms": mean(3),
+            "mean_llm_ms": mean(4),
+            "mean_prompt_tokens": mean(5),
+            "mean_completion_tokens": mean(6)
+        }
+
+
+class RetrievalTuner:
+    """Runtime defaults, traffic-split variants and their statistics"""
+
+    def __init__(self, defaults: RetrievalParams, max_k: int = 20, max_fetch_k: int = 100,
+                 allow_overrides: bool = True, sample_capacity: int = 1000):
+        self.max_k = max_k
+        self.max_fetch_k = max_fetch_k
+        self.allow_overrides = allow_overrides
+        self.sample_capacity = sample_capacity
+        self.defaults = defaults.replace(None, max_k, max_fetch_k)
+        self.variants: Dict[str, dict] = {}
+        self._stats: Dict[str, VariantStats] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, defaults: Optional[dict] = None, variants: Optional[dict] = None):
+        """
+        Change the defaults and/or replace the variants
+
+        Args:
+            defaults: Fields to change, e.g. {"k": 4}
+            variants: {name: {"params": {...}, "weight": share of traffic}};
+                weights may sum to at most 1, the rest gets the defaults
+
+        Raises:
+            RetrievalParamsError: invalid parameters, names or weights
+        """
+        new_defaults = self.defaults.replace(defaults, self.max_k, self.max_fetch_k)
+        new_variants = self.variants
+        if variants is not None:
+            new_variants = {}
+            for name, spec in variants.items():
+                if name in (DEFAULT_VARIANT, OVERRIDE_VARIANT) or not name:
+                    raise RetrievalParamsError(f"Reserved variant name: {name!r}")
+                overrides = dict((spec or {}).get("params") or {})
+                # Validated now, applied on top of the defaults in force at request time
+                new_defaults.replace(overrides, self.max_k, self.max_fetch_k)
+                weight = float((spec or {}).get("weight", 0.0))
+                if weight < 0:
+                    raise RetrievalParamsError(f"Variant {name} has a negative weight")
+                new_variants[name] = {"params": overrides, "weight": weight}
+            if sum(v["weight"] for v in new_variants.values()) > 1.0 + 1e-9:
+                raise RetrievalParamsError("Variant weights must sum to at most 1")
+        with self._lock:
+            self.defaults = new_defaults
+            self.variants = new_variants
+
+    def assign(self, client: Optional[str]) -> str:
+        """Variant for a client: a stable hash bucket over the variant weights"""
+        with self._lock:
+            variants = list(self.variants.items())
+        if not variants:
+            return DEFAULT_VARIANT
+        bucket = int.from_bytes(hashlib.sha256((client or "").encode("utf-8")).digest()[:8], "big") / 2 ** 64
+        cumulative = 0.0
+        for name, spec in sorted(variants):
+            cumulative += spec["weight"]
+            if bucket < cumulative:
+                return name
+        return DEFAULT_VARIANT
+
+    def resolve(self, client: Optional[str] = None, variant: Optional[str] = None,
+                overrides: Optional[dict] = None) -> Tuple[RetrievalParams, str]:
+        """
+        Parameters for one request
+
+        Args:
+            client: Client identifier, for sticky variant assignment
+            variant: Explicitly requested variant (DEFAULT_VARIANT for the defaults)
+            overrides: Per-request parameter values (None values are ignored)
+
+        Returns:
+            (params, name under which the request's statistics are kept)
+
+        Raises:
+            RetrievalParamsError: unknown variant, overrides not allowed or invalid
+        """
+        overrides = {name: value for name, value in (overrides or {}).items() if value is not None}
+        with self._lock:
+            defaults, variants = self.defaults, self.variants
+        name = variant or self.assign(client)
+        if name != DEFAULT_VARIANT and name not in variants:
+            raise RetrievalParamsError(f"Unknown variant: {name}")
+        params = defaults if name == DEFAULT_VARIANT else defaults.replace(
+            variants[name]["params"], self.max_k, self.max_fetch_k)
+        if overrides:
+            if not self.allow_overrides:
+                raise RetrievalParamsError("Per-request retrieval overrides are disabled")
+            return params.replace(overrides, self.max_k, self.max_fetch_k), OVERRIDE_VARIANT
+        return params, name
+
+    def observe(self, variant: str, path: str, duration_ms: float, status: int, stages: dict,
+                prompt_tokens: Optional[int] = None, completion_tokens: Optional[int] = None):
+        """Add a finished request to its variant's statistics"""
+        with self._lock:
+            stats = self._stats.get(variant)
+            if stats is None:
+                stats = self._stats[variant] = VariantStats(self.sample_capacity)
+            stats.add(path, duration_ms, status, stages, prompt_tokens, completion_tokens)
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = {}
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            stats = {name: s for name, s in self._stats.items()}
+            defaults, variants = self.defaults, self.variants
+        return {
+            "defaults": defaults.to_dict(),
+            "variants": {name: {**spec, "effective": defaults.replace(spec["params"], self.max_k,
+                                                                       self.max_fetch_k).to_dict()}
+                         for name, spec in sorted(variants.items())},
+            "limits": {"max_k": self.max_k, "max_fetch_k": self.max_fetch_k,
+                       "allow_overrides": self.allow_overrides},
+            "stats": {name: s.summary() for name, s in sorted(stats.items())}
+        }
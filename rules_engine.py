@@ -0,0 +1,291 @@
+# ==================================
+# SwiftVisa Fast-Path Rules Engine
+# ==================================
+#
+# Hard limits stated in the policy texts (minimum/maximum age, maximum length
+# of stay) are extracted from data/clean at index build time into rules.json
+# next to the index, keyed by destination and visa type. At request time the
+# destination and purpose of visit select the candidate visa types; if every
+# candidate's limits rule the applicant out, the request is answered from the
+# table without retrieval or an LLM call. Everything else (including profiles
+# that pass all known limits, where the other requirements still matter)
+# falls back to RAG.
+
+import json
+import os
+import re
+import threading
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from catalog import parse_catalog_filename
+from sharding import COUNTRY_ALIASES
+
+RULES_FILE = "rules.json"
+
+# Purpose-of-visit category -> words that identify its visa types
+PURPOSE_CATEGORIES = {
+    "study": ("study", "student", "education", "school", "university", "college", "course"),
+    "work": ("work", "job", "employment", "skilled", "career"),
+    "visit": ("tourism", "tourist", "visit", "vacation", "holiday", "travel"),
+    "business": ("business", "conference", "meeting"),
+    "family": ("family", "spouse", "partner", "marriage", "parent", "dependent", "child"),
+}
+VISA_TYPE_KEYWORDS = {
+    "study": ("Student", "Study", "Language"),
+    "work": ("Work", "Worker", "BlueCard", "JobSeeker", "H1B", "H2A", "H3"),
+    "visit": ("Visitor",),
+    "business": ("Business",),
+    "family": ("Family", "Spouse", "Partner", "Dependent", "ParentOf", "Children"),
+}
+
+NUMBER_WORDS = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7,
+    "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12, "eighteen": 18,
+}
+UNIT_DAYS = {"day": 1, "week": 7, "month": 30, "year": 365}
+
+_NUMBER = r"(\d+|" + "|".join(NUMBER_WORDS) + r")"
+# Age limits are only read from "the applicant must be <age>" statements ...
+_APPLICANT_MUST_BE = re.compile(r"\bthe applicant must be (.*)")
+# ... that name no one else and carry no condition: "both the applicant and
+# the partner", "if applying as a child", "the sponsor" etc. may not cover
+# every applicant of the visa type
+_OTHER_SUBJECTS = re.compile(
+    r"\b(?:both|partners?|spouses?|sponsors?|child(?:ren)?|parents?|petitioners?|dependants?|dependents?|"
+    r"relatives?|family members?|if|unless|when|where|except)\b"
+)
+_AGE_RANGE = re.compile(r"between (\d+) and (\d+) years old")
+_AGE_MIN = re.compile(r"(?:aged (\d+) years or older|at least (\d+) years old|(\d+) years of age or older|(\d+) years or older)")
+_AGE_MAX = re.compile(r"(?:aged )?under (?:the age of )?(\d+)")
+_STAY_MAX = re.compile(
+    r"(?:stay|remain)\w*[^.]{0,40}?(?:up to|maximum of|no more than|not exceeding) " + _NUMBER + r" (day|week|month|year)s?"
+)
+
+
+class Rule(NamedTuple):
+    """Hard limits of one visa type"""
+    country: str
+    visa_type: str
+    source: str
+    min_age: Optional[int] = None
+    max_age: Optional[int] = None
+    max_stay_days: Optional[int] = None
+    evidence: Tuple[str, ...] = ()
+
+
+def _number(token: str) -> int:
+    return int(token) if token.isdigit() else NUMBER_WORDS[token]
+
+
+def _sentences(text: str) -> List[str]:
+    text = text.replace("**", "").replace("’", "'")
+    return [s.strip() for s in re.split(r"\n+|(?<=[.!?])\s+", text) if s.strip()]
+
+
+def extract_rule(country: str, visa_type: str, source: str, text: str) -> Optional[Rule]:
+    """
+    Extract the age and length-of-stay limits stated in one policy text
+
+    Only "the applicant must be <age>" statements about the applicant alone
+    count for age, so conditions that apply to someone else (a partner, a
+    petitioner), to some applicants only or to a single requirement are
+    ignored; a visa type without a limit always falls back to RAG.
+
+    Returns:
+        A Rule, or None if the text states no such limit
+    """
+    limits: Dict[str, int] = {}
+    evidence = []
+    for sentence in _sentences(text):
+        lowered = sentence.lower()
+        found = False
+        statement = _APPLICANT_MUST_BE.search(lowered)
+        if statement and not _OTHER_SUBJECTS.search(lowered):
+            # The age must be what the applicant must be, not a later clause
+            age = statement.group(1)
+            match = _AGE_RANGE.match(age)
+            if match:
+                limits.setdefault("min_age", int(match.group(1)))
+                limits.setdefault("max_age", int(match.group(2)))
+                found = True
+            else:
+                match = _AGE_MIN.match(age)
+                if match:
+                    limits.setdefault("min_age", int(next(g for g in match.groups() if g)))
+                    found = True
+                match = _AGE_MAX.match(age)
+                if match:
+                    limits.setdefault("max_age", int(match.group(1)) - 1)
+                    found = True
+        match = _STAY_MAX.search(lowered)
+        if match:
+            limits.setdefault("max_stay_days", _number(match.group(1)) * UNIT_DAYS[match.group(2)])
+            found = True
+        if found:
+            evidence.append(sentence)
+    if not limits:
+        return None
+    return Rule(country, visa_type, source, evidence=tuple(evidence), **limits)
+
+
+def compile_rules(clean_dir: str = "data/clean") -> List[Rule]:
+    """Extract the rule table from every clean policy text"""
+    rules = []
+    if not os.path.exists(clean_dir):
+        return rules
+    for filename in sorted(os.listdir(clean_dir)):
+        parsed = parse_catalog_filename(filename)
+        if not parsed:
+            continue
+        with open(os.path.join(clean_dir, filename), "r", encoding="utf-8") as f:
+            rule = extract_rule(parsed[0], parsed[1], filename, f.read())
+        if rule is not None:
+            rules.append(rule)
+    return rules
+
+
+def write_rules(persist_dir: str, clean_dir: str = "data/clean") -> int:
+    """
+    Compile the rule table into a build directory
+
+    Returns:
+        Number of visa types with at least one limit
+    """
+    rules = compile_rules(clean_dir)
+    with open(os.path.join(persist_dir, RULES_FILE), "w", encoding="utf-8") as f:
+        json.dump({"rules": [rule._asdict() for rule in rules]}, f, indent=2, ensure_ascii=False)
+    return len(rules)
+
+
+def purpose_category(purpose: str) -> Optional[str]:
+    """Map a free-text purpose of visit to a category of visa types"""
+    lowered = purpose.lower()
+    for category, words in PURPOSE_CATEGORIES.items():
+        if any(word in lowered for word in words):
+            return category
+    return None
+
+
+def parse_number(value: str) -> Optional[int]:
+    """Leading integer of a request field ("25", "90 days"), or None"""
+    match = re.match(r"\s*(\d+)", str(value))
+    return int(match.group(1)) if match else None
+
+
+class RuleTable:
+    """Rules indexed by (destination, purpose category) for constant-time lookup"""
+
+    def __init__(self, rules: List[Rule], catalog: List[Tuple[str, str]]):
+        self.rules = rules
+        by_type = {(rule.country, rule.visa_type): rule for rule in rules}
+        self.countries = {country.lower(): country for country, _ in catalog}
+        # Every visa type of a category is a candidate, with or without limits:
+        # one without limits can never rule the applicant out
+        self._candidates: Dict[Tuple[str, str], List[Tuple[str, Optional[Rule]]]] = {}
+        for country, visa_type in catalog:
+            for category, keywords in VISA_TYPE_KEYWORDS.items():
+                if any(keyword.lower() in visa_type.lower() for keyword in keywords):
+                    self._candidates.setdefault((country, category), []).append(
+                        (visa_type, by_type.get((country, visa_type)))
+                    )
+
+    @classmethod
+    def load(cls, persist_dir: str, catalog: List[Tuple[str, str]],
+             clean_dir: str = "data/clean") -> "RuleTable":
+        """Rule table of a build directory, compiled from clean_dir if it has none"""
+        try:
+            with open(os.path.join(persist_dir, RULES_FILE), "r", encoding="utf-8") as f:
+                rules = [Rule(**{**r, "evidence": tuple(r["evidence"])}) for r in json.load(f)["rules"]]
+        except (OSError, ValueError, KeyError):
+            rules = compile_rules(clean_dir)
+        return cls(rules, catalog)
+
+    def resolve_country(self, destination: str) -> Optional[str]:
+        name = destination.strip()
+        name = COUNTRY_ALIASES.get(name.lower(), name)
+        return self.countries.get(name.lower())
+
+    def evaluate(self, destination: str, purpose: str, age: str, length_of_stay: str) -> Optional[dict]:
+        """
+        Decide a request from the rule table alone
+
+        Returns:
+            A decision dict when every candidate visa type rules the applicant
+            out, otherwise None (answer with RAG)
+        """
+        country = self.resolve_country(destination)
+        category = purpose_category(purpose)
+        candidates = self._candidates.get((country, category)) if country and category else None
+        if not candidates:
+            return None
+
+        age_years = parse_number(age)
+        stay_days = parse_number(length_of_stay)
+        reasons = []
+        for visa_type, rule in candidates:
+            failed = _violations(rule, age_years, stay_days)
+            if not failed:
+                return None
+            reasons.append({"visa_type": visa_type, "source": rule.source, "violations": failed,
+                            "evidence": list(rule.evidence)})
+        return {"eligible": False, "country": country, "category": category, "reasons": reasons}
+
+    def stats(self) -> dict:
+        return {"rules": len(self.rules), "candidate_groups": len(self._candidates)}
+
+
+def _violations(rule: Optional[Rule], age: Optional[int], stay_days: Optional[int]) -> List[str]:
+    if rule is None:
+        return []
+    failed = []
+    if age is not None and rule.min_age is not None and age < rule.min_age:
+        failed.append(f"minimum age is {rule.min_age} (applicant is {age})")
+    if age is not None and rule.max_age is not None and age > rule.max_age:
+        failed.append(f"maximum age is {rule.max_age} (applicant is {age})")
+    if stay_days is not None and rule.max_stay_days is not None and stay_days > rule.max_stay_days:
+        failed.append(f"maximum stay is {rule.max_stay_days} days (requested {stay_days})")
+    return failed
+
+
+def format_rules_answer(decision: dict) -> str:
+    """User-facing answer for a rules-engine decision"""
+    lines = [
+        "❌ **NOT ELIGIBLE** based on the published limits",
+        "",
+        f"No {decision['category']} visa to {decision['country']} accepts this profile:",
+    ]
+    for reason in decision["reasons"]:
+        lines.append(f"- **{reason['visa_type']}**: {'; '.join(reason['violations'])}")
+        for sentence in reason["evidence"]:
+            lines.append(f"  > {sentence}")
+    lines += [
+        "",
+        "---",
+        "💡 **Note**: This result is based on official visa policy documents. For the most accurate and "
+        "up-to-date information, please verify with the official embassy or consulate."
+    ]
+    return "\n".join(lines)
+
+
+class RuleStats:
+    """Hit ratio of the fast path (thread-safe counters)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checks = 0
+        self.hits = 0
+
+    def record(self, hit: bool):
+        with self._lock:
+            self.checks += 1
+            self.hits += 1 if hit else 0
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            checks, hits = self.checks, self.hits
+        return {
+            "checks": checks,
+            "hits": hits,
+            "fallbacks": checks - hits,
+            "hit_ratio": round(hits / checks, 4) if checks else 0.0
+        }
@@ -0,0 +1,207 @@
+# scripts/benchmark_memory.py
+#
+# Measure the app's memory in MEMORY_PROFILE mode: the RSS each startup phase
+# adds, the steady-state RSS after warm-up, and per endpoint how much the
+# Python heap grows per request. Optionally compared with the report of
+# another build.
+#
+#   python scripts/benchmark_memory.py --output old.json
+#   git checkout my-branch
+#   python scripts/benchmark_memory.py --baseline old.json
+#
+# The app runs in this process with the stub LLM, so the numbers cover this
+# code rather than the LLM client. Each endpoint is warmed up first (caches
+# filled, lazy imports done), then --requests more are sent one at a time and
+# the traced heap (after a garbage collection) is compared before and after
+# the batch; a leak shows up as steady growth per request. The allocation
+# sites that grew over the measured requests are listed at the end.
+#
+# Exits with status 1 when steady-state RSS or an endpoint's heap growth per
+# request regressed against --baseline, or an endpoint grows the heap by more
+# than --max-growth-bytes per request.
+
+import argparse
+import gc
+import itertools
+import json
+import os
+import sys
+import tracemalloc
+from datetime import datetime
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+os.chdir(ROOT_DIR)
+
+# Must be set before main is imported: the profiler starts with the app
+os.environ.update({
+    "MEMORY_PROFILE": "True",
+    # No periodic checkpoints: their snapshots would land in the measured RSS
+    "MEMORY_PROFILE_EVERY": str(10 ** 9),
+    "STUB_LLM": "True",
+    "STUB_LLM_LATENCY_MS": "0",
+    "PROFILE_SAMPLE_RATE": "0",
+    "MATERIALIZE_ON_INDEX_CHANGE": "False",
+    "SNAPSHOT_WATCH_INTERVAL": "0"
+})
+os.environ.pop("TRAFFIC_CAPTURE_FILE", None)
+
+from catalog import catalog_pairs
+from memory_profile import compare_memory, read_peak_rss, read_rss
+
+CLEAN_DATA_DIR = "data/clean"
+MB = 1024 * 1024
+
+
+def workloads(pairs: list) -> dict:
+    """Endpoint -> endless iterator of request kwargs for TestClient.request"""
+    ages, stays = ["22", "34", "51"], ["2 weeks", "6 months", "2 years"]
+    profiles = itertools.cycle([
+        {"countryOfCitizenship": "India", "destinationCountry": country, "purposeOfVisit": visa_type,
+         "lengthOfStay": stay, "age": age}
+        for (country, visa_type), age, stay in zip(pairs, itertools.cycle(ages), itertools.cycle(stays))
+    ])
+    pair_cycle, prefixes = itertools.cycle(pairs), itertools.cycle(["ca", "stu", "wor", "tou", "uni"])
+    return {
+        "POST /check-eligibility": (
+            {"method": "POST", "url": "/check-eligibility", "json": profile} for profile in profiles),
+        "POST /check-eligibility/stream": (
+            {"method": "POST", "url": "/check-eligibility/stream", "json": profile} for profile in profiles),
+        "GET /visa-requirements/{destination}/{visa_type}": (
+            {"method": "GET", "url": f"/visa-requirements/{country}/{visa_type}"} for country, visa_type in pair_cycle),
+        "POST /vectorstore/search": (
+            {"method": "POST", "url": "/vectorstore/search",
+             "json": {"query": f"{visa_type} visa requirements for {country}", "page_size": 10}}
+            for country, visa_type in pair_cycle),
+        "GET /suggest": ({"method": "GET", "url": "/suggest", "params": {"q": q}} for q in prefixes)
+    }
+
+
+def run(client, requests: iter, count: int):
+    for kwargs in itertools.islice(requests, count):
+        response = client.request(**kwargs)
+        response.read()
+        if response.status_code >= 400:
+            raise SystemExit(f"❌ {kwargs['method']} {kwargs['url']} returned {response.status_code}")
+
+
+def traced_heap() -> int:
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark steady-state memory and per-request allocation growth")
+    parser.add_argument("--warmup", type=int, default=20, help="Unmeasured requests per endpoint")
+    parser.add_argument("--requests", type=int, default=200, help="Measured requests per endpoint")
+    parser.add_argument("--endpoints", help="Comma-separated subset of the endpoints (as printed)")
+    parser.add_argument("--output", help="Write the memory report (JSON) here")
+    parser.add_argument("--baseline", help="Report of an earlier build to compare against")
+    parser.add_argument("--rss-threshold", type=float, default=1.10,
+                        help="Steady-state RSS ratio counted as a regression")
+    parser.add_argument("--growth-threshold", type=float, default=1.5,
+                        help="Heap growth per request ratio counted as a regression")
+    parser.add_argument("--growth-slack-bytes", type=int, default=2048,
+                        help="Increase in heap growth per request always tolerated")
+    parser.add_argument("--max-growth-bytes", type=int,
+                        help="Fail when an endpoint grows the heap by more than this per request (no baseline needed)")
+    args = parser.parse_args()
+
+    pairs = catalog_pairs(CLEAN_DATA_DIR)
+    if not pairs:
+        raise SystemExit(f"❌ No catalog entries in {CLEAN_DATA_DIR}")
+
+    print("▶️  Starting the app with MEMORY_PROFILE=True")
+    import main as app_main
+    from fastapi.testclient import TestClient
+
+    profiler = app_main.memory_profile
+    loads = workloads(pairs)
+    if args.endpoints:
+        wanted = {name.strip() for name in args.endpoints.split(",")}
+        loads = {name: requests for name, requests in loads.items() if name in wanted}
+
+    growth = {}
+    with TestClient(app_main.app) as client:
+        print(f"🔥 Warming up {len(loads)} endpoints with {args.warmup} requests each")
+        for requests in loads.values():
+            run(client, requests, args.warmup)
+        profiler.reset_endpoints()
+        gc.collect()
+        steady_rss = read_rss()
+
+        print(f"📏 Measuring {args.requests} requests per endpoint")
+        for name, requests in loads.items():
+            heap, rss = traced_heap(), read_rss()
+            run(client, requests, args.requests)
+            growth[name] = (round((traced_heap() - heap) / args.requests, 1),
+                            round((read_rss() - rss) / args.requests, 1))
+        report = profiler.report()
+        growth_sites = profiler.growth_sites()
+
+    endpoints = {
+        name: {
+            "requests": args.requests,
+            "growth_bytes_per_request": growth[name][0],
+            "rss_growth_per_request": growth[name][1],
+            "max_request_peak_bytes": report["endpoints"].get(name, {}).get("max_request_peak_bytes")
+        }
+        for name in loads
+    }
+    result = {
+        "created_at": datetime.now().isoformat(),
+        "warmup": args.warmup,
+        "requests": args.requests,
+        "startup": [{"phase": p["phase"], "rss_added_bytes": p["rss_added_bytes"], "seconds": p["seconds"]}
+                    for p in report["startup"]],
+        "steady_rss_bytes": steady_rss,
+        "final_rss_bytes": read_rss(),
+        "peak_rss_bytes": read_peak_rss(),
+        "endpoints": endpoints,
+        "growth_sites": growth_sites
+    }
+
+    print(f"\n{'startup phase':<30} {'RSS added MB':>13} {'seconds':>9}")
+    for phase in result["startup"]:
+        added = phase["rss_added_bytes"]
+        print(f"{phase['phase']:<30} {(added or 0) / MB:>13.1f} {phase['seconds']:>9.2f}")
+    print(f"\n📊 Steady-state RSS {steady_rss / MB:.1f} MB, after the run {result['final_rss_bytes'] / MB:.1f} MB\n")
+    print(f"{'endpoint':<50} {'heap B/req':>11} {'RSS B/req':>10} {'peak KB':>9}")
+    for name, stats in endpoints.items():
+        print(f"{name:<50} {stats['growth_bytes_per_request']:>11.1f} {stats['rss_growth_per_request']:>10.1f} "
+              f"{(stats['max_request_peak_bytes'] or 0) / 1024:>9.1f}")
+    print(f"\n{'grown allocation site':<90} {'bytes':>10} {'blocks':>7}")
+    for site in growth_sites:
+        print(f"{site['site'][-90:]:<90} {site['bytes']:>10} {site['count']:>7}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"\n💾 Report written to {args.output}")
+
+    failed = False
+    if args.max_growth_bytes is not None:
+        for name, stats in endpoints.items():
+            if stats["growth_bytes_per_request"] > args.max_growth_bytes:
+                print(f"❌ {name} grows the heap by {stats['growth_bytes_per_request']:.0f} bytes per request "
+                      f"(limit {args.max_growth_bytes})")
+                failed = True
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        rows = compare_memory(baseline, result, args.rss_threshold, args.growth_threshold, args.growth_slack_bytes)
+        print(f"\n🔍 Compared with {args.baseline} (regression: RSS ratio > {args.rss_threshold}, "
+              f"heap growth ratio > {args.growth_threshold} and > +{args.growth_slack_bytes} B)\n")
+        print(f"{'metric':<75} {'baseline':>12} {'current':>12}")
+        for row in rows:
+            flag = "  ❌ regressed" if row["regressed"] else ""
+            print(f"{row['metric']:<75} {row['baseline'] or 0:>12.0f} {row['current'] or 0:>12.0f}{flag}")
+        failed = failed or any(row["regressed"] for row in rows)
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# scripts/benchmark_quantized_index.py
+#
+# Build the quantized index from the live Chroma index and compare it with
+# Chroma on recall@k (against exact float32 search), agreement with Chroma's
+# results, query latency and memory.
+#
+#   python scripts/benchmark_quantized_index.py --k 5
+#   python scripts/benchmark_quantized_index.py --queries my_queries.txt
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from langchain_chroma import Chroma
+
+from catalog import catalog_pairs
+from config import settings
+from embedding_model import load_embeddings
+from quantized_index import MODES, QUANTIZED_DIR, QuantizedIndex, export_chroma_collection
+from snapshots import resolve_live_dir
+
+CHROMA_DB_DIR = "vectorstore"
+CLEAN_DATA_DIR = "data/clean"
+EMBEDDING_MODEL = settings.EMBEDDING_MODEL
+
+
+def dir_size(path: str) -> int:
+    total = 0
+    for root, dirs, files in os.walk(path):
+        if QUANTIZED_DIR in dirs:
+            dirs.remove(QUANTIZED_DIR)
+        total += sum(os.path.getsize(os.path.join(root, f)) for f in files)
+    return total
+
+
+def load_queries(path: str) -> list:
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            return [line.strip() for line in f if line.strip()]
+    return [
+        f"What are the requirements for a {visa_type} visa to {country}?"
+        for country, visa_type in catalog_pairs(CLEAN_DATA_DIR)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the quantized index against Chroma")
+    parser.add_argument("--k", type=int, default=5, help="Neighbours per query")
+    parser.add_argument("--oversample", type=int, default=10, help="Shortlist size as a multiple of k")
+    parser.add_argument("--queries", help="Text file with one query per line (default: catalog queries)")
+    args = parser.parse_args()
+
+    persist_dir = resolve_live_dir(CHROMA_DB_DIR)
+    index_dir = os.path.join(persist_dir, QUANTIZED_DIR)
+
+    embeddings = load_embeddings(EMBEDDING_MODEL, settings.EMBEDDING_MODEL_PATH)
+    db = Chroma(persist_directory=persist_dir, embedding_function=embeddings)
+
+    manifest = export_chroma_collection(db, index_dir, EMBEDDING_MODEL)
+    index = QuantizedIndex(index_dir)
+    print(f"✅ Quantized {manifest['count']} vectors ({manifest['dim']} dims) into {index_dir}")
+
+    queries = load_queries(args.queries)
+    vectors = np.asarray(embeddings.embed_documents(queries), dtype=np.float32)
+    k = min(args.k, index.count)
+
+    # Exact float32 search is the ground truth; Chroma's HNSW is approximate too
+    normed = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    exact = [set(np.argsort(-(np.asarray(index.vectors) @ v))[:k]) for v in normed]
+
+    def recall(found):
+        return np.mean([len(set(f) & e) / k for f, e in zip(found, exact)])
+
+    started = time.perf_counter()
+    chroma_docs = [db.similarity_search_by_vector(v.tolist(), k=k) for v in vectors]
+    chroma_ms = (time.perf_counter() - started) * 1000 / len(queries)
+    row_of = {doc_id: row for row, doc_id in enumerate(index.ids)}
+    chroma_rows = [[row_of[doc.id] for doc in docs] for docs in chroma_docs]
+
+    print(f"\n📊 {len(queries)} queries, k={k}, oversample={args.oversample}\n")
+    print(f"{'index':<10} {'recall@k':>9} {'vs chroma':>10} {'ms/query':>9}")
+    print(f"{'chroma':<10} {recall(chroma_rows):>9.3f} {1.0:>10.3f} {chroma_ms:>9.3f}")
+    for mode in MODES:
+        started = time.perf_counter()
+        found = [[row for row, _ in index.search(v, k=k, mode=mode, oversample=args.oversample)] for v in vectors]
+        elapsed_ms = (time.perf_counter() - started) * 1000 / len(queries)
+        agreement = np.mean([len(set(f) & set(c)) / k for f, c in zip(found, chroma_rows)])
+        print(f"{mode:<10} {recall(found):>9.3f} {agreement:>10.3f} {elapsed_ms:>9.3f}")
+
+    memory = index.memory_bytes()
+    print("\n💾 Memory")
+    print(f"  chroma index on disk:        {dir_size(persist_dir) / 1024:>10.1f} KB")
+    print(f"  float32 vectors (mmap, lazy): {memory['float32_vectors_mapped'] / 1024:>10.1f} KB")
+    print(f"  int8 codes (resident):        {memory['int8_codes'] / 1024:>10.1f} KB")
+    print(f"  binary codes (resident):      {memory['binary_codes'] / 1024:>10.1f} KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# scripts/build_frontend.py
+#
+# Build the production frontend into FRONTEND_DIST_DIR (default frontend_dist/)
+# so the API can serve it with SERVE_FRONTEND=True and no Node at runtime:
+#
+#   python scripts/build_frontend.py
+#
+#   app/    `npm run build` of my_visa_app/frontend_react, served at /app
+#           (calls the API on the same origin)
+#   home/   my_visa_app/"Home Page" with content-hashed asset names, served at
+#           /home; its "Check Eligibility" link points at /app/
+#
+# Every compressible file gets a deterministic .gz (and .br when the brotli
+# package is installed) written next to it. The new build replaces the old one
+# in a single rename.
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import settings
+from static_frontend import brotli, hash_site_assets, precompress_tree, replace_tree
+
+REACT_DIR = os.path.join("my_visa_app", "frontend_react")
+HOME_DIR = os.path.join("my_visa_app", "Home Page")
+# Link to the Streamlit dev server hardcoded in the Home Page
+DEV_ELIGIBILITY_URL = "http://192.168.1.33:8501"
+
+
+def run_npm_build():
+    """Production React build with assets under /app and same-origin API calls"""
+    npm = shutil.which("npm")
+    if npm is None:
+        sys.exit("❌ npm not found; install Node to build, or pass --skip-npm to reuse an existing build/")
+    env = dict(os.environ, PUBLIC_URL="/app", REACT_APP_API_URL="", GENERATE_SOURCEMAP="false")
+    if not os.path.isdir(os.path.join(REACT_DIR, "node_modules")):
+        subprocess.run([npm, "ci"], cwd=REACT_DIR, env=env, check=True)
+    subprocess.run([npm, "run", "build"], cwd=REACT_DIR, env=env, check=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the static production frontend")
+    parser.add_argument("--output", default=settings.FRONTEND_DIST_DIR, help="Dist directory served by the API")
+    parser.add_argument("--skip-npm", action="store_true", help="Reuse the existing React build/ directory")
+    parser.add_argument("--eligibility-url", default="/app/", help="Target of the Home Page eligibility link")
+    args = parser.parse_args()
+
+    if not args.skip_npm:
+        run_npm_build()
+    react_build = os.path.join(REACT_DIR, "build")
+    if not os.path.isfile(os.path.join(react_build, "index.html")):
+        sys.exit(f"❌ No React build at {react_build}")
+
+    output = os.path.abspath(args.output)
+    staging = f"{output}.building"
+    shutil.rmtree(staging, ignore_errors=True)
+    try:
+        shutil.copytree(react_build, os.path.join(staging, "app"))
+        shutil.copytree(HOME_DIR, os.path.join(staging, "home"))
+        renamed = hash_site_assets(
+            os.path.join(staging, "home"),
+            replacements={f'"{DEV_ELIGIBILITY_URL}"': f'"{args.eligibility_url}"'}
+        )
+        compressed = precompress_tree(staging)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    replace_tree(staging, output)
+
+    print(f"✅ Frontend built into {output}")
+    print(f"   Home Page assets hashed: {', '.join(f'{k} -> {v}' for k, v in renamed.items()) or 'none'}")
+    print(f"   Precompressed {compressed} files (gzip{' + brotli' if brotli is not None else ''})")
+    print("   Serve with SERVE_FRONTEND=True: /app (React) and /home (Home Page)")
+
+
+if __name__ == "__main__":
+    main()
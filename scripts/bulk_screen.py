@@ -0,0 +1,278 @@
+# scripts/bulk_screen.py
+#
+# Offline eligibility screening of an applicant export (CSV or JSONL of
+# VisaRequest records) using the same retrieval and LLM logic as the API,
+# in-process instead of over HTTP.
+#
+#   python scripts/bulk_screen.py applicants.csv --output screened.jsonl
+#
+# Pipeline: records are streamed in batches; each batch is embedded in one
+# call, vector search runs on a process pool (each worker opens the live
+# index read-only), and answers are generated on a thread pool capped at
+# --llm-concurrency. One JSON line is appended per applicant as soon as it is
+# done, so a rerun with the same --output skips finished applicants.
+#
+# Applicants are identified by an "id" column when present, otherwise by
+# their row number and a hash of the row.
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from multiprocessing import get_context
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+REQUEST_FIELDS = ("countryOfCitizenship", "destinationCountry", "purposeOfVisit", "lengthOfStay", "age")
+
+
+# ----------------------------------------
+# INPUT / OUTPUT
+# ----------------------------------------
+def record_key(row: dict, number: int) -> str:
+    if row.get("id") not in (None, ""):
+        return str(row["id"])
+    digest = hashlib.sha1(json.dumps(row, sort_keys=True).encode("utf-8")).hexdigest()[:10]
+    return f"row-{number}-{digest}"
+
+
+def iter_records(path: str):
+    """Yield (key, row) pairs from a CSV or JSONL file without loading it all"""
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if path.lower().endswith(".csv"):
+            rows = csv.DictReader(f)
+        else:
+            rows = (json.loads(line) for line in f if line.strip())
+        for number, row in enumerate(rows, 1):
+            yield record_key(row, number), row
+
+
+def load_done_keys(output: str) -> set:
+    """Keys already written by a previous run; drops a torn final line"""
+    if not os.path.exists(output):
+        return set()
+    with open(output, "rb+") as f:
+        data = f.read()
+        if data and not data.endswith(b"\n"):
+            f.truncate(data.rfind(b"\n") + 1)
+            data = data[:data.rfind(b"\n") + 1]
+    done = set()
+    for line in data.splitlines():
+        try:
+            done.add(json.loads(line)["key"])
+        except (ValueError, KeyError):
+            continue
+    return done
+
+
+def batched(iterable, size: int):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# ----------------------------------------
+# RETRIEVAL WORKERS (separate processes)
+# ----------------------------------------
+_store = None
+_backend = None
+
+
+def _init_worker(path: str, backend: str, quantized_mode: str, oversample: int, search_ef: int):
+    """Open the live index read-only; queries arrive as vectors, so no embedding model is loaded"""
+    global _store, _backend
+    _backend = backend
+    if backend == "quantized":
+        from quantized_index import QUANTIZED_DIR, QuantizedVectorStore
+        _store = QuantizedVectorStore.load(os.path.join(path, QUANTIZED_DIR), None,
+                                           mode=quantized_mode, oversample=oversample)
+    elif backend == "sharded":
+        from sharding import ShardedVectorStore
+        _store = ShardedVectorStore(path, None, max_workers=1, search_ef=search_ef)
+    elif backend == "readonly":
+        from readonly_index import ReadOnlyChromaStore
+        _store = ReadOnlyChromaStore.load(path, None)
+    elif backend == "pack":
+        from index_pack import PACK_FILE, IndexPack
+        _store = IndexPack(os.path.join(path, PACK_FILE)).vector_store(None)
+    elif backend == "chroma":
+        from langchain_chroma import Chroma
+        _store = Chroma(persist_directory=path)
+    else:
+        # Opening Chroma on another backend's directory would create an empty collection there
+        raise ValueError(f"Unknown index backend: {backend}")
+
+
+def search_batch(vectors: list, countries: list, k: int) -> tuple:
+    """
+    Vector search for a batch of queries
+
+    Returns:
+        (list of [(document, distance), ...] per query, seconds spent)
+    """
+    started = time.perf_counter()
+    results = []
+    for vector, country in zip(vectors, countries):
+        if _backend == "sharded":
+            results.append(_store.similarity_search_by_vector_with_score(vector, k, country))
+        elif _backend in ("quantized", "readonly", "pack"):
+            results.append(_store.similarity_search_by_vector_with_score(vector, k))
+        else:
+            results.append(_store.similarity_search_by_vector_with_relevance_scores(vector, k=k))
+    return results, time.perf_counter() - started
+
+
+# ----------------------------------------
+# SCREENING
+# ----------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Screen a CSV/JSONL file of visa applicants offline")
+    parser.add_argument("input", help="CSV or JSONL file of VisaRequest records")
+    parser.add_argument("--output", required=True, help="JSONL results file (appended to; reruns resume)")
+    parser.add_argument("--batch-size", type=int, default=32, help="Applicants embedded per batch")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="Retrieval processes")
+    parser.add_argument("--llm-concurrency", type=int, default=4, help="Maximum concurrent LLM calls")
+    parser.add_argument("--k", type=int, help="Documents retrieved per applicant (default: TOP_K)")
+    parser.add_argument("--no-llm", action="store_true", help="Retrieval-only answers, no LLM cost")
+    args = parser.parse_args()
+
+    # The screening run must not race the API's background answer-store regeneration
+    os.environ["MATERIALIZE_ON_INDEX_CHANGE"] = "False"
+    os.environ["SNAPSHOT_WATCH_INTERVAL"] = "0"
+
+    import main as api
+
+    settings = api.settings
+    k = args.k or api.TOP_K
+    use_llm = api.USE_LLM and not args.no_llm
+    llm = api.create_llm() if use_llm else None
+    handle = api.live_index.current
+
+    done = load_done_keys(args.output)
+    print(f"📋 Screening {args.input} -> {args.output} ({len(done)} already done, "
+          f"index {handle.version} [{handle.backend}], {'LLM ' + api.LLM_PROVIDER if use_llm else 'retrieval-only'})")
+
+    stats = {
+        "processed": 0, "skipped": len(done), "errors": 0, "materialized": 0,
+        "retrieval_seconds": 0.0, "llm_seconds": 0.0, "prompt_tokens": 0, "completion_tokens": 0
+    }
+
+    def answer(key, row, query, hits):
+        docs = [doc for doc, _ in hits]
+        chunks = [{"id": doc.id, "score": round(float(score), 6)} for doc, score in hits]
+        callback = api.TokenUsageCallback()
+        provider, error = "retrieval-only", None
+        started = time.perf_counter()
+        if use_llm:
+            try:
+                eligibility = api.answer_with_llm(llm, query, docs, [callback])
+                provider = api.LLM_PROVIDER
+            except Exception as e:
+                error = f"LLM failed, used retrieval-only: {e}"
+                eligibility = api.retrieval_answer(handle, query, docs)
+        else:
+            eligibility = api.retrieval_answer(handle, query, docs)
+        return {
+            "key": key, "input": row, "eligibility": eligibility, "provider": provider, "chunks": chunks,
+            "llm_seconds": round(time.perf_counter() - started, 4) if use_llm else 0.0,
+            "prompt_tokens": callback.prompt_tokens, "completion_tokens": callback.completion_tokens,
+            "error": error
+        }
+
+    started = time.perf_counter()
+    mp_context = get_context("spawn")  # fork is unsafe once chromadb has started threads
+    with open(args.output, "a", encoding="utf-8") as out, \
+            ProcessPoolExecutor(max_workers=args.workers, mp_context=mp_context, initializer=_init_worker,
+                                initargs=(handle.path, handle.backend, settings.QUANTIZED_MODE,
+                                          settings.QUANTIZED_OVERSAMPLE, settings.HNSW_SEARCH_EF)) as pool, \
+            ThreadPoolExecutor(max_workers=max(1, args.llm_concurrency)) as llm_pool:
+
+        def write(result: dict):
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            out.flush()
+            stats["processed"] += 1
+            stats["errors"] += 1 if result.get("error") else 0
+            stats["llm_seconds"] += result.get("llm_seconds", 0.0)
+            stats["prompt_tokens"] += result.get("prompt_tokens", 0)
+            stats["completion_tokens"] += result.get("completion_tokens", 0)
+            if stats["processed"] % 100 == 0:
+                rate = stats["processed"] / (time.perf_counter() - started)
+                print(f"  … {stats['processed']} screened ({rate:.1f}/s)")
+
+        retrievals = deque()
+        answers = set()
+
+        def drain_retrievals(block: bool):
+            while retrievals and (block or retrievals[0][0].done()):
+                future, batch = retrievals.popleft()
+                results, seconds = future.result()
+                stats["retrieval_seconds"] += seconds
+                for (key, row, query), hits in zip(batch, results):
+                    answers.add(llm_pool.submit(answer, key, row, query, hits))
+
+        def drain_answers(limit: int):
+            while len(answers) > limit:
+                finished, _ = wait(answers, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    answers.discard(future)
+                    write(future.result())
+
+        pending = ((key, row) for key, row in iter_records(args.input) if key not in done)
+        for batch in batched(pending, args.batch_size):
+            to_search = []
+            for key, row in batch:
+                missing = [field for field in REQUEST_FIELDS if row.get(field) in (None, "")]
+                if missing:
+                    write({"key": key, "input": row, "error": f"Invalid record: missing {', '.join(missing)}"})
+                    continue
+                request = api.VisaRequest(**{field: str(row[field]) for field in REQUEST_FIELDS})
+                query = api.eligibility_query(request)
+                cached = api.lookup_materialized_eligibility(query)
+                if cached is not None:
+                    stats["materialized"] += 1
+                    write({"key": key, "input": row, "eligibility": cached["eligibility"],
+                           "provider": cached["provider"], "source": "materialized", "error": None})
+                    continue
+                to_search.append((key, row, query, request.destinationCountry))
+
+            if to_search:
+                vectors = api.embeddings.embed_documents([query for _, _, query, _ in to_search])
+                countries = [country for _, _, _, country in to_search]
+                future = pool.submit(search_batch, vectors, countries, k)
+                retrievals.append((future, [item[:3] for item in to_search]))
+
+            # Keep the pools busy without reading the whole file ahead
+            while len(retrievals) > args.workers * 2:
+                retrievals[0][0].result()
+                drain_retrievals(block=False)
+            drain_retrievals(block=False)
+            drain_answers(limit=args.llm_concurrency * 4)
+
+        drain_retrievals(block=True)
+        drain_answers(limit=0)
+
+    elapsed = time.perf_counter() - started
+    cost = (stats["prompt_tokens"] / 1000 * settings.LLM_PROMPT_PRICE_PER_1K
+            + stats["completion_tokens"] / 1000 * settings.LLM_COMPLETION_PRICE_PER_1K)
+    print(f"✅ Screened {stats['processed']} applicants in {elapsed:.1f}s "
+          f"({stats['processed'] / elapsed if elapsed else 0:.1f}/s), "
+          f"{stats['skipped']} skipped as already done, {stats['errors']} with errors, "
+          f"{stats['materialized']} from the answer store")
+    print(f"   Retrieval: {stats['retrieval_seconds']:.1f}s across {args.workers} processes | "
+          f"LLM: {stats['llm_seconds']:.1f}s at concurrency {args.llm_concurrency}")
+    print(f"   Tokens: {stats['prompt_tokens']} prompt + {stats['completion_tokens']} completion | "
+          f"Estimated cost: ${cost:.4f}")
+
+
+if __name__ == "__main__":
+    main()
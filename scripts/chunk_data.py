@@ -1,14 +1,20 @@
-import os, json
+import os, json, sys
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dedup import mark_duplicate_chunks
+
 CLEAN_PATH = "data/clean"
 CHUNK_PATH = "data/chunks"
+# Chunks at least this similar (MinHash Jaccard) to an earlier one are left out
+CHUNK_DEDUP_THRESHOLD = 0.9
 os.makedirs(CHUNK_PATH, exist_ok=True)
 
 splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=150)
 all_chunks = []
 
-for filename in os.listdir(CLEAN_PATH):
+for filename in sorted(os.listdir(CLEAN_PATH)):
     if filename.endswith(".txt"):
         with open(os.path.join(CLEAN_PATH, filename), "r", encoding="utf-8") as f:
             text = f.read()
@@ -20,8 +26,11 @@ for filename in os.listdir(CLEAN_PATH):
                 "content": c
             })
 
+duplicates = mark_duplicate_chunks(all_chunks, CHUNK_DEDUP_THRESHOLD)
+kept_chunks = [c for c in all_chunks if "duplicate_of" not in c]
+
 with open(os.path.join(CHUNK_PATH, "visa_chunks.jsonl"), "w", encoding="utf-8") as f:
-    for c in all_chunks:
+    for c in kept_chunks:
         f.write(json.dumps(c, ensure_ascii=False) + "\n")
 
-print(f"✅ Chunking complete! Total chunks: {len(all_chunks)}")
+print(f"✅ Chunking complete! Total chunks: {len(kept_chunks)} ({duplicates} near-duplicates left out)")
@@ -1,31 +1,73 @@
 # scripts/create_vectorstore.py
+#
+# Default: (re)build the index in place at vectorstore/; an existing collection
+# is dropped first, so HNSW settings and removed documents take effect.
+# --snapshot: build a new versioned snapshot under vectorstore/snapshots/ and
+# publish it; a running API hot-swaps to it without a restart.
+# --quantize: also write the compact int8/binary index served when
+# VECTOR_INDEX_BACKEND=quantized.
+# --shards: also write per-country shards served when VECTOR_INDEX_BACKEND=sharded.
+# --rebuild-shard UK --rebuild-shard US: rebuild only those shards of the live
+# index (as a new published snapshot with --snapshot, otherwise in place).
+# HNSW parameters default to Settings (HNSW_* env vars / hnsw_config.json).
+# Empty and near-duplicate documents are collapsed before embedding
+# (--dedup-threshold, default DEDUP_THRESHOLD); see dedup_report.json in the build.
 
-from langchain_chroma import Chroma
-from langchain_core.documents import Document
-from langchain_huggingface import HuggingFaceEmbeddings
+import argparse
 import os
-import glob
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import settings
+from dedup import DEDUP_REPORT_FILE
+from embedding_model import load_embeddings
+from hnsw_config import SPACES, hnsw_collection_metadata
+from sharding import build_shards
+from snapshots import build_snapshot, build_vectorstore, publish_snapshot, rebuild_shards_snapshot
 
 # --- Configuration ---
 CHROMA_DB_DIR = "vectorstore"
 CLEAN_DATA_DIR = "data/clean"
+EMBEDDING_MODEL = settings.EMBEDDING_MODEL
 
-# --- Load cleaned text files ---
-all_texts = []
-for file in glob.glob(os.path.join(CLEAN_DATA_DIR, "*.txt")):
-    with open(file, "r", encoding="utf-8") as f:
-        all_texts.append(f.read())
+parser = argparse.ArgumentParser(description="Build the SwiftVisa Chroma vectorstore")
+parser.add_argument("--snapshot", action="store_true", help="Build and publish a new versioned snapshot")
+parser.add_argument("--quantize", action="store_true", help="Also write the compact int8/binary index")
+parser.add_argument("--shards", action="store_true", help="Also write per-country shards")
+parser.add_argument("--rebuild-shard", action="append", metavar="COUNTRY",
+                    help="Rebuild only this country shard of the existing index (repeatable)")
+parser.add_argument("--space", choices=SPACES, default=settings.HNSW_SPACE, help="HNSW distance space")
+parser.add_argument("--m", type=int, default=settings.HNSW_M, help="HNSW M (graph degree)")
+parser.add_argument("--construction-ef", type=int, default=settings.HNSW_CONSTRUCTION_EF, help="HNSW construction_ef")
+parser.add_argument("--search-ef", type=int, default=settings.HNSW_SEARCH_EF, help="HNSW search_ef")
+parser.add_argument("--dedup-threshold", type=float, default=settings.DEDUP_THRESHOLD,
+                    help="Collapse documents at least this similar (MinHash Jaccard); 0 disables")
+args = parser.parse_args()
 
-print(f"✅ Loaded {len(all_texts)} documents from {CLEAN_DATA_DIR}")
+collection_metadata = hnsw_collection_metadata(args.space, args.m, args.construction_ef, args.search_ef)
+print(f"🔧 HNSW parameters: {collection_metadata}")
 
 # --- Initialize embedding model ---
-embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
+embeddings = load_embeddings(EMBEDDING_MODEL, settings.EMBEDDING_MODEL_PATH)
 
 # --- Create Chroma vector store ---
-db = Chroma.from_texts(
-    texts=all_texts,
-    embedding=embeddings,
-    persist_directory=CHROMA_DB_DIR
-)
-
-print(f"✅ Vector store created and stored at: {CHROMA_DB_DIR}")
+if args.rebuild_shard and args.snapshot:
+    version = rebuild_shards_snapshot(CHROMA_DB_DIR, args.rebuild_shard, embeddings, CLEAN_DATA_DIR,
+                                      collection_metadata, args.dedup_threshold)
+    publish_snapshot(CHROMA_DB_DIR, version)
+    print(f"✅ Rebuilt shard(s) {', '.join(args.rebuild_shard)} into snapshot {version} (published)")
+elif args.rebuild_shard:
+    counts = build_shards(CHROMA_DB_DIR, embeddings, CLEAN_DATA_DIR, collection_metadata, only=args.rebuild_shard,
+                          dedup_threshold=args.dedup_threshold)
+    print(f"✅ Rebuilt shard(s) in place at {CHROMA_DB_DIR}: {counts}")
+elif args.snapshot:
+    version = build_snapshot(CHROMA_DB_DIR, embeddings, CLEAN_DATA_DIR, EMBEDDING_MODEL,
+                             args.quantize, collection_metadata, args.shards, args.dedup_threshold)
+    publish_snapshot(CHROMA_DB_DIR, version)
+    print(f"✅ Snapshot {version} built and published under: {CHROMA_DB_DIR}")
+else:
+    count = build_vectorstore(CHROMA_DB_DIR, embeddings, CLEAN_DATA_DIR, EMBEDDING_MODEL,
+                              args.quantize, collection_metadata, args.shards, args.dedup_threshold)
+    print(f"✅ Indexed {count} documents from {CLEAN_DATA_DIR} (see {DEDUP_REPORT_FILE} for collapsed duplicates)")
+    print(f"✅ Vector store created and stored at: {CHROMA_DB_DIR}")
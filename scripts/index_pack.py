@@ -0,0 +1,101 @@
+# scripts/index_pack.py
+#
+# Ship prebuilt indexes as one file (index_pack.py) instead of copying the
+# Chroma directory around.
+#
+#   python scripts/index_pack.py export --output dist/index.svpack    # on CI, from the live index
+#   python scripts/index_pack.py verify dist/index.svpack
+#   python scripts/index_pack.py import dist/index.svpack --publish   # on each node
+#
+# import installs the pack as a new snapshot under vectorstore/snapshots/;
+# with --publish a running API hot-swaps to it. Exporting the same index
+# always produces the same bytes, so the SHA-256 printed by export can be
+# compared across CI runs and machines.
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from index_pack import IndexPack, IndexPackError, export_pack
+from snapshots import import_pack_snapshot, publish_snapshot, resolve_live_dir
+
+CHROMA_DB_DIR = "vectorstore"
+
+
+def cmd_export(args):
+    source = args.source or resolve_live_dir(CHROMA_DB_DIR)
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    started = time.perf_counter()
+    manifest = export_pack(source, args.output, args.embedding_model)
+    pack = IndexPack(args.output)
+    print(f"✅ Packed {manifest['count']} chunks ({manifest['dim']} dims, {manifest['space']}) from {source}")
+    print(f"   {args.output}: {os.path.getsize(args.output) / 1024:.1f} KB in {time.perf_counter() - started:.2f}s")
+    print(f"   sha256 {pack.checksum}")
+    pack.close()
+
+
+def cmd_verify(args):
+    started = time.perf_counter()
+    try:
+        pack = IndexPack(args.pack, verify=True)
+    except IndexPackError as e:
+        raise SystemExit(f"❌ {e}")
+    print(f"✅ {args.pack} is intact ({time.perf_counter() - started:.2f}s)")
+    print(json.dumps(pack.stats(), indent=2))
+    pack.close()
+
+
+def cmd_info(args):
+    started = time.perf_counter()
+    pack = IndexPack(args.pack)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    print(json.dumps({**pack.stats(), "open_ms": round(elapsed_ms, 3), "build": pack.manifest["build"],
+                      "files": pack.files()}, indent=2))
+    pack.close()
+
+
+def cmd_import(args):
+    try:
+        version = import_pack_snapshot(args.base_dir, args.pack)
+    except IndexPackError as e:
+        raise SystemExit(f"❌ {e}")
+    print(f"📦 Installed {args.pack} as snapshot {version}")
+    if args.publish:
+        publish_snapshot(args.base_dir, version)
+        print(f"🚀 Published snapshot {version}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export, verify and install single-file index packs")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export", help="Pack a built index")
+    export.add_argument("--source", help="Chroma persist directory (default: the live index)")
+    export.add_argument("--output", default="index.svpack", help="Pack file to write")
+    export.add_argument("--embedding-model", help="Model identifier to record (default: from build_info.json)")
+    export.set_defaults(func=cmd_export)
+
+    verify = commands.add_parser("verify", help="Check a pack's checksums")
+    verify.add_argument("pack")
+    verify.set_defaults(func=cmd_verify)
+
+    info = commands.add_parser("info", help="Show a pack's manifest summary")
+    info.add_argument("pack")
+    info.set_defaults(func=cmd_info)
+
+    install = commands.add_parser("import", help="Install a pack as a new snapshot")
+    install.add_argument("pack")
+    install.add_argument("--base-dir", default=CHROMA_DB_DIR, help="Vectorstore directory")
+    install.add_argument("--publish", action="store_true", help="Publish the new snapshot")
+    install.set_defaults(func=cmd_import)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
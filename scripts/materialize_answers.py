@@ -0,0 +1,41 @@
+# scripts/materialize_answers.py
+#
+# Precompute /visa-requirements results for every catalog pair and answers for
+# the top profile templates into the read-only answer store served by main.py.
+# The API also regenerates the store on startup when the index has changed;
+# run this offline (e.g. in CI after create_vectorstore.py) to ship it prebuilt.
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Materialize precomputed SwiftVisa answers")
+    parser.add_argument("--profiles", help="JSONL file of VisaRequest profile templates")
+    parser.add_argument("--top", type=int, help="Number of most frequent profiles to precompute")
+    parser.add_argument("--with-llm", action="store_true", help="Generate profile answers with the configured LLM")
+    parser.add_argument("--output", help="Answer store path")
+    args = parser.parse_args()
+
+    # Overrides must be in the environment before config/main are imported
+    if args.profiles:
+        os.environ["PROFILE_TEMPLATES_FILE"] = args.profiles
+    if args.top is not None:
+        os.environ["MATERIALIZE_TOP_PROFILES"] = str(args.top)
+    if args.with_llm:
+        os.environ["MATERIALIZE_WITH_LLM"] = "True"
+    if args.output:
+        os.environ["ANSWER_STORE_PATH"] = args.output
+    os.environ["MATERIALIZE_ON_INDEX_CHANGE"] = "False"
+
+    import main as api
+
+    count = api.rebuild_answer_store()
+    print(f"✅ Materialized {count} answers into {api.settings.ANSWER_STORE_PATH}")
+
+
+if __name__ == "__main__":
+    main()
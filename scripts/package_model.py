@@ -0,0 +1,53 @@
+# scripts/package_model.py
+#
+# Bake the embedding model into a local directory so the API and scripts can
+# start without network access:
+#
+#   python scripts/package_model.py --output models/all-MiniLM-L6-v2
+#   EMBEDDING_MODEL_PATH=models/all-MiniLM-L6-v2 uvicorn main:app
+#
+# Writes weights, config and the fast tokenizer (tokenizer.json), loads the
+# copy offline and embeds a few sample queries, then records a checksum
+# manifest. The Dockerfile runs this at image build time.
+# --verify DIR only checks an existing directory against its manifest.
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import settings
+from embedding_model import ModelBundleError, package_model, verify_model_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Package the embedding model for offline loading")
+    parser.add_argument("--model", default=settings.EMBEDDING_MODEL, help="Hub model name")
+    parser.add_argument("--output", default=settings.EMBEDDING_MODEL_PATH or os.path.join("models", settings.EMBEDDING_MODEL),
+                        help="Directory to write (replaced if it exists)")
+    parser.add_argument("--cache-dir", help="Hugging Face cache to download through")
+    parser.add_argument("--verify", metavar="DIR", help="Only verify an existing packaged model directory")
+    args = parser.parse_args()
+
+    if args.verify:
+        try:
+            manifest = verify_model_dir(args.verify)
+        except ModelBundleError as e:
+            sys.exit(f"❌ {e}")
+        print(f"✅ {args.verify}: {manifest['model_name']} ({len(manifest['files'])} files, "
+              f"dimension {manifest['dimension']}) matches its manifest")
+        return
+
+    started = time.perf_counter()
+    manifest = package_model(args.model, args.output, args.cache_dir)
+    size = sum(os.path.getsize(os.path.join(args.output, name)) for name in manifest["files"])
+    print(f"✅ Packaged {manifest['model_name']} into {args.output} in {time.perf_counter() - started:.1f}s")
+    print(f"   {len(manifest['files'])} files, {size / 1e6:.1f} MB, dimension {manifest['dimension']}, "
+          f"fast tokenizer: {manifest['fast_tokenizer']}")
+    print(f"   Load offline with EMBEDDING_MODEL_PATH={args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+# scripts/replay_traffic.py
+#
+# Replay traffic captured with TRAFFIC_CAPTURE_FILE against a local instance
+# and report the latency distribution per route, optionally compared with the
+# report of another build.
+#
+#   python scripts/replay_traffic.py logs/traffic.jsonl --serve --output old.json
+#   git checkout my-branch
+#   python scripts/replay_traffic.py logs/traffic.jsonl --serve --baseline old.json
+#
+# --speed 1 keeps the captured arrival times, --speed 10 compresses them ten
+# times, --speed max sends as fast as --concurrency allows. With --serve the
+# instance is started here with the stub LLM (STUB_LLM=True), so the numbers
+# measure this code rather than the LLM provider; otherwise start the target
+# with STUB_LLM=True yourself.
+#
+# Sessions and analysis jobs created during the replay replace the captured
+# ids in later requests from the same (hashed) client. Exits with status 1
+# when --baseline shows a regression.
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+from traffic_capture import compare_summaries, latency_summary, read_capture, replay_schedule, route_key
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Routes whose captured ids are replaced by the ids created during the replay
+CREATED_IDS = {"/sessions": "session_id", "/analyze-profile/jobs": "job_id"}
+
+
+def parse_speed(value: str) -> float:
+    return 0.0 if value == "max" else float(value.rstrip("x"))
+
+
+class IdMap:
+    """Latest session/job id created during the replay, per client and route"""
+
+    def __init__(self):
+        self._ids = {}
+        self._lock = threading.Lock()
+
+    def remember(self, entry: dict, response: httpx.Response):
+        key = CREATED_IDS.get(entry["path"])
+        if entry["method"] != "POST" or key is None or response.status_code >= 400:
+            return
+        try:
+            created = response.json().get(key)
+        except ValueError:
+            return
+        with self._lock:
+            self._ids[(entry["client"], entry["path"])] = created
+
+    def rewrite(self, entry: dict) -> str:
+        path = entry["path"]
+        for prefix in CREATED_IDS:
+            if path.startswith(prefix + "/"):
+                with self._lock:
+                    created = self._ids.get((entry["client"], prefix))
+                parts = path[len(prefix) + 1:].split("/", 1)
+                if created and route_key("/" + parts[0]) == "/{id}":
+                    return "/".join([prefix, created, *parts[1:]])
+        return path
+
+
+def start_server(port: int, latency_ms: float) -> subprocess.Popen:
+    """Start the API on port with the stub LLM and wait until /health answers"""
+    env = {**os.environ, "STUB_LLM": "True", "STUB_LLM_LATENCY_MS": str(latency_ms)}
+    env.pop("TRAFFIC_CAPTURE_FILE", None)
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT_DIR, env=env
+    )
+    deadline = time.time() + 180
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise SystemExit(f"❌ Server exited with status {server.returncode}")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health", timeout=2).status_code == 200:
+                return server
+        except httpx.HTTPError:
+            pass
+        time.sleep(1)
+    server.terminate()
+    raise SystemExit("❌ Server did not become healthy within 180s")
+
+
+def replay(entries: list, base_url: str, speed: float, concurrency: int, timeout: float) -> tuple:
+    """
+    Send the captured requests on their schedule
+
+    Returns:
+        ([(path, ms, status or None)], [seconds each request was sent late])
+    """
+    schedule = replay_schedule(entries, speed)
+    ids = IdMap()
+    samples, lags = [], []
+    lock = threading.Lock()
+    client = httpx.Client(base_url=base_url, timeout=timeout,
+                          limits=httpx.Limits(max_connections=concurrency))
+
+    def send(due: float, entry: dict):
+        started = time.perf_counter()
+        path = ids.rewrite(entry)
+        status = None
+        try:
+            response = client.request(entry["method"], path, params=entry.get("query") or None,
+                                      json=entry.get("body"),
+                                      headers={"X-Client-Id": entry["client"]} if entry.get("client") else None)
+            response.read()
+            status = response.status_code
+            ids.remember(entry, response)
+        except httpx.HTTPError:
+            pass
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with lock:
+            samples.append((entry["path"], elapsed_ms, status))
+            lags.append(max(0.0, started - due))
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="replay") as pool:
+        for offset, entry in schedule:
+            delay = t0 + offset - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(send, t0 + offset, entry)
+    client.close()
+    return samples, lags
+
+
+def print_summary(summary: dict):
+    print(f"{'route':<40} {'count':>6} {'errors':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for route, stats in summary.items():
+        print(f"{route:<40} {stats['count']:>6} {stats['errors']:>6} {stats['p50_ms']:>9.1f} "
+              f"{stats['p95_ms']:>9.1f} {stats['p99_ms']:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay captured traffic and compare latency between builds")
+    parser.add_argument("capture", help="JSONL file written with TRAFFIC_CAPTURE_FILE")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000", help="Target instance")
+    parser.add_argument("--serve", action="store_true", help="Start this checkout on --port with the stub LLM")
+    parser.add_argument("--port", type=int, default=8765, help="Port for --serve")
+    parser.add_argument("--stub-latency-ms", type=float, default=300, help="Stub LLM latency for --serve")
+    parser.add_argument("--speed", type=parse_speed, default=1.0, help="1 (as captured), N (N times faster) or max")
+    parser.add_argument("--concurrency", type=int, default=32, help="Maximum requests in flight")
+    parser.add_argument("--limit", type=int, help="Replay only the first N captured requests")
+    parser.add_argument("--timeout", type=float, default=120, help="Per-request timeout in seconds")
+    parser.add_argument("--output", help="Write the latency report (JSON) here")
+    parser.add_argument("--baseline", help="Report of an earlier build to compare against")
+    parser.add_argument("--threshold", type=float, default=1.2, help="p50/p95 ratio counted as a regression")
+    args = parser.parse_args()
+
+    entries = list(read_capture(args.capture))[:args.limit]
+    if not entries:
+        raise SystemExit(f"❌ No captured requests in {args.capture}")
+    base_url = f"http://127.0.0.1:{args.port}" if args.serve else args.base_url
+    server = start_server(args.port, args.stub_latency_ms) if args.serve else None
+    speed = "max" if args.speed == 0 else f"{args.speed:g}x"
+    print(f"▶️  Replaying {len(entries)} requests against {base_url} at {speed} speed")
+
+    try:
+        started = time.perf_counter()
+        samples, lags = replay(entries, base_url, args.speed, args.concurrency, args.timeout)
+        wall = time.perf_counter() - started
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+    summary = latency_summary(samples)
+    lags.sort()
+    report = {
+        "capture": args.capture,
+        "created_at": datetime.now().isoformat(),
+        "base_url": base_url,
+        "speed": speed,
+        "requests": len(samples),
+        "wall_seconds": round(wall, 2),
+        "send_lag_p95_ms": round(lags[int(0.95 * (len(lags) - 1))] * 1000, 1) if lags else 0.0,
+        "summary": summary
+    }
+    print(f"\n📊 {len(samples)} requests in {wall:.1f}s (p95 send lag {report['send_lag_p95_ms']} ms)\n")
+    print_summary(summary)
+    if report["send_lag_p95_ms"] > 100 and args.speed > 0:
+        print("⚠️  Requests went out late - raise --concurrency for a faithful schedule")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Report written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["summary"]
+        rows = compare_summaries(baseline, summary, args.threshold)
+        print(f"\n🔍 Compared with {args.baseline} (regression: ratio > {args.threshold})\n")
+        print(f"{'route':<40} {'p50 ratio':>10} {'p95 ratio':>10}")
+        for row in rows:
+            flag = "  ❌ regressed" if row["regressed"] else ""
+            print(f"{row['route']:<40} {row['p50_ratio']:>10.3f} {row['p95_ratio']:>10.3f}{flag}")
+        if any(row["regressed"] for row in rows):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
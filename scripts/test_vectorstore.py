@@ -1,13 +1,20 @@
 # scripts/test_vectorstore.py
 
+import os
+import sys
+
 from langchain_chroma import Chroma
-from langchain_huggingface import HuggingFaceEmbeddings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import settings
+from embedding_model import load_embeddings
 
 # --- Configuration ---
 CHROMA_DB_DIR = "vectorstore"
 
 # --- Initialize the same embedding model used during creation ---
-embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
+embeddings = load_embeddings(settings.EMBEDDING_MODEL, settings.EMBEDDING_MODEL_PATH)
 
 # --- Load the existing Chroma vector store ---
 db = Chroma(
@@ -0,0 +1,144 @@
+# scripts/tune_hnsw.py
+#
+# Sweep Chroma HNSW parameters against a query set and write the fastest
+# configuration that meets the target recall to HNSW_CONFIG_FILE, where
+# Settings picks it up for the next build (space, M, construction_ef) and
+# at API startup (search_ef).
+#
+# The query set is a JSONL file of {"query": ..., "relevant_ids": [...]}.
+# Without relevant_ids (or without a file, using catalog queries) the exact
+# nearest neighbours are the labels, i.e. recall is measured against
+# brute-force search.
+#
+#   python scripts/tune_hnsw.py --target-recall 0.95 --k 5
+
+import argparse
+import itertools
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import chromadb
+import numpy as np
+from langchain_chroma import Chroma
+
+from catalog import catalog_pairs
+from config import settings
+from embedding_model import load_embeddings
+from hnsw_config import apply_search_ef, hnsw_collection_metadata, write_tuned_config
+from snapshots import resolve_live_dir
+
+CHROMA_DB_DIR = "vectorstore"
+CLEAN_DATA_DIR = "data/clean"
+EMBEDDING_MODEL = settings.EMBEDDING_MODEL
+
+
+def int_list(value: str) -> list:
+    return [int(v) for v in value.split(",")]
+
+
+def load_query_set(path: str) -> list:
+    if not path:
+        return [
+            {"query": f"What are the requirements for a {visa_type} visa to {country}?"}
+            for country, visa_type in catalog_pairs(CLEAN_DATA_DIR)
+        ]
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def exact_neighbours(corpus: np.ndarray, queries: np.ndarray, k: int, space: str) -> list:
+    if space == "l2":
+        scores = -((queries[:, None, :] - corpus[None, :, :]) ** 2).sum(axis=2)
+    else:
+        if space == "cosine":
+            corpus = corpus / np.linalg.norm(corpus, axis=1, keepdims=True)
+            queries = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+        scores = queries @ corpus.T
+    return [np.argsort(-row)[:k] for row in scores]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Auto-tune Chroma HNSW parameters")
+    parser.add_argument("--queries", help="JSONL query set with optional relevant_ids labels")
+    parser.add_argument("--k", type=int, default=settings.TOP_K, help="Neighbours per query")
+    parser.add_argument("--target-recall", type=float, default=0.95, help="Minimum recall@k to accept")
+    parser.add_argument("--spaces", default=settings.HNSW_SPACE, help="Comma-separated distance spaces")
+    parser.add_argument("--m", type=int_list, default=[8, 16, 32], help="Comma-separated M values")
+    parser.add_argument("--construction-ef", type=int_list, default=[64, 100, 200], help="Comma-separated values")
+    parser.add_argument("--search-ef", type=int_list, default=[10, 20, 50, 100], help="Comma-separated values")
+    parser.add_argument("--repeats", type=int, default=3, help="Timing repetitions per configuration")
+    parser.add_argument("--output", default=settings.HNSW_CONFIG_FILE, help="Where to write the tuned configuration")
+    args = parser.parse_args()
+
+    embeddings = load_embeddings(EMBEDDING_MODEL, settings.EMBEDDING_MODEL_PATH)
+    db = Chroma(persist_directory=resolve_live_dir(CHROMA_DB_DIR), embedding_function=embeddings)
+    data = db.get(include=["embeddings"])
+    ids, corpus = data["ids"], np.asarray(data["embeddings"], dtype=np.float32)
+
+    query_set = load_query_set(args.queries)
+    query_vectors = np.asarray(embeddings.embed_documents([q["query"] for q in query_set]), dtype=np.float32)
+    k = min(args.k, len(ids))
+    print(f"🔍 Tuning on {len(ids)} vectors, {len(query_set)} queries, k={k}, target recall {args.target_recall}")
+
+    results = []
+    workdir = tempfile.mkdtemp(prefix="hnsw-tune-")
+    try:
+        for space in args.spaces.split(","):
+            exact = exact_neighbours(corpus, query_vectors, k, space)
+            labels = [
+                set(q["relevant_ids"]) if q.get("relevant_ids") else {ids[i] for i in exact[n]}
+                for n, q in enumerate(query_set)
+            ]
+
+            for m, construction_ef in itertools.product(args.m, args.construction_ef):
+                client = chromadb.PersistentClient(path=os.path.join(workdir, f"{space}-{m}-{construction_ef}"))
+                collection = client.create_collection(
+                    "tune", metadata=hnsw_collection_metadata(space, m, construction_ef, min(args.search_ef))
+                )
+                collection.add(ids=ids, embeddings=corpus.tolist())
+
+                for search_ef in sorted(args.search_ef):
+                    apply_search_ef(collection, search_ef)
+                    timings = []
+                    for _ in range(args.repeats):
+                        started = time.perf_counter()
+                        found = collection.query(query_embeddings=query_vectors.tolist(), n_results=k)["ids"]
+                        timings.append((time.perf_counter() - started) * 1000 / len(query_set))
+                    recall = float(np.mean([
+                        len(set(f) & label) / min(k, len(label)) for f, label in zip(found, labels)
+                    ]))
+                    result = {
+                        "space": space, "m": m, "construction_ef": construction_ef, "search_ef": search_ef,
+                        "recall": recall, "ms_per_query": min(timings)
+                    }
+                    results.append(result)
+                    print(f"  space={space:<6} M={m:<3} construction_ef={construction_ef:<4} "
+                          f"search_ef={search_ef:<4} recall@{k}={recall:.3f} {result['ms_per_query']:.3f} ms/query")
+
+                client.delete_collection("tune")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    passing = [r for r in results if r["recall"] >= args.target_recall]
+    if not passing:
+        best = max(results, key=lambda r: r["recall"])
+        print(f"❌ No configuration reached recall {args.target_recall} (best: {best['recall']:.3f}); nothing written")
+        sys.exit(1)
+
+    best = min(passing, key=lambda r: (r["ms_per_query"], -r["recall"]))
+    write_tuned_config(
+        args.output, best["space"], best["m"], best["construction_ef"], best["search_ef"],
+        recall=best["recall"], ms_per_query=best["ms_per_query"], k=k, target_recall=args.target_recall
+    )
+    print(f"✅ Fastest passing configuration written to {args.output}: {best}")
+    print("   Rebuild the index (create_vectorstore.py or POST /admin/reindex) to apply space, M and construction_ef.")
+
+
+if __name__ == "__main__":
+    main()
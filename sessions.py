@@ -0,0 +1,96 @@
+# ==================================
+# SwiftVisa Retrieval Sessions
+# ==================================
+#
+# A session pins the chunks retrieved for one applicant profile, plus a
+# compact conversation history, so follow-up questions ("which documents do
+# I need?", "how long does processing take?") are answered from that chunk
+# set instead of a fresh search of the full index. The pool is re-ranked
+# against each follow-up by cosine similarity, using the chunks' vectors as
+# stored in the index; only when the backend cannot return them are the
+# chunks embedded again, once, on the first follow-up.
+
+import threading
+import uuid
+from datetime import datetime
+from typing import List, Optional
+
+import numpy as np
+
+
+class RetrievalSession:
+    """Retrieved context and conversation state for one profile"""
+
+    def __init__(self, profile: dict, query: str, docs: list, index_version: str, max_turns: int = 4,
+                 vectors: Optional[np.ndarray] = None):
+        self.session_id = uuid.uuid4().hex
+        self.profile = profile
+        self.query = query
+        self.docs = docs
+        self.index_version = index_version
+        self.max_turns = max_turns
+        self.history: List[dict] = []
+        self.turns = 0
+        self.created_at = datetime.now().isoformat()
+        self._vectors: Optional[np.ndarray] = None if vectors is None else self._normalize(vectors)
+        # One follow-up at a time per session keeps history ordered
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(vectors) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+    def doc_vectors(self, embeddings) -> np.ndarray:
+        """Unit-normalized vectors of the pooled chunks (stored, else embedded once)"""
+        if self._vectors is None:
+            self._vectors = self._normalize(embeddings.embed_documents([d.page_content for d in self.docs]))
+        return self._vectors
+
+    def rerank(self, question: str, embeddings, k: int) -> list:
+        """
+        The k pooled chunks most similar to a follow-up question
+
+        The profile query is blended in so the ranking stays on-profile.
+
+        Returns:
+            (document, cosine similarity) pairs, best first
+        """
+        if not self.docs:
+            return []
+        matrix = self.doc_vectors(embeddings)
+        target = np.asarray(embeddings.embed_query(f"{question}\n{self.query}"), dtype=np.float32)
+        norm = np.linalg.norm(target)
+        scores = matrix @ (target / norm if norm else target)
+        order = np.argsort(-scores, kind="stable")[:k]
+        return [(self.docs[i], float(scores[i])) for i in order]
+
+    def remember(self, question: str, answer: str, answer_chars: int = 400):
+        """Append a turn to the compact history (answers are truncated)"""
+        self.turns += 1
+        self.history.append({"question": question, "answer": answer[:answer_chars]})
+        del self.history[:-self.max_turns]
+
+    def follow_up_prompt(self, question: str) -> str:
+        """Question for the QA chain: profile, recent turns, then the follow-up"""
+        profile = ", ".join(f"{key}: {value}" for key, value in self.profile.items())
+        lines = [f"Applicant profile - {profile}."]
+        if self.history:
+            lines.append("Earlier in this conversation:")
+            for turn in self.history:
+                lines.append(f"Q: {turn['question']}\nA: {turn['answer']}")
+        lines.append(f"Follow-up question: {question}")
+        lines.append("Answer using the policy context above for this applicant.")
+        return "\n".join(lines)
+
+    def to_dict(self) -> dict:
+        return {
+            "session_id": self.session_id,
+            "profile": self.profile,
+            "index_version": self.index_version,
+            "created_at": self.created_at,
+            "turns": self.turns,
+            "history": self.history,
+            "sources": [(d.metadata or {}).get("source") for d in self.docs]
+        }
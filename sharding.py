@@ -0,0 +1,328 @@
+# ==================================
+# SwiftVisa Country-Sharded Index
+# ==================================
+#
+# Optional per-country layout inside a build directory:
+#   shards/<Country>/   one Chroma persist directory (+ chunk store) per country
+#   shards/shards.json  {"shards": {country: {"documents", "built_at"}}}
+#
+# Each shard is built and replaced on its own. ShardedVectorStore opens a
+# shard only when a query first needs it: requests with a known destination
+# search one shard, the rest fan out over all shards and merge the top-k.
+# Chunk ids are "<Country>:<source file stem>" so content lookups are routed
+# to a single shard as well.
+
+import glob
+import heapq
+import json
+import os
+import shutil
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
+
+from chunk_store import export_chunk_store, open_chunk_store
+from dedup import DEFAULT_DEDUP_THRESHOLD
+
+SHARDS_DIR = "shards"
+SHARDS_MANIFEST = "shards.json"
+
+# Destination spellings used by clients -> shard names taken from data/clean
+COUNTRY_ALIASES = {
+    "united kingdom": "UK",
+    "great britain": "UK",
+    "britain": "UK",
+    "england": "UK",
+    "united states": "US",
+    "united states of america": "US",
+    "usa": "US",
+    "america": "US",
+}
+
+
+def shard_for_filename(filename: str) -> str:
+    """Shard (country) a clean data file belongs to, e.g. Canada_Canada_X.txt -> Canada"""
+    return os.path.basename(filename).split("_")[0]
+
+
+def group_clean_files(clean_dir: str = "data/clean") -> Dict[str, List[str]]:
+    """Clean data files grouped by shard, both sorted"""
+    groups: Dict[str, List[str]] = {}
+    for path in sorted(glob.glob(os.path.join(clean_dir, "*.txt"))):
+        groups.setdefault(shard_for_filename(path), []).append(path)
+    return groups
+
+
+def read_shard_manifest(persist_dir: str) -> dict:
+    """Shards present in a build directory ({} if it is not sharded)"""
+    try:
+        with open(os.path.join(persist_dir, SHARDS_DIR, SHARDS_MANIFEST), "r", encoding="utf-8") as f:
+            return json.load(f)["shards"]
+    except (OSError, ValueError, KeyError):
+        return {}
+
+
+def _write_shard_manifest(persist_dir: str, shards: dict):
+    path = os.path.join(persist_dir, SHARDS_DIR, SHARDS_MANIFEST)
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        json.dump({"shards": shards}, f, indent=2, sort_keys=True)
+    os.replace(f"{path}.tmp", path)
+
+
+# ----------------------------------------
+# BUILD
+# ----------------------------------------
+def build_shard(persist_dir: str, shard: str, files: List[str], embeddings,
+                collection_metadata: Optional[dict] = None,
+                dedup_threshold: float = DEFAULT_DEDUP_THRESHOLD) -> int:
+    """
+    Build (or rebuild) one country shard
+
+    The shard is written to a staging directory and then replaces the old one.
+    Empty and near-duplicate documents are collapsed as in the full index.
+
+    Returns:
+        Number of documents in the shard
+    """
+    from langchain_chroma import Chroma
+
+    from snapshots import load_clean_documents, prepare_documents
+
+    root = os.path.join(persist_dir, SHARDS_DIR)
+    # Unique names: chromadb caches clients by path, so a reused path would
+    # reach the moved database of a previous build
+    build_id = uuid.uuid4().hex[:8]
+    staging = os.path.join(root, f".building-{shard}-{build_id}")
+    target = os.path.join(root, shard)
+    os.makedirs(root, exist_ok=True)
+
+    try:
+        texts, metadatas, _ = prepare_documents(staging, load_clean_documents(files=files), dedup_threshold)
+        ids = []
+        for metadata in metadatas:
+            metadata["country"] = shard
+            ids.append(f"{shard}:{os.path.splitext(metadata['source'])[0]}")
+        db = Chroma.from_texts(
+            texts=texts,
+            embedding=embeddings,
+            metadatas=metadatas,
+            ids=ids,
+            persist_directory=staging,
+            collection_metadata=collection_metadata
+        )
+        export_chunk_store(db, staging)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    if os.path.exists(target):
+        retired = os.path.join(root, f".old-{shard}-{build_id}")
+        os.rename(target, retired)
+        os.rename(staging, target)
+        shutil.rmtree(retired, ignore_errors=True)
+    else:
+        os.rename(staging, target)
+    return len(texts)
+
+
+def build_shards(persist_dir: str, embeddings, clean_dir: str = "data/clean",
+                 collection_metadata: Optional[dict] = None, only: Optional[Iterable[str]] = None,
+                 dedup_threshold: float = DEFAULT_DEDUP_THRESHOLD) -> Dict[str, int]:
+    """
+    Build every country shard, or just the ones named in ``only``
+
+    Returns:
+        Document count per rebuilt shard
+
+    Raises:
+        ValueError: If a requested shard has no clean data
+    """
+    groups = group_clean_files(clean_dir)
+    selected = list(only) if only else list(groups)
+    unknown = [s for s in selected if s not in groups]
+    if unknown:
+        raise ValueError(f"No clean data for shard(s): {', '.join(unknown)} (available: {', '.join(groups)})")
+
+    manifest = read_shard_manifest(persist_dir)
+    counts = {}
+    for shard in selected:
+        counts[shard] = build_shard(persist_dir, shard, groups[shard], embeddings, collection_metadata,
+                                    dedup_threshold)
+        manifest[shard] = {"documents": counts[shard], "built_at": datetime.now().isoformat()}
+        _write_shard_manifest(persist_dir, manifest)
+    return counts
+
+
+# ----------------------------------------
+# SERVING
+# ----------------------------------------
+class ShardedVectorStore(VectorStore):
+    """
+    Read-only LangChain vector store over lazily opened country shards
+
+    ``country`` may be passed to the search methods to restrict a query to one
+    shard; unknown or missing countries search every shard concurrently.
+    """
+
+    def __init__(self, persist_dir: str, embedding_function, max_workers: int = 8,
+                 search_ef: Optional[int] = None):
+        self.persist_dir = persist_dir
+        self._embedding_function = embedding_function
+        self.shards = sorted(read_shard_manifest(persist_dir))
+        self.search_ef = search_ef
+        self._stores: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="shard-search")
+        self._space: Optional[str] = None
+        self.routed_queries = 0
+        self.fanout_queries = 0
+
+    @property
+    def embeddings(self):
+        return self._embedding_function
+
+    def resolve(self, country: Optional[str]) -> Optional[str]:
+        """Map a destination country to a shard name, or None if unknown"""
+        if not country:
+            return None
+        name = country.strip()
+        name = COUNTRY_ALIASES.get(name.lower(), name)
+        for shard in self.shards:
+            if shard.lower() == name.lower():
+                return shard
+        return None
+
+    def shard(self, name: str):
+        """The Chroma store of a shard, opened on first use"""
+        with self._lock:
+            store = self._stores.get(name)
+            if store is None:
+                from langchain_chroma import Chroma
+                store = Chroma(
+                    persist_directory=os.path.join(self.persist_dir, SHARDS_DIR, name),
+                    embedding_function=self._embedding_function
+                )
+                if self.search_ef is not None:
+                    from hnsw_config import apply_search_ef
+                    apply_search_ef(store._collection, self.search_ef)
+                self._stores[name] = store
+            return store
+
+    @property
+    def space(self) -> str:
+        """Distance space of the shards ("l2", "cosine" or "ip"); all are built with the same HNSW settings"""
+        if self._space is None:
+            metadata = self.shard(self.shards[0])._collection.metadata if self.shards else None
+            self._space = (metadata or {}).get("hnsw:space", "l2")
+        return self._space
+
+    def loaded_shards(self) -> List[str]:
+        with self._lock:
+            return sorted(self._stores)
+
+    def similarity_search_by_vector_with_score(self, embedding: List[float], k: int = 4,
+                                               country: Optional[str] = None) -> List[Tuple[Document, float]]:
+        target = self.resolve(country)
+        if target is not None:
+            self.routed_queries += 1
+            return self.shard(target).similarity_search_by_vector_with_relevance_scores(embedding, k=k)
+
+        self.fanout_queries += 1
+        futures = [
+            self._executor.submit(
+                lambda name: self.shard(name).similarity_search_by_vector_with_relevance_scores(embedding, k=k), name
+            )
+            for name in self.shards
+        ]
+        # Chroma scores are distances: lower is better
+        return heapq.nsmallest(k, (hit for f in futures for hit in f.result()), key=lambda hit: hit[1])
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_by_vector_with_score(embedding, k, kwargs.get("country"))]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        embedding = self._embedding_function.embed_query(query)
+        return self.similarity_search_by_vector_with_score(embedding, k, kwargs.get("country"))
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, **kwargs)]
+
+    def _select_relevance_score_fn(self):
+        if self.space == "cosine":
+            return self._cosine_relevance_score_fn
+        if self.space == "ip":
+            return self._max_inner_product_relevance_score_fn
+        return self._euclidean_relevance_score_fn
+
+    def get(self, ids: List[str], include: Optional[List[str]] = None) -> dict:
+        """Chroma-style get by chunk id, routed to the owning shards only"""
+        result = {"ids": [], "documents": [], "metadatas": []}
+        by_shard: Dict[str, List[str]] = {}
+        for chunk_id in ids:
+            shard = chunk_id.split(":", 1)[0]
+            if shard in self.shards:
+                by_shard.setdefault(shard, []).append(chunk_id)
+        for shard, shard_ids in by_shard.items():
+            data = self.shard(shard).get(ids=shard_ids, include=["documents", "metadatas"])
+            for key in result:
+                result[key].extend(data[key])
+        return result
+
+    def close(self):
+        """Stop the fan-out threads (the store is retired)"""
+        self._executor.shutdown(wait=False)
+
+    def stats(self) -> dict:
+        return {
+            "shards": self.shards,
+            "loaded_shards": self.loaded_shards(),
+            "routed_queries": self.routed_queries,
+            "fanout_queries": self.fanout_queries
+        }
+
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[List[dict]] = None, **kwargs: Any) -> List[str]:
+        raise NotImplementedError("ShardedVectorStore is read-only; rebuild the shard instead")
+
+    @classmethod
+    def from_texts(cls, texts: List[str], embedding, metadatas: Optional[List[dict]] = None, **kwargs: Any):
+        raise NotImplementedError("Build with build_shards()")
+
+
+class ShardedChunks:
+    """Chunk store lookups routed to the owning shard's chunk store"""
+
+    def __init__(self, persist_dir: str):
+        self.persist_dir = persist_dir
+        self.shards = set(read_shard_manifest(persist_dir))
+        self._stores: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def _store(self, chunk_id: str):
+        # Ids come from clients: only shards in the manifest are opened (or remembered)
+        shard = chunk_id.split(":", 1)[0]
+        if shard not in self.shards:
+            return None
+        with self._lock:
+            store = self._stores.get(shard)
+            if store is None:
+                store = open_chunk_store(os.path.join(self.persist_dir, SHARDS_DIR, shard))
+                if store is not None:
+                    self._stores[shard] = store
+            return store
+
+    def __contains__(self, chunk_id: str) -> bool:
+        store = self._store(chunk_id)
+        return store is not None and chunk_id in store
+
+    def length(self, chunk_id: str) -> Optional[int]:
+        store = self._store(chunk_id)
+        return store.length(chunk_id) if store is not None else None
+
+    def read(self, chunk_id: str, start: int = 0, end: Optional[int] = None) -> Optional[bytes]:
+        store = self._store(chunk_id)
+        return store.read(chunk_id, start, end) if store is not None else None
@@ -0,0 +1,352 @@
+# ==================================
+# SwiftVisa Versioned Vectorstore Snapshots
+# ==================================
+#
+# Layout under the vectorstore directory:
+#   snapshots/<version>/   one complete Chroma persist directory per build
+#   CURRENT                name of the published snapshot (replaced atomically)
+#
+# Builds are written to a hidden staging directory and renamed into place, so
+# readers never see a half-written SQLite database. Without a CURRENT file the
+# vectorstore directory itself is served (legacy single-index layout).
+
+import glob
+import json
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from chunk_store import export_chunk_store
+from materialize import BUILD_INFO_FILE, write_build_info
+from dedup import DEDUP_REPORT_FILE, DEFAULT_DEDUP_THRESHOLD, collapse_documents
+from extractive import export_sentence_index
+from readonly_index import CHROMA_SQLITE_FILE, freeze_vectors
+from rules_engine import write_rules
+from suggest import write_suggest_index
+
+SNAPSHOTS_DIR = "snapshots"
+CURRENT_FILE = "CURRENT"
+_STAGING_PREFIX = ".building-"
+
+
+# ----------------------------------------
+# SNAPSHOT DIRECTORIES
+# ----------------------------------------
+def snapshot_path(base_dir: str, version: str) -> str:
+    return os.path.join(base_dir, SNAPSHOTS_DIR, version)
+
+
+def current_version(base_dir: str) -> Optional[str]:
+    """Get the published snapshot version, or None for the legacy layout"""
+    try:
+        with open(os.path.join(base_dir, CURRENT_FILE), "r", encoding="utf-8") as f:
+            version = f.read().strip()
+    except OSError:
+        return None
+    if version and os.path.isdir(snapshot_path(base_dir, version)):
+        return version
+    return None
+
+
+def resolve_live_dir(base_dir: str) -> str:
+    """Get the persist directory that should currently be served"""
+    version = current_version(base_dir)
+    return snapshot_path(base_dir, version) if version else base_dir
+
+
+def list_snapshots(base_dir: str) -> List[str]:
+    """List complete snapshot versions, oldest first"""
+    root = os.path.join(base_dir, SNAPSHOTS_DIR)
+    if not os.path.isdir(root):
+        return []
+    return sorted(
+        name for name in os.listdir(root)
+        if not name.startswith(".") and os.path.isdir(os.path.join(root, name))
+    )
+
+
+def publish_snapshot(base_dir: str, version: str):
+    """Atomically point CURRENT at a snapshot"""
+    if not os.path.isdir(snapshot_path(base_dir, version)):
+        raise FileNotFoundError(f"Snapshot not found: {version}")
+    tmp_path = os.path.join(base_dir, f"{CURRENT_FILE}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(tmp_path, os.path.join(base_dir, CURRENT_FILE))
+
+
+def gc_snapshots(base_dir: str, keep: int = 2, in_use: Iterable[str] = ()) -> List[str]:
+    """
+    Delete old snapshots
+
+    The ``keep`` newest snapshots, the published one and any directory still
+    serving requests are retained.
+
+    Returns:
+        Versions that were removed
+    """
+    in_use = {os.path.abspath(p) for p in in_use}
+    versions = list_snapshots(base_dir)
+    protected = set(versions[-keep:]) if keep > 0 else set()
+    current = current_version(base_dir)
+    if current:
+        protected.add(current)
+
+    removed = []
+    for version in versions:
+        path = snapshot_path(base_dir, version)
+        if version in protected or os.path.abspath(path) in in_use:
+            continue
+        shutil.rmtree(path, ignore_errors=True)
+        removed.append(version)
+    return removed
+
+
+# ----------------------------------------
+# BUILDING
+# ----------------------------------------
+def load_clean_documents(clean_dir: str = "data/clean", files: Optional[List[str]] = None) -> List[Tuple[str, str]]:
+    """Read cleaned policy documents as (filename, text) pairs"""
+    documents = []
+    for file in files if files is not None else sorted(glob.glob(os.path.join(clean_dir, "*.txt"))):
+        with open(file, "r", encoding="utf-8") as f:
+            documents.append((os.path.basename(file), f.read()))
+    return documents
+
+
+def load_clean_texts(clean_dir: str = "data/clean") -> List[str]:
+    """Read every cleaned policy document"""
+    return [text for _, text in load_clean_documents(clean_dir)]
+
+
+def prepare_documents(persist_dir: str, documents: List[Tuple[str, str]],
+                      dedup_threshold: float) -> Tuple[List[str], List[dict], dict]:
+    """
+    Drop empty documents and collapse near-duplicates before embedding
+
+    Writes the dedup report into the build directory.
+
+    Returns:
+        (texts, metadatas, report)
+    """
+    kept, report = collapse_documents(documents, dedup_threshold)
+    os.makedirs(persist_dir, exist_ok=True)
+    with open(os.path.join(persist_dir, DEDUP_REPORT_FILE), "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    metadatas = []
+    for doc in kept:
+        metadata = {"source": doc["source"]}
+        if doc["duplicates"]:
+            metadata["duplicates"] = ",".join(doc["duplicates"])
+        metadatas.append(metadata)
+    return [doc["text"] for doc in kept], metadatas, report
+
+
+def build_vectorstore(persist_dir: str, embeddings, clean_dir: str = "data/clean",
+                      embedding_model: str = "all-MiniLM-L6-v2", quantize: bool = False,
+                      collection_metadata: Optional[dict] = None, shard: bool = False,
+                      dedup_threshold: float = DEFAULT_DEDUP_THRESHOLD) -> int:
+    """
+    Embed the clean corpus into a Chroma persist directory
+
+    An existing collection in persist_dir is replaced, not updated.
+
+    Args:
+        quantize: Also write a quantized copy of the index (quantized_index.py)
+        collection_metadata: Chroma collection metadata, e.g. HNSW parameters
+        shard: Also write per-country shards (sharding.py)
+        dedup_threshold: Jaccard similarity above which documents are
+            collapsed into one (dedup.py); 0 keeps every non-empty document
+
+    Returns:
+        Number of documents indexed
+    """
+    from langchain_chroma import Chroma
+
+    texts, metadatas, report = prepare_documents(persist_dir, load_clean_documents(clean_dir), dedup_threshold)
+    if os.path.exists(os.path.join(persist_dir, CHROMA_SQLITE_FILE)):
+        # Rebuilding in place: from_texts would reuse the old collection, keeping
+        # its HNSW settings and every chunk this build no longer produces
+        Chroma(persist_directory=persist_dir).delete_collection()
+    db = Chroma.from_texts(
+        texts=texts,
+        embedding=embeddings,
+        metadatas=metadatas,
+        # Ids from the source file (as in shards), so identical corpora give identical builds and packs
+        ids=[os.path.splitext(metadata["source"])[0] for metadata in metadatas],
+        persist_directory=persist_dir,
+        collection_metadata=collection_metadata
+    )
+    export_chunk_store(db, persist_dir)
+    freeze_vectors(db, persist_dir)
+    export_sentence_index(db, persist_dir, embeddings)
+    write_rules(persist_dir, clean_dir)
+    write_suggest_index(persist_dir, clean_dir)
+    if quantize:
+        from quantized_index import QUANTIZED_DIR, export_chroma_collection
+        export_chroma_collection(db, os.path.join(persist_dir, QUANTIZED_DIR), embedding_model)
+    if shard:
+        from sharding import build_shards
+        build_shards(persist_dir, embeddings, clean_dir, collection_metadata, dedup_threshold=dedup_threshold)
+    write_build_info(persist_dir, documents=len(texts), embedding_model=embedding_model,
+                     collection_metadata=collection_metadata or {},
+                     duplicates_collapsed=sum(len(c["collapsed"]) for c in report["clusters"]),
+                     empty_skipped=len(report["empty_documents"]))
+    return len(texts)
+
+
+def build_snapshot(base_dir: str, embeddings, clean_dir: str = "data/clean",
+                   embedding_model: str = "all-MiniLM-L6-v2", quantize: bool = False,
+                   collection_metadata: Optional[dict] = None, shard: bool = False,
+                   dedup_threshold: float = DEFAULT_DEDUP_THRESHOLD) -> str:
+    """
+    Build a new, unpublished snapshot
+
+    Returns:
+        Version of the new snapshot
+    """
+    version = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+    root = os.path.join(base_dir, SNAPSHOTS_DIR)
+    staging = os.path.join(root, f"{_STAGING_PREFIX}{version}")
+    os.makedirs(root, exist_ok=True)
+    try:
+        build_vectorstore(staging, embeddings, clean_dir, embedding_model, quantize, collection_metadata, shard,
+                          dedup_threshold)
+        os.rename(staging, snapshot_path(base_dir, version))
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return version
+
+
+def import_pack_snapshot(base_dir: str, pack_path: str) -> str:
+    """
+    Install an index pack (index_pack.py) as a new, unpublished snapshot
+
+    Returns:
+        Version of the new snapshot
+
+    Raises:
+        IndexPackError: If the pack is invalid or corrupt
+    """
+    from index_pack import install_pack
+
+    version = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+    root = os.path.join(base_dir, SNAPSHOTS_DIR)
+    staging = os.path.join(root, f"{_STAGING_PREFIX}{version}")
+    os.makedirs(root, exist_ok=True)
+    try:
+        install_pack(pack_path, staging)
+        os.rename(staging, snapshot_path(base_dir, version))
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return version
+
+
+def _read_build_info(persist_dir: str) -> dict:
+    try:
+        with open(os.path.join(persist_dir, BUILD_INFO_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def rebuild_shards_snapshot(base_dir: str, shards: Iterable[str], embeddings, clean_dir: str = "data/clean",
+                            collection_metadata: Optional[dict] = None,
+                            dedup_threshold: float = DEFAULT_DEDUP_THRESHOLD) -> str:
+    """
+    Build a new, unpublished snapshot that copies the live one and rebuilds
+    only the given country shards
+
+    Returns:
+        Version of the new snapshot
+    """
+    from sharding import build_shards
+
+    version = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+    root = os.path.join(base_dir, SNAPSHOTS_DIR)
+    staging = os.path.join(root, f"{_STAGING_PREFIX}{version}")
+    live_dir = resolve_live_dir(base_dir)
+    os.makedirs(root, exist_ok=True)
+    try:
+        # The legacy layout keeps snapshots/ inside the live dir; never copy it into itself
+        shutil.copytree(live_dir, staging, ignore=shutil.ignore_patterns(SNAPSHOTS_DIR, CURRENT_FILE, "*.tmp"))
+        counts = build_shards(staging, embeddings, clean_dir, collection_metadata, only=shards,
+                              dedup_threshold=dedup_threshold)
+        previous = _read_build_info(staging)
+        previous.pop("build_id", None)
+        previous.pop("created_at", None)
+        write_build_info(staging, **{**previous, "rebuilt_shards": counts})
+        os.rename(staging, snapshot_path(base_dir, version))
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return version
+
+
+# ----------------------------------------
+# LIVE INDEX
+# ----------------------------------------
+class LiveIndex:
+    """
+    Holds the index handle used for serving and swaps it atomically
+
+    Requests ``acquire()`` the current handle for their whole duration. After a
+    ``swap()`` new requests see the new handle while in-flight ones finish on
+    the old one; ``on_drained`` is called once the old handle is idle.
+    """
+
+    def __init__(self, handle, on_drained: Optional[Callable] = None):
+        self._lock = threading.Lock()
+        self._current = handle
+        self._active = {id(handle): 0}
+        self._retired = []
+        self._on_drained = on_drained
+
+    @property
+    def current(self):
+        return self._current
+
+    @contextmanager
+    def acquire(self):
+        with self._lock:
+            handle = self._current
+            self._active[id(handle)] += 1
+        try:
+            yield handle
+        finally:
+            drained = False
+            with self._lock:
+                self._active[id(handle)] -= 1
+                if handle in self._retired and self._active[id(handle)] == 0:
+                    self._retired.remove(handle)
+                    del self._active[id(handle)]
+                    drained = True
+            if drained and self._on_drained:
+                self._on_drained(handle)
+
+    def swap(self, handle):
+        """Make ``handle`` live; returns the previous handle"""
+        with self._lock:
+            old = self._current
+            if handle is old:
+                return old
+            self._current = handle
+            self._active[id(handle)] = 0
+            drained = self._active[id(old)] == 0
+            if drained:
+                del self._active[id(old)]
+            else:
+                self._retired.append(old)
+        if drained and self._on_drained:
+            self._on_drained(old)
+        return old
+
+    def draining(self) -> list:
+        """Handles retired by a swap that still have requests in flight"""
+        with self._lock:
+            return list(self._retired)
@@ -0,0 +1,180 @@
+# ==================================
+# SwiftVisa Static Frontend
+# ==================================
+#
+# Production frontend served by the FastAPI app itself (no Node at runtime).
+# scripts/build_frontend.py writes the dist directory once at build time:
+#   app/    React production build (content-hashed static/js, static/css)
+#   home/   "Home Page" site with content-hashed CSS/JS/images
+# plus .gz (and .br when the brotli package is installed) next to every
+# compressible file.
+#
+# Files whose names carry a content hash are cached for a year as immutable;
+# HTML and other stable names are revalidated on every load via their ETag.
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import shutil
+from typing import List, Optional
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+try:
+    import brotli
+except ImportError:  # optional: only needed to write .br variants at build time
+    brotli = None
+
+HASHED_NAME = re.compile(r"\.[0-9a-f]{8,}\.")
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "no-cache"
+COMPRESSIBLE_EXTENSIONS = (".html", ".css", ".js", ".json", ".map", ".svg", ".txt", ".xml", ".ico")
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def cache_control_for(path: str) -> str:
+    """Cache-Control for a served file, based on whether its name is content-hashed"""
+    return IMMUTABLE_CACHE if HASHED_NAME.search(os.path.basename(path)) else REVALIDATE_CACHE
+
+
+def accepted_encodings(accept_encoding: str) -> List[str]:
+    """Encodings the client accepts (q=0 excluded)"""
+    accepted = []
+    for part in accept_encoding.split(","):
+        name, *params = [p.strip() for p in part.split(";")]
+        quality = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        if name and quality > 0:
+            accepted.append(name.lower())
+    return accepted
+
+
+# ----------------------------------------
+# BUILD HELPERS
+# ----------------------------------------
+def content_hash_name(path: str, length: int = 10) -> str:
+    """style.css -> style.<hash>.css, hashing the file's bytes"""
+    with open(path, "rb") as f:
+        digest = hashlib.sha256(f.read()).hexdigest()[:length]
+    root, ext = os.path.splitext(os.path.basename(path))
+    return f"{root}.{digest}{ext}"
+
+
+def precompress_file(path: str) -> List[str]:
+    """
+    Write .gz and .br variants of a file (deterministic output)
+
+    Returns:
+        Paths of the variants written
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    written = []
+    with open(f"{path}.gz", "wb") as raw:
+        # mtime=0 and no filename keep the bytes identical across builds
+        with gzip.GzipFile(filename="", mode="wb", fileobj=raw, compresslevel=9, mtime=0) as gz:
+            gz.write(data)
+    written.append(f"{path}.gz")
+    if brotli is not None:
+        with open(f"{path}.br", "wb") as f:
+            f.write(brotli.compress(data, quality=11))
+        written.append(f"{path}.br")
+    return written
+
+
+def precompress_tree(root: str) -> int:
+    """Precompress every compressible file under a directory; returns files processed"""
+    count = 0
+    for directory, _, files in os.walk(root):
+        for name in files:
+            if name.endswith(COMPRESSIBLE_EXTENSIONS):
+                precompress_file(os.path.join(directory, name))
+                count += 1
+    return count
+
+
+def hash_site_assets(site_dir: str, replacements: Optional[dict] = None) -> dict:
+    """
+    Rename every non-HTML asset of a static site to a content-hashed name and
+    rewrite the references in its HTML files
+
+    Args:
+        site_dir: Directory holding the copied site
+        replacements: Extra literal substitutions applied to the HTML
+
+    Returns:
+        Mapping of original to hashed file name
+    """
+    renamed = {}
+    for name in sorted(os.listdir(site_dir)):
+        path = os.path.join(site_dir, name)
+        if os.path.isfile(path) and not name.endswith(".html"):
+            hashed = content_hash_name(path)
+            os.replace(path, os.path.join(site_dir, hashed))
+            renamed[name] = hashed
+
+    substitutions = {f'"{old}"': f'"{new}"' for old, new in renamed.items()}
+    substitutions.update(replacements or {})
+    for name in os.listdir(site_dir):
+        if name.endswith(".html"):
+            path = os.path.join(site_dir, name)
+            with open(path, "r", encoding="utf-8") as f:
+                html = f.read()
+            for old, new in substitutions.items():
+                html = html.replace(old, new)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(html)
+    return renamed
+
+
+def replace_tree(staging: str, target: str):
+    """Swap a freshly built directory into place"""
+    retired = f"{target}.old"
+    shutil.rmtree(retired, ignore_errors=True)
+    if os.path.exists(target):
+        os.rename(target, retired)
+    os.rename(staging, target)
+    shutil.rmtree(retired, ignore_errors=True)
+
+
+# ----------------------------------------
+# SERVING
+# ----------------------------------------
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    StaticFiles that serves .br/.gz variants when the client accepts them and
+    sets long-lived cache headers on content-hashed files
+    """
+
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200):
+        request_headers = Headers(scope=scope)
+        media_type = mimetypes.guess_type(str(full_path))[0] or "application/octet-stream"
+        headers = {"Cache-Control": cache_control_for(str(full_path))}
+
+        served_path, served_stat = full_path, stat_result
+        accepted = accepted_encodings(request_headers.get("accept-encoding", ""))
+        for encoding, suffix in ENCODINGS:
+            variant = f"{full_path}{suffix}"
+            if (encoding in accepted or "*" in accepted) and os.path.isfile(variant):
+                served_path, served_stat = variant, os.stat(variant)
+                headers["Content-Encoding"] = encoding
+                break
+        if os.path.isfile(f"{full_path}.gz"):
+            headers["Vary"] = "Accept-Encoding"
+
+        response = FileResponse(
+            served_path, status_code=status_code, stat_result=served_stat,
+            media_type=media_type, headers=headers
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
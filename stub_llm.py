@@ -0,0 +1,44 @@
+# ==================================
+# SwiftVisa Stub LLM
+# ==================================
+#
+# Deterministic stand-in for the chat model, used when replaying captured
+# traffic (STUB_LLM=True): it waits a fixed latency instead of calling a
+# provider, replies with text derived from the prompt and reports estimated
+# token usage, so latency comparisons between builds measure our code, not
+# the provider's, and cost nothing.
+
+import hashlib
+import time
+from typing import Any, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from answer_chain import estimate_tokens
+
+
+class StubChatModel(BaseChatModel):
+    """Chat model that sleeps latency_ms and answers from the prompt"""
+
+    latency_ms: float = 300.0
+    max_tokens: int = 200
+
+    @property
+    def _llm_type(self) -> str:
+        return "swiftvisa-stub"
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager=None, **kwargs: Any) -> ChatResult:
+        prompt = "\n".join(str(message.content) for message in messages)
+        time.sleep(self.latency_ms / 1000)
+        digest = hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:8]
+        lines = [line.strip() for line in prompt.splitlines() if line.strip()]
+        text = f"[stub {digest}] " + " ".join(lines[-3:])
+        limit = kwargs.get("max_tokens") or self.max_tokens
+        text = text[:limit * 4]
+        usage = {"prompt_tokens": estimate_tokens(prompt), "completion_tokens": estimate_tokens(text)}
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))],
+                          llm_output={"token_usage": usage})
@@ -0,0 +1,205 @@
+# ==================================
+# SwiftVisa Typeahead Suggestions
+# ==================================
+#
+# Prefix index for the form fields: destination countries (plus common
+# aliases), visa types per country and purpose-of-visit phrases mined from
+# the clean corpus. Written to suggest.json next to the index at build time
+# and loaded with it, so suggestions always match the served corpus.
+#
+# Lookup is a binary search over a sorted array of normalized keys - one key
+# per word start of every label, so "permit" finds "Study Permit" - and the
+# matches are ranked by how often clients actually asked for them
+# (QueryPopularity, fed by the eligibility endpoints), then by corpus weight.
+
+import bisect
+import json
+import os
+import re
+import threading
+from collections import Counter
+from typing import Dict, List, Optional
+
+from catalog import load_catalog
+from sharding import COUNTRY_ALIASES
+
+SUGGEST_INDEX_FILE = "suggest.json"
+KINDS = ("country", "visa_type", "purpose")
+
+# The purposes offered by the frontend form, always suggested
+FORM_PURPOSES = ("Tourism", "Business", "Study", "Work", "Family Reunion", "Medical Treatment")
+# Words that name a purpose of travel; mined phrases end in one of them
+PURPOSE_NOUNS = (
+    "study", "studies", "work", "employment", "business", "tourism", "travel", "education", "training",
+    "research", "internship", "treatment", "reunion", "exchange", "visit", "vacation", "holiday",
+    "conference", "settlement"
+)
+_STOPWORDS = {
+    "a", "an", "and", "any", "as", "at", "be", "by", "for", "from", "in", "is", "may", "must", "not", "of",
+    "on", "or", "the", "their", "this", "to", "with", "who", "are", "has", "have", "if", "that", "your"
+}
+_PURPOSE_PHRASE = re.compile(r"\b((?:[a-z][a-z-]+ )?(?:%s))\b" % "|".join(PURPOSE_NOUNS))
+
+
+def normalize(text: str) -> str:
+    """Lower-case, with every run of non-alphanumerics as one space"""
+    return " ".join(re.findall(r"[a-z0-9]+", text.lower()))
+
+
+def visa_type_label(visa_type: str) -> str:
+    """Readable label of a catalog visa type ("EUBlueCard" -> "EU Blue Card")"""
+    return re.sub(r"(?<=[a-z])(?=[A-Z0-9])|(?<=[A-Z])(?=[A-Z][a-z])", " ", visa_type)
+
+
+def mine_purpose_phrases(texts: List[str], min_count: int = 3, limit: int = 200) -> Counter:
+    """
+    Count purpose nouns and their modifiers ("study", "higher education")
+
+    A leading stopword is trimmed; phrases seen fewer than min_count times are dropped.
+    """
+    counts: Counter = Counter()
+    for text in texts:
+        for match in _PURPOSE_PHRASE.finditer(text.lower()):
+            words = match.group(1).split()
+            if len(words) > 1 and words[0] in _STOPWORDS:
+                words.pop(0)
+            counts[" ".join(words)] += 1
+    return Counter({phrase: count for phrase, count in counts.most_common(limit) if count >= min_count})
+
+
+def build_suggestions(clean_dir: str = "data/clean") -> List[dict]:
+    """Suggestion entries for the clean corpus: {"kind", "value", "label", "country", "weight"}"""
+    catalog = load_catalog(clean_dir)
+    entries = []
+    documents = Counter(entry.country for entry in catalog)
+    for country, count in sorted(documents.items()):
+        aliases = sorted(alias for alias, target in COUNTRY_ALIASES.items() if target == country)
+        entries.append({"kind": "country", "value": country, "label": country, "country": None,
+                        "weight": count, "aliases": aliases})
+    for country, visa_type in sorted({(e.country, e.visa_type) for e in catalog}):
+        entries.append({"kind": "visa_type", "value": visa_type, "label": visa_type_label(visa_type),
+                        "country": country, "weight": 1, "aliases": []})
+
+    texts = []
+    for entry in catalog:
+        with open(os.path.join(clean_dir, entry.filename), "r", encoding="utf-8") as f:
+            texts.append(f.read())
+    phrases = mine_purpose_phrases(texts)
+    form = {normalize(purpose): purpose for purpose in FORM_PURPOSES}
+    top = max(phrases.values(), default=1)
+    for purpose in FORM_PURPOSES:
+        entries.append({"kind": "purpose", "value": purpose, "label": purpose, "country": None,
+                        "weight": top + phrases.get(normalize(purpose), 0), "aliases": []})
+    for phrase, count in phrases.items():
+        if normalize(phrase) not in form:
+            label = phrase[0].upper() + phrase[1:]
+            entries.append({"kind": "purpose", "value": label, "label": label, "country": None,
+                            "weight": count, "aliases": []})
+    return entries
+
+
+def write_suggest_index(persist_dir: str, clean_dir: str = "data/clean") -> int:
+    """
+    Write the suggestion entries of a build
+
+    Returns:
+        Number of entries written
+    """
+    entries = build_suggestions(clean_dir)
+    with open(os.path.join(persist_dir, SUGGEST_INDEX_FILE), "w", encoding="utf-8") as f:
+        json.dump({"entries": entries}, f, ensure_ascii=False)
+    return len(entries)
+
+
+class QueryPopularity:
+    """Thread-safe counts of the values clients submitted, per kind"""
+
+    def __init__(self):
+        self._counts: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, kind: str, value: Optional[str]):
+        if value and value.strip():
+            with self._lock:
+                self._counts[(kind, normalize(value))] += 1
+
+    def get(self, kind: str, value: str) -> int:
+        return self._counts.get((kind, normalize(value)), 0)
+
+    def top(self, limit: int = 10) -> List[dict]:
+        with self._lock:
+            common = self._counts.most_common(limit)
+        return [{"kind": kind, "value": value, "count": count} for (kind, value), count in common]
+
+
+class SuggestIndex:
+    """Sorted-array prefix index over suggestion entries"""
+
+    def __init__(self, entries: List[dict]):
+        self.entries = entries
+        keys = set()
+        for i, entry in enumerate(entries):
+            for text in [entry["label"], entry["value"], *entry.get("aliases", [])]:
+                words = normalize(text).split()
+                for start in range(len(words)):
+                    keys.add((" ".join(words[start:]), i, start == 0))
+                if words:
+                    keys.add(("".join(words), i, True))
+        ordered = sorted(keys)
+        self._keys = [key for key, _, _ in ordered]
+        self._targets = [(i, at_start) for _, i, at_start in ordered]
+
+    @classmethod
+    def load(cls, persist_dir: str, clean_dir: str = "data/clean") -> "SuggestIndex":
+        """The suggestion index of a build (built from clean_dir for older builds)"""
+        path = os.path.join(persist_dir, SUGGEST_INDEX_FILE)
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                return cls(json.load(f)["entries"])
+        return cls(build_suggestions(clean_dir))
+
+    def suggest(self, prefix: str, kind: Optional[str] = None, country: Optional[str] = None, limit: int = 8,
+                popularity: Optional[QueryPopularity] = None) -> List[dict]:
+        """
+        Entries with a word starting with prefix, best first
+
+        Args:
+            prefix: What the user has typed so far
+            kind: Only "country", "visa_type" or "purpose" entries
+            country: Only visa types of this country (case-insensitive)
+            limit: Maximum number of suggestions
+            popularity: Query counts used as the primary ranking signal
+
+        Returns:
+            {"kind", "value", "label", "country"} dicts
+        """
+        key = normalize(prefix)
+        low = bisect.bisect_left(self._keys, key)
+        high = bisect.bisect_right(self._keys, key + "￿") if key else len(self._keys)
+        country = COUNTRY_ALIASES.get(country.strip().lower(), country).lower() if country else None
+
+        matches: Dict[int, bool] = {}
+        for i, at_start in self._targets[low:high]:
+            entry = self.entries[i]
+            if kind and entry["kind"] != kind:
+                continue
+            if country and (entry["country"] or "").lower() != country:
+                continue
+            matches[i] = matches.get(i, False) or at_start
+
+        def rank(i):
+            entry = self.entries[i]
+            asked = popularity.get(entry["kind"], entry["value"]) if popularity else 0
+            return -asked, not matches[i], -entry["weight"], len(entry["label"]), entry["label"]
+
+        return [
+            {key: self.entries[i][key] for key in ("kind", "value", "label", "country")}
+            for i in sorted(matches, key=rank)[:limit]
+        ]
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self.entries),
+            "keys": len(self._keys),
+            **{kind: sum(1 for e in self.entries if e["kind"] == kind) for kind in KINDS}
+        }
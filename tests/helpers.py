@@ -0,0 +1,39 @@
+"""
+Test Helpers
+Shared fakes for SwiftVisa tests
+"""
+
+import hashlib
+import re
+
+
+class WordEmbeddings:
+    """Bag-of-words hashing embeddings, deterministic and offline; counts calls"""
+
+    def __init__(self):
+        self.document_calls = 0
+        self.embedded = 0
+
+    def _embed(self, text):
+        vector = [0.0] * 64
+        for word in re.findall(r"\w+", text.lower()):
+            vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % 64] += 1.0
+        return vector
+
+    def embed_documents(self, texts):
+        self.document_calls += 1
+        self.embedded += len(texts)
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+
+class FakeClock:
+    """Clock for TTL and rate-limit tests, advanced by hand"""
+
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
@@ -0,0 +1,110 @@
+"""
+Answer Chain Tests
+Tests for chain mode selection and the concurrent map-reduce answer
+"""
+
+import pytest
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from langchain_core.documents import Document
+from langchain_core.language_models.chat_models import SimpleChatModel
+
+from answer_chain import map_reduce_answer, map_reduce_events, select_chain_mode
+
+
+class SlowChatModel(SimpleChatModel):
+    """Replies after a delay: the excerpt's first line per map call, the extracts per reduce call"""
+
+    delay: float = 0.2
+    calls: list = []
+    in_flight: int = 0
+    peak: int = 0
+    lock: object = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "slow-fake"
+
+    def _call(self, messages, stop=None, run_manager=None, **kwargs) -> str:
+        prompt = messages[-1].content
+        with self.lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+            self.calls.append(kwargs)
+        time.sleep(self.delay)
+        with self.lock:
+            self.in_flight -= 1
+        if prompt.startswith("Answer the question"):
+            return "FINAL " + prompt.split("Extracts:\n", 1)[1].replace("\n", " | ")
+        excerpt = prompt.split("):\n", 1)[1]
+        return "NONE" if "unrelated" in excerpt else excerpt.splitlines()[0]
+
+
+def slow_model(delay=0.2):
+    return SlowChatModel(delay=delay, calls=[], lock=threading.Lock())
+
+
+def chunks(count, words=50):
+    return [
+        Document(page_content=f"Rule {i}: applicants must show funds. " + "detail " * words,
+                 metadata={"source": f"doc{i}.txt"})
+        for i in range(count)
+    ]
+
+
+class TestModeSelection:
+    """Test stuff vs map-reduce is chosen by assembled token count"""
+
+    def test_auto_by_tokens(self):
+        """Test auto switches to map_reduce above the threshold"""
+        assert select_chain_mode("auto", "q", chunks(2, words=10), 1000) == "stuff"
+        assert select_chain_mode("auto", "q", chunks(8, words=200), 1000) == "map_reduce"
+
+    def test_single_chunk_stays_stuff(self):
+        """Test one chunk never needs a reduce step"""
+        assert select_chain_mode("auto", "q", chunks(1, words=5000), 1000) == "stuff"
+
+    def test_explicit_and_invalid(self):
+        """Test explicit modes are kept and unknown modes rejected"""
+        assert select_chain_mode("map_reduce", "q", chunks(1), 10 ** 6) == "map_reduce"
+        with pytest.raises(ValueError):
+            select_chain_mode("refine", "q", chunks(1), 1000)
+
+
+class TestMapReduce:
+    """Test the concurrent map step and the reduce step"""
+
+    def test_concurrency_cap(self):
+        """Test map calls overlap but never exceed max_concurrency"""
+        llm = slow_model(0.1)
+        map_reduce_answer(llm, "q", chunks(8), max_concurrency=3)
+        assert llm.peak == 3
+        assert len(llm.calls) == 9
+        assert llm.calls[0] == {"max_tokens": 256}
+
+    def test_wall_clock_flat(self):
+        """Test 8 chunks take about as long as 2 with enough concurrency"""
+        started = time.perf_counter()
+        map_reduce_answer(slow_model(0.2), "q", chunks(8, words=400), max_concurrency=8)
+        assert time.perf_counter() - started < 0.8
+
+    def test_streams_partials_then_answer(self):
+        """Test irrelevant chunks are dropped and extracts are reduced in rank order"""
+        docs = chunks(3)
+        docs[1] = Document(page_content="unrelated text", metadata={"source": "other.txt"})
+        events = list(map_reduce_events(slow_model(0.01), "q", docs))
+        partials = [e for e in events if e["event"] == "partial"]
+        assert sorted(e["index"] for e in partials) == [0, 2]
+        assert events[-1]["event"] == "answer"
+        assert events[-1]["extracts"] == 2
+        assert events[-1]["text"].startswith("FINAL [1] Rule 0")
+        assert "[2] Rule 2" in events[-1]["text"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -3,7 +3,9 @@ API Endpoint Tests
 Tests for all FastAPI endpoints in main.py
 """
 
+import json
 import pytest
+import time
 from fastapi.testclient import TestClient
 import sys
 from pathlib import Path
@@ -48,6 +50,15 @@ class TestHealthEndpoints:
         assert "embedding_model" in data
         assert data["api_version"] == "1.0.0"
 
+    def test_stats_reports_configured_model(self, monkeypatch):
+        """Test /stats names the configured embedding model"""
+        import main
+
+        monkeypatch.setattr(main.settings, "EMBEDDING_MODEL", "paraphrase-MiniLM-L3-v2")
+        data = client.get("/stats").json()
+        assert data["embedding_model"] == "paraphrase-MiniLM-L3-v2"
+        assert data["gemini_available"] is False
+
 
 class TestCountryEndpoints:
     """Test country and visa type endpoints"""
@@ -71,6 +82,17 @@ class TestCountryEndpoints:
         assert data["country"] == "Canada"
         assert isinstance(data["visa_types"], list)
 
+    def test_suggest(self):
+        """Test typeahead suggestions for a prefix"""
+        response = client.get("/suggest", params={"q": "can", "kind": "country"})
+        assert response.status_code == 200
+        assert response.json()["suggestions"][0]["value"] == "Canada"
+
+    def test_suggest_invalid_kind(self):
+        """Test unknown suggestion kinds are rejected"""
+        response = client.get("/suggest", params={"q": "a", "kind": "airport"})
+        assert response.status_code == 400
+
 
 class TestEligibilityEndpoint:
     """Test visa eligibility checking endpoint"""
@@ -107,6 +129,71 @@ class TestEligibilityEndpoint:
         # Should still process or return proper error
         assert response.status_code in [200, 422]
 
+    def test_check_eligibility_stream(self, sample_visa_request):
+        """Test the streamed check ends with an answer event"""
+        response = client.post("/check-eligibility/stream", json=sample_visa_request)
+        assert response.status_code == 200
+        events = [json.loads(line) for line in response.text.splitlines()]
+        assert events[0]["event"] == "sources"
+        assert events[-1]["event"] == "answer"
+        assert events[-1]["provider"]
+
+    def test_check_eligibility_stream_traced_to_the_end(self, sample_visa_request, monkeypatch):
+        """Test a streamed check is traced until its body is sent, LLM stage included"""
+        import main
+        from request_trace import SlowRequestLog
+        from stub_llm import StubChatModel
+        slow_log = SlowRequestLog(threshold_ms=0)
+        monkeypatch.setattr(main, "slow_request_log", slow_log)
+        monkeypatch.setattr(main, "USE_LLM", True)
+        monkeypatch.setattr(main, "create_llm", lambda: StubChatModel(latency_ms=50))
+        response = client.post("/check-eligibility/stream", params={"chain_mode": "stuff"},
+                               json=sample_visa_request)
+        assert json.loads(response.text.splitlines()[-1])["event"] == "answer"
+        trace = slow_log.query(path="/check-eligibility/stream")[0]
+        assert trace["stages_ms"]["llm"] >= 50
+        assert trace["duration_ms"] >= trace["stages_ms"]["llm"]
+
+    def test_check_eligibility_stream_invalid_mode(self, sample_visa_request):
+        """Test unknown chain modes are rejected"""
+        response = client.post("/check-eligibility/stream", params={"chain_mode": "refine"},
+                               json=sample_visa_request)
+        assert response.status_code == 400
+
+    def test_prefetch_then_stream(self, sample_visa_request):
+        """Test a prefetched destination/purpose is answered from the pool"""
+        import main
+        headers = {"X-Client-Id": "prefetch-test"}
+        body = {"destinationCountry": "canada", "purposeOfVisit": "Study"}
+        response = client.post("/prefetch", json=body, headers=headers)
+        assert response.status_code == 202
+        assert response.json()["status"] in ("scheduled", "cached", "pending")
+        assert response.json()["destination"] == "Canada"
+        for _ in range(600):
+            if not main.prefetch_cache.inflight():
+                break
+            time.sleep(0.1)
+        response = client.post("/check-eligibility/stream", json=sample_visa_request)
+        events = [json.loads(line) for line in response.text.splitlines()]
+        assert events[0]["prefetched"] is True
+
+    def test_prefetch_limits(self):
+        """Test unknown destinations are ignored and clients are rate limited"""
+        headers = {"X-Client-Id": "prefetch-limit-test"}
+        statuses = [client.post("/prefetch", json={"destinationCountry": "Atlantis"}, headers=headers)
+                    for _ in range(10)]
+        assert statuses[0].json()["status"] == "unknown_destination"
+        assert statuses[-1].status_code == 429
+        assert "Retry-After" in statuses[-1].headers
+
+    def test_retrieval_overrides(self, sample_visa_request):
+        """Test per-request retrieval parameters are applied and limited"""
+        response = client.post("/check-eligibility/stream", params={"k": 2, "search_type": "mmr"},
+                               json=sample_visa_request)
+        assert len(json.loads(response.text.splitlines()[0])["sources"]) == 2
+        response = client.post("/check-eligibility", params={"k": 500}, json=sample_visa_request)
+        assert response.status_code == 400
+
 
 class TestVectorStoreEndpoints:
     """Test vector store query endpoints"""
@@ -163,6 +250,39 @@ class TestVisaRequirementsEndpoint:
         assert data["destination"] == "Canada"
         assert data["visa_type"] == "StudyPermit"
     
+    def test_precomputed_requirements_follow_parameters(self, tmp_path, monkeypatch):
+        """Test precomputed answers are served only with the parameters they were built with"""
+        import threading
+        import main
+        from materialize import open_answer_store, requirements_key, write_answer_store
+
+        path = str(tmp_path / "answers.kv")
+        fingerprint = main.live_index.current.fingerprint
+        defaults = main.retrieval_tuner.defaults
+        write_answer_store(path, {requirements_key("Canada", "StudyPermit"): {"precomputed": True}}, fingerprint,
+                           retrieval_params=defaults.to_dict())
+        monkeypatch.setattr(main, "answer_store", open_answer_store(path, fingerprint))
+        monkeypatch.setattr(main.retrieval_tuner, "defaults", defaults)
+        rebuilt = threading.Event()
+        monkeypatch.setattr(main, "_rebuild_answer_store_in_background", rebuilt.set)
+        monkeypatch.setattr(main.settings, "ENABLE_ANSWER_STORE", True)
+        monkeypatch.setattr(main.settings, "MATERIALIZE_ON_INDEX_CHANGE", True)
+        monkeypatch.setattr(main.settings, "ADMIN_TOKEN", "test-admin-token")
+
+        def served(**params):
+            response = client.get("/visa-requirements/Canada/StudyPermit", params=params)
+            return response.json().get("precomputed") is True
+
+        assert served()
+        assert served(requirements_k=defaults.requirements_k)
+        assert not served(requirements_k=defaults.requirements_k + 1)
+
+        response = client.put("/admin/retrieval", headers={"X-Admin-Token": "test-admin-token"},
+                              json={"defaults": {"requirements_k": defaults.requirements_k + 1}})
+        assert response.status_code == 200
+        assert not served()
+        assert rebuilt.wait(5)
+
     def test_get_visa_requirements_not_found(self):
         """Test getting requirements for non-existent visa type"""
         response = client.get("/visa-requirements/FakeCountry/FakeVisa")
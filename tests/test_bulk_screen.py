@@ -0,0 +1,103 @@
+"""
+Bulk Screening Tests
+Tests for resumable output, record keys and the retrieval workers of scripts/bulk_screen.py
+"""
+
+import json
+import os
+import pytest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+pytest.importorskip("langchain_chroma")
+
+import bulk_screen
+from bulk_screen import batched, iter_records, load_done_keys, search_batch
+from index_pack import PACK_FILE, export_pack
+from snapshots import build_vectorstore
+from tests.helpers import WordEmbeddings
+
+
+@pytest.fixture(scope="module")
+def index_dirs(tmp_path_factory):
+    """One small build with every backend's files, and a pack of it"""
+    root = tmp_path_factory.mktemp("bulk")
+    clean = root / "clean"
+    clean.mkdir()
+    files = {
+        "Canada_Canada_StudyPermit_EligibilityOnly.txt": "canada study permit tuition proof of funds",
+        "Canada_Canada_WorkPermit_EligibilityOnly.txt": "canada work permit employer job offer",
+        "UK_UK_StudentVisa_EligibilityOnly.txt": "uk student visa cas tuition english test",
+        "US_US_H1B_Eligibility.txt": "us h1b specialty occupation employer petition",
+    }
+    for name, text in files.items():
+        (clean / name).write_text(text, encoding="utf-8")
+    persist_dir = str(root / "index")
+    build_vectorstore(persist_dir, WordEmbeddings(), str(clean), quantize=True, shard=True)
+    pack_dir = root / "pack"
+    pack_dir.mkdir()
+    export_pack(persist_dir, str(pack_dir / PACK_FILE))
+    return {"index": persist_dir, "pack": str(pack_dir)}
+
+
+class TestResume:
+    """Test a rerun skips finished applicants and survives a torn write"""
+
+    def test_torn_last_line(self, tmp_path):
+        """Test a half-written final line is dropped from the file and not counted as done"""
+        output = tmp_path / "screened.jsonl"
+        lines = [json.dumps({"key": "a", "eligibility": "..."}), json.dumps({"key": "b", "eligibility": "..."})]
+        output.write_text("\n".join(lines) + '\n{"key": "c", "eligi', encoding="utf-8")
+        assert load_done_keys(str(output)) == {"a", "b"}
+        assert output.read_text(encoding="utf-8") == "\n".join(lines) + "\n"
+
+    def test_missing_output(self, tmp_path):
+        """Test a first run starts from nothing"""
+        assert load_done_keys(str(tmp_path / "new.jsonl")) == set()
+
+    def test_record_keys(self, tmp_path):
+        """Test ids are used when present and row keys are stable between runs"""
+        path = tmp_path / "applicants.csv"
+        path.write_text("id,destinationCountry\n7,Canada\n,UK\n", encoding="utf-8")
+        first = [key for key, _ in iter_records(str(path))]
+        assert first[0] == "7" and first[1].startswith("row-2-")
+        assert [key for key, _ in iter_records(str(path))] == first
+
+    def test_batched(self):
+        """Test batches are full except the last"""
+        assert list(batched(range(5), 2)) == [[0, 1], [2, 3], [4]]
+
+
+class TestSearchWorkers:
+    """Test each backend answers a batch of vectors in order"""
+
+    @pytest.mark.parametrize("backend", ["chroma", "readonly", "quantized", "sharded", "pack"])
+    def test_search_batch(self, index_dirs, backend):
+        """Test results come back per query, best hit first, with the destination routed"""
+        path = index_dirs["pack"] if backend == "pack" else index_dirs["index"]
+        bulk_screen._init_worker(path, backend, "int8", 4, 50)
+        embeddings = WordEmbeddings()
+        queries = ["canada study tuition funds", "us h1b specialty occupation"]
+        results, seconds = search_batch(embeddings.embed_documents(queries), ["Canada", "US"], k=2)
+        assert len(results) == 2 and seconds >= 0
+        top = [hits[0][0].page_content for hits in results]
+        assert top == ["canada study permit tuition proof of funds", "us h1b specialty occupation employer petition"]
+        # Routed to the destination's shard, the US query only sees the one US document
+        assert [len(hits) for hits in results] == ([2, 1] if backend == "sharded" else [2, 2])
+
+    def test_pack_directory_left_untouched(self, index_dirs):
+        """Test opening an installed pack does not create a Chroma database next to it"""
+        bulk_screen._init_worker(index_dirs["pack"], "pack", "int8", 4, 50)
+        assert os.listdir(index_dirs["pack"]) == [PACK_FILE]
+
+    def test_unknown_backend(self, index_dirs):
+        """Test an unknown backend is refused instead of opened as Chroma"""
+        with pytest.raises(ValueError):
+            bulk_screen._init_worker(index_dirs["pack"], "hnswlib", "int8", 4, 50)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,91 @@
+"""
+Chunk Store Tests
+Tests for the memory-mapped chunk store and search cursors
+"""
+
+import pytest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from chunk_store import (
+    decode_cursor,
+    encode_cursor,
+    open_chunk_store,
+    parse_byte_range,
+    write_chunk_store,
+)
+
+
+class TestChunkStore:
+    """Test writing and reading chunk contents"""
+
+    def test_round_trip(self, tmp_path):
+        """Test every chunk is readable by id"""
+        texts = {f"id-{i}": f"Policy text {i} — visa requirements" * (i + 1) for i in range(50)}
+        assert write_chunk_store(str(tmp_path), list(texts), list(texts.values())) == 50
+
+        store = open_chunk_store(str(tmp_path))
+        assert len(store) == 50
+        for chunk_id, text in texts.items():
+            assert store.read(chunk_id).decode("utf-8") == text
+            assert store.length(chunk_id) == len(text.encode("utf-8"))
+        assert store.read("missing") is None
+        assert "missing" not in store
+
+    def test_byte_range(self, tmp_path):
+        """Test partial reads are clamped to the chunk"""
+        write_chunk_store(str(tmp_path), ["a", "b"], ["0123456789", "abcdef"])
+        store = open_chunk_store(str(tmp_path))
+        assert store.read("a", 2, 5) == b"234"
+        assert store.read("b", 4) == b"ef"
+        assert store.read("b", 4, 100) == b"ef"
+        assert store.read("b", 10) == b""
+
+    def test_missing_store(self, tmp_path):
+        """Test builds without a chunk store"""
+        assert open_chunk_store(str(tmp_path)) is None
+
+
+class TestByteRange:
+    """Test HTTP Range header parsing"""
+
+    @pytest.mark.parametrize("header, expected", [
+        ("bytes=0-9", (0, 10)),
+        ("bytes=5-", (5, 100)),
+        ("bytes=-10", (90, 100)),
+        ("bytes=90-500", (90, 100)),
+    ])
+    def test_valid_ranges(self, header, expected):
+        """Test satisfiable ranges"""
+        assert parse_byte_range(header, 100) == expected
+
+    @pytest.mark.parametrize("header", ["bytes=100-", "items=0-1", "bytes=0-1,4-5", "bytes=-"])
+    def test_invalid_ranges(self, header):
+        """Test malformed and unsatisfiable ranges"""
+        with pytest.raises(ValueError):
+            parse_byte_range(header, 100)
+
+
+class TestSearchCursor:
+    """Test pagination cursors"""
+
+    def test_round_trip(self):
+        """Test the offset survives encoding"""
+        cursor = encode_cursor("canada study", 20, "build-1")
+        assert decode_cursor(cursor, "canada study", "build-1") == 20
+
+    def test_rejects_other_query_or_index(self):
+        """Test cursors are bound to their query and index version"""
+        cursor = encode_cursor("canada study", 20, "build-1")
+        with pytest.raises(ValueError):
+            decode_cursor(cursor, "germany work", "build-1")
+        with pytest.raises(ValueError):
+            decode_cursor(cursor, "canada study", "build-2")
+        with pytest.raises(ValueError):
+            decode_cursor("not-a-cursor", "canada study", "build-1")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,74 @@
+"""
+Near-Duplicate Detection Tests
+Tests for MinHash/LSH deduplication at ingestion
+"""
+
+import pytest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dedup import MinHasher, collapse_documents, find_near_duplicates, mark_duplicate_chunks, shingles
+
+POLICY = (
+    "Basic Eligibility Requirements - The petitioner must be either a U.S. citizen or a lawful permanent "
+    "resident and must be able to prove a valid parent-child relationship through birth or adoption records. "
+    "Key Documents Required - Form I-130, Petition for Alien Relative, Form I-864, Affidavit of Support with "
+    "financial documents such as tax returns and W-2s, and civil documents including police certificates."
+)
+EDITED = POLICY.replace("tax returns and W-2s", "tax returns, W-2s") + " Processing may take several months."
+UNRELATED = (
+    "The applicant must be aged 18 years or older and must hold a recognised university degree. "
+    "A job offer with a salary above the general threshold is required for the skilled worker route."
+)
+
+
+class TestDetection:
+    """Test MinHash/LSH grouping"""
+
+    def test_near_copy_grouped(self):
+        """Test a lightly edited copy is found and unrelated text is not"""
+        assert find_near_duplicates([POLICY, UNRELATED, EDITED], threshold=0.7) == [[0, 2]]
+
+    def test_threshold(self):
+        """Test groups require the Jaccard similarity to reach the threshold"""
+        assert find_near_duplicates([POLICY, EDITED], threshold=0.99) == []
+
+    def test_signatures_deterministic(self):
+        """Test the same text always gets the same signature"""
+        first = MinHasher().signature(shingles(POLICY))
+        assert (MinHasher().signature(shingles(POLICY)) == first).all()
+
+
+class TestCollapse:
+    """Test document and chunk collapsing"""
+
+    def test_collapse_documents(self):
+        """Test the longest copy is kept and empty documents are dropped"""
+        kept, report = collapse_documents(
+            [("a.txt", POLICY), ("b.txt", UNRELATED), ("c.txt", EDITED), ("empty.txt", "  ")], threshold=0.7
+        )
+        assert [(d["source"], d["duplicates"]) for d in kept] == [("b.txt", []), ("c.txt", ["a.txt"])]
+        assert report["empty_documents"] == ["empty.txt"]
+        assert report["clusters"] == [{"kept": "c.txt", "collapsed": ["a.txt"]}]
+
+    def test_disabled(self):
+        """Test a threshold of 0 keeps every non-empty document"""
+        kept, _ = collapse_documents([("a.txt", POLICY), ("c.txt", POLICY)], threshold=0)
+        assert len(kept) == 2
+
+    def test_mark_duplicate_chunks(self):
+        """Test later near-identical chunks point at the first one"""
+        chunks = [
+            {"chunk_id": "a_chunk0", "content": POLICY},
+            {"chunk_id": "b_chunk0", "content": UNRELATED},
+            {"chunk_id": "c_chunk0", "content": POLICY},
+        ]
+        assert mark_duplicate_chunks(chunks) == 1
+        assert chunks[2]["duplicate_of"] == "a_chunk0"
+        assert "duplicate_of" not in chunks[0]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
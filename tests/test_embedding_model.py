@@ -0,0 +1,59 @@
+"""
+Embedding Model Tests
+Tests for packaged (offline) embedding model directories
+"""
+
+import pytest
+import hashlib
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from embedding_model import MODEL_MANIFEST, ModelBundleError, load_embeddings, read_model_manifest, verify_model_dir
+
+
+@pytest.fixture
+def model_dir(tmp_path):
+    path = tmp_path / "model"
+    (path / "1_Pooling").mkdir(parents=True)
+    files = {"config.json": b"{}", "tokenizer.json": b'{"model": {}}', "1_Pooling/config.json": b"{}"}
+    for name, data in files.items():
+        (path / name).write_bytes(data)
+    manifest = {
+        "model_name": "all-MiniLM-L6-v2",
+        "dimension": 384,
+        "files": {name: hashlib.sha256(data).hexdigest() for name, data in files.items()}
+    }
+    (path / MODEL_MANIFEST).write_text(json.dumps(manifest), encoding="utf-8")
+    return path
+
+
+class TestModelBundle:
+    """Test packaged model validation"""
+
+    def test_verify_intact(self, model_dir):
+        """Test an untouched directory matches its manifest"""
+        assert verify_model_dir(str(model_dir))["dimension"] == 384
+
+    def test_verify_detects_changes(self, model_dir):
+        """Test missing or modified files are reported"""
+        (model_dir / "tokenizer.json").write_bytes(b"{}")
+        (model_dir / "1_Pooling" / "config.json").unlink()
+        with pytest.raises(ModelBundleError, match="missing: 1_Pooling/config.json; changed: tokenizer.json"):
+            verify_model_dir(str(model_dir))
+
+    def test_missing_manifest(self, tmp_path):
+        """Test a directory that was never packaged is rejected"""
+        with pytest.raises(ModelBundleError, match="package_model.py"):
+            read_model_manifest(str(tmp_path))
+
+    def test_model_name_mismatch(self, model_dir):
+        """Test a bundle of a different model is refused before loading"""
+        with pytest.raises(ModelBundleError, match="would not match"):
+            load_embeddings("paraphrase-MiniLM-L3-v2", str(model_dir))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,111 @@
+"""
+Extractive Answer Tests
+Tests for sentence splitting, the sentence index and sentence ranking
+"""
+
+import pytest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from langchain_core.documents import Document
+
+from extractive import (
+    SentenceHit,
+    SentenceIndex,
+    format_extractive_answer,
+    rank_sentences,
+    split_sentences,
+    write_sentence_index,
+)
+from tests.helpers import WordEmbeddings
+
+
+DOCS = [
+    Document(
+        id="study",
+        page_content="Study Permit\n - Applicants must show proof of funds for tuition and living costs. "
+                     "A letter of acceptance from a designated learning institution is required.\n"
+                     " - Biometrics must be provided at a visa application centre.",
+        metadata={"source": "Canada_Canada_StudyPermit_EligibilityOnly.txt"}
+    ),
+    Document(
+        id="work",
+        page_content="Work Permit\n Applicants need a valid job offer from a Canadian employer. "
+                     "Biometrics must be provided at a visa application centre.",
+        metadata={"source": "Canada_Canada_WorkPermit_EligibilityOnly.txt"}
+    ),
+]
+
+
+class TestSplitSentences:
+    """Test policy text is split into citable sentences"""
+
+    def test_split(self):
+        """Test bullets are stripped and short headings dropped"""
+        sentences = split_sentences(DOCS[0].page_content)
+        assert sentences == [
+            "Applicants must show proof of funds for tuition and living costs.",
+            "A letter of acceptance from a designated learning institution is required.",
+            "Biometrics must be provided at a visa application centre.",
+        ]
+
+
+class TestRankSentences:
+    """Test ranking with and without the precomputed index"""
+
+    @pytest.fixture
+    def sentence_index(self, tmp_path):
+        count = write_sentence_index(
+            str(tmp_path), [d.id for d in DOCS], [d.page_content for d in DOCS], [d.metadata for d in DOCS],
+            WordEmbeddings()
+        )
+        assert count == 5
+        return SentenceIndex.load(str(tmp_path))
+
+    def test_precomputed(self, sentence_index):
+        """Test the best sentence is found without embedding any sentence at query time"""
+        embeddings = WordEmbeddings()
+        query = embeddings.embed_query("proof of funds for tuition")
+        hits = rank_sentences(query, DOCS, sentence_index, embeddings, limit=2, min_score=0.0)
+        assert hits[0].text.startswith("Applicants must show proof of funds")
+        assert hits[0].source == "Canada_Canada_StudyPermit_EligibilityOnly.txt"
+        assert embeddings.embedded == 0
+
+    def test_repeats_removed(self, sentence_index):
+        """Test a sentence repeated across chunks is listed once"""
+        embeddings = WordEmbeddings()
+        query = embeddings.embed_query("biometrics visa application centre")
+        hits = rank_sentences(query, DOCS, sentence_index, limit=5, min_score=0.0)
+        assert [h.text for h in hits].count("Biometrics must be provided at a visa application centre.") == 1
+
+    def test_on_the_fly(self, sentence_index):
+        """Test chunks missing from the index are split and embedded at query time"""
+        embeddings = WordEmbeddings()
+        docs = [Document(id="other", page_content=DOCS[1].page_content, metadata=DOCS[1].metadata)]
+        hits = rank_sentences(embeddings.embed_query("job offer employer"), docs, sentence_index, embeddings)
+        assert hits[0].text == "Applicants need a valid job offer from a Canadian employer."
+        assert embeddings.embedded == 2
+
+    def test_min_score_keeps_best(self, sentence_index):
+        """Test weak matches are dropped but one sentence always remains"""
+        embeddings = WordEmbeddings()
+        hits = rank_sentences(embeddings.embed_query("zzz"), DOCS, sentence_index, min_score=0.99)
+        assert len(hits) == 1
+
+
+class TestFormat:
+    """Test the answer lists sentences with numbered citations"""
+
+    def test_citations(self):
+        """Test each source gets one citation number"""
+        answer = format_extractive_answer([
+            SentenceHit("First.", "a.txt", 0.9), SentenceHit("Second.", "b.txt", 0.8), SentenceHit("Third.", "a.txt", 0.7)
+        ])
+        assert "• First. [1]" in answer and "• Second. [2]" in answer and "• Third. [1]" in answer
+        assert "[1] a.txt" in answer and "[2] b.txt" in answer
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,79 @@
+"""
+HNSW Configuration Tests
+Tests for Chroma HNSW parameter handling and tuned configuration files
+"""
+
+import pytest
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from hnsw_config import apply_search_ef, current_search_ef, hnsw_collection_metadata, write_tuned_config
+
+
+class LegacyCollection:
+    """Collection without the configuration API (chromadb < 0.6)"""
+
+    def __init__(self, metadata):
+        self.metadata = metadata
+
+    def modify(self, metadata=None):
+        self.metadata = metadata
+
+
+class TestHnswMetadata:
+    """Test build-time collection metadata"""
+
+    def test_metadata_keys(self):
+        """Test parameters map to Chroma's hnsw: keys"""
+        metadata = hnsw_collection_metadata("cosine", 32, 200, 50)
+        assert metadata == {
+            "hnsw:space": "cosine",
+            "hnsw:M": 32,
+            "hnsw:construction_ef": 200,
+            "hnsw:search_ef": 50
+        }
+
+    def test_invalid_space(self):
+        """Test unsupported distance spaces are rejected"""
+        with pytest.raises(ValueError):
+            hnsw_collection_metadata("manhattan")
+
+
+class TestSearchEf:
+    """Test query-time search_ef changes"""
+
+    def test_legacy_metadata_fallback(self):
+        """Test search_ef is written to metadata on old chromadb versions"""
+        collection = LegacyCollection({"hnsw:space": "l2", "hnsw:search_ef": 10})
+        assert apply_search_ef(collection, 64) is True
+        assert collection.metadata == {"hnsw:space": "l2", "hnsw:search_ef": 64}
+        assert current_search_ef(collection) == 64
+        assert apply_search_ef(collection, 64) is False
+
+    def test_chromadb_collection(self, tmp_path):
+        """Test search_ef is applied to a real collection"""
+        chromadb = pytest.importorskip("chromadb")
+        client = chromadb.PersistentClient(path=str(tmp_path))
+        collection = client.create_collection("test", metadata=hnsw_collection_metadata(search_ef=10))
+        assert current_search_ef(collection) == 10
+        apply_search_ef(collection, 80)
+        assert current_search_ef(client.get_collection("test")) == 80
+
+
+class TestTunedConfig:
+    """Test the tuned configuration file"""
+
+    def test_write_tuned_config(self, tmp_path):
+        """Test the file uses the keys Settings reads"""
+        path = tmp_path / "hnsw_config.json"
+        write_tuned_config(str(path), "l2", 8, 100, 20, recall=0.97)
+        config = json.loads(path.read_text())
+        assert [config[key] for key in ("space", "M", "construction_ef", "search_ef")] == ["l2", 8, 100, 20]
+        assert config["recall"] == 0.97
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,117 @@
+"""
+Index Pack Tests
+Tests for writing, opening, verifying and installing single-file index packs
+"""
+
+import json
+import numpy as np
+import pytest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from index_pack import PACK_FILE, IndexPack, IndexPackError, install_pack, write_pack
+from materialize import BUILD_INFO_FILE
+from rules_engine import RULES_FILE
+
+
+def pack_args():
+    rng = np.random.default_rng(0)
+    return {
+        "ids": ["a", "b", "c"],
+        "documents": ["Study permit: proof of funds.", "Visitor visa – 6 months.", None],
+        "metadatas": [{"source": "a.txt"}, {"source": "b.txt", "duplicates": "x.txt"}, {"source": "c.txt"}],
+        "vectors": rng.normal(size=(3, 8)).astype(np.float32),
+        "space": "l2",
+        "embedding_model": "all-MiniLM-L6-v2",
+        "build_info": {"build_id": "123", "created_at": "now", "documents": 3},
+        "files": {RULES_FILE: b'{"rules": []}'}
+    }
+
+
+class TestPackFormat:
+    """Test the file round-trips and is reproducible"""
+
+    def test_round_trip(self, tmp_path):
+        """Test vectors, texts and metadata come back unchanged"""
+        args = pack_args()
+        write_pack(str(tmp_path / PACK_FILE), **args)
+        pack = IndexPack(str(tmp_path / PACK_FILE), verify=True)
+        assert pack.ids == args["ids"]
+        assert pack.metadatas == args["metadatas"]
+        assert list(pack.texts) == ["Study permit: proof of funds.", "Visitor visa – 6 months.", ""]
+        np.testing.assert_array_equal(pack.vectors, args["vectors"])
+        assert not pack.vectors.flags.writeable
+        assert pack.manifest["build"] == {"documents": 3}
+        assert pack.files() == [RULES_FILE]
+
+    def test_sections_aligned(self, tmp_path):
+        """Test every section starts on a 64-byte boundary"""
+        write_pack(str(tmp_path / PACK_FILE), **pack_args())
+        pack = IndexPack(str(tmp_path / PACK_FILE))
+        assert all(entry["offset"] % 64 == 0 for entry in pack.manifest["sections"].values())
+
+    def test_reproducible(self, tmp_path):
+        """Test the same index always packs to the same bytes"""
+        first, second = tmp_path / "1.svpack", tmp_path / "2.svpack"
+        write_pack(str(first), **pack_args())
+        args = pack_args()
+        args["build_info"] = {**args["build_info"], "build_id": "456", "created_at": "later"}
+        write_pack(str(second), **args)
+        assert first.read_bytes() == second.read_bytes()
+
+    def test_corruption_detected(self, tmp_path):
+        """Test verification fails after a flipped byte and bad files are rejected"""
+        path = tmp_path / PACK_FILE
+        write_pack(str(path), **pack_args())
+        data = bytearray(path.read_bytes())
+        data[-70] ^= 0xFF
+        path.write_bytes(bytes(data))
+        with pytest.raises(IndexPackError):
+            IndexPack(str(path), verify=True)
+        (tmp_path / "other").write_bytes(b"not a pack" * 10)
+        with pytest.raises(IndexPackError):
+            IndexPack(str(tmp_path / "other"))
+
+
+class TestPackServing:
+    """Test the pack as a vector store, chunk store and installed snapshot"""
+
+    def test_search_and_chunks(self, tmp_path):
+        """Test exact search and byte-range chunk reads"""
+        args = pack_args()
+        write_pack(str(tmp_path / PACK_FILE), **args)
+        pack = IndexPack(str(tmp_path / PACK_FILE))
+        store = pack.vector_store(None)
+        doc, score = store.similarity_search_by_vector_with_score(args["vectors"][1].tolist(), k=1)[0]
+        assert doc.id == "b" and doc.metadata["duplicates"] == "x.txt"
+        assert score == pytest.approx(0.0, abs=1e-4)
+        chunks = pack.chunk_store()
+        assert chunks.read("a", 0, 5) == b"Study"
+        assert chunks.length("b") == len("Visitor visa – 6 months.".encode("utf-8"))
+        assert chunks.read("missing") is None
+
+    def test_install(self, tmp_path):
+        """Test install restores sidecar files and stamps a checksum build id"""
+        write_pack(str(tmp_path / "src.svpack"), **pack_args())
+        info = install_pack(str(tmp_path / "src.svpack"), str(tmp_path / "node"))
+        assert (tmp_path / "node" / PACK_FILE).read_bytes() == (tmp_path / "src.svpack").read_bytes()
+        assert (tmp_path / "node" / RULES_FILE).read_bytes() == b'{"rules": []}'
+        stored = json.loads((tmp_path / "node" / BUILD_INFO_FILE).read_text())
+        assert stored["build_id"] == info["build_id"] == "pack-" + IndexPack(str(tmp_path / "src.svpack")).checksum[:16]
+
+    @pytest.mark.parametrize("name", ["../../CURRENT", "/tmp/evil.json", "notes.txt"])
+    def test_install_rejects_unknown_files(self, tmp_path, name):
+        """Test a pack carrying a file outside the known sidecars installs nothing"""
+        args = pack_args()
+        args["files"][name] = b"overwritten"
+        write_pack(str(tmp_path / "src.svpack"), **args)
+        with pytest.raises(IndexPackError):
+            install_pack(str(tmp_path / "src.svpack"), str(tmp_path / "snapshots" / "node"))
+        assert not (tmp_path / "snapshots" / "node").exists()
+        assert not (tmp_path / "CURRENT").exists()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
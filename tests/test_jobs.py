@@ -0,0 +1,85 @@
+"""
+Job Queue Tests
+Tests for the bounded background job queue
+"""
+
+import pytest
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from jobs import JobQueue, QueueFull, validate_webhook_url
+
+
+def wait_for(queue, job_id, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job["status"] in ("done", "failed"):
+            return job
+        time.sleep(0.01)
+    raise AssertionError("job did not finish")
+
+
+class TestJobQueue:
+    """Test job execution, backlog limits and results"""
+
+    def test_result_is_kept(self):
+        """Test a finished job exposes its result"""
+        queue = JobQueue(workers=2)
+        job = queue.submit("test", lambda: {"status": "success"})
+        assert job["status"] == "queued"
+        finished = wait_for(queue, job["job_id"])
+        assert finished["status"] == "done"
+        assert finished["result"] == {"status": "success"}
+        assert queue.stats()["completed"] == 1
+
+    def test_failure_is_recorded(self):
+        """Test exceptions mark the job failed with the error message"""
+        queue = JobQueue(workers=1)
+
+        def boom():
+            raise RuntimeError("LLM unavailable")
+
+        finished = wait_for(queue, queue.submit("test", boom)["job_id"])
+        assert (finished["status"], finished["error"]) == ("failed", "LLM unavailable")
+
+    def test_backlog_is_bounded(self):
+        """Test submissions beyond max_pending are rejected until jobs finish"""
+        release = threading.Event()
+        queue = JobQueue(workers=1, max_pending=2)
+        first = queue.submit("test", lambda: release.wait(5))
+        second = queue.submit("test", lambda: release.wait(5))
+        with pytest.raises(QueueFull):
+            queue.submit("test", lambda: None)
+        assert queue.get(second["job_id"])["queue_position"] == 1
+        release.set()
+        wait_for(queue, first["job_id"])
+        wait_for(queue, second["job_id"])
+        queue.submit("test", lambda: None)
+        assert queue.stats()["rejected"] == 1
+
+    def test_unknown_job(self):
+        """Test unknown ids return None"""
+        assert JobQueue().get("missing") is None
+
+
+class TestWebhookValidation:
+    """Test callback URLs are limited to allowed hosts"""
+
+    def test_allowed_host(self):
+        """Test a local URL is accepted"""
+        validate_webhook_url("http://localhost:9000/done", ["localhost", "127.0.0.1"])
+
+    @pytest.mark.parametrize("url", ["http://10.0.0.5/hook", "file:///etc/passwd", "localhost:9000"])
+    def test_rejected(self, url):
+        """Test other hosts and schemes are rejected"""
+        with pytest.raises(ValueError):
+            validate_webhook_url(url, ["localhost", "127.0.0.1"])
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
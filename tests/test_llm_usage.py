@@ -0,0 +1,79 @@
+"""
+LLM Usage Accounting Tests
+Tests for token/cost aggregation, budgets and the metrics exposition
+"""
+
+import pytest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from llm_usage import UsageLedger, llm_cost
+
+
+class Day:
+    """Settable budget day"""
+
+    def __init__(self, value="2025-01-01"):
+        self.value = value
+
+    def __call__(self):
+        return self.value
+
+
+class TestAccounting:
+    """Test usage is aggregated by endpoint, provider and destination"""
+
+    def test_cost(self):
+        """Test cost uses separate prompt and completion prices"""
+        assert llm_cost(2000, 1000, 0.0005, 0.0015) == pytest.approx(0.0025)
+
+    def test_aggregation(self):
+        """Test calls roll up into each grouping"""
+        ledger = UsageLedger(0.0005, 0.0015)
+        ledger.record("/check-eligibility", "openai", "Canada", "a", 1000, 200, 1.5)
+        ledger.record("/check-eligibility", "openai", "UK", "b", 500, 100, 0.5)
+        ledger.record("/analyze-profile", "openai", "Canada", "a", 1500, 300, 2.0)
+        snapshot = ledger.snapshot()
+        assert snapshot["by_endpoint"]["/check-eligibility"]["calls"] == 2
+        assert snapshot["by_destination"]["Canada"]["prompt_tokens"] == 2500
+        assert snapshot["by_provider"]["openai"]["llm_seconds"] == pytest.approx(4.0)
+        assert snapshot["budget"]["spent_usd"] == pytest.approx(llm_cost(3000, 600, 0.0005, 0.0015))
+        assert snapshot["budget"]["top_clients"][0]["client"] == "a"
+
+    def test_metrics(self):
+        """Test the Prometheus exposition carries labels and budget gauges"""
+        ledger = UsageLedger(0.0005, 0.0015)
+        ledger.record("/check-eligibility", "openai", 'Can"ada', "a", 1000, 0, 1.0)
+        text = "\n".join(ledger.prometheus_lines())
+        assert '# TYPE swiftvisa_llm_prompt_tokens_total counter' in text
+        assert 'swiftvisa_llm_prompt_tokens_total{endpoint="/check-eligibility",provider="openai",destination="Can\\"ada"} 1000' in text
+        assert "swiftvisa_llm_spend_today_usd 0.0005" in text
+
+
+class TestBudgets:
+    """Test daily and per-client budgets"""
+
+    def test_daily_budget(self):
+        """Test the daily budget blocks everyone until the next day"""
+        day = Day()
+        ledger = UsageLedger(1.0, 1.0, daily_budget_usd=1.0, day=day)
+        assert ledger.check("a") is None
+        ledger.record("/check-eligibility", "openai", "UK", "a", 1000, 0, 1.0)
+        assert ledger.check("b") == "daily"
+        day.value = "2025-01-02"
+        assert ledger.check("b") is None
+        assert ledger.snapshot()["budget"]["spent_usd"] == 0
+
+    def test_client_budget(self):
+        """Test a client over its budget is blocked while others are not"""
+        ledger = UsageLedger(1.0, 1.0, client_daily_budget_usd=0.5, day=Day())
+        ledger.record("/check-eligibility", "openai", "UK", "heavy", 600, 0, 1.0)
+        assert ledger.check("heavy") == "client"
+        assert ledger.check("light") is None
+        assert ledger.snapshot()["budget"]["denied_calls"] == {"daily": 0, "client": 1}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,147 @@
+"""
+Materialized Answer Store Tests
+Tests for the precomputed answer key-value file
+"""
+
+import pytest
+import json
+import os
+import sys
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from catalog import catalog_pairs, parse_catalog_filename
+from materialize import (
+    build_answer_items,
+    eligibility_key,
+    index_fingerprint,
+    open_answer_store,
+    requirements_key,
+    top_profiles,
+    write_answer_store,
+    write_build_info,
+)
+
+
+class TestCatalog:
+    """Test catalog parsing from clean data filenames"""
+
+    def test_parse_catalog_filename(self):
+        """Test country and visa type extraction"""
+        assert parse_catalog_filename("Canada_Canada_StudyPermit_EligibilityOnly.txt") == ("Canada", "StudyPermit")
+        assert parse_catalog_filename("US_usbring.txt") is None
+        assert parse_catalog_filename("notes.md") is None
+
+    def test_catalog_pairs(self):
+        """Test pairs are discovered from the clean corpus"""
+        pairs = catalog_pairs("data/clean")
+        assert ("Canada", "StudyPermit") in pairs
+        assert pairs == sorted(set(pairs))
+
+
+class TestAnswerStore:
+    """Test writing and reading the memory-mapped answer store"""
+
+    def test_round_trip(self, tmp_path):
+        """Test every written key can be read back"""
+        path = str(tmp_path / "answers.kv")
+        items = {requirements_key("Canada", f"Visa{i}"): {"status": "success", "n": i} for i in range(200)}
+        assert write_answer_store(path, items, "build-1") == 200
+
+        store = open_answer_store(path, "build-1")
+        assert store is not None
+        for key, value in items.items():
+            assert store.get(key) == value
+        assert store.get(requirements_key("Canada", "Missing")) is None
+        assert store.stats()["hits"] == 200
+        assert store.stats()["misses"] == 1
+
+    def test_keys_are_normalized(self, tmp_path):
+        """Test lookups ignore case and whitespace differences"""
+        path = str(tmp_path / "answers.kv")
+        write_answer_store(path, {eligibility_key("Visa  for Canada "): {"provider": "retrieval-only"}}, None)
+        store = open_answer_store(path, None)
+        assert store.get(eligibility_key("visa for canada")) == {"provider": "retrieval-only"}
+        assert requirements_key(" UK ", "Graduatevisa") == requirements_key("uk", "GraduateVisa")
+
+    def test_stale_store_is_rejected(self, tmp_path):
+        """Test a store built from another index is not served"""
+        path = str(tmp_path / "answers.kv")
+        write_answer_store(path, {"k": 1}, "build-1")
+        assert open_answer_store(path, "build-2") is None
+        assert open_answer_store(str(tmp_path / "missing.kv"), "build-1") is None
+
+    def test_unmapped_when_dropped(self, tmp_path):
+        """Test a store nobody references any more releases its mapping"""
+        path = str(tmp_path / "answers.kv")
+        write_answer_store(path, {"k": 1}, "build-1")
+        store = open_answer_store(path, "build-1")
+        mapping = store._mm
+        del store
+        assert mapping.closed
+
+    def test_concurrent_writers(self, tmp_path, monkeypatch):
+        """Test workers rebuilding the same store at once each publish their own complete file"""
+        path = str(tmp_path / "answers.kv")
+        items = {requirements_key("Canada", f"Visa{i}"): {"n": i, "text": "x" * 2000} for i in range(200)}
+        replaced = []
+        replace = os.replace
+        monkeypatch.setattr(os, "replace", lambda src, dst: replaced.append(src) or replace(src, dst))
+        writers = [threading.Thread(target=write_answer_store, args=(path, items, "build-1")) for _ in range(8)]
+        for writer in writers:
+            writer.start()
+        for writer in writers:
+            writer.join()
+        store = open_answer_store(path, "build-1")
+        assert all(store.get(key) == value for key, value in items.items())
+        assert len(set(replaced)) == len(writers)
+        assert os.listdir(tmp_path) == ["answers.kv"]
+
+    def test_corrupt_file_is_rejected(self, tmp_path):
+        """Test a file that is not an answer store is ignored"""
+        path = tmp_path / "answers.kv"
+        path.write_bytes(b"not a store")
+        assert open_answer_store(str(path), None) is None
+
+
+class TestMaterialization:
+    """Test the materialization helpers"""
+
+    def test_index_fingerprint_tracks_builds(self, tmp_path):
+        """Test a new build id changes the fingerprint"""
+        assert index_fingerprint(str(tmp_path / "missing")) is None
+        (tmp_path / "chroma.sqlite3").write_bytes(b"x" * 10)
+        stat_fingerprint = index_fingerprint(str(tmp_path))
+        assert stat_fingerprint.startswith("stat-")
+
+        build_id = write_build_info(str(tmp_path))
+        assert index_fingerprint(str(tmp_path)) == build_id
+
+    def test_top_profiles(self, tmp_path):
+        """Test profiles are ranked by frequency"""
+        common = {"destinationCountry": "UK", "age": "25"}
+        rare = {"destinationCountry": "US", "age": "40"}
+        lines = [common, common, rare, dict(rare, count=5)]
+        path = tmp_path / "profiles.jsonl"
+        path.write_text("\n".join(json.dumps(p) for p in lines))
+
+        assert top_profiles(str(path), 1) == [rare]
+        assert top_profiles(str(path), 10) == [rare, common]
+        assert top_profiles(str(tmp_path / "missing.jsonl"), 10) == []
+
+    def test_build_answer_items(self):
+        """Test requirement and profile records are both produced"""
+        items = build_answer_items(
+            lambda d, v: {"destination": d, "visa_type": v},
+            [("UK", "StudentVisa")],
+            ["Student visa to UK"],
+            lambda q: {"eligibility": q, "provider": "retrieval-only"}
+        )
+        assert items[requirements_key("UK", "StudentVisa")]["visa_type"] == "StudentVisa"
+        assert eligibility_key("Student visa to UK") in items
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
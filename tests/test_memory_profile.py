@@ -0,0 +1,110 @@
+"""
+Memory Profile Tests
+Tests for startup phase accounting, endpoint totals and benchmark comparison
+"""
+
+import tracemalloc
+import pytest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from memory_profile import MemoryProfiler, compare_memory, package_of, top_growth
+
+
+@pytest.fixture
+def profiler():
+    was_tracing = tracemalloc.is_tracing()
+    yield MemoryProfiler(enabled=True, every=2)
+    if not was_tracing:
+        tracemalloc.stop()
+
+
+class TestHelpers:
+    """Test allocation sites are attributed and diffed"""
+
+    def test_package_of(self):
+        """Test files map to their installed package, the stdlib or the app"""
+        assert package_of("/venv/lib/python3.11/site-packages/torch/nn/modules.py") == "torch"
+        assert package_of("/usr/lib/python3/dist-packages/numpy/core.py") == "numpy"
+        assert package_of("/venv/lib/python3.11/site-packages/six.py") == "six"
+        assert package_of("/usr/lib/python3.11/json/decoder.py") == "<stdlib>"
+        assert package_of("/srv/app/main.py") == "<app>"
+
+    def test_top_growth(self):
+        """Test only grown sites are listed, largest first"""
+        baseline = {"a.py:1": (100, 1), "b.py:2": (500, 5)}
+        current = {"a.py:1": (400, 4), "b.py:2": (200, 2), "c.py:3": (50, 1)}
+        assert top_growth(baseline, current) == [
+            {"site": "a.py:1", "bytes": 300, "count": 3},
+            {"site": "c.py:3", "bytes": 50, "count": 1}
+        ]
+
+
+class TestMemoryProfiler:
+    """Test phases, endpoint totals and checkpoints"""
+
+    def test_disabled(self):
+        """Test a disabled profiler records nothing and reports RSS only"""
+        disabled = MemoryProfiler(enabled=False)
+        disabled.mark("imports")
+        disabled.request_finished("GET /x", disabled.request_started())
+        report = disabled.report()
+        assert report["enabled"] is False and "startup" not in report
+        assert disabled.phases == [] and disabled.endpoints == {}
+
+    def test_phases(self, profiler):
+        """Test each mark records the allocation of its phase, grouped by package"""
+        held = [bytearray(1024) for _ in range(512)]
+        profiler.mark("load", final=True)
+        phases = profiler.report()["startup"]
+        assert [p["phase"] for p in phases] == ["baseline", "load"]
+        assert phases[1]["traced_bytes"] - phases[0]["traced_bytes"] >= 512 * 1024
+        assert phases[1]["packages"][0]["package"] == "<app>"
+        profiler.mark("late")
+        assert len(profiler.phases) == 2
+        del held
+
+    def test_endpoints(self, profiler):
+        """Test retained bytes are summed per endpoint and checkpoints list grown sites"""
+        profiler.mark("ready", final=True)
+        held = []
+        for _ in range(4):
+            started = profiler.request_started()
+            held.append(bytearray(64 * 1024))
+            profiler.request_finished("POST /leak", started)
+        started = profiler.request_started()
+        profiler.request_finished("GET /health", started)
+
+        endpoints = profiler.report()["endpoints"]
+        leak = endpoints["POST /leak"]
+        assert leak["requests"] == 4 and leak["retained_bytes_per_request"] >= 64 * 1024
+        assert [c["requests"] for c in leak["checkpoints"]] == [2, 4]
+        assert leak["checkpoints"][-1]["growth_sites"][0]["bytes"] >= 4 * 64 * 1024
+        assert endpoints["GET /health"]["checkpoints"] == []
+
+        profiler.reset_endpoints()
+        assert profiler.report()["endpoints"] == {}
+        assert all(site["bytes"] < 64 * 1024 for site in profiler.growth_sites())
+        del held
+
+
+class TestCompareMemory:
+    """Test the benchmark's regression rules"""
+
+    def report(self, rss, growth):
+        return {"steady_rss_bytes": rss, "endpoints": {"POST /x": {"growth_bytes_per_request": growth}}}
+
+    def test_regressions(self):
+        """Test RSS and heap growth regress past their thresholds only"""
+        rows = compare_memory(self.report(1000, 500), self.report(1050, 2000))
+        assert [row["regressed"] for row in rows] == [False, False]
+        rows = compare_memory(self.report(1000, 500), self.report(1200, 4000))
+        assert [row["regressed"] for row in rows] == [True, True]
+        rows = compare_memory(self.report(1000, 10000), self.report(1000, 13000))
+        assert rows[1]["regressed"] is False
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,116 @@
+"""
+Prefetch Tests
+Tests for the prefetch cache, its rate limiter and pool re-ranking
+"""
+
+import threading
+import numpy as np
+import pytest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from langchain_core.documents import Document
+
+from prefetch import PrefetchCache, PrefetchedContext, SlidingWindowLimiter, prefetch_key
+from tests.helpers import FakeClock
+
+
+def context(version="v1"):
+    docs = [Document(page_content=text) for text in ("funds", "age", "stay")]
+    return PrefetchedContext("q", docs, np.eye(3, dtype=np.float32) * 2, version)
+
+
+class TestPrefetchedContext:
+    """Test the pool is re-ranked by cosine similarity"""
+
+    def test_rank(self):
+        """Test the closest chunks come first and k is respected"""
+        ranked = context().rank([0.1, 0.9, 0.3], k=2)
+        assert [doc.page_content for doc, _ in ranked] == ["age", "stay"]
+        assert ranked[0][1] == pytest.approx(0.9 / np.linalg.norm([0.1, 0.9, 0.3]))
+
+    def test_mmr(self):
+        """Test MMR picks a different relevant chunk over a near-duplicate of the best"""
+        docs = [Document(page_content=text) for text in ("funds", "funds again", "age")]
+        vectors = np.array([[1.0, 0.0, 0.0], [0.99, 0.1, 0.0], [0.6, 0.0, 0.8]], dtype=np.float32)
+        pool = PrefetchedContext("q", docs, vectors, "v1")
+        query = [1.0, 0.05, 0.3]
+        assert [doc.page_content for doc, _ in pool.rank(query, 2)] == ["funds", "funds again"]
+        assert [doc.page_content for doc, _ in pool.mmr(query, 2, fetch_k=3, lambda_mult=0.5)] == ["funds", "age"]
+
+    def test_empty_pool(self):
+        """Test an empty pool ranks to nothing"""
+        assert PrefetchedContext("q", [], np.zeros((0, 3), dtype=np.float32), "v1").rank([1, 0, 0], 5) == []
+
+    def test_key(self):
+        """Test keys ignore case and punctuation but not the index version"""
+        assert prefetch_key("v1", "Canada", "Study") == prefetch_key("v1", " canada", "study.")
+        assert prefetch_key("v1", "Canada", None) != prefetch_key("v2", "Canada", None)
+
+
+class TestRateLimiter:
+    """Test the per-client sliding window"""
+
+    def test_window(self):
+        """Test requests beyond the limit wait for the oldest to leave the window"""
+        clock = FakeClock(1000.0)
+        limiter = SlidingWindowLimiter(2, 60, clock=clock)
+        assert limiter.check("a") is None
+        clock.now += 10
+        assert limiter.check("a") is None
+        assert limiter.check("a") == pytest.approx(50)
+        assert limiter.check("b") is None
+        clock.now += 50
+        assert limiter.check("a") is None
+        assert limiter.rejected == 1
+
+
+class TestPrefetchCache:
+    """Test fetches are deduplicated, bounded and expire"""
+
+    def test_dedup_and_bounds(self):
+        """Test cached and in-flight keys are not fetched again and excess fetches are dropped"""
+        clock = FakeClock(1000.0)
+        cache = PrefetchCache(ttl_seconds=30, max_inflight=1, clock=clock)
+        release = threading.Event()
+        calls = []
+
+        def slow_fetch():
+            calls.append("slow")
+            release.wait(5)
+            return context()
+
+        assert cache.submit("k1", slow_fetch) == "scheduled"
+        assert cache.submit("k1", slow_fetch) == "pending"
+        assert cache.submit("k2", slow_fetch) == "busy"
+        release.set()
+        cache._executor.shutdown(wait=True)
+        assert calls == ["slow"]
+        assert cache.submit("k1", slow_fetch) == "cached"
+        assert cache.lookup("k2", "k1").docs[0].page_content == "funds"
+
+        assert cache.lookup("k1", min_k=4) is None
+
+        clock.now += 31
+        assert cache.lookup("k1") is None
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["busy"]) == (1, 2, 1)
+        assert stats["hit_rate"] == 0.333
+
+    def test_failed_fetch(self):
+        """Test a failing fetch is counted and frees its slot"""
+        cache = PrefetchCache(ttl_seconds=30, max_inflight=1)
+
+        def broken():
+            raise RuntimeError("index closed")
+
+        cache.submit("k", broken)
+        cache._executor.shutdown(wait=True)
+        assert cache.stats()["failed"] == 1
+        assert cache.inflight() == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,89 @@
+"""
+Profiling Tests
+Tests for the sampling profiler and profile store
+"""
+
+import pytest
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from profiling import ProfileStore, StackSampler, collapse_stack, should_sample, to_collapsed
+
+
+def busy_worker(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+class TestStackSampler:
+    """Test stack sampling"""
+
+    def test_samples_target_thread(self):
+        """Test the sampler records the busy thread's function"""
+        stop = threading.Event()
+        worker = threading.Thread(target=busy_worker, args=(stop,))
+        worker.start()
+        try:
+            sampler = StackSampler(worker.ident, interval=0.001).start()
+            time.sleep(0.1)
+            stacks = sampler.stop()
+        finally:
+            stop.set()
+            worker.join()
+        assert sum(stacks.values()) > 0
+        assert any("test_profiling.py:busy_worker" in stack for stack in stacks)
+
+    def test_collapse_stack_is_root_first(self):
+        """Test collapsed stacks list the caller before the callee"""
+        def inner():
+            return collapse_stack(sys._getframe())
+
+        stack = collapse_stack_caller(inner)
+        names = stack.split(";")
+        assert names[-1].endswith(":inner")
+        assert names[-2].endswith(":collapse_stack_caller")
+
+    def test_to_collapsed_format(self):
+        """Test the flame-graph text format"""
+        text = to_collapsed(Counter({"a.py:f;b.py:g": 3, "a.py:f": 1}))
+        assert text == "a.py:f;b.py:g 3\na.py:f 1\n"
+
+
+def collapse_stack_caller(fn):
+    return fn()
+
+
+class TestProfileStore:
+    """Test stored profiles and aggregates"""
+
+    def test_keeps_most_recent_profiles(self):
+        """Test the store is bounded"""
+        store = ProfileStore(max_profiles=2)
+        ids = [store.save("/check-eligibility", Counter({"x": i + 1}), 0.1) for i in range(3)]
+        assert store.get(ids[0]) is None
+        assert [p["id"] for p in store.list()] == [ids[2], ids[1]]
+        assert "stacks" not in store.list()[0]
+
+    def test_aggregate_per_endpoint(self):
+        """Test sampled requests accumulate per endpoint and can be reset"""
+        store = ProfileStore()
+        store.add_to_aggregate("/analyze-profile", Counter({"x": 2}))
+        store.add_to_aggregate("/analyze-profile", Counter({"x": 1, "y": 1}))
+        assert store.aggregate("/analyze-profile") == Counter({"x": 3, "y": 1})
+        assert store.aggregate_summary() == {"/analyze-profile": {"requests": 2, "samples": 4}}
+        store.reset_aggregate("/analyze-profile")
+        assert store.aggregate("/analyze-profile") == Counter()
+
+    def test_should_sample_rate(self):
+        """Test disabled and always-on sample rates"""
+        assert not should_sample(0)
+        assert should_sample(1.0)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,152 @@
+"""
+Quantized Index Tests
+Tests for the int8/binary index with full-precision rescoring
+"""
+
+import pytest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+np = pytest.importorskip("numpy")
+
+from hnsw_config import hnsw_collection_metadata
+from quantized_index import QuantizedIndex, QuantizedVectorStore, export_chroma_collection, write_quantized_index
+from tests.helpers import WordEmbeddings
+
+
+@pytest.fixture(scope="module")
+def corpus():
+    rng = np.random.default_rng(7)
+    return rng.normal(size=(300, 64)).astype(np.float32)
+
+
+@pytest.fixture(scope="module")
+def index_dir(tmp_path_factory, corpus):
+    path = tmp_path_factory.mktemp("quantized")
+    write_quantized_index(
+        str(path), corpus,
+        documents=[f"doc {i}" for i in range(len(corpus))],
+        metadatas=[{"row": i} for i in range(len(corpus))],
+        ids=[f"id-{i}" for i in range(len(corpus))]
+    )
+    return str(path)
+
+
+def exact_top_k(corpus, query, k):
+    normed = corpus / np.linalg.norm(corpus, axis=1, keepdims=True)
+    return set(np.argsort(-(normed @ (query / np.linalg.norm(query))))[:k])
+
+
+class TestQuantizedIndex:
+    """Test search quality and storage"""
+
+    @pytest.mark.parametrize("mode", ["binary", "int8"])
+    def test_self_query_is_top_hit(self, index_dir, corpus, mode):
+        """Test a stored vector finds itself first"""
+        index = QuantizedIndex(index_dir)
+        for row in (0, 42, 299):
+            hits = index.search(corpus[row], k=3, mode=mode)
+            assert hits[0][0] == row
+            assert hits[0][1] == pytest.approx(1.0, abs=1e-5)
+
+    @pytest.mark.parametrize("mode", ["binary", "int8"])
+    def test_recall_against_exact_search(self, index_dir, corpus, mode):
+        """Test rescoring recovers the exact neighbours"""
+        index = QuantizedIndex(index_dir)
+        rng = np.random.default_rng(1)
+        recalls = []
+        for query in rng.normal(size=(20, 64)).astype(np.float32):
+            found = {row for row, _ in index.search(query, k=5, mode=mode, oversample=20)}
+            recalls.append(len(found & exact_top_k(corpus, query, 5)) / 5)
+        assert np.mean(recalls) >= 0.8
+
+    def test_float_vectors_are_lazy(self, index_dir, corpus):
+        """Test full-precision vectors are only mapped when rescoring"""
+        index = QuantizedIndex(index_dir)
+        assert index._vectors is None
+        index.search(corpus[0], k=1)
+        assert isinstance(index._vectors, np.memmap)
+
+    def test_codes_are_compact(self, index_dir):
+        """Test the resident codes are smaller than float32 vectors"""
+        memory = QuantizedIndex(index_dir).memory_bytes()
+        assert memory["binary_codes"] < memory["float32_vectors_mapped"] / 16
+        assert memory["int8_codes"] < memory["float32_vectors_mapped"] / 3
+
+    def test_unknown_mode(self, index_dir, corpus):
+        """Test an invalid mode is rejected"""
+        with pytest.raises(ValueError):
+            QuantizedIndex(index_dir).search(corpus[0], mode="fp8")
+
+
+class TestQuantizedVectorStore:
+    """Test the LangChain adapter"""
+
+    def test_similarity_search(self, index_dir, corpus):
+        """Test documents and Chroma-style distances are returned"""
+        store = QuantizedVectorStore.load(index_dir, WordEmbeddings())
+        results = store.similarity_search_by_vector_with_score(corpus[42].tolist(), k=2)
+        doc, distance = results[0]
+        assert doc.page_content == "doc 42"
+        assert doc.metadata == {"row": 42}
+        assert doc.id == "id-42"
+        assert distance == pytest.approx(0.0, abs=1e-5)
+        assert results[1][1] > distance
+
+    @pytest.mark.parametrize("space", ["l2", "cosine", "ip"])
+    def test_distance_space(self, tmp_path, corpus, space):
+        """Test scores are distances in the recorded space of the source collection"""
+        write_quantized_index(str(tmp_path), corpus[:20], documents=[f"doc {i}" for i in range(20)], space=space)
+        store = QuantizedVectorStore.load(str(tmp_path), WordEmbeddings(), mode="int8", oversample=20)
+        unit = corpus[:20] / np.linalg.norm(corpus[:20], axis=1, keepdims=True)
+        cosine = unit @ unit[3]
+        expected = {"l2": 2 - 2 * cosine, "cosine": 1 - cosine, "ip": 1 - cosine}[space]
+        results = store.similarity_search_by_vector_with_score(corpus[3].tolist(), k=5)
+        rows = [int(doc.page_content.split()[1]) for doc, _ in results]
+        assert [score for _, score in results] == pytest.approx(np.maximum(expected[rows], 0), abs=1e-5)
+        relevance = {"l2": store._euclidean_relevance_score_fn, "cosine": store._cosine_relevance_score_fn,
+                     "ip": store._max_inner_product_relevance_score_fn}[space]
+        assert store._select_relevance_score_fn() == relevance
+
+    def test_unknown_space(self, tmp_path, corpus):
+        """Test a space Chroma does not have is refused at build time"""
+        with pytest.raises(ValueError):
+            write_quantized_index(str(tmp_path), corpus[:4], documents=["a", "b", "c", "d"], space="manhattan")
+
+    def test_export_matches_chroma(self, tmp_path):
+        """Test an exported cosine collection scores like the Chroma client"""
+        pytest.importorskip("langchain_chroma")
+        from langchain_chroma import Chroma
+
+        texts = ["canada study permit tuition", "canada work permit employer", "uk student visa english test",
+                 "us h1b specialty occupation employer"]
+        db = Chroma.from_texts(texts, WordEmbeddings(), ids=[f"id-{i}" for i in range(len(texts))],
+                               persist_directory=str(tmp_path / "chroma"),
+                               collection_metadata=hnsw_collection_metadata(space="cosine"))
+        manifest = export_chroma_collection(db, str(tmp_path / "quantized"))
+        assert manifest["space"] == "cosine"
+
+        store = QuantizedVectorStore.load(str(tmp_path / "quantized"), WordEmbeddings(), mode="int8")
+        for query in ("canada study tuition", "employer job offer"):
+            expected = db.similarity_search_with_score(query, k=3)
+            actual = store.similarity_search_with_score(query, k=3)
+            assert [d.id for d, _ in actual] == [d.id for d, _ in expected]
+            assert [s for _, s in actual] == pytest.approx([s for _, s in expected], abs=1e-4)
+
+    def test_retriever(self, tmp_path):
+        """Test the store works as a retriever"""
+        texts = ["canada study permit tuition", "canada work permit employer", "uk student visa english test",
+                 "us h1b specialty occupation employer", "australia skilled worker points test"]
+        embeddings = WordEmbeddings()
+        write_quantized_index(str(tmp_path), np.array(embeddings.embed_documents(texts), dtype=np.float32),
+                              documents=texts)
+        store = QuantizedVectorStore.load(str(tmp_path), embeddings)
+        docs = store.as_retriever(search_kwargs={"k": 4}).invoke("uk student visa")
+        assert len(docs) == 4
+        assert docs[0].page_content == texts[2]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
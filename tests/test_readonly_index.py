@@ -0,0 +1,87 @@
+"""
+Read-Only Index Tests
+Tests for serving a Chroma store from an immutable, in-memory copy
+"""
+
+import pytest
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+pytest.importorskip("langchain_chroma")
+
+from readonly_index import FROZEN_VECTORS_FILE, ReadOnlyChromaStore, ReadOnlyIndexError
+from snapshots import build_vectorstore
+from tests.helpers import WordEmbeddings
+
+
+@pytest.fixture
+def persist_dir(tmp_path):
+    clean = tmp_path / "clean"
+    clean.mkdir()
+    files = {
+        "Canada_Canada_StudyPermit_EligibilityOnly.txt": "canada study permit tuition proof of funds",
+        "Canada_Canada_WorkPermit_EligibilityOnly.txt": "canada work permit employer job offer",
+        "UK_UK_StudentVisa_EligibilityOnly.txt": "uk student visa cas tuition english test",
+        "US_US_H1B_Eligibility.txt": "us h1b specialty occupation employer petition",
+    }
+    for name, text in files.items():
+        (clean / name).write_text(text, encoding="utf-8")
+    path = str(tmp_path / "index")
+    build_vectorstore(path, WordEmbeddings(), str(clean))
+    return path
+
+
+class TestReadOnlyChromaStore:
+    """Test the in-memory store matches the Chroma client and refuses writes"""
+
+    def test_matches_chroma(self, persist_dir):
+        """Test results and distances equal the Chroma client's"""
+        from langchain_chroma import Chroma
+
+        store = ReadOnlyChromaStore.load(persist_dir, WordEmbeddings())
+        assert store.source == "frozen"
+        assert store.stats()["count"] == 4
+
+        chroma = Chroma(persist_directory=persist_dir, embedding_function=WordEmbeddings())
+        for query in ("canada study tuition", "employer job offer", "uk english test"):
+            expected = chroma.similarity_search_with_score(query, k=3)
+            actual = store.similarity_search_with_score(query, k=3)
+            assert [d.id for d, _ in actual] == [d.id for d, _ in expected]
+            assert [s for _, s in actual] == pytest.approx([s for _, s in expected], abs=1e-4)
+            assert actual[0][0].metadata["source"] == expected[0][0].metadata["source"]
+
+    def test_get_by_id(self, persist_dir):
+        """Test Chroma-style get returns documents for known ids only"""
+        store = ReadOnlyChromaStore.load(persist_dir, WordEmbeddings())
+        data = store.get(ids=[store.ids[1], "missing"], include=["documents"])
+        assert data["ids"] == [store.ids[1]]
+        assert data["documents"] == [store.documents[1]]
+
+    def test_queue_fallback(self, persist_dir):
+        """Test stores without the frozen copy load vectors from the embeddings queue"""
+        os.remove(os.path.join(persist_dir, FROZEN_VECTORS_FILE))
+        store = ReadOnlyChromaStore.load(persist_dir, WordEmbeddings())
+        assert store.source == "queue"
+        assert store.similarity_search("us h1b petition", k=1)[0].metadata["source"] == "US_US_H1B_Eligibility.txt"
+
+    def test_writes_refused(self, persist_dir):
+        """Test the served index cannot be modified"""
+        store = ReadOnlyChromaStore.load(persist_dir, WordEmbeddings())
+        with pytest.raises(ReadOnlyIndexError):
+            store.add_texts(["new policy"])
+        with pytest.raises(ReadOnlyIndexError):
+            store.delete([store.ids[0]])
+        with pytest.raises(ValueError):
+            store.vectors[0, 0] = 1.0
+
+    def test_missing_database(self, tmp_path):
+        """Test a directory without chroma.sqlite3 cannot be opened"""
+        with pytest.raises(ReadOnlyIndexError):
+            ReadOnlyChromaStore.load(str(tmp_path), WordEmbeddings())
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,97 @@
+"""
+Request Trace Tests
+Tests for per-request diagnostics and the slow-request log
+"""
+
+import pytest
+import json
+import sys
+from contextvars import copy_context
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from langchain_core.documents import Document
+
+from request_trace import (
+    SlowRequestLog,
+    annotate,
+    current_trace,
+    record_chunks,
+    start_trace,
+    trace_stage,
+)
+
+
+def traced(method="POST", path="/check-eligibility"):
+    """Run a traced fake request in its own context and return the trace"""
+    def handle():
+        trace = start_trace(method, path)
+        annotate(query="canada study", provider="retrieval-only")
+        with trace_stage("retrieval"):
+            record_chunks([(Document(page_content="a", id="c1", metadata={"source": "x.txt"}), 0.25)])
+        with trace_stage("retrieval"):
+            pass
+        return trace
+    return copy_context().run(handle)
+
+
+class TestRequestTrace:
+    """Test trace annotation"""
+
+    def test_annotations(self):
+        """Test query, chunks, stages and provider are captured"""
+        record = traced().to_dict()
+        assert record["query"] == "canada study"
+        assert record["provider"] == "retrieval-only"
+        assert record["chunks"] == [{"id": "c1", "score": 0.25, "source": "x.txt"}]
+        assert list(record["stages_ms"]) == ["retrieval"]
+
+    def test_helpers_outside_request(self):
+        """Test helpers are no-ops without an active trace"""
+        def handle():
+            with trace_stage("retrieval"):
+                annotate(query="ignored")
+            record_chunks([(Document(page_content="a"), 1.0)])
+            return current_trace()
+        assert copy_context().run(handle) is None
+
+
+class TestSlowRequestLog:
+    """Test the slow-request ring buffer"""
+
+    def test_only_slow_requests_kept(self):
+        """Test the latency threshold"""
+        log = SlowRequestLog(threshold_ms=100)
+        fast, slow = traced(), traced()
+        fast.duration_ms, slow.duration_ms = 5.0, 250.0
+        assert not log.observe(fast)
+        assert log.observe(slow)
+        assert [r["duration_ms"] for r in log.query()] == [250.0]
+
+    def test_ring_buffer_and_filters(self):
+        """Test capacity bound, newest-first order and filters"""
+        log = SlowRequestLog(threshold_ms=0, capacity=3)
+        for i in range(5):
+            trace = traced(path="/analyze-profile" if i % 2 else "/check-eligibility")
+            trace.finish(200)
+            trace.duration_ms = float(i)
+            log.observe(trace)
+        assert [r["duration_ms"] for r in log.query()] == [4.0, 3.0, 2.0]
+        assert [r["duration_ms"] for r in log.query(path="/analyze-profile")] == [3.0]
+        assert [r["duration_ms"] for r in log.query(min_ms=3)] == [4.0, 3.0]
+        assert log.total_recorded == 5
+
+    def test_spills_to_jsonl(self, tmp_path):
+        """Test records are appended to the JSONL file"""
+        path = tmp_path / "slow.jsonl"
+        log = SlowRequestLog(threshold_ms=0, log_file=str(path))
+        trace = traced()
+        trace.finish(200)
+        log.observe(trace)
+        lines = path.read_text(encoding="utf-8").splitlines()
+        assert json.loads(lines[0])["chunks"][0]["id"] == "c1"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
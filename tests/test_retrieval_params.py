@@ -0,0 +1,112 @@
+"""
+Retrieval Parameter Tests
+Tests for runtime retrieval parameters, variants, overrides and MMR
+"""
+
+import numpy as np
+import pytest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from retrieval_params import (
+    DEFAULT_VARIANT,
+    OVERRIDE_VARIANT,
+    RetrievalParams,
+    RetrievalParamsError,
+    RetrievalTuner,
+    mmr_select,
+)
+
+
+class TestRetrievalParams:
+    """Test validation against the allowed values and limits"""
+
+    def test_replace(self):
+        """Test overrides are coerced and the original is unchanged"""
+        defaults = RetrievalParams()
+        params = defaults.replace({"k": "7", "search_type": "mmr", "fetch_k": None}, max_k=20, max_fetch_k=100)
+        assert (params.k, params.search_type, params.fetch_k) == (7, "mmr", 20)
+        assert defaults.k == 5
+
+    @pytest.mark.parametrize("overrides", [
+        {"k": 0}, {"k": 21}, {"fetch_k": 101}, {"search_type": "hybrid"}, {"chain_type": "refine"},
+        {"score_threshold": 1.5}, {"k": "many"}, {"top_p": 1}
+    ])
+    def test_rejected(self, overrides):
+        """Test values outside the limits or choices are rejected"""
+        with pytest.raises(RetrievalParamsError):
+            RetrievalParams().replace(overrides, max_k=20, max_fetch_k=100)
+
+
+class TestMMR:
+    """Test maximal marginal relevance selection"""
+
+    def test_diversifies(self):
+        """Test a near-duplicate of the best hit loses to a different relevant chunk"""
+        vectors = np.array([[1.0, 0.0, 0.0], [0.99, 0.1, 0.0], [0.6, 0.0, 0.8]])
+        query = [1.0, 0.05, 0.3]
+        assert mmr_select(query, vectors, k=2, lambda_mult=1.0) == [0, 1]
+        assert mmr_select(query, vectors, k=2, lambda_mult=0.5) == [0, 2]
+        assert mmr_select(query, vectors, k=5) == [0, 2, 1]
+        assert mmr_select(query, np.zeros((0, 3)), k=2) == []
+
+
+class TestRetrievalTuner:
+    """Test runtime changes, variant assignment and statistics"""
+
+    def tuner(self):
+        return RetrievalTuner(RetrievalParams(k=5), max_k=10, max_fetch_k=50)
+
+    def test_configure(self):
+        """Test defaults change at runtime and invalid updates leave them untouched"""
+        tuner = self.tuner()
+        tuner.configure(defaults={"k": 3}, variants={"fast": {"params": {"k": 2}, "weight": 0.5}})
+        assert tuner.defaults.k == 3
+        for bad in ({"variants": {"a": {"weight": 0.6}, "b": {"weight": 0.6}}},
+                    {"variants": {"default": {"weight": 0.1}}},
+                    {"defaults": {"k": 11}}):
+            with pytest.raises(RetrievalParamsError):
+                tuner.configure(**bad)
+        assert tuner.defaults.k == 3 and list(tuner.variants) == ["fast"]
+
+    def test_resolve(self):
+        """Test variants are sticky per client, explicit and overridable"""
+        tuner = self.tuner()
+        tuner.configure(variants={"fast": {"params": {"k": 2, "chain_type": "stuff"}, "weight": 0.5}})
+        names = {tuner.resolve(client=f"client-{i}")[1] for i in range(50)}
+        assert names == {"fast", DEFAULT_VARIANT}
+        assert tuner.resolve(client="client-7")[1] == tuner.resolve(client="client-7")[1]
+
+        params, name = tuner.resolve(variant="fast")
+        assert (params.k, params.chain_type, name) == (2, "stuff", "fast")
+        params, name = tuner.resolve(variant="fast", overrides={"k": 4, "fetch_k": None})
+        assert (params.k, params.chain_type, name) == (4, "stuff", OVERRIDE_VARIANT)
+        with pytest.raises(RetrievalParamsError):
+            tuner.resolve(variant="slow")
+
+    def test_overrides_disabled(self):
+        """Test per-request overrides can be turned off"""
+        tuner = RetrievalTuner(RetrievalParams(), allow_overrides=False)
+        assert tuner.resolve(overrides={"k": None})[1] == DEFAULT_VARIANT
+        with pytest.raises(RetrievalParamsError):
+            tuner.resolve(overrides={"k": 3})
+
+    def test_stats(self):
+        """Test variants collect latency, stage time and tokens side by side"""
+        tuner = self.tuner()
+        for ms in (100.0, 120.0):
+            tuner.observe("default", "/check-eligibility", ms, 200, {"retrieval": 10.0, "llm": 80.0}, 900, 100)
+        tuner.observe("fast", "/check-eligibility", 60.0, 200, {"retrieval": 4.0}, None, None)
+        stats = tuner.snapshot()["stats"]
+        assert stats["default"]["requests"] == 2
+        assert stats["default"]["latency"]["/check-eligibility"]["mean_ms"] == 110.0
+        assert stats["default"]["mean_prompt_tokens"] == 900
+        assert stats["fast"]["mean_retrieval_ms"] == 4.0 and stats["fast"]["mean_llm_ms"] is None
+        tuner.reset_stats()
+        assert tuner.snapshot()["stats"] == {}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
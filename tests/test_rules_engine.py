@@ -0,0 +1,110 @@
+"""
+Rules Engine Tests
+Tests for rule extraction and the fast-path evaluator
+"""
+
+import pytest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from rules_engine import RuleStats, RuleTable, compile_rules, extract_rule, write_rules
+
+CATALOG = [
+    ("Germany", "JobSeekerVisa"),
+    ("UK", "AdultDependentVisa"),
+    ("UK", "ChildStudentVisa"),
+    ("UK", "FamilyVisa"),
+    ("UK", "StudentVisa"),
+]
+
+
+@pytest.fixture
+def clean_dir(tmp_path):
+    path = tmp_path / "clean"
+    path.mkdir()
+    files = {
+        "Germany_Germany_JobSeekerVisa_EligibilityOnly.txt":
+            "It provides a legal stay for up to six months while searching for a job.",
+        "UK_UK_AdultDependentVisa_EligibilityOnly.txt": "The applicant must be **aged 18 years or older**.",
+        "UK_UK_ChildStudentVisa_EligibilityOnly.txt": "The applicant must be **between 4 and 17 years old**.",
+        "UK_UK_FamilyVisa_EligibilityOnly.txt": "Both the applicant and the partner must be aged 18 years or older.",
+        "UK_UK_StudentVisa_EligibilityOnly.txt": "The applicant must be 16 years of age or older.",
+    }
+    for name, text in files.items():
+        (path / name).write_text(text, encoding="utf-8")
+    return path
+
+
+class TestExtraction:
+    """Test limits are read from policy text"""
+
+    def test_age_and_stay_limits(self, clean_dir):
+        """Test ranges, minimums and stay lengths in words"""
+        rules = {r.visa_type: r for r in compile_rules(str(clean_dir))}
+        assert (rules["ChildStudentVisa"].min_age, rules["ChildStudentVisa"].max_age) == (4, 17)
+        assert rules["StudentVisa"].min_age == 16
+        assert rules["JobSeekerVisa"].max_stay_days == 180
+
+    def test_conditions_on_others_ignored(self):
+        """Test ages outside "must be" statements are not treated as limits"""
+        text = "Refusal reasons: petitioner not meeting the age requirement (under 21 for sibling petitions)."
+        assert extract_rule("US", "FamilyOfUSCitizens", "x.txt", text) is None
+
+    @pytest.mark.parametrize("text", [
+        "Both the applicant and the partner must be aged 18 years or older.",
+        "The sponsor must be at least 18 years old.",
+        "If applying as a partner, the applicant must be aged 18 years or older.",
+        "The applicant must be accompanied by a parent if under 18.",
+        "The applicant must be in the UK and under the age of 18 for the child route.",
+    ])
+    def test_limits_on_some_applicants_ignored(self, text):
+        """Test ages that name someone else, a condition or a later clause are not limits"""
+        assert extract_rule("UK", "FamilyVisa", "x.txt", text) is None
+
+
+class TestEvaluation:
+    """Test fast-path decisions"""
+
+    @pytest.fixture
+    def table(self, tmp_path, clean_dir):
+        write_rules(str(tmp_path), str(clean_dir))
+        return RuleTable.load(str(tmp_path), CATALOG)
+
+    def test_all_candidates_fail(self, table):
+        """Test a profile ruled out by every study visa is answered"""
+        decision = table.evaluate("United Kingdom", "Study", "2", "365")
+        assert decision["country"] == "UK"
+        assert [r["visa_type"] for r in decision["reasons"]] == ["ChildStudentVisa", "StudentVisa"]
+
+    def test_child_joining_family_falls_back(self, table):
+        """Test the partner route's 18+ rule does not deny a child joining a settled parent"""
+        assert table.evaluate("UK", "Join my family (child of settled parent)", "10", "365") is None
+
+    def test_any_candidate_passes_falls_back(self, table):
+        """Test one acceptable visa type sends the request to RAG"""
+        assert table.evaluate("UK", "Study", "25", "365") is None
+        assert table.evaluate("UK", "Study", "2", "365") is not None
+
+    def test_stay_limit(self, table):
+        """Test length of stay is checked in days"""
+        assert table.evaluate("Germany", "Job search", "30", "200 days") is not None
+        assert table.evaluate("Germany", "Job search", "30", "90") is None
+
+    def test_unknown_inputs_fall_back(self, table):
+        """Test unknown destinations, purposes and unparsable ages are not decided"""
+        assert table.evaluate("France", "Study", "2", "30") is None
+        assert table.evaluate("UK", "Medical treatment", "2", "30") is None
+        assert table.evaluate("UK", "Family", "unknown", "30") is None
+
+    def test_hit_ratio(self):
+        """Test stats count hits and fallbacks"""
+        stats = RuleStats()
+        for hit in (True, False, False, True):
+            stats.record(hit)
+        assert stats.to_dict() == {"checks": 4, "hits": 2, "fallbacks": 2, "hit_ratio": 0.5}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
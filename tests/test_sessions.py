@@ -0,0 +1,99 @@
+"""
+Session Tests
+Tests for the TTL store and follow-up retrieval sessions
+"""
+
+import pytest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from langchain_core.documents import Document
+
+from sessions import RetrievalSession
+from tests.helpers import FakeClock, WordEmbeddings
+from ttl_store import TTLStore
+
+
+class TestTTLStore:
+    """Test expiry and eviction"""
+
+    def test_expiry(self):
+        """Test entries disappear after their TTL"""
+        clock = FakeClock()
+        store = TTLStore(10, clock=clock)
+        store.put("a", 1)
+        clock.now = 9.9
+        assert store.get("a") == 1
+        clock.now = 10.0
+        assert store.get("a") is None
+        assert store.stats()["expired"] == 1
+
+    def test_sliding_expiry(self):
+        """Test reads extend the lifetime of sliding entries"""
+        clock = FakeClock()
+        store = TTLStore(10, sliding=True, clock=clock)
+        store.put("a", 1)
+        clock.now = 8
+        store.get("a")
+        clock.now = 15
+        assert store.get("a") == 1
+        assert store.ttl("a") == 10
+
+    def test_lru_eviction(self):
+        """Test the least recently used entry is evicted when full"""
+        store = TTLStore(60, max_entries=2)
+        store.put("a", 1)
+        store.put("b", 2)
+        store.get("a")
+        store.put("c", 3)
+        assert store.get("b") is None
+        assert store.get("a") == 1 and store.get("c") == 3
+        assert store.stats()["evicted"] == 1
+
+
+class TestRetrievalSession:
+    """Test re-ranking and conversation state"""
+
+    @pytest.fixture
+    def session(self):
+        docs = [
+            Document(page_content="study permit requires letter of acceptance", metadata={"source": "a.txt"}),
+            Document(page_content="processing time is usually eight weeks", metadata={"source": "b.txt"}),
+            Document(page_content="required documents passport and bank statements", metadata={"source": "c.txt"}),
+        ]
+        profile = {"destinationCountry": "Canada", "purposeOfVisit": "Study"}
+        return RetrievalSession(profile, "canada study permit", docs, "v1", max_turns=2)
+
+    def test_rerank_follow_up(self, session):
+        """Test the pool is re-ranked for the question and embedded only once"""
+        embeddings = WordEmbeddings()
+        ranked = session.rerank("what is the processing time", embeddings, k=2)
+        assert ranked[0][0].metadata["source"] == "b.txt"
+        assert len(ranked) == 2
+        session.rerank("which documents are required", embeddings, k=2)
+        assert embeddings.document_calls == 1
+
+    def test_rerank_with_stored_vectors(self, session):
+        """Test vectors stored in the index are used instead of embedding the pool again"""
+        stored = WordEmbeddings().embed_documents([doc.page_content for doc in session.docs])
+        embeddings = WordEmbeddings()
+        pinned = RetrievalSession(session.profile, session.query, session.docs, "v1", vectors=stored)
+        ranked = pinned.rerank("what is the processing time", embeddings, k=2)
+        assert ranked[0][0].metadata["source"] == "b.txt"
+        assert embeddings.document_calls == 0
+
+    def test_history_is_compact(self, session):
+        """Test only the last turns are kept, with truncated answers"""
+        for i in range(3):
+            session.remember(f"q{i}", "x" * 1000)
+        assert [t["question"] for t in session.history] == ["q1", "q2"]
+        assert len(session.history[0]["answer"]) == 400
+        prompt = session.follow_up_prompt("how long?")
+        assert prompt.startswith("Applicant profile - destinationCountry: Canada")
+        assert prompt.index("Q: q2") < prompt.index("Follow-up question: how long?")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,135 @@
+"""
+Sharding Tests
+Tests for per-country shards and scatter-gather search
+"""
+
+import pytest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+pytest.importorskip("langchain_chroma")
+
+from sharding import (
+    ShardedChunks,
+    ShardedVectorStore,
+    build_shards,
+    group_clean_files,
+    read_shard_manifest,
+    shard_for_filename,
+)
+from tests.helpers import WordEmbeddings
+
+
+@pytest.fixture
+def clean_dir(tmp_path):
+    path = tmp_path / "clean"
+    path.mkdir()
+    files = {
+        "Canada_Canada_StudyPermit_EligibilityOnly.txt": "canada study permit tuition proof",
+        "Canada_Canada_WorkPermit_EligibilityOnly.txt": "canada work permit employer offer",
+        "UK_UK_StudentVisa_EligibilityOnly.txt": "uk student visa cas tuition proof",
+        "US_US_H1B_Eligibility.txt": "us h1b specialty occupation employer",
+    }
+    for name, text in files.items():
+        (path / name).write_text(text, encoding="utf-8")
+    return str(path)
+
+
+@pytest.fixture
+def sharded_dir(tmp_path, clean_dir):
+    persist_dir = str(tmp_path / "index")
+    build_shards(persist_dir, WordEmbeddings(), clean_dir)
+    return persist_dir
+
+
+class TestShardBuild:
+    """Test building shards"""
+
+    def test_grouping(self, clean_dir):
+        """Test files are grouped by country prefix"""
+        assert shard_for_filename("UK_UK_StudentVisa_EligibilityOnly.txt") == "UK"
+        assert {k: len(v) for k, v in group_clean_files(clean_dir).items()} == {"Canada": 2, "UK": 1, "US": 1}
+
+    def test_manifest(self, sharded_dir):
+        """Test every shard is recorded"""
+        manifest = read_shard_manifest(sharded_dir)
+        assert sorted(manifest) == ["Canada", "UK", "US"]
+        assert manifest["Canada"]["documents"] == 2
+
+    def test_rebuild_one_shard(self, sharded_dir, clean_dir):
+        """Test a single shard can be rebuilt without touching the others"""
+        before = read_shard_manifest(sharded_dir)
+        assert build_shards(sharded_dir, WordEmbeddings(), clean_dir, only=["UK"]) == {"UK": 1}
+        after = read_shard_manifest(sharded_dir)
+        assert after["Canada"] == before["Canada"]
+        assert after["UK"]["built_at"] >= before["UK"]["built_at"]
+
+    def test_unknown_shard(self, sharded_dir, clean_dir):
+        """Test rebuilding a shard without data fails"""
+        with pytest.raises(ValueError):
+            build_shards(sharded_dir, WordEmbeddings(), clean_dir, only=["France"])
+
+
+class TestShardedSearch:
+    """Test routing, fan-out and lazy loading"""
+
+    def test_routed_query_opens_one_shard(self, sharded_dir):
+        """Test a known destination searches only its shard"""
+        store = ShardedVectorStore(sharded_dir, WordEmbeddings())
+        assert store.loaded_shards() == []
+        results = store.similarity_search_with_score("student visa tuition", k=3, country="United Kingdom")
+        assert [doc.metadata["country"] for doc, _ in results] == ["UK"]
+        assert store.loaded_shards() == ["UK"]
+
+    def test_fanout_merges_top_k(self, sharded_dir):
+        """Test unknown destinations merge results across shards by distance"""
+        store = ShardedVectorStore(sharded_dir, WordEmbeddings(), max_workers=2)
+        results = store.similarity_search_with_score("employer work permit", k=3)
+        assert len(results) == 3
+        assert results[0][0].id == "Canada:Canada_Canada_WorkPermit_EligibilityOnly"
+        assert [score for _, score in results] == sorted(score for _, score in results)
+        assert store.stats()["fanout_queries"] == 1
+
+    def test_chunks_route_by_id(self, sharded_dir):
+        """Test chunk content and get() only open the owning shard"""
+        chunks = ShardedChunks(sharded_dir)
+        assert chunks.read("US:US_US_H1B_Eligibility") == b"us h1b specialty occupation employer"
+        assert "UK:missing" not in chunks
+        for chunk_id in ("../..:x", "..:x", "Atlantis:x", "no-separator"):
+            assert chunk_id not in chunks and chunks.read(chunk_id) is None
+        assert sorted(chunks._stores) == ["UK", "US"]
+
+        store = ShardedVectorStore(sharded_dir, WordEmbeddings())
+        data = store.get(ids=["UK:UK_UK_StudentVisa_EligibilityOnly"])
+        assert data["documents"] == ["uk student visa cas tuition proof"]
+        assert store.loaded_shards() == ["UK"]
+
+    def test_cosine_relevance(self, tmp_path, clean_dir):
+        """Test relevance scores follow the shards' distance space"""
+        from hnsw_config import hnsw_collection_metadata
+
+        persist_dir = str(tmp_path / "cosine")
+        build_shards(persist_dir, WordEmbeddings(), clean_dir, hnsw_collection_metadata(space="cosine"))
+        store = ShardedVectorStore(persist_dir, WordEmbeddings())
+        assert store.space == "cosine"
+        assert store._select_relevance_score_fn() == store._cosine_relevance_score_fn
+        expected = store.shard("Canada").similarity_search_with_relevance_scores("canada work permit", k=2)
+        relevance = store._select_relevance_score_fn()
+        actual = [(doc, relevance(score))
+                  for doc, score in store.similarity_search_with_score("canada work permit", k=2, country="Canada")]
+        assert [d.id for d, _ in actual] == [d.id for d, _ in expected]
+        assert [s for _, s in actual] == pytest.approx([s for _, s in expected], abs=1e-5)
+
+    def test_close(self, sharded_dir):
+        """Test closing a retired store stops its fan-out threads"""
+        store = ShardedVectorStore(sharded_dir, WordEmbeddings(), max_workers=2)
+        store.similarity_search_with_score("employer", k=2)
+        store.close()
+        with pytest.raises(RuntimeError):
+            store.similarity_search_with_score("employer", k=2)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
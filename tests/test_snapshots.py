@@ -0,0 +1,162 @@
+"""
+Vectorstore Snapshot Tests
+Tests for versioned snapshot directories and live index hot-swapping
+"""
+
+import pytest
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from snapshots import (
+    LiveIndex,
+    current_version,
+    gc_snapshots,
+    list_snapshots,
+    publish_snapshot,
+    build_vectorstore,
+    resolve_live_dir,
+    snapshot_path,
+)
+from hnsw_config import hnsw_collection_metadata
+from tests.helpers import WordEmbeddings
+
+
+class Handle:
+    """Stand-in for an opened index"""
+
+    def __init__(self, path):
+        self.path = path
+
+
+def make_snapshots(base, *versions):
+    for version in versions:
+        os.makedirs(snapshot_path(str(base), version))
+
+
+class TestSnapshotDirectories:
+    """Test publishing and garbage collection of snapshots"""
+
+    def test_legacy_layout(self, tmp_path):
+        """Test the base directory is served when nothing is published"""
+        assert current_version(str(tmp_path)) is None
+        assert resolve_live_dir(str(tmp_path)) == str(tmp_path)
+
+    def test_publish_snapshot(self, tmp_path):
+        """Test CURRENT selects the served snapshot"""
+        make_snapshots(tmp_path, "v1", "v2")
+        publish_snapshot(str(tmp_path), "v2")
+        assert current_version(str(tmp_path)) == "v2"
+        assert resolve_live_dir(str(tmp_path)) == snapshot_path(str(tmp_path), "v2")
+
+        with pytest.raises(FileNotFoundError):
+            publish_snapshot(str(tmp_path), "missing")
+
+    def test_staging_directories_are_hidden(self, tmp_path):
+        """Test half-built snapshots are never listed"""
+        make_snapshots(tmp_path, "v1", ".building-v2")
+        assert list_snapshots(str(tmp_path)) == ["v1"]
+
+    def test_gc_keeps_current_and_in_use(self, tmp_path):
+        """Test GC only removes idle, unpublished, old snapshots"""
+        make_snapshots(tmp_path, "v1", "v2", "v3", "v4", "v5")
+        publish_snapshot(str(tmp_path), "v1")
+        removed = gc_snapshots(str(tmp_path), keep=2, in_use=[snapshot_path(str(tmp_path), "v2")])
+        assert removed == ["v3"]
+        assert list_snapshots(str(tmp_path)) == ["v1", "v2", "v4", "v5"]
+
+
+class TestLiveIndex:
+    """Test atomic swapping with in-flight request draining"""
+
+    def test_swap_waits_for_in_flight_requests(self):
+        """Test the old handle drains before it is released"""
+        drained = []
+        old, new = Handle("old"), Handle("new")
+        live = LiveIndex(old, on_drained=drained.append)
+
+        with live.acquire() as in_flight:
+            live.swap(new)
+            assert in_flight is old
+            assert live.current is new
+            assert live.draining() == [old]
+            assert drained == []
+
+            with live.acquire() as fresh:
+                assert fresh is new
+
+        assert drained == [old]
+        assert live.draining() == []
+
+    def test_swap_idle_handle_drains_immediately(self):
+        """Test an idle handle is released at swap time"""
+        drained = []
+        old = Handle("old")
+        live = LiveIndex(old, on_drained=drained.append)
+        assert live.swap(Handle("new")) is old
+        assert drained == [old]
+
+
+class TestBuildInPlace:
+    """Test rebuilding an existing persist directory replaces its collection"""
+
+    FILES = {
+        "Canada_Canada_StudyPermit_EligibilityOnly.txt": "canada study permit tuition proof of funds",
+        "UK_UK_StudentVisa_EligibilityOnly.txt": "uk student visa cas tuition english test",
+        "US_US_H1B_Eligibility.txt": "us h1b specialty occupation employer petition",
+    }
+
+    @pytest.fixture
+    def clean_dir(self, tmp_path):
+        path = tmp_path / "clean"
+        path.mkdir()
+        for name, text in self.FILES.items():
+            (path / name).write_text(text, encoding="utf-8")
+        return path
+
+    def collection(self, persist_dir):
+        from langchain_chroma import Chroma
+        return Chroma(persist_directory=persist_dir)._collection
+
+    def test_rebuild_applies_settings_and_drops_old_chunks(self, tmp_path, clean_dir):
+        """Test new HNSW settings take effect and chunks no longer produced are gone"""
+        pytest.importorskip("langchain_chroma")
+        persist_dir = str(tmp_path / "index")
+        build_vectorstore(persist_dir, WordEmbeddings(), str(clean_dir))
+        (clean_dir / "US_US_H1B_Eligibility.txt").unlink()
+        metadata = hnsw_collection_metadata(space="cosine", m=32)
+        assert build_vectorstore(persist_dir, WordEmbeddings(), str(clean_dir), collection_metadata=metadata) == 2
+
+        collection = self.collection(persist_dir)
+        assert collection.metadata["hnsw:space"] == "cosine" and collection.metadata["hnsw:M"] == 32
+        assert sorted(collection.get()["ids"]) == ["Canada_Canada_StudyPermit_EligibilityOnly",
+                                                   "UK_UK_StudentVisa_EligibilityOnly"]
+
+    def test_rebuild_replaces_random_ids(self, tmp_path, clean_dir):
+        """Test a store with random ids (older builds) is not duplicated by a rebuild"""
+        Chroma = pytest.importorskip("langchain_chroma").Chroma
+
+        persist_dir = str(tmp_path / "index")
+        Chroma.from_texts(list(self.FILES.values()), WordEmbeddings(), persist_directory=persist_dir)
+        build_vectorstore(persist_dir, WordEmbeddings(), str(clean_dir))
+        assert self.collection(persist_dir).count() == len(self.FILES)
+
+    def test_rebuild_removes_collapsed_duplicates(self, tmp_path, clean_dir):
+        """Test a document collapsed as a near-duplicate leaves an index that held it"""
+        pytest.importorskip("langchain_chroma")
+        words = " ".join(f"requirement{i}" for i in range(80))
+        (clean_dir / "UK_UK_SkilledWorkerVisa_EligibilityOnly.txt").write_text(words, encoding="utf-8")
+        (clean_dir / "UK_UK_HealthCareWorkerVisa_EligibilityOnly.txt").write_text(words + " nurse",
+                                                                                  encoding="utf-8")
+        persist_dir = str(tmp_path / "index")
+        assert build_vectorstore(persist_dir, WordEmbeddings(), str(clean_dir), dedup_threshold=0) == 5
+        assert build_vectorstore(persist_dir, WordEmbeddings(), str(clean_dir), dedup_threshold=0.8) == 4
+        ids = self.collection(persist_dir).get()["ids"]
+        assert "UK_UK_HealthCareWorkerVisa_EligibilityOnly" in ids
+        assert "UK_UK_SkilledWorkerVisa_EligibilityOnly" not in ids
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,109 @@
+"""
+Static Frontend Tests
+Tests for the precompressed, cache-friendly static file serving
+"""
+
+import pytest
+import gzip
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from static_frontend import (
+    IMMUTABLE_CACHE,
+    REVALIDATE_CACHE,
+    PrecompressedStaticFiles,
+    accepted_encodings,
+    cache_control_for,
+    hash_site_assets,
+    precompress_file,
+    precompress_tree,
+)
+
+
+@pytest.fixture
+def site(tmp_path):
+    path = tmp_path / "home"
+    path.mkdir()
+    (path / "index.html").write_text(
+        '<link rel="stylesheet" href="style.css"><a href="http://192.168.1.33:8501">Check</a>', encoding="utf-8"
+    )
+    (path / "style.css").write_text("body { color: navy; }\n" * 50, encoding="utf-8")
+    return path
+
+
+class TestBuildHelpers:
+    """Test asset hashing and precompression"""
+
+    def test_cache_control(self):
+        """Test only content-hashed names are immutable"""
+        assert cache_control_for("static/js/main.3f9a1c2b.js") == IMMUTABLE_CACHE
+        assert cache_control_for("index.html") == REVALIDATE_CACHE
+
+    def test_accepted_encodings(self):
+        """Test q=0 encodings are excluded"""
+        assert accepted_encodings("gzip, deflate, br;q=0") == ["gzip", "deflate"]
+        assert accepted_encodings("") == []
+
+    def test_hash_site_assets(self, site):
+        """Test assets are renamed and HTML references rewritten"""
+        renamed = hash_site_assets(str(site), {'"http://192.168.1.33:8501"': '"/app/"'})
+        hashed = renamed["style.css"]
+        assert (site / hashed).exists() and not (site / "style.css").exists()
+        html = (site / "index.html").read_text(encoding="utf-8")
+        assert f'href="{hashed}"' in html
+        assert 'href="/app/"' in html
+
+    def test_gzip_is_deterministic(self, site):
+        """Test repeated builds produce identical bytes"""
+        path = str(site / "style.css")
+        precompress_file(path)
+        first = (site / "style.css.gz").read_bytes()
+        precompress_file(path)
+        assert (site / "style.css.gz").read_bytes() == first
+        assert gzip.decompress(first) == (site / "style.css").read_bytes()
+
+
+class TestServing:
+    """Test PrecompressedStaticFiles responses"""
+
+    @pytest.fixture
+    def client(self, site):
+        hash_site_assets(str(site))
+        precompress_tree(str(site))
+        app = FastAPI()
+        app.mount("/home", PrecompressedStaticFiles(directory=str(site), html=True), name="home")
+        return TestClient(app)
+
+    def test_serves_gzip_variant(self, client, site):
+        """Test hashed assets come precompressed with a long cache lifetime"""
+        name = next(p.name for p in site.iterdir() if p.name.startswith("style.") and p.suffix == ".css")
+        response = client.get(f"/home/{name}", headers={"Accept-Encoding": "gzip"})
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["cache-control"] == IMMUTABLE_CACHE
+        assert response.headers["content-type"].startswith("text/css")
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert response.text.startswith("body")
+
+    def test_identity_and_html(self, client):
+        """Test clients without gzip get the original, and HTML is revalidated"""
+        response = client.get("/home/", headers={"Accept-Encoding": "identity"})
+        assert response.status_code == 200
+        assert "content-encoding" not in response.headers
+        assert response.headers["cache-control"] == REVALIDATE_CACHE
+        assert "Check" in response.text
+
+    def test_not_modified(self, client):
+        """Test ETag revalidation of HTML"""
+        etag = client.get("/home/index.html").headers["etag"]
+        response = client.get("/home/index.html", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,95 @@
+"""
+Typeahead Tests
+Tests for the prefix index, purpose mining and popularity ranking
+"""
+
+import pytest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from suggest import (
+    QueryPopularity,
+    SuggestIndex,
+    build_suggestions,
+    mine_purpose_phrases,
+    visa_type_label,
+    write_suggest_index,
+)
+
+
+@pytest.fixture
+def clean_dir(tmp_path):
+    path = tmp_path / "clean"
+    path.mkdir()
+    files = {
+        "Canada_Canada_StudyPermit_EligibilityOnly.txt": "Permit for study. Proof of study. Full-time study.",
+        "Canada_Canada_WorkPermit_EligibilityOnly.txt": "Open work permit.",
+        "Germany_Germany_EUBlueCard_EligibilityOnly.txt": "Higher education degree. Higher education. Higher education.",
+        "UK_UK_StudentVisa_EligibilityOnly.txt": "Student visa.",
+    }
+    for name, text in files.items():
+        (path / name).write_text(text, encoding="utf-8")
+    return str(path)
+
+
+@pytest.fixture
+def index(clean_dir):
+    return SuggestIndex(build_suggestions(clean_dir))
+
+
+def labels(suggestions):
+    return [s["label"] for s in suggestions]
+
+
+class TestBuild:
+    """Test suggestion entries mined from the corpus"""
+
+    def test_visa_type_label(self):
+        """Test catalog names are split into words"""
+        assert visa_type_label("EUBlueCard") == "EU Blue Card"
+        assert visa_type_label("SkilledWorkerVisa") == "Skilled Worker Visa"
+
+    def test_purpose_phrases(self):
+        """Test purpose nouns and their modifiers are counted"""
+        phrases = mine_purpose_phrases(["For higher education and study.", "Higher education, study."], min_count=2)
+        assert phrases == {"higher education": 2, "study": 2}
+
+    def test_written_with_build(self, tmp_path, clean_dir):
+        """Test the index round-trips through suggest.json"""
+        count = write_suggest_index(str(tmp_path), clean_dir)
+        assert len(SuggestIndex.load(str(tmp_path)).entries) == count
+
+
+class TestSuggest:
+    """Test prefix lookup, filters and ranking"""
+
+    def test_prefix_of_any_word(self, index):
+        """Test a prefix matches word starts inside labels"""
+        assert labels(index.suggest("perm", kind="visa_type")) == ["Work Permit", "Study Permit"]
+        assert labels(index.suggest("blue")) == ["EU Blue Card"]
+        assert index.suggest("xyz") == []
+
+    def test_aliases_and_country_filter(self, index):
+        """Test country aliases and per-country visa types"""
+        assert labels(index.suggest("brit", kind="country")) == ["UK"]
+        assert labels(index.suggest("", kind="visa_type", country="united kingdom")) == ["Student Visa"]
+
+    def test_form_purposes_and_mined(self, index):
+        """Test form purposes are always present next to mined phrases"""
+        assert labels(index.suggest("hi", kind="purpose")) == ["Higher education"]
+        assert "Medical Treatment" in labels(index.suggest("med", kind="purpose"))
+
+    def test_popularity_ranks_first(self, index):
+        """Test requested values outrank everything else"""
+        popularity = QueryPopularity()
+        assert labels(index.suggest("", kind="country"))[0] == "Canada"
+        for _ in range(3):
+            popularity.record("country", "uk")
+        assert labels(index.suggest("", kind="country", popularity=popularity))[0] == "UK"
+        assert popularity.top(1) == [{"kind": "country", "value": "uk", "count": 3}]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
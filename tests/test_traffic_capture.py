@@ -0,0 +1,100 @@
+"""
+Traffic Capture Tests
+Tests for request sanitizing, the JSONL capture and the replay helpers
+"""
+
+import json
+import pytest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from request_trace import TokenUsageCallback
+from stub_llm import StubChatModel
+from traffic_capture import (
+    TrafficCapture,
+    compare_summaries,
+    latency_summary,
+    read_capture,
+    replay_schedule,
+    route_key,
+    sanitize,
+    sanitize_query,
+)
+
+
+class TestSanitize:
+    """Test personal data and secrets never reach the capture"""
+
+    def test_body(self):
+        """Test secrets and webhooks are dropped and identifiers masked"""
+        body = sanitize({
+            "question": "Passport X 1234 5678 90, mail jane.doe@example.com",
+            "callback_url": "http://localhost/hook",
+            "api_key": "sk-123",
+            "age": 25
+        })
+        assert body == {"question": "Passport X <number>, mail <email>", "age": 25}
+
+    def test_query(self):
+        """Test secret parameters are removed and URL queries masked"""
+        assert sanitize_query("q=ca&token=abc") == "q=ca"
+        assert "secret" not in sanitize_query("next=" + "https://x.org/cb?secret=1")
+
+
+class TestCapture:
+    """Test the JSONL capture file"""
+
+    def test_record(self, tmp_path):
+        """Test matching requests are written as compact sanitized lines"""
+        path = tmp_path / "traffic.jsonl"
+        capture = TrafficCapture(str(path), ["/check-eligibility*", "/suggest"], salt="s")
+        assert capture.wants("/check-eligibility/stream")
+        assert capture.wants("/suggest")
+        assert not capture.wants("/admin/index")
+
+        body = json.dumps({"destinationCountry": "Canada", "callback_url": "http://h"}).encode()
+        capture.record(100.0, "POST", "/check-eligibility", "", body, 200, 12.34, "10.0.0.1")
+        capture.record(101.5, "GET", "/suggest", "q=ca", b"", 200, 1.0)
+        entries = list(read_capture(str(path)))
+        assert entries[0]["body"] == {"destinationCountry": "Canada"}
+        assert entries[0]["client"] == capture.client_hash("10.0.0.1") != "10.0.0.1"
+        assert entries[1]["query"] == "q=ca" and entries[1]["body"] is None
+        assert " " not in path.read_text().splitlines()[0]
+
+
+class TestReplay:
+    """Test replay scheduling and latency comparison"""
+
+    def test_schedule(self):
+        """Test arrival gaps are scaled by speed, and max speed sends at once"""
+        entries = [{"ts": 12.0}, {"ts": 10.0}, {"ts": 11.0}]
+        assert [offset for offset, _ in replay_schedule(entries, 2)] == [0.0, 0.5, 1.0]
+        assert [offset for offset, _ in replay_schedule(entries, 0)] == [0.0, 0.0, 0.0]
+
+    def test_route_key(self):
+        """Test ids and path parameters are grouped"""
+        assert route_key("/sessions/64386f687dc14a68b8ec0ca49f3a4380/ask") == "/sessions/{id}/ask"
+        assert route_key("/visa-requirements/Canada/StudyPermit") == "/visa-requirements/*"
+
+    def test_compare(self):
+        """Test a slower build is flagged only with enough samples"""
+        fast = latency_summary([("/check-eligibility", 100.0, 200)] * 30 + [("/suggest", 5.0, 200)] * 5)
+        slow = latency_summary([("/check-eligibility", 150.0, 200)] * 30 + [("/suggest", 50.0, None)] * 5)
+        assert slow["/suggest"]["errors"] == 5
+        rows = {row["route"]: row for row in compare_summaries(fast, slow)}
+        assert rows["/check-eligibility"]["p95_ratio"] == 1.5
+        assert rows["/check-eligibility"]["regressed"]
+        assert not rows["/suggest"]["regressed"]
+
+    def test_stub_llm_reports_usage(self):
+        """Test the stub model answers without a provider and reports tokens"""
+        usage = TokenUsageCallback()
+        reply = StubChatModel(latency_ms=0).invoke("What documents are required?", config={"callbacks": [usage]})
+        assert reply.content.startswith("[stub ")
+        assert usage.prompt_tokens > 0 and usage.completion_tokens > 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
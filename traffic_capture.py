@@ -0,0 +1,232 @@
+# ==================================
+# SwiftVisa Traffic Capture
+# ==================================
+#
+# Opt-in recording of real request traffic (TRAFFIC_CAPTURE_FILE) so that
+# workloads can be replayed offline with scripts/replay_traffic.py. One
+# compact JSON line per request: arrival time, method, path, query string,
+# sanitized JSON body, status and server-side duration.
+#
+# Sanitizing: secrets (keys named like token/password/key) are dropped,
+# e-mail addresses, long digit runs (phone, passport and card numbers) and
+# URL query strings are masked in every string, webhook URLs are removed so
+# a replay never calls them, and the client is kept only as a salted hash.
+# Headers are not recorded.
+#
+# The replay helpers below (schedule, latency summaries, build comparison)
+# are used by scripts/replay_traffic.py.
+
+import hashlib
+import json
+import logging
+import random
+import re
+import threading
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+SECRET_KEY = re.compile(r"token|password|secret|api[_-]?key|authorization|cookie", re.IGNORECASE)
+DROPPED_KEYS = {"callback_url"}
+_EMAIL = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+_DIGITS = re.compile(r"\+?\d[\d ()-]{6,}\d")
+_URL_QUERY = re.compile(r"(https?://[^\s?#]+)\?[^\s#]*")
+
+
+def sanitize_text(text: str) -> str:
+    """Mask e-mail addresses, long digit runs and URL query strings"""
+    text = _URL_QUERY.sub(r"\1?<redacted>", text)
+    text = _EMAIL.sub("<email>", text)
+    return _DIGITS.sub("<number>", text)
+
+
+def sanitize(value):
+    """Sanitized copy of a decoded JSON value"""
+    if isinstance(value, dict):
+        return {
+            key: sanitize(item) for key, item in value.items()
+            if key not in DROPPED_KEYS and not SECRET_KEY.search(str(key))
+        }
+    if isinstance(value, list):
+        return [sanitize(item) for item in value]
+    if isinstance(value, str):
+        return sanitize_text(value)
+    return value
+
+
+def sanitize_query(query_string: str) -> str:
+    """Sanitized query string, without secret parameters"""
+    pairs = parse_qsl(query_string, keep_blank_values=True)
+    return urlencode([(key, sanitize_text(value)) for key, value in pairs if not SECRET_KEY.search(key)])
+
+
+def decode_body(body: bytes):
+    """JSON body as a sanitized value, or None for empty or non-JSON bodies"""
+    if not body:
+        return None
+    try:
+        return sanitize(json.loads(body))
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+# ----------------------------------------
+# CAPTURE
+# ----------------------------------------
+class TrafficCapture:
+    """Rotating JSONL writer of sanitized requests"""
+
+    def __init__(self, path: str, endpoints: Iterable[str], sample_rate: float = 1.0, salt: str = "",
+                 max_bytes: int = 52428800, backup_count: int = 5):
+        """
+        Args:
+            path: JSONL file (rotated at max_bytes)
+            endpoints: Paths to capture; a trailing "*" matches a prefix
+            sample_rate: Fraction of matching requests written
+            salt: Mixed into client hashes so they cannot be reversed by guessing
+        """
+        self.path = path
+        self.endpoints = [e for e in endpoints if e]
+        self.sample_rate = sample_rate
+        self.salt = salt
+        self.captured = 0
+        self._lock = threading.Lock()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        self._logger = logging.getLogger(f"swiftvisa.traffic.{id(self)}")
+        self._logger.propagate = False
+        self._logger.setLevel(logging.INFO)
+        self._logger.addHandler(handler)
+
+    def wants(self, path: str) -> bool:
+        """Whether a request to path should be captured (applies sampling)"""
+        matched = any(path.startswith(e[:-1]) if e.endswith("*") else path == e for e in self.endpoints)
+        return matched and (self.sample_rate >= 1 or random.random() < self.sample_rate)
+
+    def client_hash(self, client: Optional[str]) -> Optional[str]:
+        if not client:
+            return None
+        return hashlib.sha256(f"{self.salt}:{client}".encode("utf-8")).hexdigest()[:12]
+
+    def record(self, arrived: float, method: str, path: str, query_string: str, body: bytes,
+               status: int, duration_ms: float, client: Optional[str] = None):
+        entry = {
+            "ts": round(arrived, 3),
+            "method": method,
+            "path": path,
+            "query": sanitize_query(query_string) or None,
+            "body": decode_body(body),
+            "status": status,
+            "duration_ms": round(duration_ms, 1),
+            "client": self.client_hash(client)
+        }
+        line = json.dumps(entry, ensure_ascii=False, separators=(",", ":"))
+        with self._lock:
+            self._logger.info(line)
+            self.captured += 1
+
+    def stats(self) -> dict:
+        return {"file": self.path, "endpoints": self.endpoints, "sample_rate": self.sample_rate,
+                "captured": self.captured}
+
+
+# ----------------------------------------
+# REPLAY
+# ----------------------------------------
+def read_capture(path: str) -> Iterator[dict]:
+    """Captured requests of a JSONL file (torn or corrupt lines are skipped)"""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+def replay_schedule(entries: Iterable[dict], speed: float = 1.0) -> List[Tuple[float, dict]]:
+    """
+    Send offsets for captured requests
+
+    Args:
+        entries: Captured requests
+        speed: Time compression (1 = as captured, 10 = ten times faster,
+            0 = as fast as possible)
+
+    Returns:
+        (seconds after the replay starts, entry) pairs in arrival order
+    """
+    ordered = sorted(entries, key=lambda entry: entry["ts"])
+    if not ordered:
+        return []
+    first = ordered[0]["ts"]
+    return [((entry["ts"] - first) / speed if speed > 0 else 0.0, entry) for entry in ordered]
+
+
+_ID_SEGMENT = re.compile(r"^[0-9a-f]{16,}$")
+COLLAPSED_ROUTES = ("/visa-requirements/", "/visa-types/", "/chunks/")
+
+
+def route_key(path: str) -> str:
+    """Path with ids and path parameters replaced, for grouping latencies"""
+    for prefix in COLLAPSED_ROUTES:
+        if path.startswith(prefix):
+            return prefix + "*"
+    return "/".join("{id}" if _ID_SEGMENT.match(segment) else segment for segment in path.split("/"))
+
+
+def _percentile(ordered: List[float], fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def latency_summary(samples: List[Tuple[str, float, Optional[int]]]) -> Dict[str, dict]:
+    """
+    Latency distribution per route (see route_key) and overall ("*")
+
+    Args:
+        samples: (path, milliseconds, status or None for transport errors)
+
+    Returns:
+        {route: {"count", "errors", "mean_ms", "p50_ms", "p90_ms", "p95_ms", "p99_ms", "max_ms"}}
+    """
+    grouped: Dict[str, List[Tuple[float, Optional[int]]]] = {"*": []}
+    for path, ms, status in samples:
+        grouped.setdefault(route_key(path), []).append((ms, status))
+        grouped["*"].append((ms, status))
+
+    summary = {}
+    for route, values in sorted(grouped.items()):
+        if not values:
+            continue
+        ordered = sorted(ms for ms, _ in values)
+        summary[route] = {
+            "count": len(values),
+            "errors": sum(1 for _, status in values if status is None or status >= 500),
+            "mean_ms": round(sum(ordered) / len(ordered), 2),
+            **{f"p{int(q * 100)}_ms": round(_percentile(ordered, q), 2) for q in (0.5, 0.9, 0.95, 0.99)},
+            "max_ms": round(ordered[-1], 2)
+        }
+    return summary
+
+
+def compare_summaries(baseline: Dict[str, dict], current: Dict[str, dict], threshold: float = 1.2,
+                      min_count: int = 20) -> List[dict]:
+    """
+    Per-route latency ratios of two replays of the same capture
+
+    A route regresses when its p50 or p95 grew by more than threshold (as a
+    ratio) and both runs have at least min_count requests to it.
+
+    Returns:
+        {"route", "p50_ratio", "p95_ratio", "regressed"} rows, worst p95 first
+    """
+    rows = []
+    for route in sorted(set(baseline) & set(current)):
+        before, after = baseline[route], current[route]
+        p50 = after["p50_ms"] / before["p50_ms"] if before["p50_ms"] else 1.0
+        p95 = after["p95_ms"] / before["p95_ms"] if before["p95_ms"] else 1.0
+        enough = min(before["count"], after["count"]) >= min_count
+        rows.append({"route": route, "p50_ratio": round(p50, 3), "p95_ratio": round(p95, 3),
+                     "regressed": enough and max(p50, p95) > threshold})
+    return sorted(rows, key=lambda row: -row["p95_ratio"])
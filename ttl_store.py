@@ -0,0 +1,103 @@
+# ==================================
+# SwiftVisa TTL Store
+# ==================================
+#
+# Small in-process key/value store whose entries expire after a time-to-live
+# and which evicts the least recently used entry once it is full. Used for
+# per-profile retrieval sessions and other short-lived server-side state.
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+
+class TTLStore:
+    """Thread-safe, size-bounded mapping with per-entry expiry"""
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 1000, sliding: bool = False,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            ttl_seconds: Lifetime of an entry
+            max_entries: Entries kept before the least recently used is evicted
+            sliding: Restart an entry's lifetime whenever it is read
+            clock: Time source (monotonic seconds)
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.sliding = sliding
+        self._clock = clock
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.expired = 0
+        self.evicted = 0
+
+    def _alive(self, key: str, now: float):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[1] <= now:
+            del self._entries[key]
+            self.expired += 1
+            return None
+        return entry
+
+    def get(self, key: str, default: Any = None) -> Any:
+        now = self._clock()
+        with self._lock:
+            entry = self._alive(key, now)
+            if entry is None:
+                return default
+            self._entries.move_to_end(key)
+            if self.sliding:
+                self._entries[key] = (entry[0], now + self.ttl_seconds)
+            return entry[0]
+
+    def put(self, key: str, value: Any, ttl_seconds: Optional[float] = None):
+        now = self._clock()
+        with self._lock:
+            self._entries[key] = (value, now + (ttl_seconds if ttl_seconds is not None else self.ttl_seconds))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evicted += 1
+
+    def pop(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._alive(key, self._clock())
+            if entry is None:
+                return default
+            del self._entries[key]
+            return entry[0]
+
+    def ttl(self, key: str) -> Optional[float]:
+        """Seconds until an entry expires, or None if it is gone"""
+        now = self._clock()
+        with self._lock:
+            entry = self._alive(key, now)
+            return None if entry is None else round(entry[1] - now, 3)
+
+    def purge(self) -> int:
+        """Drop every expired entry; returns how many were dropped"""
+        now = self._clock()
+        with self._lock:
+            stale = [key for key, (_, expires) in self._entries.items() if expires <= now]
+            for key in stale:
+                del self._entries[key]
+            self.expired += len(stale)
+            return len(stale)
+
+    def __len__(self) -> int:
+        self.purge()
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "expired": self.expired,
+            "evicted": self.evicted
+        }